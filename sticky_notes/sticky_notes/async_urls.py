@@ -0,0 +1,18 @@
+"""
+Root URL configuration used for requests served under ASGI.
+
+Identical to sticky_notes.urls except that the sticky notes app's URLs come
+from sticky_notes_app.async_urls, which serves the board views natively
+async. Selected per request by sticky_notes_app.middleware.async_views.
+"""
+from django.contrib import admin
+from django.urls import path, include
+
+
+urlpatterns = [
+    # Admin URL pattern, mapping to the Django admin interface
+    path('admin/', admin.site.urls),
+
+    # Include URL patterns from the 'sticky notes' app, with async views
+    path('', include("sticky_notes_app.async_urls")),
+]
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,23 +45,36 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'sticky_notes_app.middleware.measure_requests',
     'django.middleware.security.SecurityMiddleware',
+    'sticky_notes_app.middleware.serve_static',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'sticky_notes_app.middleware.async_views',
+    'sticky_notes_app.middleware.replica_stickiness',
+    'sticky_notes_app.middleware.note_shards',
 ]
 
 ROOT_URLCONF = 'sticky_notes.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'sticky_notes_app.template_backends.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Templates are compiled once per process and kept in memory, in
+            # development too; runserver's autoreloader still clears them
+            # when a template file changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -76,13 +91,73 @@ WSGI_APPLICATION = 'sticky_notes.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Production SQLite profile, run on every new connection. WAL lets readers
+# proceed while a write is in progress, synchronous=NORMAL only syncs at WAL
+# checkpoints (safe from corruption; the last commits may be lost on power
+# failure), and cache_size (negative: KiB, here 64 MiB) and mmap_size (256
+# MiB) keep hot pages in memory. Transactions start with BEGIN IMMEDIATE so
+# a transaction that reads then writes takes the write lock up front
+# instead of failing with "database is locked" when upgrading, and waiting
+# writers retry for up to 'timeout' seconds (SQLite's busy_timeout).
+# Connections are kept open for CONN_MAX_AGE seconds, checked before reuse.
+# See `manage.py benchmark_sqlite`.
+SQLITE_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    'cache_size=-65536',
+    'mmap_size=268435456',
+    'temp_store=MEMORY',
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {pragma}' for pragma in SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Read replica, used once listed in DATABASE_REPLICAS. Locally this is
+    # a copy of the primary kept by `manage.py sync_replica`; in tests it
+    # mirrors the test database.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {pragma}' for pragma in SQLITE_PRAGMAS),
+            'timeout': 20,
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
+    # Note shard, used once listed in NOTE_SHARDS. Create its tables with
+    # `manage.py migrate --database shard_1`.
+    'shard_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_shard_1.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {pragma}' for pragma in SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
 }
 
+DATABASE_ROUTERS = [
+    'sticky_notes_app.routers.NoteShardRouter',
+    'sticky_notes_app.routers.PrimaryReplicaRouter',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -127,6 +202,65 @@ STATICFILES_DIRS = [
 # Define the root directory for static files
 STATIC_ROOT = BASE_DIR / "static"
 
+# Static asset pipeline: `manage.py collectstatic` copies every static
+# file into STATIC_ROOT under a name hashed from its content, listed in
+# STATIC_ROOT/staticfiles.json, with gzip (and, with the brotli package,
+# Brotli) siblings of the text files of at least STATIC_COMPRESS_MIN_SIZE
+# bytes; re-run it after changing any static file. The serve_static
+# middleware serves them with STATIC_SERVE: hashed names as immutable for
+# a year, other files with max-age STATIC_MAX_AGE and a 304 once
+# unchanged.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'sticky_notes_app.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+STATIC_COMPRESS_EXTENSIONS = ['.css', '.js', '.svg', '.txt', '.json', '.map']
+STATIC_COMPRESS_MIN_SIZE = 256
+STATIC_SERVE = True
+STATIC_MAX_AGE = 0
+
+# Third-party assets loaded by the templates through {% vendor_asset %}:
+# name -> (static path, CDN URL, integrity of the CDN file). They are
+# vendored under sticky_notes_app/static/sticky_notes_app/vendor/, so
+# pages make no third-party requests; one missing there is loaded from
+# its CDN until `manage.py vendor_static` downloads it. Bootstrap's source
+# maps are vendored next to it under their original names, which its
+# files refer to and collectstatic resolves. Bootstrap's JS is the build
+# without Popper, which only dropdowns, tooltips and popovers need.
+VENDOR_ASSETS = {
+    'jquery.js': (
+        'sticky_notes_app/vendor/jquery/jquery-3.7.1.min.js',
+        'https://code.jquery.com/jquery-3.7.1.min.js',
+        None,
+    ),
+    'jquery-ui.js': (
+        'sticky_notes_app/vendor/jquery-ui/jquery-ui-1.13.2.min.js',
+        'https://code.jquery.com/ui/1.13.2/jquery-ui.min.js',
+        None,
+    ),
+    'jquery-ui.css': (
+        'sticky_notes_app/vendor/jquery-ui/jquery-ui-1.13.2.min.css',
+        'https://code.jquery.com/ui/1.13.2/themes/base/jquery-ui.min.css',
+        None,
+    ),
+    'bootstrap.css': (
+        'sticky_notes_app/vendor/bootstrap/bootstrap-5.3.2.min.css',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/'
+        'bootstrap.min.css',
+        'sha384-T3c6CoIi6uLrA9TneNEoa7RxnatzjcDSCmG1MXxSR1GAsXEV/Dwwykc2MPK8M2HN',
+    ),
+    'bootstrap.js': (
+        'sticky_notes_app/vendor/bootstrap/bootstrap-5.3.2.min.js',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/'
+        'bootstrap.min.js',
+        'sha384-BBtl+eGJRgqQAUMxJ7pMwbEyER4l1g+O15P+16Ep7Q9Q+zqX6gSbd85u4mG4QzX+',
+    ),
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -143,3 +277,265 @@ LOGIN_REDIRECT_URL = 'note_list'
 # Setting determines where users are redirected after they log out of the
 # application.
 LOGOUT_REDIRECT_URL = 'login'
+
+# Board viewport windowing: note_list and note_window only return the notes
+# whose position falls inside the requested board rectangle.
+# Width of a rendered note card in board pixels. Notes starting up to this far
+# to the left of the viewport still overlap it, so the window is widened by
+# this margin.
+NOTE_CARD_WIDTH = 300
+
+# Vertical margin added above the viewport for the same reason; cards have no
+# fixed height, so this is an estimate of a tall card.
+NOTE_CARD_HEIGHT = 400
+
+# Upper bound on the number of notes returned for one window, whatever the
+# size of the rectangle requested.
+NOTE_WINDOW_MAX_NOTES = 500
+
+# Board rectangle rendered with the initial note_list page, before the client
+# reports its real viewport.
+NOTE_WINDOW_INITIAL_WIDTH = 2000
+NOTE_WINDOW_INITIAL_HEIGHT = 1200
+
+# Below this zoom level cards are too small to read, so note previews are
+# left out of window responses.
+NOTE_WINDOW_DETAIL_ZOOM = 0.5
+
+# Largest number of {note_id, x, y} entries accepted by one batched
+# update_position request.
+POSITION_BATCH_MAX_SIZE = 500
+
+# Write-behind mode for note positions: when enabled, update_position only
+# buffers positions in the cache below and `manage.py flush_positions` writes
+# them to the database in bulk every POSITION_FLUSH_INTERVAL_MS milliseconds.
+# The flusher is a separate process, so the buffer cache must be shared by
+# it and every worker process, such as Redis or Memcached (see
+# BOARD_CACHE_ENABLED); the default local memory cache is private to each
+# process, and check sticky_notes_app.E001 rejects it. A flush that fails
+# keeps its positions buffered for the next one.
+POSITION_WRITE_BEHIND = False
+POSITION_BUFFER_CACHE = 'default'
+POSITION_FLUSH_INTERVAL_MS = 1000
+
+# Cache of rendered board windows, keyed per user and invalidated whenever
+# one of the user's notes is saved, deleted or moved. Entries expire after
+# BOARD_CACHE_TIMEOUT seconds. See `manage.py board_cache_stats` for the hit
+# ratio when sizing the cache. Off by default: invalidations only reach the
+# processes sharing the BOARD_CACHE_ALIAS cache, and the default cache is
+# Django's per-process local memory cache, so with more than one worker
+# the others would keep serving stale boards. Enable it only with a cache
+# shared by every worker process, such as Redis or Memcached, e.g.
+#   CACHES = {'default': {
+#       'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#       'LOCATION': 'redis://127.0.0.1:6379'}}
+BOARD_CACHE_ENABLED = False
+BOARD_CACHE_ALIAS = 'default'
+BOARD_CACHE_TIMEOUT = 300
+
+# Page size of the JSON API's note listing, by default and at most.
+API_PAGE_SIZE = 50
+API_PAGE_MAX_SIZE = 200
+
+# Number of notes read per query when streaming an export.
+EXPORT_CHUNK_SIZE = 2000
+
+# Number of notes inserted per bulk_create batch (and transaction) when
+# importing, and the most per-row errors kept in an import report.
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+
+# Note search: uses the SQLite FTS5 index when available (set to False to
+# force the plain lookup fallback), returning at most
+# NOTE_SEARCH_MAX_RESULTS results.
+NOTE_SEARCH_FTS = True
+NOTE_SEARCH_MAX_RESULTS = 50
+
+# Under ASGI, requests are routed with ASYNC_ROOT_URLCONF so the board,
+# export and JSON API views run as native async views (see
+# sticky_notes_app.middleware.async_views); the export is streamed from an
+# async iterator, which ASGI sends as it is produced. WSGI always uses
+# ROOT_URLCONF.
+ASYNC_VIEWS = True
+ASYNC_ROOT_URLCONF = 'sticky_notes.async_urls'
+
+# Live board sync over Server-Sent Events. EVENT_BROKER fans events out to
+# open streams: the in-process broker only reaches streams of the same
+# process; use 'sticky_notes_app.events.CacheBroker' (with a cache shared by
+# every process in EVENT_BROKER_CACHE) for multi-process deployments. The
+# last EVENT_HISTORY_SIZE events per user are kept (for at most
+# EVENT_HISTORY_TIMEOUT seconds with the cache broker) so reconnecting
+# clients can resume. Streams end after EVENT_STREAM_DURATION seconds and
+# browsers reconnect after EVENT_RETRY_MS milliseconds.
+EVENT_BROKER = 'sticky_notes_app.events.InProcessBroker'
+EVENT_BROKER_CACHE = 'default'
+EVENT_HISTORY_SIZE = 1000
+EVENT_HISTORY_TIMEOUT = 3600
+EVENT_POLL_INTERVAL = 0.5
+EVENT_HEARTBEAT_INTERVAL = 15
+EVENT_STREAM_DURATION = 60
+EVENT_RETRY_MS = 2000
+
+# Single-writer queue: when enabled, note writes from the views are handed
+# to one writer thread per process, which commits whatever has queued up
+# (at most WRITE_QUEUE_MAX_BATCH operations) in one transaction and merges
+# concurrent position updates into one UPDATE. A write not started within
+# WRITE_QUEUE_TIMEOUT seconds is dropped and fails like a direct write to a
+# locked database; a write already started is waited for.
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_MAX_BATCH = 200
+WRITE_QUEUE_TIMEOUT = 30
+
+# Read replicas: database aliases that board, export and search reads are
+# spread over (e.g. ['replica'] once `manage.py sync_replica` has copied
+# the primary). Empty to read everything from the primary. After a user
+# writes, their reads stay on the primary for REPLICA_STICKY_SECONDS,
+# which must exceed the replicas' lag.
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 5
+
+# Note sharding: NOTE_SHARDS lists the databases users' notes are spread
+# over (e.g. ['default', 'shard_1']); empty keeps every note on the
+# primary. Users, sessions and the user-to-shard map (UserShard) stay on
+# the primary. NOTE_SHARD_DATABASES lists the databases set up as shards,
+# which only get the note tables. While sharding, note IDs are handed out
+# by the primary in blocks of NOTE_ID_BLOCK_SIZE, so they are unique
+# across shards and notes keep them when moved. Assignments are cached for
+# NOTE_SHARD_CACHE_TIMEOUT seconds in the default cache, which must be
+# shared by every process, rebalance_shards included, for workers to see
+# moves (check sticky_notes_app.E002 rejects the local memory cache), and
+# `manage.py rebalance_shards` waits NOTE_SHARD_MOVE_GRACE seconds for
+# in-flight writes before moving a user.
+NOTE_SHARDS = []
+NOTE_SHARD_DATABASES = ['shard_1']
+NOTE_ID_BLOCK_SIZE = 1000
+NOTE_SHARD_CACHE_TIMEOUT = 300
+NOTE_SHARD_MOVE_GRACE = 2
+
+# Request measurements (sticky_notes_app.middleware.measure_requests): the
+# queries, database time and total time of every request, logged per view
+# to the 'sticky_notes_app.requests' logger (at INFO, or WARNING when a
+# view exceeds its budget) and shown at /dev/request-stats/ when DEBUG is
+# on. VIEW_QUERY_BUDGETS is the most queries each view may run per
+# request, sessions, authentication and transaction statements included,
+# whatever the number of notes; the test suite checks every URL against
+# it. The budgets cover the optional modes (a window with unflushed
+# positions takes one more query). Work repeated per unit of data is
+# allowed on top of the budget (request_stats.unbudgeted): each export
+# chunk of EXPORT_CHUNK_SIZE notes and import batch of IMPORT_BATCH_SIZE
+# notes after the first, the reservation of a block of note IDs, the
+# lookup of a user's shard assignment missing from the cache, and the
+# rehash of a password stored with an outdated hasher on login.
+REQUEST_STATS_ENABLED = True
+VIEW_QUERY_BUDGETS = {
+    'note_list': 4,
+    'note_window': 5,
+    'note_sync': 5,
+    'note_content': 4,
+    'note_create': 3,
+    'note_update': 4,
+    'note_delete': 5,
+    'update_position': 6,
+    'note_search': 4,
+    'note_events': 2,
+    'note_export': 4,
+    'note_import': 5,
+    'signup': 11,
+    'login': 9,
+    'logout': 4,
+    'api_note_list': 4,
+    'api_note_detail': 6,
+    'request_stats': 0,
+    'metrics': 0,
+}
+
+# Prometheus metrics served at /metrics (sticky_notes_app.metrics) to
+# METRICS_ALLOWED_IPS: request counts, latency and database time
+# histograms per view, saved positions and board cache lookups. Each
+# worker process keeps its own values and writes them to a file in
+# METRICS_DIR at most every METRICS_FLUSH_INTERVAL seconds (and on exit);
+# /metrics adds up every process's file, so all workers of a server must
+# share METRICS_DIR, and it should be emptied when the server restarts.
+# SERVER_TIMING_ENABLED sends each request's db, render and total times
+# in milliseconds in a Server-Timing header.
+METRICS_ENABLED = True
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'sticky_notes_metrics')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+SERVER_TIMING_ENABLED = True
+
+# Fast authentication: with FAST_AUTH on, sessions are read from the
+# cache (cached_db, still written through to the database) and the user
+# of each request is loaded from the cache by CachedUserBackend for up to
+# AUTH_USER_CACHE_TIMEOUT seconds, instead of two queries per
+# authenticated request. Cached users are dropped when saved, deleted or
+# logged out; bulk QuerySet.update() calls on users bypass this. The
+# default cache must be shared by every process for logouts and password
+# changes to be seen everywhere; check sticky_notes_app.E003 rejects the
+# local memory cache. ModelBackend stays listed so sessions
+# created before the switch keep working. SESSION_ENGINE is chosen from
+# FAST_AUTH once, here, when the settings load; only the user cache reads
+# the flag at runtime. So override_settings or any later change of
+# FAST_AUTH switches the user cache alone: set SESSION_ENGINE along with
+# it (as the tests and benchmark_views --fast-auth do).
+FAST_AUTH = False
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if FAST_AUTH
+    else 'django.contrib.sessions.backends.db')
+AUTHENTICATION_BACKENDS = [
+    'sticky_notes_app.auth_backends.CachedUserBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Login and signup under load: password hashing (PBKDF2) runs on a pool
+# of HASHING_POOL_WORKERS threads per process, so a burst of logins takes
+# at most that many CPUs; up to HASHING_POOL_BACKLOG more checks wait for
+# at most HASHING_POOL_TIMEOUT seconds, and further attempts get a 503.
+# Attempts are also throttled with token buckets in the default cache:
+# per client IP for login and signup, holding AUTH_THROTTLE_IP_BURST
+# attempts and refilled at AUTH_THROTTLE_IP_RATE per second, and per
+# username for login, so a password cannot be guessed from many
+# addresses. Throttled attempts get a 429. The limits only hold with a
+# default cache shared by every process: with the local memory cache
+# used here each process keeps its own buckets, so N workers allow N
+# times as many attempts (check --deploy warns, sticky_notes_app.W001).
+HASHING_POOL_ENABLED = True
+HASHING_POOL_WORKERS = 2
+HASHING_POOL_BACKLOG = 16
+HASHING_POOL_TIMEOUT = 10
+AUTH_THROTTLE_ENABLED = True
+AUTH_THROTTLE_IP_BURST = 20
+AUTH_THROTTLE_IP_RATE = 20 / 60
+AUTH_THROTTLE_USERNAME_BURST = 5
+AUTH_THROTTLE_USERNAME_RATE = 5 / 300
+
+# Board sync (sticky_notes_app.sync): every note change advances its
+# owner's change sequence and every deleted note leaves a tombstone, so
+# the note_sync view sends a client that missed live events only what
+# changed since its token, at most SYNC_MAX_CHANGES changes per request.
+# `manage.py prune_tombstones` (run daily, e.g. from cron) deletes
+# tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS; clients holding a
+# token from before them reload the whole board.
+SYNC_MAX_CHANGES = 500
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Set to 'INFO' to log the measurements of every request
+        'sticky_notes_app.requests': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+        # Failed flushes of write-behind positions
+        'sticky_notes_app.positions': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
@@ -0,0 +1,405 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.http import HttpRequest, JsonResponse, HttpResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+
+from .conditional import board_list_condition, note_condition
+from .forms import NoteForm
+from .models import Note
+from .positions import with_pending_positions
+from .routers import read_from_replica
+from .writer import run_write
+
+# Fields a client may request with the 'fields' query parameter.
+API_FIELDS = (
+    'id', 'title', 'content', 'color', 'x_position', 'y_position',
+    'created_at', 'updated_at',
+)
+
+
+def _error(message: str, status: int, **extra) -> JsonResponse:
+    """
+    Builds a JSON error response in the app's {'status': 'error'} format.
+
+    Args:
+        message (str): A human-readable description of the error.
+        status (int): The HTTP status code.
+        **extra: Additional keys for the response body.
+
+    Returns:
+        JsonResponse: The error response.
+    """
+
+    return JsonResponse(
+        {'status': 'error', 'message': message, **extra}, status=status)
+
+
+def api_login_required(view):
+    """
+    Requires an authenticated user for an API view, answering anonymous
+    requests with a 401 JSON error instead of redirecting to the login page
+    like login_required.
+
+    Args:
+        view (callable): The API view to protect.
+
+    Returns:
+        callable: The wrapped view.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _error('Authentication required.', 401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _parse_fields(request: HttpRequest) -> tuple:
+    """
+    Parses the comma-separated 'fields' query parameter.
+
+    Args:
+        request (HttpRequest): The API request.
+
+    Returns:
+        tuple: The requested fields, or every field in API_FIELDS when the
+            parameter is absent.
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+
+    if 'fields' not in request.GET:
+        return API_FIELDS
+    fields = tuple(
+        field for field in request.GET['fields'].split(',') if field)
+    unknown = set(fields) - set(API_FIELDS)
+    if unknown or not fields:
+        raise ValueError(
+            'Unknown fields: ' + ', '.join(sorted(unknown)) if unknown
+            else 'No fields requested.')
+    return fields
+
+
+def _encode_cursor(row: dict) -> str:
+    """
+    Encodes the keyset position of a note as an opaque cursor.
+    The update time keeps its full precision so no note is skipped or
+    repeated between pages.
+
+    Args:
+        row (dict): A note row with 'updated_at' and 'id'.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+
+    raw = json.dumps([row['updated_at'].isoformat(), row['id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """
+    Decodes a cursor produced by _encode_cursor.
+
+    Args:
+        cursor (str): The cursor from the 'cursor' query parameter.
+
+    Returns:
+        tuple: The (updated_at, id) keyset position.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        updated_at, note_id = json.loads(raw)
+        updated_at = datetime.fromisoformat(updated_at)
+        note_id = int(note_id)
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise ValueError('Invalid cursor.') from exc
+    if updated_at.tzinfo is None:
+        raise ValueError('Invalid cursor.')
+    return updated_at, note_id
+
+
+def _note_payload(note: Note, fields: tuple = API_FIELDS) -> dict:
+    """
+    Serializes a Note instance to the API representation.
+
+    Args:
+        note (Note): The note to serialize.
+        fields (tuple): The fields to include.
+
+    Returns:
+        dict: The requested fields of the note.
+    """
+
+    return {field: getattr(note, field) for field in fields}
+
+
+def _request_data(request: HttpRequest) -> dict:
+    """
+    Decodes the JSON object in an API request body.
+
+    Args:
+        request (HttpRequest): A POST, PUT or PATCH request.
+
+    Returns:
+        dict: The decoded body.
+
+    Raises:
+        ValueError: If the body is not a JSON object.
+    """
+
+    try:
+        data = json.loads(request.body)
+    except ValueError as exc:
+        raise ValueError('The request body is not valid JSON.') from exc
+    if not isinstance(data, dict):
+        raise ValueError('The request body must be a JSON object.')
+    return data
+
+
+def _not_allowed(allow: str) -> JsonResponse:
+    """
+    Builds the 405 response of an API view.
+
+    Args:
+        allow (str): The methods the view accepts, for the Allow header.
+
+    Returns:
+        JsonResponse: The error response.
+    """
+
+    response = _error('Method not allowed.', 405)
+    response['Allow'] = allow
+    return response
+
+
+def _page_query(request: HttpRequest) -> tuple:
+    """
+    Parses the listing's query parameters and builds the query of its page.
+    The query fetches one row more than the page size, to tell whether
+    there is a next page.
+
+    Args:
+        request (HttpRequest): A listing request from an authenticated user.
+
+    Returns:
+        tuple: The requested fields, the page size and the QuerySet of the
+            page's rows.
+
+    Raises:
+        ValueError: If a parameter is invalid.
+    """
+
+    fields = _parse_fields(request)
+    limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    if not 1 <= limit <= settings.API_PAGE_MAX_SIZE:
+        raise ValueError('limit is out of range.')
+    cursor = request.GET.get('cursor')
+    after = _decode_cursor(cursor) if cursor else None
+
+    notes = Note.objects.filter(user=request.user)
+    if after:
+        updated_at, note_id = after
+        notes = notes.filter(
+            Q(updated_at__lt=updated_at)
+            | Q(updated_at=updated_at, id__lt=note_id))
+    # The keyset columns are always fetched to build the next cursor
+    rows = (
+        notes.order_by('-updated_at', '-id')
+        .values(*dict.fromkeys(fields + ('id', 'updated_at')))[:limit + 1]
+    )
+    return fields, limit, rows
+
+
+def _page_payload(rows: list, page: list, fields: tuple, limit: int) -> dict:
+    """
+    Builds a page of the listing.
+
+    Args:
+        rows (list): The rows fetched by the page's query.
+        page (list): The first limit rows, with their pending positions.
+        fields (tuple): The requested fields.
+        limit (int): The page size.
+
+    Returns:
+        dict: The page's {'results', 'next'}.
+    """
+
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    results = [{field: row[field] for field in fields} for row in page]
+    return {'results': results, 'next': next_cursor}
+
+
+def _create_form(data: dict) -> NoteForm:
+    """
+    Builds the form of a new note from an API request body.
+    Omitted fields take the model's defaults, as in the HTML form.
+
+    Args:
+        data (dict): The decoded request body.
+
+    Returns:
+        NoteForm: The bound form.
+    """
+
+    defaults = {
+        field: Note._meta.get_field(field).get_default()
+        for field in NoteForm._meta.fields
+    }
+    return NoteForm({**defaults, **data})
+
+
+def _update_form(request: HttpRequest, note: Note, data: dict) -> NoteForm:
+    """
+    Builds the form of a PUT or PATCH request; PATCH keeps the fields that
+    are not given.
+
+    Args:
+        request (HttpRequest): The update request.
+        note (Note): The note to update.
+        data (dict): The decoded request body.
+
+    Returns:
+        NoteForm: The bound form.
+    """
+
+    if request.method == 'PATCH':
+        data = {**model_to_dict(note, NoteForm._meta.fields), **data}
+    return NoteForm(data, instance=note)
+
+
+def _created(note: Note) -> JsonResponse:
+    """
+    Builds the 201 response of a created note.
+
+    Args:
+        note (Note): The saved note.
+
+    Returns:
+        JsonResponse: The note, with its URL in the Location header.
+    """
+
+    response = JsonResponse(_note_payload(note), status=201)
+    response['Location'] = reverse('api_note_detail', args=[note.pk])
+    return response
+
+
+@api_login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@board_list_condition
+def api_note_list(request: HttpRequest) -> JsonResponse:
+    """
+    Lists the authenticated user's notes, or creates a note, as JSON.
+    GET returns notes most recently updated first using keyset pagination on
+    (updated_at, id): each page carries a 'next' cursor and the following
+    page is fetched with a range condition served by the (user, updated_at)
+    index, so deep pages cost the same as the first one. The 'fields'
+    parameter selects the fields returned (e.g. to skip 'content') and
+    'limit' sets the page size, up to API_PAGE_MAX_SIZE. GET supports
+    conditional requests with an ETag per page (the board's, combined with
+    the query parameters). POST validates a JSON object with NoteForm and
+    creates the note, without the validator query.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user, the 'cursor', 'limit' and
+            'fields' query parameters, or the JSON body of a new note.
+
+    Returns:
+        JsonResponse: A page of {'results', 'next'} for GET, the created
+            note with status 201 for POST, or an error response with status
+            400 (invalid parameters or data), 401 (anonymous) or 405 (other
+            methods).
+    """
+
+    if request.method == 'POST':
+        try:
+            data = _request_data(request)
+        except ValueError as exc:
+            return _error(str(exc), 400)
+        form = _create_form(data)
+        if not form.is_valid():
+            return _error('Invalid note.', 400, errors=form.errors)
+        note = form.save(commit=False)
+        note.user = request.user
+        run_write(note.save)
+        return _created(note)
+    if request.method not in ('GET', 'HEAD'):
+        return _not_allowed('GET, HEAD, POST')
+
+    try:
+        fields, limit, query = _page_query(request)
+    except ValueError as exc:
+        return _error(str(exc), 400)
+    rows = list(query)
+    page = with_pending_positions(request.user, rows[:limit])
+    return JsonResponse(_page_payload(rows, page, fields, limit))
+
+
+@api_login_required
+@cache_control(private=True, no_cache=True)
+@note_condition
+def api_note_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Retrieves, updates or deletes one of the authenticated user's notes.
+    GET returns the note (the 'fields' parameter selects fields), PUT
+    replaces its editable fields and PATCH updates only the fields given,
+    both validated with NoteForm, and DELETE removes it. GET supports
+    conditional requests with the note's ETag and Last-Modified, and PUT,
+    PATCH and DELETE honour If-Match to avoid lost updates.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the JSON body for updates.
+        pk (int): The primary key (ID) of the note.
+
+    Returns:
+        HttpResponse: The note as JSON for GET, PUT and PATCH, an empty
+            response with status 204 for DELETE, or an error response with
+            status 400, 401, 404 (missing or not owned) or 405.
+    """
+
+    if request.method not in ('GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'):
+        return _not_allowed('GET, HEAD, PUT, PATCH, DELETE')
+    note = Note.objects.filter(pk=pk, user=request.user).first()
+    if note is None:
+        return _error('No Note matches the given query.', 404)
+
+    if request.method in ('GET', 'HEAD'):
+        try:
+            fields = _parse_fields(request)
+        except ValueError as exc:
+            return _error(str(exc), 400)
+        # The pending position is looked up by id, which may not be
+        # among the requested fields
+        [payload] = with_pending_positions(
+            request.user, [_note_payload(note)])
+        return JsonResponse({field: payload[field] for field in fields})
+    if request.method == 'DELETE':
+        run_write(note.delete)
+        return HttpResponse(status=204)
+
+    try:
+        data = _request_data(request)
+    except ValueError as exc:
+        return _error(str(exc), 400)
+    form = _update_form(request, note, data)
+    if not form.is_valid():
+        return _error('Invalid note.', 400, errors=form.errors)
+    note = run_write(form.save)
+    return JsonResponse(_note_payload(note))
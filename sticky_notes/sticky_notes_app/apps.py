@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class StickyNotesAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sticky_notes_app'
+
+    def ready(self):
+        # Connects the signal receivers that keep caches in sync with notes
+        from . import signals  # noqa: F401
+        # Registers the checks of settings that need a shared cache
+        from . import checks  # noqa: F401
+        # Counts every query towards the current request's stats
+        from .request_stats import install_query_recorder
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,148 @@
+import mimetypes
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpRequest
+from django.templatetags.static import static
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+# A name given a content hash by the manifest storage, e.g.
+# 'sticky_notes_app/style.3b6f0a1c2d4e.css'.
+HASHED_NAME = re.compile(r'^(?P<base>.+)\.[0-9a-f]{12}(?P<ext>\.[^./]+)?$')
+
+# Precompressed variants, in order of preference: (encoding, suffix).
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Cache-Control of files whose name changes with their content.
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+@lru_cache(maxsize=None)
+def is_vendored(path: str) -> bool:
+    """
+    Returns whether a vendored asset's file is among the static files.
+
+    Args:
+        path (str): The asset's static path.
+    """
+
+    return finders.find(path) is not None
+
+
+def vendor_asset_url(name: str) -> tuple:
+    """
+    Returns where a third-party asset of VENDOR_ASSETS is loaded from: its
+    vendored static file, or its CDN until it has been vendored with
+    `manage.py vendor_static`.
+
+    Args:
+        name (str): The asset's name in VENDOR_ASSETS, e.g. 'jquery.js'.
+
+    Returns:
+        tuple: The (URL, integrity) pair; the integrity is None for
+            vendored files, which are served by the site itself.
+    """
+
+    path, url, integrity = settings.VENDOR_ASSETS[name]
+    if is_vendored(path):
+        return static(path), None
+    return url, integrity
+
+
+def is_hashed(name: str) -> bool:
+    """
+    Returns whether a collected file's name is the hashed name of a file in
+    the staticfiles manifest, so its content never changes.
+
+    Args:
+        name (str): The name relative to STATIC_ROOT.
+    """
+
+    match = HASHED_NAME.match(name)
+    if match is None:
+        return False
+    original = match['base'] + (match['ext'] or '')
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    return hashed_files.get(original) == name
+
+
+def _accepted_encodings(request: HttpRequest) -> set:
+    """
+    Returns the content codings a request accepts, leaving out those with
+    a quality of 0.
+    """
+
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve_asset(request: HttpRequest, name: str):
+    """
+    Serves a file collected into STATIC_ROOT, sending its Brotli or gzip
+    variant when one was written by collectstatic and the client accepts
+    it. Files with hashed names are cached for a year as immutable; others
+    must be revalidated, with ETag and Last-Modified for a 304.
+
+    Args:
+        request (HttpRequest): A GET or HEAD request.
+        name (str): The file's name relative to STATIC_ROOT.
+
+    Returns:
+        HttpResponse: The file, or 304 Not Modified.
+
+    Raises:
+        Http404: If there is no such file.
+    """
+
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404('No such static file.')
+    if not os.path.isfile(path):
+        raise Http404('No such static file.')
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    encoding, served = None, path
+    accepted = _accepted_encodings(request)
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(path + suffix):
+            encoding, served = coding, path + suffix
+            break
+    stat = os.stat(served)
+    etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}{encoding or ""}"'
+    headers = {
+        'Cache-Control': (
+            IMMUTABLE if is_hashed(name)
+            else f'public, max-age={settings.STATIC_MAX_AGE}'),
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Vary': 'Accept-Encoding',
+    }
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = FileResponse(
+            open(served, 'rb'), content_type=content_type,
+            filename=os.path.basename(path))
+        if encoding:
+            response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,26 @@
+from django.urls import URLPattern
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+# Views replaced by their native async versions when serving under ASGI.
+ASYNC_VIEWS = {
+    'note_list': async_views.note_list,
+    'note_window': async_views.note_window,
+    'update_position': async_views.update_position,
+    'note_events': async_views.note_events,
+    'note_export': async_views.note_export,
+    'api_note_list': async_views.api_note_list,
+    'api_note_detail': async_views.api_note_detail,
+}
+
+# The app's URL patterns with the async views swapped in; routes and names
+# are unchanged, so reverse() gives the same URLs under WSGI and ASGI.
+urlpatterns = [
+    URLPattern(
+        pattern.pattern,
+        ASYNC_VIEWS.get(pattern.name, pattern.callback),
+        pattern.default_args,
+        pattern.name,
+    )
+    for pattern in sync_urlpatterns
+]
@@ -0,0 +1,383 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.http import (
+    HttpRequest, HttpResponse, JsonResponse, Http404, StreamingHttpResponse)
+from django.shortcuts import render
+from django.views.decorators.cache import cache_control
+
+from . import board_cache
+from .api import (
+    _create_form, _created, _error, _not_allowed, _note_payload, _page_payload,
+    _page_query, _parse_fields, _request_data, _update_form,
+)
+from .events import aiter_event_stream, parse_last_event_id
+from .conditional import (
+    aboard_state, async_board_condition, async_board_list_condition,
+    async_board_page_condition, async_note_condition,
+)
+from .export import EXPORT_FORMATS, aexport_notes
+from .models import Note
+from .positions import (
+    awith_pending_positions, parse_position, parse_position_batch,
+    asave_positions,
+)
+from .routers import read_from_replica
+from .views import (
+    _encode_window, _initial_window, _merge_pending_positions,
+    _parse_window, _position_batch, _window_name, _window_payload,
+    _window_query,
+)
+from .writer import arun_write
+
+
+def async_login_required(view):
+    """
+    Requires an authenticated user for an async view, redirecting anonymous
+    users to the login page like login_required.
+    The user is resolved with request.auser() on the event loop, whereas
+    Django's login_required runs its test in a worker thread. The resolved
+    user is then stored as request.user, so templates and context processors
+    that read it do not query the database again from sync code.
+
+    Args:
+        view (callable): The async view to protect.
+
+    Returns:
+        callable: The wrapped view.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def async_api_login_required(view):
+    """
+    Async version of api.api_login_required, resolving the user with
+    request.auser() like async_login_required.
+
+    Args:
+        view (callable): The async API view to protect.
+
+    Returns:
+        callable: The wrapped view.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return _error('Authentication required.', 401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _anotes_in_window(user, window: dict, token: int) -> dict:
+    """
+    Async version of views._notes_in_window, using the async ORM.
+
+    Args:
+        user (User): The owner of the notes.
+        window (dict): A validated rectangle as returned by _parse_window.
+        token (int): The board's sync token, read before the window.
+
+    Returns:
+        dict: The window payload.
+    """
+
+    notes, window_query, bounds = _window_query(user, window)
+    window_notes = [note async for note in window_query]
+    if settings.POSITION_WRITE_BEHIND:
+        window_notes = await sync_to_async(_merge_pending_positions)(
+            user, notes, window_notes, bounds)
+    return _window_payload(window, window_notes, token)
+
+
+async def _aboard_json(user, window: dict, token: int) -> str:
+    """
+    Async version of views._board_json, sharing its board cache entries.
+
+    Args:
+        user (User): The owner of the notes.
+        window (dict): A validated rectangle as returned by _parse_window.
+        token (int): The board's sync token, as read by aboard_state.
+
+    Returns:
+        str: The window payload encoded as JSON.
+    """
+
+    async def build():
+        return _encode_window(await _anotes_in_window(user, window, token))
+
+    return await board_cache.aget_or_build(
+        user.pk, _window_name(window), build)
+
+
+@async_login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@async_board_page_condition
+async def note_list(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of views.note_list, served under ASGI.
+    Displays the board shell with the notes of the initial viewport embedded
+    as JSON. The validators, the window query and the board cache lookups
+    run on the event loop; only template rendering, which does no I/O once
+    the user and session are loaded, is synchronous.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user.
+
+    Returns:
+        HttpResponse: A rendered HTML response displaying the board shell and
+            the notes of the initial viewport, or 304 Not Modified.
+    """
+
+    window = _initial_window()
+    state = await aboard_state(request)
+    return render(request, 'sticky_notes_app/note_list.html', {
+        'window': window,
+        'board_json': await _aboard_json(
+            request.user, window, state['token']),
+    })
+
+
+@async_login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@async_board_condition
+async def note_window(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of views.note_window, served under ASGI.
+    Returns the authenticated user's notes inside a board viewport as JSON,
+    with the same parameters, caching and conditional GET support.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the viewport parameters.
+
+    Returns:
+        HttpResponse: The JSON window payload, a JsonResponse with
+            {'status': 'error'} with status 400 for a missing or invalid
+            viewport, or 304 Not Modified.
+    """
+
+    try:
+        window = _parse_window(request.GET)
+    except ValueError as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=400)
+    state = await aboard_state(request)
+    return HttpResponse(
+        await _aboard_json(request.user, window, state['token']),
+        content_type='application/json')
+
+
+@async_login_required
+async def update_position(request: HttpRequest) -> JsonResponse:
+    """
+    Async version of views.update_position, served under ASGI.
+    Accepts the same single-note and batch payloads. A single note is moved
+    with one async UPDATE; batches and write-behind buffering run in a
+    worker thread since they need a transaction or a blocking lock.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and POST data with either
+            'note_id', 'x', and 'y' keys or a 'positions' batch.
+
+    Returns:
+        JsonResponse: A JSON response with {'status': 'success'} on successful
+            POST update ('updated' holds the count for batches), or
+            {'status': 'error'} with status 400 for non-POST requests,
+            non-integer values and malformed batches. Raises Http404 if a
+            note is missing or not owned by the user.
+    """
+
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error'}, status=400)
+    batch = _position_batch(request)
+    try:
+        if batch is not None:
+            positions = parse_position_batch(batch)
+        else:
+            note_id, x, y = parse_position(request.POST)
+            positions = {note_id: (x, y)}
+    except ValueError as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=400)
+    try:
+        updated = await asave_positions(request.user, positions)
+    except Note.DoesNotExist:
+        raise Http404('No Note matches the given query.')
+    if batch is not None:
+        return JsonResponse({'status': 'success', 'updated': updated})
+    return JsonResponse({'status': 'success'})
+
+
+@async_login_required
+async def note_events(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of views.note_events, served under ASGI.
+    Each open stream is a suspended task polling the event broker instead
+    of a blocked worker thread, so many boards can stay connected.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the Last-Event-ID header.
+
+    Returns:
+        HttpResponse: A text/event-stream StreamingHttpResponse, or a
+            JsonResponse with {'status': 'error'} with status 400 for an
+            invalid event ID.
+    """
+
+    try:
+        last_id = parse_last_event_id(request)
+    except ValueError:
+        return JsonResponse(
+            {'status': 'error', 'message': 'Invalid last event ID.'},
+            status=400)
+    response = StreamingHttpResponse(
+        aiter_event_stream(request.user.pk, last_id),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@async_login_required
+@read_from_replica
+async def note_export(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of views.note_export, served under ASGI.
+    The export is an async iterator reading each chunk with the async ORM,
+    which Django streams as it is produced; a sync iterator would be read
+    whole into memory before being sent under ASGI.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the optional 'format'.
+
+    Returns:
+        HttpResponse: A StreamingHttpResponse with the exported notes, or
+            {'status': 'error'} with status 400 for an unsupported format.
+    """
+
+    export_format = request.GET.get('format', 'ndjson')
+    try:
+        lines = aexport_notes(request.user, export_format)
+    except ValueError as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=400)
+    response = StreamingHttpResponse(
+        lines, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="notes.{export_format}"')
+    return response
+
+
+@async_api_login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@async_board_list_condition
+async def api_note_list(request: HttpRequest) -> JsonResponse:
+    """
+    Async version of api.api_note_list, served under ASGI.
+    Pages and their validators are read with the async ORM; a created note
+    is saved through arun_write.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user, the 'cursor', 'limit' and
+            'fields' query parameters, or the JSON body of a new note.
+
+    Returns:
+        JsonResponse: A page of {'results', 'next'} for GET, the created
+            note with status 201 for POST, or an error response with status
+            400, 401 or 405.
+    """
+
+    if request.method == 'POST':
+        try:
+            data = _request_data(request)
+        except ValueError as exc:
+            return _error(str(exc), 400)
+        form = _create_form(data)
+        if not form.is_valid():
+            return _error('Invalid note.', 400, errors=form.errors)
+        note = form.save(commit=False)
+        note.user = request.user
+        await arun_write(note.save)
+        return _created(note)
+    if request.method not in ('GET', 'HEAD'):
+        return _not_allowed('GET, HEAD, POST')
+
+    try:
+        fields, limit, query = _page_query(request)
+    except ValueError as exc:
+        return _error(str(exc), 400)
+    rows = [row async for row in query]
+    page = await awith_pending_positions(request.user, rows[:limit])
+    return JsonResponse(_page_payload(rows, page, fields, limit))
+
+
+@async_api_login_required
+@cache_control(private=True, no_cache=True)
+@async_note_condition
+async def api_note_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Async version of api.api_note_detail, served under ASGI.
+    The note and its validators are read with the async ORM; updates and
+    deletions go through arun_write.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the JSON body for updates.
+        pk (int): The primary key (ID) of the note.
+
+    Returns:
+        HttpResponse: The note as JSON for GET, PUT and PATCH, an empty
+            response with status 204 for DELETE, or an error response with
+            status 400, 401, 404 or 405.
+    """
+
+    if request.method not in ('GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'):
+        return _not_allowed('GET, HEAD, PUT, PATCH, DELETE')
+    note = await Note.objects.filter(pk=pk, user=request.user).afirst()
+    if note is None:
+        return _error('No Note matches the given query.', 404)
+
+    if request.method in ('GET', 'HEAD'):
+        try:
+            fields = _parse_fields(request)
+        except ValueError as exc:
+            return _error(str(exc), 400)
+        # The pending position is looked up by id, which may not be
+        # among the requested fields
+        [payload] = await awith_pending_positions(
+            request.user, [_note_payload(note)])
+        return JsonResponse({field: payload[field] for field in fields})
+    if request.method == 'DELETE':
+        await arun_write(note.delete)
+        return HttpResponse(status=204)
+
+    try:
+        data = _request_data(request)
+    except ValueError as exc:
+        return _error(str(exc), 400)
+    form = _update_form(request, note, data)
+    if not form.is_valid():
+        return _error('Invalid note.', 400, errors=form.errors)
+    note = await arun_write(form.save)
+    return JsonResponse(_note_payload(note))
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password, verify_password
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+
+from .hashing import run_hashing
+from .request_stats import unbudgeted
+
+
+def _user_key(user_id) -> str:
+    """
+    Returns the cache key of a cached user.
+    """
+
+    return f'auth:user:{user_id}'
+
+
+def invalidate_user(user_id) -> None:
+    """
+    Drops a user from the user cache, so their next request loads them from
+    the database again.
+
+    Args:
+        user_id: The primary key of the user.
+    """
+
+    cache.delete(_user_key(user_id))
+
+
+class CachedUserBackend(ModelBackend):
+    """
+    The model backend, with password checks run through the hashing pool
+    and the user of each authenticated request loaded from the default
+    cache while FAST_AUTH is on, instead of from the database. Only the
+    hashing leaves the request's thread; the user is read (and a password
+    needing a stronger hash rewritten) in it. Cached users are dropped
+    whenever they are saved or deleted and when they log out (see
+    signals), so a password change, a deactivation or a new last_login is
+    seen by the next request; the session hash check still runs against
+    the cached user. That takes a default cache shared by every process
+    (see checks), or the other processes keep their stale copy. FAST_AUTH
+    is read on each call; the cached sessions it goes with are chosen by
+    SESSION_ENGINE when the settings load. Must come first in
+    AUTHENTICATION_BACKENDS.
+
+    Methods:
+        authenticate: Checks a username and password.
+        get_user: Returns a user by ID, from the cache when possible.
+        aget_user: Async version of get_user.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Returns the active user with the given username and password.
+        Wrong credentials raise PermissionDenied, so the next backend does
+        not hash the password again.
+
+        Raises:
+            PermissionDenied: If the credentials are wrong.
+            HashingBusy: If the hashing pool cannot take the check.
+        """
+
+        user_model = get_user_model()
+        if username is None:
+            username = kwargs.get(user_model.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = user_model._default_manager.get_by_natural_key(username)
+        except user_model.DoesNotExist:
+            # Hash anyway, so unknown usernames take as long to reject
+            run_hashing(make_password, password)
+            raise PermissionDenied
+        correct, must_update = run_hashing(
+            verify_password, password, user.password)
+        if not correct or not self.user_can_authenticate(user):
+            raise PermissionDenied
+        if must_update:
+            user.password = run_hashing(make_password, password)
+            # A one-off upgrade, outside the login's query budget
+            with unbudgeted():
+                user.save(update_fields=['password'])
+        return user
+
+    def get_user(self, user_id):
+        """
+        Returns the active user with the given ID, or None.
+        """
+
+        if not settings.FAST_AUTH:
+            return super().get_user(user_id)
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        """
+        Async version of get_user; only a cache miss queries the database.
+        """
+
+        if not settings.FAST_AUTH:
+            return await super().aget_user(user_id)
+        key = _user_key(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,1057 @@
+import asyncio
+import io
+import math
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from importlib import import_module
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import login
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import OperationalError, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpRequest
+from django.template import engines
+from django.template.loader import render_to_string
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from . import board_cache
+from .models import Note, note_preview
+from .shards import assign_note_ids, note_database, shard_for_user, use_shard
+from .views import WINDOW_FIELDS, _encode_window, _initial_window
+from .writer import WriteQueue
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Returns a percentile of a list of values with the nearest-rank method.
+
+    Args:
+        values (list): The measured values; must not be empty.
+        fraction (float): The percentile as a fraction, e.g. 0.99.
+
+    Returns:
+        float: The smallest value that at least that fraction of the values
+            is less than or equal to.
+    """
+
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(results: list, elapsed: float, expected: int = None) -> dict:
+    """
+    Summarizes the (latency, status) pairs of a benchmark run.
+
+    Args:
+        results (list): The (seconds, HTTP status) of every request.
+        elapsed (float): The wall-clock duration of the run in seconds.
+        expected (int): The status every request should get; if omitted,
+            any status below 400 is a success.
+
+    Returns:
+        dict: The number of 'requests', the throughput in 'rps', the 'p50',
+            'p95', 'p99' and 'max' latencies in milliseconds, and the number
+            of 'errors' (responses with another status than expected, or
+            with status 400 or above).
+    """
+
+    latencies = [seconds * 1000 for seconds, status in results]
+    return {
+        'requests': len(results),
+        'rps': len(results) / elapsed if elapsed else 0,
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'max': max(latencies),
+        'errors': sum(
+            1 for seconds, status in results
+            if (status != expected if expected else status >= 400)),
+    }
+
+
+def session_headers(user, host: str) -> dict:
+    """
+    Logs a user in with a new session and returns the request headers that
+    authenticate as them, as a browser would send them.
+
+    Args:
+        user (User): The user to authenticate as.
+        host (str): The Host header to send.
+
+    Returns:
+        dict: The 'Host' and 'Cookie' headers.
+    """
+
+    request = HttpRequest()
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+    login(request, user, settings.AUTHENTICATION_BACKENDS[0])
+    request.session.save()
+    cookie = f'{settings.SESSION_COOKIE_NAME}={request.session.session_key}'
+    return {'Host': host, 'Cookie': cookie}
+
+
+def wsgi_environ(path: str, headers: dict) -> dict:
+    """
+    Builds the WSGI environ of a GET request, as a WSGI server would.
+
+    Args:
+        path (str): The path and optional query string.
+        headers (dict): The request headers, including 'Host'.
+
+    Returns:
+        dict: The environ.
+    """
+
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': headers['Host'],
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def asgi_scope(path: str, headers: dict) -> dict:
+    """
+    Builds the ASGI scope of a GET request, as an ASGI server would.
+
+    Args:
+        path (str): The path and optional query string.
+        headers (dict): The request headers, including 'Host'.
+
+    Returns:
+        dict: The HTTP connection scope.
+    """
+
+    path, _, query = path.partition('?')
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'root_path': '',
+        'query_string': query.encode(),
+        'headers': [
+            (name.lower().encode(), value.encode())
+            for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': (headers['Host'], 80),
+    }
+
+
+def wsgi_request(application, path: str, headers: dict) -> tuple:
+    """
+    Sends one GET request to a WSGI application and consumes the response.
+
+    Returns:
+        tuple: The (seconds, HTTP status) of the request.
+    """
+
+    statuses = []
+
+    def start_response(status, response_headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    started = time.perf_counter()
+    body = application(wsgi_environ(path, headers), start_response)
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return time.perf_counter() - started, statuses[0]
+
+
+async def asgi_request(application, path: str, headers: dict) -> tuple:
+    """
+    Sends one GET request to an ASGI application and consumes the response.
+
+    Returns:
+        tuple: The (seconds, HTTP status) of the request.
+    """
+
+    statuses = []
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects; the server cancels this wait
+        await asyncio.get_running_loop().create_future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    started = time.perf_counter()
+    await application(asgi_scope(path, headers), receive, send)
+    return time.perf_counter() - started, statuses[0]
+
+
+def run_wsgi(application, paths: list, headers: dict, requests: int,
+             concurrency: int) -> dict:
+    """
+    Benchmarks a WSGI application with concurrent threads, like a threaded
+    WSGI server. Every path is requested once beforehand to warm up.
+
+    Args:
+        application (callable): The WSGI application.
+        paths (list): The paths requested in turn.
+        headers (dict): The request headers, as from session_headers.
+        requests (int): The number of requests measured.
+        concurrency (int): The number of requests in flight at once.
+
+    Returns:
+        dict: The run's summary, as from summarize.
+    """
+
+    for path in paths:
+        wsgi_request(application, path, headers)
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(
+            lambda index: wsgi_request(
+                application, paths[index % len(paths)], headers),
+            range(requests),
+        ))
+        elapsed = time.perf_counter() - started
+    return summarize(results, elapsed)
+
+
+def run_asgi(application, paths: list, headers: dict, requests: int,
+             concurrency: int) -> dict:
+    """
+    Benchmarks an ASGI application with concurrent tasks on one event loop,
+    like an ASGI server. Every path is requested once beforehand to warm up.
+
+    Args:
+        application (callable): The ASGI application.
+        paths (list): The paths requested in turn.
+        headers (dict): The request headers, as from session_headers.
+        requests (int): The number of requests measured.
+        concurrency (int): The number of requests in flight at once.
+
+    Returns:
+        dict: The run's summary, as from summarize.
+    """
+
+    async def run():
+        for path in paths:
+            await asgi_request(application, path, headers)
+        indexes = iter(range(requests))
+        results = []
+
+        async def worker():
+            for index in indexes:
+                results.append(await asgi_request(
+                    application, paths[index % len(paths)], headers))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run())
+    return summarize(results, elapsed)
+
+
+# Schema of the notes table used by the SQLite benchmark: the columns and
+# index read and written by the board window and update_position.
+SQLITE_SCHEMA = (
+    'CREATE TABLE bench_note (id INTEGER PRIMARY KEY, user_id INTEGER, '
+    'title TEXT, content TEXT, color TEXT, x_position INTEGER, '
+    'y_position INTEGER, updated_at TEXT)',
+    'CREATE INDEX bench_note_position ON bench_note '
+    '(user_id, x_position, y_position)',
+)
+
+# Board size over which benchmark notes are spread, in board pixels.
+SQLITE_BOARD_SIZE = 10000
+
+# Alias under which the benchmark database is registered for a WriteQueue.
+QUEUE_ALIAS = 'benchmark'
+
+
+def sqlite_settings(base: dict, path: str, options: dict,
+                    persistent: bool) -> dict:
+    """
+    Builds the settings of a benchmark database from a configured one.
+
+    Args:
+        base (dict): The settings_dict of a configured SQLite connection.
+        path (str): The path of the benchmark database file.
+        options (dict): The connection OPTIONS to benchmark.
+        persistent (bool): Whether connections are reused between requests.
+
+    Returns:
+        dict: The settings of the benchmark database.
+    """
+
+    return {
+        **base,
+        'NAME': path,
+        'OPTIONS': options,
+        'CONN_MAX_AGE': None if persistent else 0,
+    }
+
+
+def create_sqlite_notes(settings_dict: dict, notes: int, users: int) -> None:
+    """
+    Creates the benchmark notes table and fills it with notes spread over
+    the users' boards.
+
+    Args:
+        settings_dict (dict): The settings of the benchmark database.
+        notes (int): The number of notes.
+        users (int): The number of users owning them.
+    """
+
+    connection = DatabaseWrapper(settings_dict)
+    with connection.cursor() as cursor:
+        for statement in SQLITE_SCHEMA:
+            cursor.execute(statement)
+        cursor.executemany(
+            'INSERT INTO bench_note VALUES (%s, %s, %s, %s, %s, %s, %s, %s)',
+            [
+                (number + 1, number % users + 1, f'Note {number}',
+                 'Benchmark content ' * 10, '#FFD700',
+                 random.randrange(SQLITE_BOARD_SIZE),
+                 random.randrange(SQLITE_BOARD_SIZE), '2024-01-01 00:00:00')
+                for number in range(notes)
+            ],
+        )
+    connection.close()
+
+
+def _is_lock_error(exc: Exception) -> bool:
+    """
+    Tells whether a database error means the database was locked or busy.
+    """
+
+    message = str(exc).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def run_sqlite_contention(settings_dict: dict, notes: int, users: int,
+                          readers: int, writers: int, duration: float,
+                          queued: bool = False) -> dict:
+    """
+    Runs readers and writers against a SQLite database at the same time.
+    Readers repeatedly load a board window, like note_window; writers move
+    a batch of notes in a transaction that first checks ownership, like a
+    batched update_position. Without persistent connections every request
+    opens and closes its own connection, as Django does with CONN_MAX_AGE
+    set to 0. When queued, writers hand their moves to a WriteQueue, which
+    checks each one's ownership and writes concurrent moves together, like
+    update_position with WRITE_QUEUE_ENABLED.
+
+    Args:
+        settings_dict (dict): The settings of the benchmark database, as
+            from sqlite_settings, already filled by create_sqlite_notes.
+        notes (int): The number of notes in the database.
+        users (int): The number of users owning them.
+        readers (int): The number of reading threads.
+        writers (int): The number of writing threads.
+        duration (float): The length of the run in seconds.
+        queued (bool): Whether writes go through a WriteQueue.
+
+    Returns:
+        dict: The 'reads' and 'writes' completed per second, the 'read_p99'
+            and 'write_p99' latencies in milliseconds, and the number of
+            'lock_errors'.
+    """
+
+    persistent = settings_dict['CONN_MAX_AGE'] != 0
+    stop = time.monotonic() + duration
+    lock = threading.Lock()
+    totals = {'reads': [], 'writes': [], 'lock_errors': 0}
+    # Transactions start the way Django's atomic() starts them
+    begin = 'BEGIN {}'.format(
+        settings_dict['OPTIONS'].get('transaction_mode') or '').strip()
+
+    def read(connection):
+        x, y = (random.randrange(SQLITE_BOARD_SIZE) for _ in range(2))
+        cursor = connection.cursor()
+        cursor.execute(
+            'SELECT id, title, content, color, x_position, y_position, '
+            'updated_at FROM bench_note WHERE user_id = %s '
+            'AND x_position BETWEEN %s AND %s '
+            'AND y_position BETWEEN %s AND %s '
+            'ORDER BY x_position, y_position LIMIT 501',
+            [random.randrange(users) + 1, x - 300, x + 2000, y - 400,
+             y + 1200],
+        )
+        cursor.fetchall()
+        cursor.close()
+
+    def pick_move():
+        user_id = random.randrange(users) + 1
+        positions = {
+            random.randrange(notes // users) * users + user_id: (
+                random.randrange(SQLITE_BOARD_SIZE),
+                random.randrange(SQLITE_BOARD_SIZE))
+            for _ in range(5)
+        }
+        return user_id, positions
+
+    def move(cursor, items):
+        # Checks each request's ownership, then writes all their positions
+        merged = {}
+        for user_id, positions in items:
+            placeholders = ', '.join(['%s'] * len(positions))
+            cursor.execute(
+                'SELECT COUNT(*) FROM bench_note WHERE user_id = %s '
+                f'AND id IN ({placeholders})', [user_id, *positions])
+            cursor.fetchone()
+            merged.update(positions)
+        cursor.executemany(
+            'UPDATE bench_note SET x_position = %s, y_position = %s, '
+            "updated_at = datetime('now') WHERE id = %s",
+            [(x, y, note_id) for note_id, (x, y) in merged.items()])
+        return [len(positions) for user_id, positions in items]
+
+    def write(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(begin)
+            try:
+                move(cursor, [pick_move()])
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+
+    def write_group(items):
+        with connections[write_queue.using].cursor() as cursor:
+            return move(cursor, items)
+
+    def queued_write(connection):
+        write_queue.submit_grouped(write_group, pick_move()).result()
+
+    def worker(operation, results):
+        connection = DatabaseWrapper(settings_dict)
+        latencies, lock_errors = [], 0
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            try:
+                operation(connection)
+            except OperationalError as exc:
+                if not _is_lock_error(exc):
+                    raise
+                lock_errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+            if not persistent:
+                connection.close()
+        connection.close()
+        with lock:
+            results.extend(latencies)
+            totals['lock_errors'] += lock_errors
+
+    write_queue = None
+    if queued:
+        write_queue = WriteQueue(QUEUE_ALIAS)
+        connections.settings[QUEUE_ALIAS] = settings_dict
+    threads = [
+        threading.Thread(target=worker, args=(read, totals['reads']))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(
+            target=worker,
+            args=(queued_write if queued else write, totals['writes']))
+        for _ in range(writers)
+    ]
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if write_queue:
+            write_queue.stop()
+            del connections.settings[QUEUE_ALIAS]
+    elapsed = time.perf_counter() - started
+
+    def p99(latencies):
+        return percentile(latencies, 0.99) * 1000 if latencies else None
+
+    return {
+        'reads': len(totals['reads']) / elapsed,
+        'writes': len(totals['writes']) / elapsed,
+        'read_p99': p99(totals['reads']),
+        'write_p99': p99(totals['writes']),
+        'lock_errors': totals['lock_errors'],
+    }
+
+
+# Words the text of seeded notes is made of.
+SEED_WORDS = (
+    'call', 'email', 'meeting', 'review', 'draft', 'budget', 'report',
+    'plan', 'idea', 'remember', 'buy', 'milk', 'fix', 'bug', 'deploy',
+    'release', 'notes', 'ask', 'team', 'about', 'the', 'new', 'design',
+    'before', 'friday', 'tomorrow', 'project', 'client', 'invoice', 'and',
+    'check', 'follow', 'up', 'with', 'sprint', 'goals', 'for', 'week',
+)
+
+# Colors of seeded notes, as picked with the note form's color input.
+SEED_COLORS = ('#FFD700', '#FFFF88', '#FF7EB9', '#7AFCFF', '#CDFC93')
+
+# Longest content of a seeded note, in characters.
+SEED_MAX_CONTENT = 5000
+
+# Title of the notes created by the note_create benchmark, which are
+# deleted after the run.
+BENCHMARK_TITLE = 'Benchmark note'
+
+# The note views benchmarked by run_view_benchmark, in the order they run.
+VIEW_SCENARIOS = (
+    'login', 'note_list', 'note_create', 'note_update', 'update_position',
+    'note_delete',
+)
+
+
+def seed_text(rng: random.Random, length: int) -> str:
+    """
+    Returns text of about the given length made of SEED_WORDS.
+
+    Args:
+        rng (Random): The random number generator.
+        length (int): The length of the text in characters.
+
+    Returns:
+        str: The text, at most length characters long.
+    """
+
+    words, size = [], 0
+    while size < length:
+        word = rng.choice(SEED_WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:length]
+
+
+def seed_note(rng: random.Random, user) -> Note:
+    """
+    Returns an unsaved note with realistic content: a short title, content
+    whose length follows a long-tailed distribution (most notes hold a
+    line or two, a few hold pages) and a random spot on the board.
+
+    Args:
+        rng (Random): The random number generator.
+        user (User): The owner of the note.
+
+    Returns:
+        Note: The note.
+    """
+
+    content_length = min(
+        SEED_MAX_CONTENT, max(1, int(rng.lognormvariate(4.5, 1.0))))
+    content = seed_text(rng, content_length)
+    return Note(
+        title=seed_text(rng, rng.randint(8, 40)).capitalize(),
+        content=content,
+        preview=note_preview(content),
+        color=rng.choice(SEED_COLORS),
+        x_position=rng.randrange(SQLITE_BOARD_SIZE),
+        y_position=rng.randrange(SQLITE_BOARD_SIZE),
+        user=user,
+    )
+
+
+def seed_user_notes(user, count: int, rng: random.Random,
+                    batch_size: int = None) -> list:
+    """
+    Inserts seeded notes for a user on their shard, in batches.
+    Like imports, the notes are inserted with bulk_create, so the owner's
+    cached board is invalidated once at the end.
+
+    Args:
+        user (User): The owner of the notes.
+        count (int): The number of notes.
+        rng (Random): The random number generator.
+        batch_size (int): The number of notes inserted per batch; defaults
+            to IMPORT_BATCH_SIZE.
+
+    Returns:
+        list: The inserted notes.
+    """
+
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    inserted = []
+    with use_shard(shard_for_user(user.pk)):
+        for offset in range(0, count, batch_size):
+            batch = [
+                seed_note(rng, user)
+                for _ in range(min(batch_size, count - offset))
+            ]
+            assign_note_ids(batch)
+            with transaction.atomic(using=note_database()):
+                inserted.extend(Note.objects.bulk_create(batch))
+    board_cache.invalidate(user.pk)
+    return inserted
+
+
+def seed_users(prefix: str, users: int, password: str) -> list:
+    """
+    Creates users named prefix1, prefix2... sharing a password, which is
+    hashed only once.
+
+    Args:
+        prefix (str): The start of the usernames.
+        users (int): The number of users.
+        password (str): Their password.
+
+    Returns:
+        list: The users, in order.
+    """
+
+    hashed = make_password(password)
+    usernames = [f'{prefix}{number}' for number in range(1, users + 1)]
+    User.objects.bulk_create(
+        User(username=username, password=hashed) for username in usernames)
+    return list(User.objects.filter(username__in=usernames).order_by('pk'))
+
+
+def benchmark_users(prefix: str) -> list:
+    """
+    Returns the users created by seed_users with a prefix, in order.
+
+    Args:
+        prefix (str): The start of the usernames.
+
+    Returns:
+        list: The users.
+    """
+
+    return list(User.objects.filter(
+        username__regex=rf'^{re.escape(prefix)}[0-9]+$').order_by('pk'))
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts the queries the current thread runs on any database inside the
+    block. Yields a one-item list holding the count.
+    """
+
+    counter = [0]
+
+    def count(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(count))
+        yield counter
+
+
+def client_sender(user, host: str):
+    """
+    Returns a function that sends requests to the project in process with
+    Django's test client, logged in as a user.
+
+    Args:
+        user (User): The user to log in as, or None to stay anonymous.
+        host (str): The Host header to send.
+
+    Returns:
+        callable: send(method, path, data), which returns the status.
+    """
+
+    client = Client(HTTP_HOST=host, raise_request_exception=False)
+    if user is not None:
+        client.force_login(user)
+
+    def send(method: str, path: str, data: dict = None) -> int:
+        if method == 'POST':
+            response = client.post(path, data or {})
+        else:
+            response = client.get(path, data or {})
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response.status_code
+    return send
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """
+    Reports redirects as responses instead of following them.
+    """
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def live_sender(base_url: str, user):
+    """
+    Returns a function that sends requests to a running server over HTTP,
+    logged in as a user. The session is created in the configured database,
+    which the server must share, and a CSRF cookie is sent along with its
+    token in the X-CSRFToken header, as the board's scripts do.
+
+    Args:
+        base_url (str): The server's URL, e.g. 'http://localhost:8000'.
+        user (User): The user to log in as, or None to stay anonymous.
+
+    Returns:
+        callable: send(method, path, data), which returns the status.
+    """
+
+    base_url = base_url.rstrip('/')
+    token = get_random_string(32)
+    cookies = [f'{settings.CSRF_COOKIE_NAME}={token}']
+    if user is not None:
+        cookies.append(
+            session_headers(user, urlsplit(base_url).netloc)['Cookie'])
+    headers = {'Cookie': '; '.join(cookies), 'X-CSRFToken': token}
+    opener = urllib.request.build_opener(_NoRedirect)
+
+    def send(method: str, path: str, data: dict = None) -> int:
+        body = urlencode(data or {}).encode() if method == 'POST' else None
+        request = urllib.request.Request(
+            base_url + path, data=body, headers=headers, method=method)
+        try:
+            with opener.open(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            return exc.code
+    return send
+
+
+def _scenario_notes(scenario: str, users: list, requests: int,
+                    rng: random.Random) -> dict:
+    """
+    Returns the note IDs a scenario's requests act on, by user ID: notes
+    seeded now for note_delete to delete, existing notes otherwise.
+    """
+
+    if scenario == 'note_delete':
+        per_user = math.ceil(requests / len(users))
+        return {
+            user.pk: [note.pk for note in seed_user_notes(user, per_user, rng)]
+            for user in users
+        }
+    note_ids = {}
+    for user in users:
+        with use_shard(shard_for_user(user.pk)):
+            note_ids[user.pk] = list(Note.objects.filter(
+                user=user).values_list('pk', flat=True)[:1000])
+        if not note_ids[user.pk]:
+            raise ValueError(f'{user.username} has no notes to {scenario}.')
+    return note_ids
+
+
+def scenario_request(scenario: str, user, password: str, note_id: int,
+                     number: int, rng: random.Random) -> tuple:
+    """
+    Returns one request of a benchmark scenario.
+
+    Args:
+        scenario (str): One of VIEW_SCENARIOS.
+        user (User): The user sending the request.
+        password (str): The user's password, for login.
+        note_id (int): The note the request acts on, if any.
+        number (int): The number of the request in the run.
+        rng (Random): The random number generator.
+
+    Returns:
+        tuple: The (method, path, data, expected status) of the request.
+    """
+
+    form = {
+        'title': f'{BENCHMARK_TITLE} {number}',
+        'content': seed_text(rng, 120), 'color': rng.choice(SEED_COLORS),
+        'x_position': rng.randrange(SQLITE_BOARD_SIZE),
+        'y_position': rng.randrange(SQLITE_BOARD_SIZE),
+    }
+    if scenario == 'login':
+        return ('POST', reverse('login'),
+                {'username': user.username, 'password': password}, 302)
+    if scenario == 'note_list':
+        return 'GET', reverse('note_list'), None, 200
+    if scenario == 'note_create':
+        return 'POST', reverse('note_create'), form, 302
+    if scenario == 'note_update':
+        form['title'] = seed_text(rng, 30)
+        return 'POST', reverse('note_update', args=[note_id]), form, 302
+    if scenario == 'update_position':
+        return ('POST', reverse('update_position'), {
+            'note_id': note_id, 'x': form['x_position'],
+            'y': form['y_position']}, 200)
+    if scenario == 'note_delete':
+        return 'POST', reverse('note_delete', args=[note_id]), None, 302
+    raise ValueError(f'Unknown scenario: {scenario}.')
+
+
+def run_view_benchmark(scenario: str, users: list, password: str,
+                       requests: int, concurrency: int, sender,
+                       seed: int = 0) -> dict:
+    """
+    Benchmarks one note view with concurrent threads, each request sent as
+    the next of the users in turn. Every thread logs in its users before
+    the clock starts. Queries are counted per request when the views run
+    in the sending thread, as with client_sender. The data set is left as
+    it was: note_delete deletes notes seeded for it, and the notes
+    created by note_create are deleted after the run.
+
+    Args:
+        scenario (str): One of VIEW_SCENARIOS.
+        users (list): The users sending the requests, with notes.
+        password (str): The users' password, for login.
+        requests (int): The number of requests measured.
+        concurrency (int): The number of requests in flight at once.
+        sender (callable): sender(user) returns the send function of a new
+            session, as client_sender or live_sender.
+        seed (int): The seed of the random requests.
+
+    Returns:
+        dict: The run's summary, as from summarize, with the mean
+            'queries' per request and the 'max_queries' of one request.
+
+    Raises:
+        ValueError: If the scenario is unknown or a user has no notes.
+    """
+
+    if scenario not in VIEW_SCENARIOS:
+        raise ValueError(f'Unknown scenario: {scenario}.')
+    rng = random.Random(seed)
+    note_ids = (
+        _scenario_notes(scenario, users, requests, rng)
+        if scenario in ('note_update', 'update_position', 'note_delete')
+        else {})
+    plan = []
+    for number in range(requests):
+        user = users[number % len(users)]
+        if scenario == 'note_delete':
+            note_id = note_ids[user.pk].pop()
+        elif user.pk in note_ids:
+            note_id = rng.choice(note_ids[user.pk])
+        else:
+            note_id = None
+        plan.append((user, scenario_request(
+            scenario, user, password, note_id, number, rng)))
+    results, queries, errors = [], [], []
+    lock = threading.Lock()
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker(offset):
+        mine = plan[offset::concurrency]
+        sends = {}
+        try:
+            for user, request in mine:
+                if user.pk not in sends:
+                    sends[user.pk] = sender(
+                        None if scenario == 'login' else user)
+            ready.wait()
+            measured = []
+            for user, (method, path, data, expected) in mine:
+                with count_queries() as counter:
+                    started = time.perf_counter()
+                    status = sends[user.pk](method, path, data)
+                    measured.append(
+                        (time.perf_counter() - started, status, counter[0]))
+        except BaseException as exc:
+            ready.abort()
+            errors.append(exc)
+            return
+        finally:
+            connections.close_all()
+        with lock:
+            for seconds, status, count in measured:
+                results.append((seconds, status))
+                queries.append(count)
+
+    threads = [
+        threading.Thread(target=worker, args=(offset,))
+        for offset in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        pass
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    if scenario == 'note_create':
+        for user in users:
+            with use_shard(shard_for_user(user.pk)):
+                Note.objects.filter(
+                    user=user, title__startswith=BENCHMARK_TITLE).delete()
+    summary = summarize(results, elapsed, plan[0][1][3])
+    summary['queries'] = sum(queries) / len(queries)
+    summary['max_queries'] = max(queries)
+    return summary
+
+
+# The board page as it was before windowed loading: a {% for %} loop with
+# an inline style block and two {% url %} tags per card. Only kept for
+# run_render_benchmark to compare the JSON board against.
+LEGACY_BOARD_TEMPLATE = """{% extends 'base.html' %}
+{% block content %}
+<div class="mt-3 position-relative" style="min-height: 600px">
+  {% for note in notes %}
+  <div
+    class="card note-card"
+    style="background-color: {{ note.color }};
+                        position: absolute;
+                        left: {{ note.x_position }}px;
+                        top: {{ note.y_position }}px;
+                        width: 300px;"
+    data-note-id="{{ note.pk }}"
+  >
+    <div class="card-body">
+      <h5 class="card-title">{{ note.title }}</h5>
+      <p class="card-text">{{ note.content }}</p>
+      <small>Last updated: {{ note.updated_at }}</small>
+      <div class="mt-2">
+        <a href="{% url 'note_update' note.pk %}" class="btn btn-sm btn-warning"
+          >Edit</a
+        >
+        <a href="{% url 'note_delete' note.pk %}" class="btn btn-sm btn-danger"
+          >Delete</a
+        >
+      </div>
+    </div>
+  </div>
+  {% empty %}
+  <p>No notes yet!</p>
+  {% endfor %}
+</div>
+{% endblock %}
+"""
+
+# Board sizes rendered by benchmark_rendering unless others are given.
+RENDER_SIZES = (1000, 10000, 100000)
+
+# The ways of rendering a board compared by run_render_benchmark.
+RENDER_PATHS = ('template', 'json', 'window')
+
+
+def render_notes(count: int, rng: random.Random) -> list:
+    """
+    Returns unsaved notes for rendering, as seed_note makes them, with
+    primary keys and update times so they render like stored notes.
+
+    Args:
+        count (int): The number of notes.
+        rng (Random): The random number generator.
+
+    Returns:
+        list: The notes.
+    """
+
+    now = timezone.now()
+    notes = []
+    for number in range(1, count + 1):
+        note = seed_note(rng, None)
+        note.pk = number
+        note.updated_at = now
+        notes.append(note)
+    return notes
+
+
+def _best_time(render, repeat: int) -> tuple:
+    """
+    Calls render repeat times and returns the fastest time, in seconds,
+    with the size of what it returned, in bytes.
+    """
+
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = render()
+        best = min(best, time.perf_counter() - started)
+    return best, len(output.encode())
+
+
+def run_render_benchmark(count: int, repeat: int = 3, seed: int = 0) -> dict:
+    """
+    Times rendering a board of notes in each of RENDER_PATHS, with the
+    first configured template engine and its loaders:
+
+    - 'template': LEGACY_BOARD_TEMPLATE, one card per note.
+    - 'json': the note_list shell with every note embedded as the compact
+      JSON the client builds its cards from.
+    - 'window': the same with only as many notes as one window holds
+      (NOTE_WINDOW_MAX_NOTES), which is what note_list serves.
+
+    Each path is timed from the notes in memory, so the database and the
+    board cache play no part.
+
+    Args:
+        count (int): The number of notes on the board.
+        repeat (int): The renders timed per path; the fastest counts.
+        seed (int): The seed of the random notes.
+
+    Returns:
+        dict: (seconds, bytes) of the fastest render, by path.
+    """
+
+    notes = render_notes(count, random.Random(seed))
+    legacy = engines.all()[0].from_string(LEGACY_BOARD_TEMPLATE)
+    window = _initial_window()
+
+    def render_json(board):
+        payload = {
+            'window': window,
+            'notes': [
+                {field: getattr(note, field) for field in WINDOW_FIELDS}
+                for note in board
+            ],
+            'truncated': len(board) < len(notes),
+        }
+        return render_to_string('sticky_notes_app/note_list.html', {
+            'window': window,
+            'board_json': _encode_window(payload),
+        })
+
+    window_notes = notes[:settings.NOTE_WINDOW_MAX_NOTES]
+    renders = {
+        'template': lambda: legacy.render({'notes': notes}),
+        'json': lambda: render_json(notes),
+        'window': lambda: render_json(window_notes),
+    }
+    return {
+        path: _best_time(renders[path], repeat) for path in RENDER_PATHS
+    }
@@ -0,0 +1,234 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import metrics
+
+# Cache key prefix of every entry written by the board cache.
+PREFIX = 'board'
+
+
+def _cache():
+    """
+    Returns the cache backend configured by BOARD_CACHE_ALIAS.
+    """
+
+    return caches[settings.BOARD_CACHE_ALIAS]
+
+
+def _count(name: str) -> None:
+    """
+    Increments one of the board cache's hit/miss counters.
+
+    Args:
+        name (str): The counter to increment, 'hits' or 'misses'.
+    """
+
+    metrics.inc('sticky_notes_board_cache_lookups_total',
+                result=name)
+    cache = _cache()
+    key = f'{PREFIX}:stats:{name}'
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr
+            cache.add(key, 1, None)
+
+
+async def _acount(name: str) -> None:
+    """
+    Increments one of the board cache's hit/miss counters from async code.
+
+    Args:
+        name (str): The counter to increment, 'hits' or 'misses'.
+    """
+
+    metrics.inc('sticky_notes_board_cache_lookups_total',
+                result=name)
+    cache = _cache()
+    key = f'{PREFIX}:stats:{name}'
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aadd(key, 1, None)
+
+
+def generation(user_id: int) -> int:
+    """
+    Returns the current cache generation of a user's board.
+    Every cached fragment of a board is keyed by its generation, so bumping
+    the generation invalidates all of them at once. A missing generation is
+    initialized from the clock rather than zero, so a generation evicted from
+    the cache can never make stale entries reachable again.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+
+    Returns:
+        int: The board's current generation.
+    """
+
+    cache = _cache()
+    key = f'{PREFIX}:gen:{user_id}'
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+async def ageneration(user_id: int) -> int:
+    """
+    Async version of generation.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+
+    Returns:
+        int: The board's current generation.
+    """
+
+    cache = _cache()
+    key = f'{PREFIX}:gen:{user_id}'
+    value = await cache.aget(key)
+    if value is None:
+        await cache.aadd(key, time.time_ns(), None)
+        value = await cache.aget(key)
+    return value
+
+
+def invalidate(user_id: int) -> None:
+    """
+    Invalidates every cached fragment of a user's board.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+    """
+
+    cache = _cache()
+    key = f'{PREFIX}:gen:{user_id}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_on_commit(user_id: int, using: str = None) -> None:
+    """
+    Invalidates a user's cached board once the current transaction commits.
+    Invalidating earlier would let a concurrent request rebuild the board
+    from the data before the commit and cache it under the new generation.
+    Outside a transaction the board is invalidated immediately.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+        using (str): The alias of the database written to, such as the
+            owner's shard; defaults to the primary.
+    """
+
+    transaction.on_commit(lambda: invalidate(user_id), using=using)
+
+
+async def ainvalidate(user_id: int) -> None:
+    """
+    Async version of invalidate.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+    """
+
+    cache = _cache()
+    key = f'{PREFIX}:gen:{user_id}'
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, time.time_ns(), None)
+
+
+def get_or_build(user_id: int, name: str, build):
+    """
+    Returns a cached fragment of a user's board, building it on a miss.
+    When BOARD_CACHE_ENABLED is off the fragment is always built.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+        name (str): Identifies the fragment within the board (e.g. the
+            viewport it covers).
+        build (callable): Builds the fragment; called without arguments.
+
+    Returns:
+        The cached or freshly built fragment.
+    """
+
+    if not settings.BOARD_CACHE_ENABLED:
+        return build()
+    cache = _cache()
+    key = f'{PREFIX}:{user_id}:{generation(user_id)}:{name}'
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        return value
+    _count('misses')
+    value = build()
+    cache.set(key, value, settings.BOARD_CACHE_TIMEOUT)
+    return value
+
+
+async def aget_or_build(user_id: int, name: str, build):
+    """
+    Async version of get_or_build, for use by the async views.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+        name (str): Identifies the fragment within the board.
+        build (callable): Builds the fragment; an async function called
+            without arguments.
+
+    Returns:
+        The cached or freshly built fragment.
+    """
+
+    if not settings.BOARD_CACHE_ENABLED:
+        return await build()
+    cache = _cache()
+    key = f'{PREFIX}:{user_id}:{await ageneration(user_id)}:{name}'
+    value = await cache.aget(key)
+    if value is not None:
+        await _acount('hits')
+        return value
+    await _acount('misses')
+    value = await build()
+    await cache.aset(key, value, settings.BOARD_CACHE_TIMEOUT)
+    return value
+
+
+def stats() -> dict:
+    """
+    Returns the board cache's hit and miss counters.
+
+    Returns:
+        dict: The 'hits' and 'misses' counts and the 'hit_ratio' (None
+            before the first lookup).
+    """
+
+    cache = _cache()
+    hits = cache.get(f'{PREFIX}:stats:hits', 0)
+    misses = cache.get(f'{PREFIX}:stats:misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
+
+
+def reset_stats() -> None:
+    """
+    Resets the board cache's hit and miss counters.
+    """
+
+    _cache().delete_many([f'{PREFIX}:stats:hits', f'{PREFIX}:stats:misses'])
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Cache backends whose entries are only seen by the process that wrote
+# them: Django's local memory cache, and the dummy cache keeping nothing.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Example of a shared cache, for the hints of the checks below.
+SHARED_CACHE_HINT = (
+    "Configure a cache shared by every process, e.g. CACHES = {'default': "
+    "{'BACKEND': 'django.core.cache.backends.redis.RedisCache', "
+    "'LOCATION': 'redis://127.0.0.1:6379'}}."
+)
+
+
+def is_process_local(alias: str) -> bool:
+    """
+    Returns whether a configured cache is private to each process, so what
+    one process stores there or deletes is never seen by the others.
+
+    Args:
+        alias (str): The alias of the cache in CACHES.
+    """
+
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches)
+def check_position_buffer_cache(app_configs, **kwargs) -> list:
+    """
+    Rejects write-behind positions buffered in a per-process cache: the
+    flush_positions process would never see the web workers' buffers, so
+    positions accepted by update_position would never be written.
+    """
+
+    if (settings.POSITION_WRITE_BEHIND
+            and is_process_local(settings.POSITION_BUFFER_CACHE)):
+        return [Error(
+            'POSITION_WRITE_BEHIND needs a POSITION_BUFFER_CACHE shared '
+            'with the flush_positions process.',
+            hint=SHARED_CACHE_HINT,
+            id='sticky_notes_app.E001',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def check_note_shards_cache(app_configs, **kwargs) -> list:
+    """
+    Rejects note sharding with a per-process default cache: the shard
+    assignments cached there would not follow the moves of
+    rebalance_shards, which runs in its own process, so web workers would
+    go on reading and writing a moved user's notes on the old shard.
+    """
+
+    if settings.NOTE_SHARDS and is_process_local('default'):
+        return [Error(
+            'NOTE_SHARDS needs a default cache shared by every process, '
+            'where shard assignments are cached.',
+            hint=SHARED_CACHE_HINT,
+            id='sticky_notes_app.E002',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def check_fast_auth_cache(app_configs, **kwargs) -> list:
+    """
+    Rejects FAST_AUTH with a per-process default cache: a user dropped from
+    the cache after a password change, a deactivation or a logout would
+    only be dropped in the process that handled it, and the others would
+    keep authenticating old sessions against the stale copy.
+    """
+
+    if settings.FAST_AUTH and is_process_local('default'):
+        return [Error(
+            'FAST_AUTH needs a default cache shared by every process, '
+            'where sessions and users are cached.',
+            hint=SHARED_CACHE_HINT,
+            id='sticky_notes_app.E003',
+        )]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_auth_throttle_cache(app_configs, **kwargs) -> list:
+    """
+    Warns on deployment when authentication attempts are throttled with a
+    per-process default cache: each process keeps its own token buckets,
+    so the limits are as many times looser as there are workers. Only a
+    warning, as the local memory cache is fine in development.
+    """
+
+    if settings.AUTH_THROTTLE_ENABLED and is_process_local('default'):
+        return [Warning(
+            'AUTH_THROTTLE_ENABLED needs a default cache shared by every '
+            'process, where the token buckets are kept; with a '
+            'per-process cache each worker applies the limits on its own.',
+            hint=SHARED_CACHE_HINT,
+            id='sticky_notes_app.W001',
+        )]
+    return []
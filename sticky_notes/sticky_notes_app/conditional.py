@@ -0,0 +1,424 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max, Subquery
+from django.middleware.csrf import get_token
+from django.views.decorators.http import condition
+
+from .models import ChangeSequence, Note
+from .positions import get_position_buffer
+
+
+def _etag(*parts) -> str:
+    """
+    Builds a strong ETag from the parts that identify a representation.
+
+    Args:
+        *parts: Values that change whenever the representation does.
+
+    Returns:
+        str: A quoted hexadecimal digest of the parts.
+    """
+
+    digest = hashlib.md5(
+        '|'.join(str(part) for part in parts).encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def _state_aggregates(user) -> dict:
+    """
+    Returns the aggregates of board_state: the note count and latest update
+    time, served by the (user, updated_at) index, and the user's latest
+    change number, read by a subquery that runs once.
+    """
+
+    last_change = ChangeSequence.objects.filter(user=user).values('last')
+    return {
+        'count': Count('id'),
+        'latest': Max('updated_at'),
+        'token': Max(Subquery(last_change[:1])),
+    }
+
+
+def board_state(request) -> dict:
+    """
+    Returns the note count, latest update time and sync token of the
+    user's board. Computed with a single aggregate query and memoized on
+    the request, so the ETag and Last-Modified validators and the views
+    share one query. With POSITION_WRITE_BEHIND enabled, a digest of the
+    user's unflushed positions is included since they change the board
+    without touching updated_at.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+
+    Returns:
+        dict: The board's 'count', 'latest' update time (None if the board
+            is empty), sync 'token' (the latest change number, read before
+            the board is; 0 for an empty board) and 'pending' positions
+            digest.
+    """
+
+    if not hasattr(request, '_board_state'):
+        state = Note.objects.filter(user=request.user).aggregate(
+            **_state_aggregates(request.user))
+        state['token'] = state['token'] or 0
+        state['pending'] = ''
+        if settings.POSITION_WRITE_BEHIND:
+            pending = get_position_buffer().pending(request.user.pk)
+            state['pending'] = _etag(sorted(pending.items()))
+        request._board_state = state
+    return request._board_state
+
+
+async def aboard_state(request) -> dict:
+    """
+    Async version of board_state, using the async ORM and cache.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+
+    Returns:
+        dict: The board's 'count', 'latest' update time, sync 'token' and
+            'pending' positions digest.
+    """
+
+    if not hasattr(request, '_board_state'):
+        state = await Note.objects.filter(user=request.user).aaggregate(
+            **_state_aggregates(request.user))
+        state['token'] = state['token'] or 0
+        state['pending'] = ''
+        if settings.POSITION_WRITE_BEHIND:
+            pending = await get_position_buffer().apending(request.user.pk)
+            state['pending'] = _etag(sorted(pending.items()))
+        request._board_state = state
+    return request._board_state
+
+
+def board_etag(request, *args, **kwargs) -> str:
+    """
+    Returns the ETag of a representation of the user's whole board.
+    Changes whenever a note is created, updated, moved or deleted, since
+    creating and updating advance the latest update time and deleting
+    lowers the count; every change also advances the sync token, which
+    board representations embed.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+
+    Returns:
+        str: The board's ETag.
+    """
+
+    state = board_state(request)
+    return _etag(
+        request.user.pk, state['count'], state['latest'], state['token'],
+        state['pending'])
+
+
+def board_last_modified(request, *args, **kwargs):
+    """
+    Returns the Last-Modified time of the user's board. Deletions do not move
+    it, so clients should prefer the ETag, which browsers send alongside and
+    which takes precedence.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+
+    Returns:
+        datetime | None: The latest update time of the user's notes, or None
+            when the board is empty.
+    """
+
+    state = board_state(request)
+    if state['pending']:
+        return None
+    return state['latest']
+
+
+def board_query_etag(request, *args, **kwargs) -> str:
+    """
+    Returns the ETag of a representation of the user's board selected by
+    query parameters, such as a page of the API's note listing: the
+    board's ETag combined with the parameters, so every cursor, fields and
+    limit variant has its own.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+
+    Returns:
+        str: The representation's ETag.
+    """
+
+    return _etag(board_etag(request), sorted(request.GET.lists()))
+
+
+def board_page_etag(request, *args, **kwargs):
+    """
+    Returns the ETag of an HTML page rendering the user's board.
+    Besides the board, the page embeds the CSRF token, so the token's secret
+    is part of the ETag; it is created here if the client has none yet, so
+    the ETag matches the token the page is rendered with. Pages with messages
+    waiting to be displayed are never validated, so the messages are not
+    left behind by a 304.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+
+    Returns:
+        str | None: The page's ETag, or None when messages are pending.
+    """
+
+    if len(messages.get_messages(request)):
+        return None
+    get_token(request)
+    return _etag(board_etag(request), request.META['CSRF_COOKIE'])
+
+
+def board_page_last_modified(request, *args, **kwargs):
+    """
+    Returns the Last-Modified time of an HTML page rendering the user's
+    board, or None when messages are pending.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+
+    Returns:
+        datetime | None: The board's Last-Modified time, or None.
+    """
+
+    if len(messages.get_messages(request)):
+        return None
+    return board_last_modified(request)
+
+
+async def aboard_etag(request, *args, **kwargs) -> str:
+    """
+    Async version of board_etag.
+    """
+
+    await aboard_state(request)
+    return board_etag(request)
+
+
+async def aboard_query_etag(request, *args, **kwargs) -> str:
+    """
+    Async version of board_query_etag.
+    """
+
+    await aboard_state(request)
+    return board_query_etag(request)
+
+
+async def aboard_last_modified(request, *args, **kwargs):
+    """
+    Async version of board_last_modified.
+    """
+
+    await aboard_state(request)
+    return board_last_modified(request)
+
+
+async def aboard_page_etag(request, *args, **kwargs):
+    """
+    Async version of board_page_etag. Messages and the CSRF token are read
+    from the session, which is already loaded once the user is resolved.
+    """
+
+    await aboard_state(request)
+    return board_page_etag(request)
+
+
+async def aboard_page_last_modified(request, *args, **kwargs):
+    """
+    Async version of board_page_last_modified.
+    """
+
+    await aboard_state(request)
+    return board_page_last_modified(request)
+
+
+def note_state(request, pk: int):
+    """
+    Returns the latest update time of one of the user's notes, memoized on
+    the request. Only the updated_at column is read.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+        pk (int): The primary key of the note.
+
+    Returns:
+        datetime | None: The note's update time, or None if the note does
+            not exist or belongs to another user.
+    """
+
+    cache = request.__dict__.setdefault('_note_state', {})
+    if pk not in cache:
+        cache[pk] = (
+            Note.objects.filter(pk=pk, user=request.user)
+            .values_list('updated_at', flat=True).first()
+        )
+    return cache[pk]
+
+
+def note_etag(request, pk: int, *args, **kwargs):
+    """
+    Returns the ETag of a JSON representation of one note.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+        pk (int): The primary key of the note.
+
+    Returns:
+        str | None: The note's ETag, or None if the note is not found so the
+            view itself can respond with 404.
+    """
+
+    updated_at = note_state(request, pk)
+    if updated_at is None:
+        return None
+    return _etag(request.user.pk, pk, updated_at)
+
+
+def note_last_modified(request, pk: int, *args, **kwargs):
+    """
+    Returns the Last-Modified time of one note.
+
+    Args:
+        request (HttpRequest): A request from an authenticated user.
+        pk (int): The primary key of the note.
+
+    Returns:
+        datetime | None: The note's update time, or None if not found.
+    """
+
+    return note_state(request, pk)
+
+
+async def anote_state(request, pk: int):
+    """
+    Async version of note_state, sharing its memo.
+    """
+
+    cache = request.__dict__.setdefault('_note_state', {})
+    if pk not in cache:
+        cache[pk] = await (
+            Note.objects.filter(pk=pk, user=request.user)
+            .values_list('updated_at', flat=True).afirst()
+        )
+    return cache[pk]
+
+
+async def anote_etag(request, pk: int, *args, **kwargs):
+    """
+    Async version of note_etag.
+    """
+
+    await anote_state(request, pk)
+    return note_etag(request, pk)
+
+
+async def anote_last_modified(request, pk: int, *args, **kwargs):
+    """
+    Async version of note_last_modified.
+    """
+
+    return await anote_state(request, pk)
+
+
+def async_condition(etag_func=None, last_modified_func=None):
+    """
+    Conditional GET decorator for async views with async validators.
+    Django's condition decorator accepts async views but calls its
+    validators synchronously, where the ORM cannot be used; this one awaits
+    the validators first and hands their values to condition, so the
+    request is answered with the same semantics.
+
+    Args:
+        etag_func (callable): An async function returning the ETag.
+        last_modified_func (callable): An async function returning the
+            Last-Modified time.
+
+    Returns:
+        callable: The decorator.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = last_modified = None
+            if etag_func:
+                etag = await etag_func(request, *args, **kwargs)
+            if last_modified_func:
+                last_modified = await last_modified_func(
+                    request, *args, **kwargs)
+            conditional_view = condition(
+                etag_func=lambda *args, **kwargs: etag,
+                last_modified_func=lambda *args, **kwargs: last_modified,
+            )(view)
+            return await conditional_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def safe_methods_only(decorator):
+    """
+    Applies a conditional GET decorator to GET and HEAD requests only, for
+    views that also write, so other methods do not run its validator
+    queries. Works with sync and async views.
+
+    Args:
+        decorator (callable): A conditional GET decorator.
+
+    Returns:
+        callable: The decorator, restricted to GET and HEAD.
+    """
+
+    def restricted(view):
+        conditional_view = decorator(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method in ('GET', 'HEAD'):
+                    return await conditional_view(request, *args, **kwargs)
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in ('GET', 'HEAD'):
+                return conditional_view(request, *args, **kwargs)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return restricted
+
+
+# Conditional GET decorators: views wrapped with these answer
+# If-None-Match/If-Modified-Since with 304 Not Modified after one cheap
+# validator query, without running the view.
+board_condition = condition(
+    etag_func=board_etag, last_modified_func=board_last_modified)
+board_page_condition = condition(
+    etag_func=board_page_etag, last_modified_func=board_page_last_modified)
+note_condition = condition(
+    etag_func=note_etag, last_modified_func=note_last_modified)
+# For the API's note listing, which also creates notes on POST
+board_list_condition = safe_methods_only(condition(
+    etag_func=board_query_etag, last_modified_func=board_last_modified))
+
+async_board_condition = async_condition(
+    etag_func=aboard_etag, last_modified_func=aboard_last_modified)
+async_board_page_condition = async_condition(
+    etag_func=aboard_page_etag,
+    last_modified_func=aboard_page_last_modified)
+async_note_condition = async_condition(
+    etag_func=anote_etag, last_modified_func=anote_last_modified)
+async_board_list_condition = safe_methods_only(async_condition(
+    etag_func=aboard_query_etag, last_modified_func=aboard_last_modified))
@@ -0,0 +1,482 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Types of the events pushed to a user's board. 'reset' tells a client that
+# events were missed (history expired, broker restarted, bulk import) and it
+# should reload its windows instead of applying deltas.
+EVENT_TYPES = ('create', 'update', 'move', 'delete', 'reset')
+
+# Fields of a note sent with create and update events, matching a card in a
+# board window.
+EVENT_NOTE_FIELDS = (
+    'id', 'title', 'preview', 'color', 'x_position', 'y_position',
+    'updated_at',
+)
+
+
+class EventBroker:
+    """
+    Base class of the brokers that fan note events out to a user's open
+    event streams.
+    Each user has their own sequence of event IDs, starting at 1, and a
+    bounded history of recent events, so a reconnecting client resumes from
+    the last ID it saw. When the events after that ID are no longer all
+    available, reading returns a single 'reset' event instead.
+
+    Methods:
+        publish: Appends an event to a user's history.
+        last_id: Returns the ID of a user's latest event.
+        read: Returns a user's events after an ID.
+        wait: Blocks until a user has events after an ID.
+        apublish: Async version of publish.
+        aread: Async version of read.
+    """
+
+    def publish(self, user_id: int, event_type: str, data: dict) -> int:
+        """
+        Appends an event to a user's history.
+
+        Args:
+            user_id (int): The primary key of the board's owner.
+            event_type (str): One of EVENT_TYPES.
+            data (dict): The JSON-serializable event payload.
+
+        Returns:
+            int: The ID of the event.
+        """
+
+        raise NotImplementedError
+
+    def last_id(self, user_id: int) -> int:
+        """
+        Returns the ID of a user's latest event, 0 if there is none.
+        """
+
+        raise NotImplementedError
+
+    def read(self, user_id: int, last_id: int) -> list:
+        """
+        Returns a user's events after an event ID.
+
+        Args:
+            user_id (int): The primary key of the board's owner.
+            last_id (int): The ID of the last event the client received.
+
+        Returns:
+            list: The events as {'id', 'type', 'data'} dictionaries, oldest
+                first, or a single 'reset' event carrying the latest ID when
+                some of them are no longer available.
+        """
+
+        raise NotImplementedError
+
+    def wait(self, user_id: int, last_id: int, timeout: float) -> list:
+        """
+        Waits until a user has events after an ID, or the timeout expires.
+        Polls every EVENT_POLL_INTERVAL seconds; brokers that can be
+        notified override this.
+
+        Args:
+            user_id (int): The primary key of the board's owner.
+            last_id (int): The ID of the last event the client received.
+            timeout (float): The longest time to wait, in seconds.
+
+        Returns:
+            list: The new events, empty if the timeout expired.
+        """
+
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.read(user_id, last_id)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            time.sleep(min(settings.EVENT_POLL_INTERVAL, remaining))
+
+    async def apublish(self, user_id: int, event_type: str,
+                       data: dict) -> int:
+        """
+        Async version of publish.
+        """
+
+        return await sync_to_async(self.publish)(user_id, event_type, data)
+
+    async def aread(self, user_id: int, last_id: int) -> list:
+        """
+        Async version of read.
+        """
+
+        return await sync_to_async(self.read)(user_id, last_id)
+
+    def _reset(self, user_id: int) -> list:
+        """
+        Returns the 'reset' event read when events were missed.
+        """
+
+        return [{'id': self.last_id(user_id), 'type': 'reset', 'data': {}}]
+
+
+class InProcessBroker(EventBroker):
+    """
+    A broker keeping event histories in memory.
+    Only streams served by the same process see the events, so it suits the
+    development server and single-process deployments; use CacheBroker when
+    several worker processes serve the app. Waiting streams are woken as
+    soon as an event is published.
+
+    Attributes:
+        history_size (int): The number of events kept per user.
+    """
+
+    def __init__(self, history_size: int = None):
+        """
+        Initializes empty event histories.
+
+        Args:
+            history_size (int): The number of events kept per user;
+                defaults to EVENT_HISTORY_SIZE.
+        """
+
+        self.history_size = history_size or settings.EVENT_HISTORY_SIZE
+        self._condition = threading.Condition()
+        self._histories = defaultdict(
+            lambda: deque(maxlen=self.history_size))
+        self._last_ids = defaultdict(int)
+
+    def publish(self, user_id: int, event_type: str, data: dict) -> int:
+        with self._condition:
+            self._last_ids[user_id] += 1
+            event_id = self._last_ids[user_id]
+            self._histories[user_id].append(
+                {'id': event_id, 'type': event_type, 'data': data})
+            self._condition.notify_all()
+        return event_id
+
+    def last_id(self, user_id: int) -> int:
+        with self._condition:
+            return self._last_ids.get(user_id, 0)
+
+    def read(self, user_id: int, last_id: int) -> list:
+        with self._condition:
+            latest = self._last_ids.get(user_id, 0)
+            if last_id == latest:
+                return []
+            history = self._histories.get(user_id, ())
+            # The client is ahead (the process restarted) or behind the
+            # oldest event kept
+            if (last_id > latest or not history
+                    or last_id < history[0]['id'] - 1):
+                return self._reset(user_id)
+            return [event for event in history if event['id'] > last_id]
+
+    def wait(self, user_id: int, last_id: int, timeout: float) -> list:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._last_ids.get(user_id, 0) != last_id, timeout)
+            return self.read(user_id, last_id)
+
+    async def apublish(self, user_id: int, event_type: str,
+                       data: dict) -> int:
+        # Only touches memory, so there is no need for a worker thread
+        return self.publish(user_id, event_type, data)
+
+    async def aread(self, user_id: int, last_id: int) -> list:
+        return self.read(user_id, last_id)
+
+
+class CacheBroker(EventBroker):
+    """
+    A broker storing event histories in Django's cache, for deployments
+    with several worker processes. The cache configured by
+    EVENT_BROKER_CACHE must be shared by every process (e.g. a database,
+    file or memcached cache).
+    Event IDs come from an atomic cache.incr and every event is stored
+    under its own key for EVENT_HISTORY_TIMEOUT seconds, so publishing takes
+    no lock. Readers fetch the events after their last ID with one
+    get_many and stop at an event still being written.
+
+    Attributes:
+        cache_alias (str): The alias of the cache holding the events.
+        prefix (str): The prefix of every cache key used by the broker.
+    """
+
+    def __init__(self, cache_alias: str = None, prefix: str = 'events'):
+        """
+        Initializes the broker on top of a configured cache.
+
+        Args:
+            cache_alias (str): The alias of the cache holding the events;
+                defaults to EVENT_BROKER_CACHE.
+            prefix (str): The prefix of every cache key used by the broker.
+        """
+
+        self.cache_alias = cache_alias or settings.EVENT_BROKER_CACHE
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        """
+        Returns the cache backend holding the events.
+        """
+
+        return caches[self.cache_alias]
+
+    def _key(self, user_id: int, name) -> str:
+        """
+        Builds a cache key for one of a user's events or their sequence.
+        """
+
+        return f'{self.prefix}:{user_id}:{name}'
+
+    def publish(self, user_id: int, event_type: str, data: dict) -> int:
+        sequence_key = self._key(user_id, 'seq')
+        self.cache.add(sequence_key, 0, None)
+        try:
+            event_id = self.cache.incr(sequence_key)
+        except ValueError:
+            # Evicted between add and incr; readers will reset
+            self.cache.add(sequence_key, 1, None)
+            event_id = 1
+        self.cache.set(
+            self._key(user_id, event_id),
+            {'id': event_id, 'type': event_type, 'data': data},
+            settings.EVENT_HISTORY_TIMEOUT,
+        )
+        return event_id
+
+    def last_id(self, user_id: int) -> int:
+        return self.cache.get(self._key(user_id, 'seq'), 0)
+
+    def read(self, user_id: int, last_id: int) -> list:
+        latest = self.last_id(user_id)
+        if last_id == latest:
+            return []
+        if last_id > latest or latest - last_id > settings.EVENT_HISTORY_SIZE:
+            return self._reset(user_id)
+        keys = [
+            self._key(user_id, event_id)
+            for event_id in range(last_id + 1, latest + 1)
+        ]
+        found = self.cache.get_many(keys)
+        events = []
+        for index, key in enumerate(keys):
+            if key in found:
+                events.append(found[key])
+            elif any(later in found for later in keys[index + 1:]):
+                # Expired or evicted while later events remain
+                return self._reset(user_id)
+            else:
+                # Still being written; read again on the next poll
+                break
+        return events
+
+
+@lru_cache
+def _load_broker(path: str) -> EventBroker:
+    """
+    Instantiates a broker class once per process.
+    """
+
+    return import_string(path)()
+
+
+def get_broker() -> EventBroker:
+    """
+    Returns the broker configured by EVENT_BROKER.
+
+    Returns:
+        EventBroker: The process-wide broker instance.
+    """
+
+    return _load_broker(settings.EVENT_BROKER)
+
+
+def note_data(note) -> dict:
+    """
+    Serializes a note for a create or update event.
+
+    Args:
+        note (Note): The saved note.
+
+    Returns:
+        dict: The EVENT_NOTE_FIELDS of the note.
+    """
+
+    return {field: getattr(note, field) for field in EVENT_NOTE_FIELDS}
+
+
+def publish_on_commit(user_id: int, event_type: str, data: dict,
+                      using: str = None) -> None:
+    """
+    Publishes an event once the current transaction commits, so streams
+    never see changes that are rolled back. Outside a transaction the event
+    is published immediately.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+        event_type (str): One of EVENT_TYPES.
+        data (dict): The event payload.
+        using (str): The alias of the database written to, such as the
+            owner's shard; defaults to the primary.
+    """
+
+    transaction.on_commit(
+        lambda: get_broker().publish(user_id, event_type, data),
+        using=using)
+
+
+def publish_moves(user_id: int, positions: dict) -> None:
+    """
+    Publishes one 'move' event per note for saved positions.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+        positions (dict): A mapping of note ID to (x, y).
+    """
+
+    for note_id, (x, y) in positions.items():
+        publish_on_commit(
+            user_id, 'move',
+            {'id': note_id, 'x_position': x, 'y_position': y})
+
+
+async def apublish_moves(user_id: int, positions: dict) -> None:
+    """
+    Async version of publish_moves, for positions saved by the async ORM
+    outside a transaction.
+    """
+
+    broker = get_broker()
+    for note_id, (x, y) in positions.items():
+        await broker.apublish(
+            user_id, 'move',
+            {'id': note_id, 'x_position': x, 'y_position': y})
+
+
+def format_event(event: dict) -> str:
+    """
+    Encodes an event in the text/event-stream format.
+
+    Args:
+        event (dict): An event with 'id', 'type' and 'data'.
+
+    Returns:
+        str: The event's 'id', 'event' and 'data' fields.
+    """
+
+    data = json.dumps(event['data'], cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+def iter_event_stream(user_id: int, last_id: int = None,
+                      duration: float = None):
+    """
+    Streams a user's events in the text/event-stream format.
+    Starts after last_id (or at the latest event for a new connection),
+    sends a comment as a heartbeat whenever EVENT_HEARTBEAT_INTERVAL seconds
+    pass without events so proxies keep the connection open, and ends after
+    duration seconds; the browser's EventSource then reconnects with the
+    Last-Event-ID header and resumes where it stopped. Each open stream
+    holds a worker thread under WSGI, so streams are kept short there.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+        last_id (int): The ID of the last event the client received, or None.
+        duration (float): Seconds before the stream ends; defaults to
+            EVENT_STREAM_DURATION.
+
+    Yields:
+        str: The retry interval, then events and heartbeats.
+    """
+
+    broker = get_broker()
+    if last_id is None:
+        last_id = broker.last_id(user_id)
+    deadline = time.monotonic() + (duration or settings.EVENT_STREAM_DURATION)
+    yield f'retry: {settings.EVENT_RETRY_MS}\n\n'
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = broker.wait(
+            user_id, last_id,
+            min(settings.EVENT_HEARTBEAT_INTERVAL, remaining))
+        for event in events:
+            yield format_event(event)
+            last_id = event['id']
+        if not events:
+            yield ': heartbeat\n\n'
+
+
+async def aiter_event_stream(user_id: int, last_id: int = None,
+                             duration: float = None):
+    """
+    Async version of iter_event_stream, served under ASGI where an open
+    stream costs a suspended task rather than a thread. New events are
+    polled every EVENT_POLL_INTERVAL seconds.
+
+    Args:
+        user_id (int): The primary key of the board's owner.
+        last_id (int): The ID of the last event the client received, or None.
+        duration (float): Seconds before the stream ends; defaults to
+            EVENT_STREAM_DURATION.
+
+    Yields:
+        str: The retry interval, then events and heartbeats.
+    """
+
+    broker = get_broker()
+    if last_id is None:
+        last_id = await sync_to_async(broker.last_id)(user_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (duration or settings.EVENT_STREAM_DURATION)
+    heartbeat = loop.time() + settings.EVENT_HEARTBEAT_INTERVAL
+    yield f'retry: {settings.EVENT_RETRY_MS}\n\n'
+    while loop.time() < deadline:
+        events = await broker.aread(user_id, last_id)
+        for event in events:
+            yield format_event(event)
+            last_id = event['id']
+        if events:
+            heartbeat = loop.time() + settings.EVENT_HEARTBEAT_INTERVAL
+        elif loop.time() >= heartbeat:
+            yield ': heartbeat\n\n'
+            heartbeat = loop.time() + settings.EVENT_HEARTBEAT_INTERVAL
+        await asyncio.sleep(settings.EVENT_POLL_INTERVAL)
+
+
+def parse_last_event_id(request) -> int:
+    """
+    Returns the ID of the last event a reconnecting client received.
+    Read from the Last-Event-ID header sent by EventSource, or the
+    'last_event_id' query parameter for a client opening a new EventSource.
+
+    Args:
+        request (HttpRequest): The event stream request.
+
+    Returns:
+        int | None: The ID, or None for a new connection.
+
+    Raises:
+        ValueError: If the ID is not a non-negative integer.
+    """
+
+    value = request.headers.get(
+        'Last-Event-ID', request.GET.get('last_event_id'))
+    if value in (None, ''):
+        return None
+    last_id = int(value)
+    if last_id < 0:
+        raise ValueError('The last event ID must not be negative.')
+    return last_id
@@ -0,0 +1,225 @@
+import csv
+import json
+from contextlib import nullcontext
+
+from django.conf import settings
+
+from .models import Note
+from .positions import awith_pending_positions, with_pending_positions
+from .request_stats import unbudgeted
+
+# Columns of an exported note, in CSV column order.
+EXPORT_FIELDS = (
+    'id', 'title', 'content', 'color', 'x_position', 'y_position',
+    'created_at', 'updated_at',
+)
+
+# Export formats and the content type each one is served with.
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _chunk_query(user, last_id: int, chunk_size: int):
+    """
+    Returns the query of the chunk of a user's notes after last_id.
+    """
+
+    return (
+        Note.objects.filter(user=user, id__gt=last_id).order_by('id')
+        .values(*EXPORT_FIELDS)[:chunk_size]
+    )
+
+
+def _export_rows(rows: list) -> list:
+    """
+    Formats the datetimes of exported rows in place, in full-precision
+    ISO 8601 format.
+    """
+
+    for row in rows:
+        row['created_at'] = row['created_at'].isoformat()
+        row['updated_at'] = row['updated_at'].isoformat()
+    return rows
+
+
+def iter_notes(user, chunk_size: int = None):
+    """
+    Yields a user's notes in primary key order, one chunk at a time.
+    Each chunk is a separate keyset query (id greater than the last one
+    seen), so at most chunk_size rows are held in memory and no read
+    transaction stays open between chunks, however large the board is.
+    Chunks after the first do not count against the query budget.
+
+    Args:
+        user (User): The owner of the notes.
+        chunk_size (int): The number of rows fetched per query; defaults to
+            EXPORT_CHUNK_SIZE.
+
+    Yields:
+        dict: One note per row, with the EXPORT_FIELDS keys and datetimes
+            in full-precision ISO 8601 format.
+    """
+
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    last_id = 0
+    while True:
+        with unbudgeted() if last_id else nullcontext():
+            chunk = list(_chunk_query(user, last_id, chunk_size))
+        if not chunk:
+            return
+        yield from _export_rows(with_pending_positions(user, chunk))
+        last_id = chunk[-1]['id']
+
+
+async def aiter_notes(user, chunk_size: int = None):
+    """
+    Async version of iter_notes, reading each chunk with the async ORM.
+
+    Args:
+        user (User): The owner of the notes.
+        chunk_size (int): The number of rows fetched per query; defaults to
+            EXPORT_CHUNK_SIZE.
+
+    Yields:
+        dict: One note per row, as yielded by iter_notes.
+    """
+
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    last_id = 0
+    while True:
+        with unbudgeted() if last_id else nullcontext():
+            chunk = [
+                row async for row in _chunk_query(user, last_id, chunk_size)]
+        if not chunk:
+            return
+        for row in _export_rows(await awith_pending_positions(user, chunk)):
+            yield row
+        last_id = chunk[-1]['id']
+
+
+def iter_ndjson(rows):
+    """
+    Encodes rows as newline-delimited JSON.
+
+    Args:
+        rows (Iterable): Note dictionaries.
+
+    Yields:
+        str: One JSON object per line.
+    """
+
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """
+    A file-like object whose write method returns the value written, so a
+    csv.writer can produce one line at a time without a buffer.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(rows):
+    """
+    Encodes rows as CSV with a header line.
+
+    Args:
+        rows (Iterable): Note dictionaries.
+
+    Yields:
+        str: The header line, then one line per row.
+    """
+
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+async def aiter_ndjson(rows):
+    """
+    Async version of iter_ndjson.
+
+    Args:
+        rows (AsyncIterable): Note dictionaries.
+
+    Yields:
+        str: One JSON object per line.
+    """
+
+    async for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+async def aiter_csv(rows):
+    """
+    Async version of iter_csv.
+
+    Args:
+        rows (AsyncIterable): Note dictionaries.
+
+    Yields:
+        str: The header line, then one line per row.
+    """
+
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    async for row in rows:
+        yield writer.writerow(row)
+
+
+def _check_format(export_format: str) -> None:
+    """
+    Raises ValueError if export_format is not one of EXPORT_FORMATS.
+    """
+
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unsupported export format: {export_format}.')
+
+
+def export_notes(user, export_format: str, chunk_size: int = None):
+    """
+    Streams a user's notes in an export format.
+
+    Args:
+        user (User): The owner of the notes.
+        export_format (str): One of the EXPORT_FORMATS keys.
+        chunk_size (int): The number of rows fetched per query.
+
+    Returns:
+        Iterator: The lines of the export.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+
+    _check_format(export_format)
+    encode = iter_csv if export_format == 'csv' else iter_ndjson
+    return encode(iter_notes(user, chunk_size))
+
+
+def aexport_notes(user, export_format: str, chunk_size: int = None):
+    """
+    Async version of export_notes, for async streaming responses. The
+    format is checked when called, before anything is streamed.
+
+    Args:
+        user (User): The owner of the notes.
+        export_format (str): One of the EXPORT_FORMATS keys.
+        chunk_size (int): The number of rows fetched per query.
+
+    Returns:
+        AsyncIterator: The lines of the export.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+
+    _check_format(export_format)
+    encode = aiter_csv if export_format == 'csv' else aiter_ndjson
+    return encode(aiter_notes(user, chunk_size))
@@ -0,0 +1,126 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+
+class HashingBusy(Exception):
+    """
+    Raised when the hashing pool has too many jobs waiting, or a job waited
+    longer than HASHING_POOL_TIMEOUT.
+    """
+
+
+class HashingPool:
+    """
+    Runs password hashing on a few dedicated threads, so a burst of logins
+    or signups only takes that many CPUs at once and the request workers
+    serving the board stay free. PBKDF2 releases the GIL while hashing, so
+    the pool's threads hash in parallel with the rest of the process. At
+    most `workers` jobs run and `backlog` more wait; beyond that, and for
+    jobs that wait longer than HASHING_POOL_TIMEOUT, HashingBusy is raised
+    instead of queueing more work. Jobs run in a copy of the caller's
+    context, so their time counts towards the caller's request. Jobs must
+    not use the database, whose transactions belong to the caller's
+    thread.
+
+    Attributes:
+        workers (int): The number of hashing threads.
+        backlog (int): The most jobs waiting for a thread.
+
+    Methods:
+        run: Runs a job on the pool and returns its result.
+    """
+
+    def __init__(self, workers: int = None, backlog: int = None):
+        """
+        Initializes the pool; its threads start with the first jobs.
+
+        Args:
+            workers (int): The number of hashing threads; defaults to
+                HASHING_POOL_WORKERS.
+            backlog (int): The most jobs waiting for a thread; defaults to
+                HASHING_POOL_BACKLOG.
+        """
+
+        self.workers = workers or settings.HASHING_POOL_WORKERS
+        self.backlog = (settings.HASHING_POOL_BACKLOG if backlog is None
+                        else backlog)
+        self._slots = threading.BoundedSemaphore(self.workers + self.backlog)
+        self._executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix='hashing')
+
+    def run(self, func, *args, **kwargs):
+        """
+        Runs a job on the pool and waits for it.
+
+        Args:
+            func (callable): The hashing job.
+            *args: Positional arguments for func.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            The return value of func.
+
+        Raises:
+            HashingBusy: If the pool is full or the job timed out.
+        """
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy('Too many password checks are waiting.')
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda future: self._slots.release())
+        try:
+            return future.result(settings.HASHING_POOL_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingBusy('A password check took too long.')
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool() -> HashingPool:
+    """
+    Returns the process-wide hashing pool.
+
+    Returns:
+        HashingPool: The pool used while HASHING_POOL_ENABLED is on.
+    """
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool()
+        return _pool
+
+
+def run_hashing(func, *args, **kwargs):
+    """
+    Runs password hashing on the hashing pool when HASHING_POOL_ENABLED is
+    on, or directly otherwise, with the same result or exception either
+    way.
+
+    Args:
+        func (callable): The hashing job, which must not use the database.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        The return value of func.
+
+    Raises:
+        HashingBusy: If the pool is full or the job timed out.
+    """
+
+    if not settings.HASHING_POOL_ENABLED:
+        return func(*args, **kwargs)
+    return get_hashing_pool().run(func, *args, **kwargs)
@@ -0,0 +1,164 @@
+import codecs
+import csv
+import json
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import transaction
+
+from . import board_cache
+from .events import publish_on_commit
+from .forms import NoteForm
+from .models import Note, note_preview
+from .request_stats import unbudgeted
+from .shards import assign_note_ids, note_database
+
+# Import formats, matching the export formats.
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+
+def iter_ndjson_records(lines):
+    """
+    Parses newline-delimited JSON one line at a time.
+    Blank lines are skipped; lines that are not JSON objects are reported
+    as errors without stopping the import.
+
+    Args:
+        lines (Iterable): Text lines of the input.
+
+    Yields:
+        tuple: (row number, record dict or None, error message or None).
+    """
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON.'
+            continue
+        if not isinstance(record, dict):
+            yield number, None, 'Expected a JSON object.'
+            continue
+        yield number, record, None
+
+
+def iter_csv_records(lines):
+    """
+    Parses CSV with a header line one record at a time.
+
+    Args:
+        lines (Iterable): Text lines of the input.
+
+    Yields:
+        tuple: (row number, record dict, None); rows are numbered from 1
+            after the header.
+    """
+
+    for number, record in enumerate(csv.DictReader(lines), start=1):
+        yield number, record, None
+
+
+def iter_records(stream, import_format: str):
+    """
+    Parses an uploaded or opened binary stream incrementally.
+
+    Args:
+        stream (Iterable): A binary file-like object yielding lines.
+        import_format (str): One of IMPORT_FORMATS.
+
+    Returns:
+        Iterator: (row number, record, error) tuples.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f'Unsupported import format: {import_format}.')
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if import_format == 'csv':
+        return iter_csv_records(lines)
+    return iter_ndjson_records(lines)
+
+
+def import_notes(user, records, batch_size: int = None) -> dict:
+    """
+    Validates records with NoteForm and inserts them in batches.
+    Each record is validated with the same rules as the note creation form,
+    with omitted fields taking the model's defaults, and valid notes are
+    inserted with bulk_create, one transaction per batch. Only the current
+    batch and a bounded number of error reports are held in memory, so
+    imports of any size run in constant memory. Since bulk_create skips
+    save() and sends no signals, each note's preview is set here, and the
+    owner's cached board is invalidated once at the end and their open
+    boards are told to reload with a 'reset' event, even if reading the
+    input fails after some batches were inserted.
+
+    Args:
+        user (User): The owner of the imported notes.
+        records (Iterable): (row number, record, error) tuples as produced
+            by iter_records.
+        batch_size (int): The number of notes inserted per batch; defaults
+            to IMPORT_BATCH_SIZE.
+
+    Returns:
+        dict: The number of notes 'imported', the number of 'failed' rows,
+            their 'errors' as {'row', 'errors'} dictionaries (at most
+            IMPORT_MAX_ERRORS) and whether the errors were 'truncated'.
+    """
+
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    defaults = {
+        field: Note._meta.get_field(field).get_default()
+        for field in NoteForm._meta.fields
+    }
+    report = {'imported': 0, 'failed': 0, 'errors': [], 'truncated': False}
+
+    def fail(number, errors):
+        report['failed'] += 1
+        if len(report['errors']) < settings.IMPORT_MAX_ERRORS:
+            report['errors'].append({'row': number, 'errors': errors})
+        else:
+            report['truncated'] = True
+
+    def insert(batch):
+        # Batches after the first do not count against the query budget
+        with unbudgeted() if report['imported'] else nullcontext():
+            assign_note_ids(batch)
+            with transaction.atomic(using=note_database()):
+                Note.objects.bulk_create(batch)
+        report['imported'] += len(batch)
+
+    batch = []
+    try:
+        for number, record, error in records:
+            if error:
+                fail(number,
+                     {'__all__': [{'message': error, 'code': 'invalid'}]})
+                continue
+            form = NoteForm({
+                **defaults,
+                **{key: value for key, value in record.items()
+                   if key in defaults and value not in (None, '')},
+            })
+            if not form.is_valid():
+                fail(number, form.errors.get_json_data(escape_html=False))
+                continue
+            note = form.save(commit=False)
+            note.user = user
+            note.preview = note_preview(note.content)
+            batch.append(note)
+            if len(batch) >= batch_size:
+                insert(batch)
+                batch = []
+        if batch:
+            insert(batch)
+    finally:
+        # Also when the input turns out to be unreadable part way through,
+        # since the batches inserted until then stay committed
+        if report['imported']:
+            board_cache.invalidate(user.pk)
+            publish_on_commit(user.pk, 'reset', {})
+    return report
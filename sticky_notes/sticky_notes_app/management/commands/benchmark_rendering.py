@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sticky_notes_app.benchmark import (
+    RENDER_PATHS, RENDER_SIZES, run_render_benchmark)
+
+
+class Command(BaseCommand):
+    """
+    Compares the ways of rendering a board at several board sizes: the
+    legacy per-card template loop, the note_list shell with every note as
+    compact JSON for the client to hydrate, and the shell with a single
+    window of notes, as note_list serves it. It reports the fastest render
+    time and page size of each, and how much faster the JSON board renders
+    than the template loop. The notes are generated in memory, so no
+    database is touched.
+    """
+
+    help = 'Benchmarks rendering the board as cards against JSON.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the board sizes and the number of renders.
+        """
+
+        parser.add_argument(
+            'notes', nargs='*', type=int, default=list(RENDER_SIZES),
+            help='Board sizes to render, in notes (default: 1000 10000 '
+                 '100000).',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Renders timed per path; the fastest counts (default: 3).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Renders each board size in every way and prints the results.
+        """
+
+        if options['repeat'] < 1 or min(options['notes']) < 1:
+            raise CommandError('Board sizes and --repeat must be positive.')
+        for count in options['notes']:
+            results = run_render_benchmark(count, options['repeat'])
+            paths = ', '.join(
+                f'{path} {results[path][0] * 1000:,.1f} ms '
+                f'({results[path][1] / 1024:,.0f} KiB)'
+                for path in RENDER_PATHS)
+            speedup = results['template'][0] / results['json'][0]
+            self.stdout.write(
+                f'{count:,} notes: {paths}; JSON is {speedup:.1f}x faster '
+                f'than the template.')
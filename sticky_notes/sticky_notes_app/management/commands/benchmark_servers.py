@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
+
+from sticky_notes_app.benchmark import run_asgi, run_wsgi, session_headers
+
+
+class Command(BaseCommand):
+    """
+    Compares the board views served under WSGI and ASGI.
+    Drives the project's WSGI application from a thread pool, as a threaded
+    WSGI server does, and its ASGI application from concurrent tasks on one
+    event loop, as an ASGI server does, with the same requests authenticated
+    as a user, then reports requests/sec and latency percentiles for both.
+    The applications are called in-process, so the numbers measure Django's
+    handlers and the views rather than a particular server's HTTP parsing.
+    """
+
+    help = 'Benchmarks the board views under WSGI and ASGI.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the username argument and the load options.
+        """
+
+        parser.add_argument('username', help='User whose board is loaded.')
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Requests measured per server (default: 1000).',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help='Requests in flight at once (default: 50).',
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Path to request; repeat for several (default: the board '
+                 'page and its initial window).',
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Host header, which must be allowed (default: localhost).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs both benchmarks and prints their summaries.
+        """
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist.")
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive.')
+        paths = options['paths'] or [
+            reverse('note_list'),
+            reverse('note_window') + '?x_min=0&x_max=2000&y_min=0&y_max=1200',
+        ]
+        headers = session_headers(user, options['host'])
+        runs = (
+            ('WSGI', run_wsgi, get_wsgi_application()),
+            ('ASGI', run_asgi, get_asgi_application()),
+        )
+        for name, run, application in runs:
+            summary = run(
+                application, paths, headers, options['requests'],
+                options['concurrency'])
+            self.stdout.write(
+                f"{name}: {summary['rps']:,.0f} requests/sec, "
+                f"p50 {summary['p50']:.1f} ms, p99 {summary['p99']:.1f} ms, "
+                f"max {summary['max']:.1f} ms, {summary['errors']} errors "
+                f"({summary['requests']} requests, "
+                f"{options['concurrency']} concurrent)."
+            )
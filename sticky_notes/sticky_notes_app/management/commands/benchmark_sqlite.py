@@ -0,0 +1,106 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from sticky_notes_app.benchmark import (
+    create_sqlite_notes, run_sqlite_contention, sqlite_settings)
+
+
+class Command(BaseCommand):
+    """
+    Compares the production SQLite profile with Django's stock SQLite
+    settings under concurrent reads and writes.
+    Runs the same workload (board window reads alongside batched position
+    writes) against temporary database files: one with the stock settings
+    and per-request connections, one with the OPTIONS and persistent
+    connections of the configured default database, and one with the same
+    profile and writes funneled through a WriteQueue. It reports the
+    throughput, p99 latencies and "database is locked" errors of each.
+    The configured database itself is never touched.
+    """
+
+    help = 'Benchmarks the SQLite profile against the stock settings.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the workload options.
+        """
+
+        parser.add_argument(
+            '--notes', type=int, default=20000,
+            help='Notes in each database (default: 20000).',
+        )
+        parser.add_argument(
+            '--users', type=int, default=20,
+            help='Users owning the notes (default: 20).',
+        )
+        parser.add_argument(
+            '--readers', type=int, default=8,
+            help='Concurrent reading threads (default: 8).',
+        )
+        parser.add_argument(
+            '--writers', type=int, default=4,
+            help='Concurrent writing threads (default: 4).',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Seconds each profile runs for (default: 5).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the workload with each profile and prints their results.
+        """
+
+        base = connections['default'].settings_dict
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite.')
+        if options['users'] < 1 or options['notes'] < options['users']:
+            raise CommandError('--notes must be at least --users (>= 1).')
+        persistent = base['CONN_MAX_AGE'] != 0
+        profiles = (
+            ('stock', {}, False, False),
+            ('production', base['OPTIONS'], persistent, False),
+            ('write queue', base['OPTIONS'], persistent, True),
+        )
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for index, (name, db_options, persistent, queued) in enumerate(
+                    profiles):
+                settings_dict = sqlite_settings(
+                    base, os.path.join(directory, f'{index}.sqlite3'),
+                    db_options, persistent)
+                create_sqlite_notes(
+                    settings_dict, options['notes'], options['users'])
+                results[name] = result = run_sqlite_contention(
+                    settings_dict, options['notes'], options['users'],
+                    options['readers'], options['writers'],
+                    options['duration'], queued)
+                self.stdout.write(
+                    f"{name}: {result['reads']:,.0f} reads/sec "
+                    f"(p99 {self._ms(result['read_p99'])}), "
+                    f"{result['writes']:,.0f} writes/sec "
+                    f"(p99 {self._ms(result['write_p99'])}), "
+                    f"{result['lock_errors']} lock errors."
+                )
+        stock, production = results['stock'], results['production']
+        if stock['reads']:
+            self.stdout.write(
+                f"Read throughput: {production['reads'] / stock['reads']:.2f}x"
+                f"; lock errors: {stock['lock_errors']} -> "
+                f"{production['lock_errors']}.")
+        queued = results['write queue']
+        if production['writes']:
+            self.stdout.write(
+                f"Write throughput with the queue: "
+                f"{queued['writes'] / production['writes']:.2f}x.")
+
+    @staticmethod
+    def _ms(value) -> str:
+        """
+        Formats a latency in milliseconds, or 'n/a' if nothing completed.
+        """
+
+        return 'n/a' if value is None else f'{value:.1f} ms'
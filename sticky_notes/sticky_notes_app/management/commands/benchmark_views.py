@@ -0,0 +1,213 @@
+import json
+import platform
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from sticky_notes_app.benchmark import (
+    VIEW_SCENARIOS, benchmark_users, client_sender, live_sender,
+    run_view_benchmark)
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the note views end to end with the users of seed_notes.
+    Drives login, note_list, note_create, note_update, update_position and
+    note_delete in turn, each with --requests requests sent by
+    --concurrency threads as the seeded users, either in process through
+    Django's test client or over HTTP to a running server with --url (which
+    must use the same database). For each view it reports the throughput,
+    the latency percentiles and, in process, the queries per request.
+    --fast-auth runs the in-process benchmark with FAST_AUTH on (cached
+    sessions and users), to compare with a run without it. Login
+    throttling is off in process; a server benchmarked with --url needs
+    AUTH_THROTTLE_ENABLED off for the login scenario. The results can
+    be written as JSON with --output and compared with an earlier run's
+    with --compare.
+    """
+
+    help = 'Benchmarks the note views with the seeded users.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the load, target and result options.
+        """
+
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            choices=VIEW_SCENARIOS,
+            help='View to benchmark; repeat for several (default: all).',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests measured per view (default: 200).',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Requests in flight at once (default: 1).',
+        )
+        parser.add_argument(
+            '--prefix', default='benchuser',
+            help='Start of the seeded usernames (default: benchuser).',
+        )
+        parser.add_argument(
+            '--password', default='benchpass',
+            help='Password of the seeded users (default: benchpass).',
+        )
+        parser.add_argument(
+            '--url',
+            help='URL of a running server to benchmark, e.g. '
+                 'http://localhost:8000 (default: in process).',
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Host header in process, which must be allowed '
+                 '(default: localhost).',
+        )
+        parser.add_argument(
+            '--fast-auth', action='store_true',
+            help='Benchmark in process with FAST_AUTH on.',
+        )
+        parser.add_argument(
+            '--output', help='File to write the results to as JSON.')
+        parser.add_argument(
+            '--compare', help='JSON results of an earlier run to compare to.')
+
+    def handle(self, *args, **options):
+        """
+        Runs every scenario, prints and saves the results and compares them.
+        """
+
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive.')
+        if options['fast_auth'] and options['url']:
+            raise CommandError(
+                "--fast-auth only applies in process; set the server's "
+                'FAST_AUTH instead.')
+        users = benchmark_users(options['prefix'])
+        if not users:
+            raise CommandError(
+                f"No users named {options['prefix']}N; run seed_notes first.")
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as file:
+                    baseline = json.load(file)['scenarios']
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+        if options['url']:
+            def sender(user):
+                return live_sender(options['url'], user)
+        else:
+            def sender(user):
+                return client_sender(user, options['host'])
+        mode = override_settings(
+            FAST_AUTH=True,
+            SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        ) if options['fast_auth'] else nullcontext()
+        # Every in-process request comes from one address and few users
+        throttle = nullcontext() if options['url'] else override_settings(
+            AUTH_THROTTLE_ENABLED=False)
+        with mode, throttle:
+            results = self.run(users, sender, baseline, options)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+
+    def run(self, users: list, sender, baseline: dict, options: dict) -> dict:
+        """
+        Runs every scenario, printing each result and its comparison.
+
+        Args:
+            users (list): The seeded users.
+            sender (callable): Returns the request function of a user.
+            baseline (dict): An earlier run's scenarios, or None.
+            options (dict): The command's options.
+
+        Returns:
+            dict: The results, as written with --output.
+        """
+
+        results = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'target': options['url'] or 'in process',
+            'python': platform.python_version(),
+            'users': len(users),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'settings': {
+                name: getattr(settings, name) for name in (
+                    'POSITION_WRITE_BEHIND', 'WRITE_QUEUE_ENABLED',
+                    'DATABASE_REPLICAS', 'NOTE_SHARDS', 'FAST_AUTH',
+                    'HASHING_POOL_ENABLED')
+            },
+            'scenarios': {},
+        }
+        for scenario in options['scenarios'] or VIEW_SCENARIOS:
+            try:
+                summary = run_view_benchmark(
+                    scenario, users, options['password'],
+                    options['requests'], options['concurrency'], sender)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            if options['url']:
+                # The server's queries run in another process
+                summary['queries'] = summary['max_queries'] = None
+            results['scenarios'][scenario] = summary
+            self.stdout.write(self.describe(scenario, summary))
+            if baseline and scenario in baseline:
+                self.stdout.write(
+                    '  ' + self.compare(baseline[scenario], summary))
+        return results
+
+    @staticmethod
+    def describe(scenario: str, summary: dict) -> str:
+        """
+        Formats the summary of one scenario.
+
+        Args:
+            scenario (str): The name of the scenario.
+            summary (dict): Its summary, from run_view_benchmark.
+
+        Returns:
+            str: One line with the throughput, latencies and queries.
+        """
+
+        queries = (
+            '' if summary['queries'] is None else
+            f", {summary['queries']:.1f} queries/request "
+            f"(max {summary['max_queries']})")
+        return (
+            f"{scenario}: {summary['rps']:,.1f} requests/sec, "
+            f"p50 {summary['p50']:.1f} ms, p95 {summary['p95']:.1f} ms, "
+            f"p99 {summary['p99']:.1f} ms, max {summary['max']:.1f} ms"
+            f"{queries}, {summary['errors']} errors.")
+
+    @staticmethod
+    def compare(before: dict, after: dict) -> str:
+        """
+        Formats the change of a scenario's results since an earlier run.
+
+        Args:
+            before (dict): The scenario's summary in the earlier run.
+            after (dict): Its summary now.
+
+        Returns:
+            str: The relative changes of the throughput and latencies, and
+                the change of queries per request.
+        """
+
+        def change(name):
+            if not before.get(name):
+                return 'n/a'
+            return f'{(after[name] - before[name]) / before[name]:+.1%}'
+
+        line = (f"vs baseline: requests/sec {change('rps')}, "
+                f"p50 {change('p50')}, p99 {change('p99')}")
+        if before.get('queries') is not None and after['queries'] is not None:
+            line += f", queries {after['queries'] - before['queries']:+.1f}"
+        return line + '.'
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from sticky_notes_app import board_cache
+
+
+class Command(BaseCommand):
+    """
+    Reports the hit and miss counters of the per-user board cache, used to
+    size the cache backend and BOARD_CACHE_TIMEOUT.
+    """
+
+    help = 'Shows the board cache hit/miss counters.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the --reset option.
+        """
+
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Reset the counters after reporting them.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Prints the counters and the hit ratio, then optionally resets them.
+        """
+
+        stats = board_cache.stats()
+        ratio = stats['hit_ratio']
+        self.stdout.write(f"Hits: {stats['hits']}")
+        self.stdout.write(f"Misses: {stats['misses']}")
+        self.stdout.write(
+            'Hit ratio: ' + ('n/a' if ratio is None else f'{ratio:.1%}'))
+        if options['reset']:
+            board_cache.reset_stats()
+            self.stdout.write('Counters reset.')
@@ -0,0 +1,78 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from sticky_notes_app.export import EXPORT_FORMATS, export_notes
+from sticky_notes_app.shards import shard_for_user, use_shard
+
+
+class Command(BaseCommand):
+    """
+    Exports a user's notes as NDJSON or CSV.
+    Streams the notes in keyset chunks to a file or standard output, so
+    memory use stays constant whatever the size of the board, and reports
+    the number of rows written and the throughput (on standard error when
+    the export itself goes to standard output).
+    """
+
+    help = "Streams a user's notes to a file as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        """
+        Adds the username argument and the format, output and chunk size
+        options.
+        """
+
+        parser.add_argument('username', help='Owner of the notes.')
+        parser.add_argument(
+            '--format', choices=sorted(EXPORT_FORMATS), default='ndjson',
+            help='Export format (default: ndjson).',
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help='File to write to (default: standard output).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help='Notes read per query (default: EXPORT_CHUNK_SIZE).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Writes the export and reports its throughput.
+        """
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist.")
+        if options['output']:
+            output = open(
+                options['output'], 'w', encoding='utf-8', newline='')
+            write, report = output.write, self.stdout
+        else:
+            output = None
+
+            def write(line):
+                self.stdout.write(line, ending='')
+
+            # Keeps standard output for the export itself
+            report = self.stderr
+        lines = 0
+        started = time.perf_counter()
+        try:
+            with use_shard(shard_for_user(user.pk)):
+                for line in export_notes(
+                        user, options['format'], options['chunk_size']):
+                    write(line)
+                    lines += 1
+        finally:
+            if output:
+                output.close()
+        elapsed = time.perf_counter() - started
+        # CSV exports start with a header line
+        rows = lines - 1 if options['format'] == 'csv' else lines
+        rate = rows / elapsed if elapsed else 0
+        report.write(
+            f'Exported {rows} notes in {elapsed:.2f}s ({rate:,.0f} rows/sec).')
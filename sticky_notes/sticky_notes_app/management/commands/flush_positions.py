@@ -0,0 +1,71 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from sticky_notes_app.positions import get_position_buffer
+
+logger = logging.getLogger('sticky_notes_app.positions')
+
+
+class Command(BaseCommand):
+    """
+    Flushes buffered note positions to the database.
+    Runs the write-behind flusher used when POSITION_WRITE_BEHIND is enabled:
+    every interval it drains the position buffer and writes all pending
+    positions with one bulk UPDATE. Runs until interrupted, flushing one last
+    time on exit, or only once with --once. A flush that fails (e.g. with
+    the database locked) is logged and its positions are kept in the buffer
+    for the next one.
+    """
+
+    help = 'Writes buffered note positions to the database periodically.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the --interval and --once options.
+        """
+
+        parser.add_argument(
+            '--interval', type=int,
+            default=settings.POSITION_FLUSH_INTERVAL_MS,
+            help='Milliseconds between flushes.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Flush once and exit.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Flushes the buffer once or in a loop until interrupted.
+        """
+
+        buffer = get_position_buffer()
+        if options['once']:
+            self.report(buffer.flush())
+            return
+        interval = options['interval'] / 1000
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    self.report(buffer.flush())
+                except (DatabaseError, TimeoutError):
+                    logger.exception('Flushing positions failed; retrying.')
+                time.sleep(max(0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.report(buffer.flush())
+
+    def report(self, written: int):
+        """
+        Reports the number of positions written by a flush, if any.
+
+        Args:
+            written (int): The number of positions written.
+        """
+
+        if written:
+            self.stdout.write(f'Flushed {written} positions.')
@@ -0,0 +1,72 @@
+import csv
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from sticky_notes_app.importer import IMPORT_FORMATS, import_notes, iter_records
+from sticky_notes_app.shards import shard_for_user, use_shard
+
+
+class Command(BaseCommand):
+    """
+    Imports notes for a user from an NDJSON or CSV file.
+    Parses the file incrementally, validates each row with the same rules as
+    NoteForm and inserts valid rows in batches with bulk_create, then
+    reports the rows imported, the throughput and any per-row errors.
+    """
+
+    help = 'Imports notes for a user from an NDJSON or CSV file.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the username and path arguments and the format and batch size
+        options.
+        """
+
+        parser.add_argument('username', help='Owner of the imported notes.')
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument(
+            '--format', choices=IMPORT_FORMATS,
+            help='Import format (default: taken from the file extension).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Notes inserted per batch (default: IMPORT_BATCH_SIZE).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the import and reports its outcome.
+        """
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist.")
+        import_format = (
+            options['format'] or options['path'].rpartition('.')[2].lower())
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as stream, \
+                    use_shard(shard_for_user(user.pk)):
+                report = import_notes(
+                    user, iter_records(stream, import_format),
+                    options['batch_size'])
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        rows = report['imported'] + report['failed']
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Imported {report['imported']} notes, {report['failed']} rows "
+            f'failed, in {elapsed:.2f}s ({rate:,.0f} rows/sec).')
+        for error in report['errors']:
+            messages = '; '.join(
+                f"{field}: {detail['message']}"
+                for field, details in error['errors'].items()
+                for detail in details
+            )
+            self.stderr.write(f"Row {error['row']}: {messages}")
+        if report['truncated']:
+            self.stderr.write('Further errors were not reported.')
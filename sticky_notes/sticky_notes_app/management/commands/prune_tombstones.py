@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sticky_notes_app.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    """
+    Deletes the tombstones of notes deleted longer ago than the sync
+    retention, on every database holding notes. Clients whose sync token
+    predates the pruned tombstones are told to reload the whole board.
+    Meant to run daily, e.g. from cron.
+    """
+
+    help = 'Deletes note tombstones older than the sync retention.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the --days option.
+        """
+
+        parser.add_argument(
+            '--days', type=float,
+            default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help='Age in days of the tombstones deleted (default: '
+                 'SYNC_TOMBSTONE_RETENTION_DAYS).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Prunes the tombstones and reports how many were deleted.
+        """
+
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative.')
+        deleted = prune_tombstones(options['days'])
+        self.stdout.write(f'Deleted {deleted} tombstones.')
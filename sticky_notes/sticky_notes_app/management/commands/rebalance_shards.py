@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from sticky_notes_app.shards import move_user, plan_rebalance, shard_loads
+
+
+class Command(BaseCommand):
+    """
+    Moves users' notes between shards while the site stays up.
+    With --user and --to, moves one user to the given shard. Otherwise,
+    counts the notes on every shard of NOTE_SHARDS and moves users from the
+    fullest shards to the emptiest until the counts are as even as whole
+    users allow, printing the plan only with --dry-run. Each move only
+    pauses the writes of the user being moved.
+    """
+
+    help = 'Rebalances users across note shards, or moves one user.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the --user, --to, --dry-run and --grace options.
+        """
+
+        parser.add_argument('--user', help='Username of a user to move.')
+        parser.add_argument('--to', help='Shard to move the user to.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Print the rebalancing plan without moving anyone.',
+        )
+        parser.add_argument(
+            '--grace', type=float,
+            help='Seconds to wait for in-flight writes before each move '
+                 '(default: NOTE_SHARD_MOVE_GRACE).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Moves the given user, or plans and runs a rebalance.
+        """
+
+        if not settings.NOTE_SHARDS:
+            raise CommandError('Sharding is disabled; set NOTE_SHARDS.')
+        if bool(options['user']) != bool(options['to']):
+            raise CommandError('--user and --to must be given together.')
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+            try:
+                moved = move_user(user.pk, options['to'], options['grace'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(
+                f"Moved {moved} notes of {user.username} to {options['to']}.")
+            return
+        loads = shard_loads()
+        self.report('Before', loads)
+        moves = plan_rebalance(loads)
+        if not moves:
+            self.stdout.write('The shards are balanced.')
+            return
+        names = dict(User.objects.filter(
+            pk__in=[move[0] for move in moves]).values_list('pk', 'username'))
+        for user_id, notes, source, target in moves:
+            name = names.get(user_id, f'user {user_id}')
+            if options['dry_run']:
+                self.stdout.write(
+                    f'Would move {name} ({notes} notes) from {source} to '
+                    f'{target}.')
+                continue
+            move_user(user_id, target, options['grace'])
+            self.stdout.write(
+                f'Moved {name} ({notes} notes) from {source} to {target}.')
+        if not options['dry_run']:
+            self.report('After', shard_loads())
+
+    def report(self, label: str, loads: dict) -> None:
+        """
+        Prints the number of users and notes on each shard.
+
+        Args:
+            label (str): What the counts are, e.g. 'Before'.
+            loads (dict): Notes per user per shard, from shard_loads.
+        """
+
+        counts = ', '.join(
+            f'{alias} {sum(users.values())} notes/{len(users)} users'
+            for alias, users in loads.items())
+        self.stdout.write(f'{label}: {counts}.')
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from sticky_notes_app.search import rebuild_index
+from sticky_notes_app.shards import use_shard
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the FTS5 full-text index of notes from the notes table and
+    reports the rebuild time and the size of the index, for each shard
+    when NOTE_SHARDS is set.
+    """
+
+    help = 'Rebuilds the full-text search index of notes.'
+
+    def handle(self, *args, **options):
+        """
+        Runs the rebuild and prints its statistics.
+        """
+
+        for shard in settings.NOTE_SHARDS or [DEFAULT_DB_ALIAS]:
+            try:
+                with use_shard(shard):
+                    stats = rebuild_index()
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            prefix = f'{shard}: ' if settings.NOTE_SHARDS else ''
+            self.stdout.write(
+                f"{prefix}Indexed {stats['notes']} notes in "
+                f"{stats['seconds']:.2f}s; "
+                f"index size {stats['size'] / 1024:,.1f} KiB.")
@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from sticky_notes_app.benchmark import (
+    benchmark_users, seed_user_notes, seed_users)
+from sticky_notes_app.shards import delete_user_notes, shard_for_user
+
+
+class Command(BaseCommand):
+    """
+    Creates users with notes to benchmark the views against.
+    Creates --users users named <prefix>1, <prefix>2... sharing a password,
+    each with --notes notes of realistic sizes (short titles, content
+    from a line to a few pages, mostly short) spread over the board, on
+    their shard when notes are sharded. The same --seed always produces
+    the same notes, so runs of benchmark_views are comparable.
+    """
+
+    help = 'Seeds users with notes for benchmarking.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the size, naming and --clear options.
+        """
+
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Users to create (default: 10).',
+        )
+        parser.add_argument(
+            '--notes', type=int, default=1000,
+            help='Notes per user (default: 1000).',
+        )
+        parser.add_argument(
+            '--prefix', default='benchuser',
+            help='Start of the usernames (default: benchuser).',
+        )
+        parser.add_argument(
+            '--password', default='benchpass',
+            help='Password of every user (default: benchpass).',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed of the generated notes (default: 0).',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete the users with the prefix, and their notes, first.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Creates the users and their notes and reports how long it took.
+        """
+
+        if options['users'] < 1 or options['notes'] < 0:
+            raise CommandError('--users must be positive and --notes not '
+                               'negative.')
+        existing = benchmark_users(options['prefix'])
+        if existing and not options['clear']:
+            raise CommandError(
+                f"{len(existing)} users named {options['prefix']}N exist; "
+                'use --clear to replace them.')
+        for user in existing:
+            # Deleting the notes in one statement beats the cascade
+            delete_user_notes(user.pk, shard_for_user(user.pk))
+            user.delete()
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        users = seed_users(
+            options['prefix'], options['users'], options['password'])
+        for user in users:
+            seed_user_notes(user, options['notes'], rng)
+        self.stdout.write(
+            f"Created {len(users)} users with {options['notes']} notes each "
+            f"in {time.perf_counter() - started:.1f} s "
+            f"({User.objects.count()} users in total).")
@@ -0,0 +1,74 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """
+    Copies the primary SQLite database to a replica's file.
+    Stands in for replication when developing locally: the replica alias
+    (a second SQLite file) receives a consistent snapshot of the primary
+    through SQLite's online backup API, which does not block writers on the
+    primary. With --interval it copies again every interval until
+    interrupted, so the replica lags the primary like a real one would,
+    which is what the read-your-writes stickiness covers.
+    """
+
+    help = 'Copies the primary SQLite database to a replica.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the replica alias and the --interval option.
+        """
+
+        parser.add_argument(
+            '--replica', default='replica',
+            help='Alias of the replica database (default: replica).',
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Seconds between copies; copies once if omitted.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Copies the primary once or in a loop until interrupted.
+        """
+
+        alias = options['replica']
+        if alias == DEFAULT_DB_ALIAS or alias not in connections:
+            raise CommandError(f'{alias} is not a replica database alias.')
+        if not all(connections[name].vendor == 'sqlite'
+                   for name in (DEFAULT_DB_ALIAS, alias)):
+            raise CommandError('The primary and the replica must be SQLite.')
+        if options['interval'] is None:
+            self.copy(alias)
+            return
+        try:
+            while True:
+                started = time.monotonic()
+                self.copy(alias)
+                time.sleep(max(
+                    0, options['interval'] - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+
+    def copy(self, alias: str) -> None:
+        """
+        Copies the primary to the replica's file and reports it.
+
+        Args:
+            alias (str): The alias of the replica database.
+        """
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        path = connections[alias].settings_dict['NAME']
+        target = sqlite3.connect(path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(f'Copied the primary database to {path}.')
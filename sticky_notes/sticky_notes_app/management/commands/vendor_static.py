@@ -0,0 +1,80 @@
+import base64
+import hashlib
+import os
+import urllib.request
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sticky_notes_app.assets import is_vendored
+
+
+class Command(BaseCommand):
+    """
+    Downloads the third-party assets of VENDOR_ASSETS into the app's static
+    files, so the templates load them from the site instead of their CDNs.
+    Assets already vendored are skipped unless --force is given. Downloads
+    with an integrity hash in VENDOR_ASSETS are checked against it. Run
+    collectstatic afterwards, and commit the new files.
+    """
+
+    help = 'Vendors the CDN assets of VENDOR_ASSETS into the static files.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the --force and --timeout options.
+        """
+
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Download assets that are already vendored too.',
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=30,
+            help='Seconds to wait for each download (default: 30).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Downloads and checks every missing asset.
+        """
+
+        static_dir = os.path.join(
+            apps.get_app_config('sticky_notes_app').path, 'static')
+        for name, (path, url, integrity) in settings.VENDOR_ASSETS.items():
+            if is_vendored(path) and not options['force']:
+                self.stdout.write(f'{name}: already vendored.')
+                continue
+            try:
+                with urllib.request.urlopen(
+                        url, timeout=options['timeout']) as response:
+                    data = response.read()
+            except OSError as exc:
+                raise CommandError(f'Cannot download {url}: {exc}')
+            if integrity and self.integrity(integrity, data) != integrity:
+                raise CommandError(f'{url} does not match its integrity hash.')
+            target = os.path.join(static_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as file:
+                file.write(data)
+            self.stdout.write(f'{name}: vendored {len(data)} bytes as {path}.')
+        is_vendored.cache_clear()
+
+    @staticmethod
+    def integrity(expected: str, data: bytes) -> str:
+        """
+        Computes a subresource integrity hash of data, with the algorithm
+        of the expected one.
+
+        Args:
+            expected (str): The expected hash, e.g. 'sha384-...'.
+            data (bytes): The downloaded file.
+
+        Returns:
+            str: The hash of data.
+        """
+
+        algorithm = expected.split('-', 1)[0]
+        digest = hashlib.new(algorithm, data).digest()
+        return f'{algorithm}-{base64.b64encode(digest).decode()}'
@@ -0,0 +1,349 @@
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+# The exported metrics: name -> (type, help text, label names).
+METRICS = {
+    'sticky_notes_requests_total': (
+        'counter', 'Requests handled, by view, method and status code.',
+        ('view', 'method', 'status')),
+    'sticky_notes_request_duration_seconds': (
+        'histogram', 'Time taken to handle a request, by view.', ('view',)),
+    'sticky_notes_db_duration_seconds': (
+        'histogram', 'Time spent in the database per request, by view.',
+        ('view',)),
+    'sticky_notes_db_queries_total': (
+        'counter', 'Database queries run by requests, by view.', ('view',)),
+    'sticky_notes_positions_saved_total': (
+        'counter', 'Note positions saved, by how they were written.',
+        ('mode',)),
+    'sticky_notes_board_cache_lookups_total': (
+        'counter', 'Board cache lookups, by result.', ('result',)),
+}
+
+# Content type of the Prometheus text exposition format.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _running(path: str) -> bool:
+    """
+    Returns whether the process that wrote a snapshot file is still
+    running. Always true where processes cannot be probed.
+    """
+
+    try:
+        pid = int(os.path.basename(path).split('.')[0])
+    except ValueError:
+        return False
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsRegistry:
+    """
+    Holds this process's metric values and shares them with the other
+    worker processes through METRICS_DIR: every process writes a snapshot
+    of its values to its own file at most every METRICS_FLUSH_INTERVAL
+    seconds (and when it exits), and collect() adds up the snapshots of
+    every running process, so any worker can serve the totals. Values only
+    ever grow, so a restarted process shows up as a counter reset.
+    Thread-safe.
+
+    Attributes:
+        lock (Lock): Guards the values.
+        values (dict): Counter values and histogram bucket counts, by
+            series key.
+        flushed (float): When the values were last written, from monotonic.
+
+    Methods:
+        inc: Adds to a counter.
+        observe: Adds a value to a histogram.
+        snapshot: Returns a copy of the values.
+        flush: Writes the values to this process's file.
+        maybe_flush: Flushes if the interval has elapsed.
+        collect: Returns the values of every process, added up.
+        reset: Clears the values.
+    """
+
+    def __init__(self):
+        """
+        Starts with no values.
+        """
+
+        self.lock = threading.Lock()
+        self.values = {}
+        self.flushed = time.monotonic()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> str:
+        """
+        Returns the key of a series: its name and label values.
+        """
+
+        values = [str(labels[label]) for label in METRICS[name][2]]
+        return json.dumps([name, values])
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """
+        Adds to a counter.
+
+        Args:
+            name (str): A counter of METRICS.
+            amount (float): The amount to add.
+            **labels: The value of each of the counter's labels.
+        """
+
+        key = self._key(name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Adds a value to a histogram.
+
+        Args:
+            name (str): A histogram of METRICS.
+            value (float): The observed value, in seconds.
+            **labels: The value of each of the histogram's labels.
+        """
+
+        key = self._key(name, labels)
+        with self.lock:
+            # One count per bucket, then +Inf, the sum and the count
+            series = self.values.setdefault(
+                key, [0] * (len(LATENCY_BUCKETS) + 3))
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    break
+            else:
+                index = len(LATENCY_BUCKETS)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of this process's values.
+        """
+
+        with self.lock:
+            return {
+                key: list(value) if isinstance(value, list) else value
+                for key, value in self.values.items()
+            }
+
+    def _path(self) -> str:
+        """
+        Returns the path of this process's snapshot file.
+        """
+
+        return os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+
+    def flush(self) -> None:
+        """
+        Writes this process's values to its snapshot file, atomically.
+        """
+
+        self.flushed = time.monotonic()
+        values = self.snapshot()
+        if not values:
+            return
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = self._path()
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(values, file)
+        os.replace(f'{path}.tmp', path)
+
+    def maybe_flush(self) -> None:
+        """
+        Flushes when METRICS_FLUSH_INTERVAL seconds have passed since the
+        last flush.
+        """
+
+        if time.monotonic() - self.flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def collect(self) -> dict:
+        """
+        Returns the values of every running process that has flushed, with
+        this process's current values instead of its file, added up.
+        Snapshots of processes that have exited are deleted, so their
+        values drop out as a counter reset.
+
+        Returns:
+            dict: The total values, by series key.
+        """
+
+        snapshots = [self.snapshot()]
+        own = self._path()
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            if path == own:
+                continue
+            if not _running(path):
+                # Left by a process that has exited
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                # Removed, or not a snapshot
+                continue
+        totals = {}
+        for values in snapshots:
+            for key, value in values.items():
+                if isinstance(value, list):
+                    total = totals.setdefault(key, [0] * len(value))
+                    for index, count in enumerate(value):
+                        total[index] += count
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def reset(self) -> None:
+        """
+        Clears this process's values.
+        """
+
+        with self.lock:
+            self.values.clear()
+
+
+registry = MetricsRegistry()
+atexit.register(lambda: settings.METRICS_ENABLED and registry.flush())
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    """
+    Adds to a counter of the registry, unless METRICS_ENABLED is off.
+
+    Args:
+        name (str): A counter of METRICS.
+        amount (float): The amount to add.
+        **labels: The value of each of the counter's labels.
+    """
+
+    if settings.METRICS_ENABLED:
+        registry.inc(name, amount, **labels)
+
+
+def record_request(view: str, method: str, status: int, stats) -> None:
+    """
+    Records a finished request's metrics.
+
+    Args:
+        view (str): The resolved view name.
+        method (str): The request method.
+        status (int): The response status code.
+        stats (RequestStats): The request's measurements.
+    """
+
+    if not settings.METRICS_ENABLED:
+        return
+    registry.inc(
+        'sticky_notes_requests_total', view=view, method=method,
+        status=status)
+    registry.observe(
+        'sticky_notes_request_duration_seconds', stats.duration, view=view)
+    registry.observe(
+        'sticky_notes_db_duration_seconds', stats.db_time, view=view)
+    registry.inc('sticky_notes_db_queries_total', stats.queries, view=view)
+    registry.maybe_flush()
+
+
+def _escape(value: str) -> str:
+    """
+    Escapes a label value for the text format.
+    """
+
+    return (value.replace('\\', '\\\\').replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def _labels(names, values, extra: tuple = ()) -> str:
+    """
+    Formats label names and values, plus extra (name, value) pairs.
+    """
+
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+def _number(value: float) -> str:
+    """
+    Formats a sample value for the text format.
+    """
+
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render() -> str:
+    """
+    Renders the metrics of every process in the Prometheus text format,
+    with the board cache hit ratio derived from its lookups.
+
+    Returns:
+        str: The exposition.
+    """
+
+    series = {}
+    for key, value in registry.collect().items():
+        name, label_values = json.loads(key)
+        series.setdefault(name, []).append((label_values, value))
+    lines = []
+    for name, (kind, help_text, label_names) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for label_values, value in sorted(series.get(name, [])):
+            if kind == 'counter':
+                lines.append(
+                    f'{name}{_labels(label_names, label_values)} '
+                    f'{_number(value)}')
+                continue
+            cumulative = 0
+            bounds = [*map(str, LATENCY_BUCKETS), '+Inf']
+            for bound, count in zip(bounds, value):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket'
+                    f'{_labels(label_names, label_values, [("le", bound)])} '
+                    f'{_number(cumulative)}')
+            labels = _labels(label_names, label_values)
+            lines.append(f'{name}_sum{labels} {_number(value[-2])}')
+            lines.append(f'{name}_count{labels} {_number(value[-1])}')
+    lookups = dict(
+        (label_values[0], value) for label_values, value in
+        series.get('sticky_notes_board_cache_lookups_total', []))
+    total = sum(lookups.values())
+    lines.append('# HELP sticky_notes_board_cache_hit_ratio Share of board '
+                 'cache lookups that were hits.')
+    lines.append('# TYPE sticky_notes_board_cache_hit_ratio gauge')
+    ratio = lookups.get('hits', 0) / total if total else math.nan
+    lines.append(f'sticky_notes_board_cache_hit_ratio {_number(ratio)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,312 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+from . import metrics
+from .assets import serve_asset
+from . import request_stats as stats_store
+from .request_stats import RequestStats, measuring, query_budget
+from .routers import amark_written, mark_written, stream_within
+from .shards import aget_assignment, get_assignment, use_shard
+
+# Methods that never write.
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+logger = logging.getLogger('sticky_notes_app.requests')
+
+
+def _server_timing(stats: RequestStats) -> str:
+    """
+    Returns the Server-Timing header value of a request's stats so far.
+    """
+
+    total = time.perf_counter() - stats.started
+    return (f'db;dur={stats.db_time * 1000:.1f}, '
+            f'render;dur={stats.render_time * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}')
+
+
+def _report(request, response, stats: RequestStats) -> None:
+    """
+    Logs a finished request's stats, adds them to its view's totals and
+    its metrics, warning when the view ran more queries than its budget
+    allows.
+    """
+
+    stats.finish()
+    match = request.resolver_match
+    if match is None:
+        return
+    name = match.view_name
+    stats_store.add(name, stats)
+    metrics.record_request(
+        name, request.method, response.status_code, stats)
+    logger.info(
+        '%s %s %s: %d queries, %.1f ms in the database, %.1f ms in total',
+        request.method, name, response.status_code, stats.queries,
+        stats.db_time * 1000, stats.duration * 1000)
+    budget = query_budget(name)
+    if budget is not None and stats.queries > budget + stats.allowance:
+        logger.warning(
+            '%s ran %d queries, over its budget of %d.', name, stats.queries,
+            budget + stats.allowance)
+
+
+@contextmanager
+def _streaming(request, response, stats: RequestStats):
+    """
+    Measures the content of a streaming response, then reports the
+    request once it has been sent.
+    """
+
+    try:
+        with measuring(stats):
+            yield
+    finally:
+        _report(request, response, stats)
+
+
+def measure_requests(get_response):
+    """
+    Measures every request: the number of queries it runs on any database,
+    the time they take, the template rendering time and the total time, per
+    resolved view name. Each request is logged to the
+    'sticky_notes_app.requests' logger at INFO level, with a warning when a
+    view runs more queries than its VIEW_QUERY_BUDGETS entry allows;
+    per-view totals are kept in process (see the request_stats view, served
+    when DEBUG is on), the Prometheus metrics served at /metrics are
+    updated, and the measurements are attached to the response as
+    response.request_stats. With SERVER_TIMING_ENABLED, the db, render and
+    total times are sent in a Server-Timing header, measured up to the
+    headers of streaming responses. The content of synchronous streaming
+    responses is measured too, and the request is reported once it has been
+    sent. Must come first in MIDDLEWARE to include the other middleware's
+    queries. Disabled by setting REQUEST_STATS_ENABLED to False.
+
+    Args:
+        get_response (callable): The next handler in the middleware chain.
+
+    Returns:
+        callable: The middleware, async when get_response is.
+    """
+
+    def finish(request, response, stats):
+        response.request_stats = stats
+        if settings.SERVER_TIMING_ENABLED:
+            response['Server-Timing'] = _server_timing(stats)
+        if response.streaming and not response.is_async:
+            return stream_within(
+                response, _streaming(request, response, stats))
+        _report(request, response, stats)
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not settings.REQUEST_STATS_ENABLED:
+                return await get_response(request)
+            stats = RequestStats()
+            with measuring(stats):
+                response = await get_response(request)
+            return finish(request, response, stats)
+        return middleware
+
+    def middleware(request):
+        if not settings.REQUEST_STATS_ENABLED:
+            return get_response(request)
+        stats = RequestStats()
+        with measuring(stats):
+            response = get_response(request)
+        return finish(request, response, stats)
+    return middleware
+
+
+measure_requests.sync_capable = True
+measure_requests.async_capable = True
+
+
+def serve_static(get_response):
+    """
+    Serves the files collected into STATIC_ROOT by collectstatic, so the
+    app needs no separate static file server: precompressed variants are
+    sent to clients that accept them, hashed files are cached by browsers
+    for a year as immutable, and other files are revalidated (304). Only
+    GET and HEAD requests under a local STATIC_URL are served; runserver
+    serves the source files itself while DEBUG is on. Must come before
+    the session middleware, so static requests skip sessions and users.
+    Disabled by setting STATIC_SERVE to False.
+
+    Args:
+        get_response (callable): The next handler in the middleware chain.
+
+    Returns:
+        callable: The middleware, async when get_response is.
+    """
+
+    def static_name(request):
+        prefix = settings.STATIC_URL
+        if (not settings.STATIC_SERVE or not prefix.startswith('/')
+                or request.method not in ('GET', 'HEAD')
+                or not request.path.startswith(prefix)):
+            return None
+        return request.path[len(prefix):]
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            name = static_name(request)
+            if name is None:
+                return await get_response(request)
+            return await sync_to_async(serve_asset)(request, name)
+        return middleware
+
+    def middleware(request):
+        name = static_name(request)
+        if name is None:
+            return get_response(request)
+        return serve_asset(request, name)
+    return middleware
+
+
+serve_static.sync_capable = True
+serve_static.async_capable = True
+
+
+def async_views(get_response):
+    """
+    Serves the app's async views to requests handled under ASGI.
+    When the middleware chain runs asynchronously (under ASGI), each request
+    is routed with ASYNC_ROOT_URLCONF, whose board, export and API views
+    are native async functions, so they run on the event loop instead of
+    being pushed through a worker thread. Under WSGI the chain is
+    synchronous and the sync views of ROOT_URLCONF are served unchanged,
+    since async views would need an event loop per request there. Disabled
+    by setting ASYNC_VIEWS to False.
+
+    Args:
+        get_response (callable): The next handler in the middleware chain.
+
+    Returns:
+        callable: The middleware, async when get_response is.
+    """
+
+    if not iscoroutinefunction(get_response):
+        return get_response
+
+    async def middleware(request):
+        if settings.ASYNC_VIEWS:
+            request.urlconf = settings.ASYNC_ROOT_URLCONF
+        return await get_response(request)
+    return middleware
+
+
+async_views.sync_capable = True
+async_views.async_capable = True
+
+
+def replica_stickiness(get_response):
+    """
+    Pins a user's reads to the primary database after they write.
+    Any request from an authenticated user with an unsafe method (POST,
+    PUT, PATCH or DELETE) that did not fail marks the user as having
+    written, and read_from_replica views then skip the replicas for that
+    user for REPLICA_STICKY_SECONDS, longer than the replicas take to catch
+    up, so users always see their own changes. Does nothing while
+    DATABASE_REPLICAS is empty.
+
+    Args:
+        get_response (callable): The next handler in the middleware chain.
+
+    Returns:
+        callable: The middleware, async when get_response is.
+    """
+
+    def wrote(request, response) -> bool:
+        return (settings.DATABASE_REPLICAS
+                and request.method not in SAFE_METHODS
+                and response.status_code < 400)
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            if wrote(request, response):
+                user = await request.auser()
+                if user.is_authenticated:
+                    await amark_written(user.pk)
+            return response
+        return middleware
+
+    def middleware(request):
+        response = get_response(request)
+        if wrote(request, response) and request.user.is_authenticated:
+            mark_written(request.user.pk)
+        return response
+    return middleware
+
+
+replica_stickiness.sync_capable = True
+replica_stickiness.async_capable = True
+
+
+def _moving_response() -> JsonResponse:
+    """
+    Returns the response to a write from a user whose notes are being moved
+    to another shard.
+    """
+
+    response = JsonResponse(
+        {'status': 'error',
+         'message': 'Your notes are being moved; try again shortly.'},
+        status=503)
+    response['Retry-After'] = '5'
+    return response
+
+
+def note_shards(get_response):
+    """
+    Sends the note queries of each request to its user's shard.
+    For an authenticated user, the request (including the content of a
+    streaming response) runs inside use_shard() with the user's shard, so
+    NoteShardRouter routes the views' note queries there unchanged. While
+    the user's notes are being moved to another shard, their writes get a
+    503 with Retry-After and their reads are served from the old shard.
+    Does nothing while NOTE_SHARDS is empty.
+
+    Args:
+        get_response (callable): The next handler in the middleware chain.
+
+    Returns:
+        callable: The middleware, async when get_response is.
+    """
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not settings.NOTE_SHARDS:
+                return await get_response(request)
+            user = await request.auser()
+            if not user.is_authenticated:
+                return await get_response(request)
+            shard, moving = await aget_assignment(user.pk)
+            if moving and request.method not in SAFE_METHODS:
+                return _moving_response()
+            with use_shard(shard):
+                response = await get_response(request)
+            return stream_within(response, use_shard(shard))
+        return middleware
+
+    def middleware(request):
+        if not settings.NOTE_SHARDS or not request.user.is_authenticated:
+            return get_response(request)
+        shard, moving = get_assignment(request.user.pk)
+        if moving and request.method not in SAFE_METHODS:
+            return _moving_response()
+        with use_shard(shard):
+            response = get_response(request)
+        return stream_within(response, use_shard(shard))
+    return middleware
+
+
+note_shards.sync_capable = True
+note_shards.async_capable = True
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-17 06:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sticky_notes_app', '0003_alter_note_color'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'x_position', 'y_position'], name='note_user_position_idx'),
+        ),
+    ]
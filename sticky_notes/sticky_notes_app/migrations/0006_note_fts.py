@@ -0,0 +1,74 @@
+# Full-text search index for notes, maintained by triggers. SQLite only; on
+# other backends search falls back to plain lookups.
+
+from django.db import migrations
+
+FTS_TABLE = 'sticky_notes_app_note_fts'
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, content,
+        content='sticky_notes_app_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER sticky_notes_app_note_fts_insert
+    AFTER INSERT ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER sticky_notes_app_note_fts_delete
+    AFTER DELETE ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    # Only fires when title or content is written, so position updates
+    # never touch the index
+    f"""
+    CREATE TRIGGER sticky_notes_app_note_fts_update
+    AFTER UPDATE OF title, content ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS sticky_notes_app_note_fts_insert',
+    'DROP TRIGGER IF EXISTS sticky_notes_app_note_fts_delete',
+    'DROP TRIGGER IF EXISTS sticky_notes_app_note_fts_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sticky_notes_app', '0005_note_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
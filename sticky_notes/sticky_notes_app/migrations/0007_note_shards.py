@@ -0,0 +1,84 @@
+# Generated by Django 5.1.15 on 2026-10-17 07:48
+#
+# Drops the database constraint of Note.user so notes can live on shard
+# databases without the users table. SQLite alters the column by remaking
+# the notes table, which drops its triggers, so the FTS triggers of 0006
+# are created again afterwards (and again when reversing).
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+FTS_TABLE = 'sticky_notes_app_note_fts'
+
+TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_insert
+    AFTER INSERT ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_delete
+    AFTER DELETE ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_update
+    AFTER UPDATE OF title, content ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+
+def create_fts_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if (connection.vendor != 'sqlite'
+            or FTS_TABLE not in connection.introspection.table_names()):
+        return
+    for sql in TRIGGER_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('sticky_notes_app', '0006_note_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserShard',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('shard', models.CharField(max_length=100)),
+                ('moving', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NoteIdBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.PositiveBigIntegerField(unique=True)),
+                ('end', models.PositiveBigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(
+            migrations.RunPython.noop, create_fts_triggers),
+        migrations.AlterField(
+            model_name='note',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(
+            create_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,212 @@
+# Generated by Django 5.1.15 on 2026-10-17 09:06
+#
+# Per-user change sequences and delete tombstones for board syncs,
+# maintained by triggers. Every insert, update and delete of a note
+# advances its owner's ChangeSequence and stamps the new number on the
+# note (change_seq) or on a NoteTombstone, so every write path (saves,
+# bulk position updates, imports, shard copies) is covered without extra
+# queries. Inserts that already carry a change_seq, as notes copied by a
+# shard move do, keep it. SQLite only; on other backends change_seq stays
+# 0 and syncs are refused.
+#
+# Adding change_seq makes SQLite remake the notes table, which drops its
+# triggers, so the FTS triggers of 0006 are created again afterwards (and
+# again when reversing), as in 0007.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+FTS_TABLE = 'sticky_notes_app_note_fts'
+
+FTS_TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_insert
+    AFTER INSERT ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_delete
+    AFTER DELETE ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_update
+    AFTER UPDATE OF title, content ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+SEQUENCE_TABLE = 'sticky_notes_app_changesequence'
+TOMBSTONE_TABLE = 'sticky_notes_app_notetombstone'
+
+
+def _advance(user_id: str) -> str:
+    """
+    Returns the statement advancing a user's change sequence.
+    """
+
+    return f"""
+        INSERT INTO {SEQUENCE_TABLE}(user_id, last, pruned)
+        VALUES ({user_id}, 1, 0)
+        ON CONFLICT(user_id) DO UPDATE SET last = last + 1;
+    """
+
+
+def _stamp(row: str) -> str:
+    """
+    Returns the statement stamping a changed note with its owner's latest
+    change number.
+    """
+
+    return f"""
+        UPDATE sticky_notes_app_note SET change_seq = (
+            SELECT last FROM {SEQUENCE_TABLE}
+            WHERE user_id = {row}.user_id)
+        WHERE id = {row}.id;
+    """
+
+
+SYNC_TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_sync_insert
+    AFTER INSERT ON sticky_notes_app_note WHEN new.change_seq = 0 BEGIN
+        {_advance('new.user_id')}
+        {_stamp('new')}
+    END
+    """,
+    # Not fired by the trigger's own change_seq update
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_sync_update
+    AFTER UPDATE OF title, content, color, x_position, y_position,
+        updated_at, user_id
+    ON sticky_notes_app_note BEGIN
+        {_advance('new.user_id')}
+        {_stamp('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_sync_delete
+    AFTER DELETE ON sticky_notes_app_note BEGIN
+        {_advance('old.user_id')}
+        INSERT INTO {TOMBSTONE_TABLE}(note_id, user_id, seq, deleted_at)
+        VALUES (
+            old.id, old.user_id,
+            (SELECT last FROM {SEQUENCE_TABLE}
+             WHERE user_id = old.user_id),
+            strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """,
+]
+
+# Numbers the existing notes of each user 1, 2... in ID order and starts
+# each user's sequence after them.
+BACKFILL_SQL = [
+    """
+    UPDATE sticky_notes_app_note SET change_seq = ranked.seq
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id ORDER BY id) AS seq
+        FROM sticky_notes_app_note
+    ) AS ranked
+    WHERE sticky_notes_app_note.id = ranked.id
+    """,
+    f"""
+    INSERT INTO {SEQUENCE_TABLE}(user_id, last, pruned)
+    SELECT user_id, MAX(change_seq), 0 FROM sticky_notes_app_note
+    GROUP BY user_id
+    """,
+]
+
+DROP_SYNC_SQL = [
+    'DROP TRIGGER IF EXISTS sticky_notes_app_note_sync_insert',
+    'DROP TRIGGER IF EXISTS sticky_notes_app_note_sync_update',
+    'DROP TRIGGER IF EXISTS sticky_notes_app_note_sync_delete',
+]
+
+
+def create_fts_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if (connection.vendor != 'sqlite'
+            or FTS_TABLE not in connection.introspection.table_names()):
+        return
+    for sql in FTS_TRIGGER_SQL:
+        schema_editor.execute(sql)
+
+
+def create_sync(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in BACKFILL_SQL + SYNC_TRIGGER_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_sync(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SYNC_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('sticky_notes_app', '0007_note_shards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, create_fts_triggers),
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('user', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last', models.PositiveBigIntegerField(default=0)),
+                ('pruned', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NoteTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.PositiveBigIntegerField()),
+                ('seq', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'change_seq'], name='note_user_change_idx'),
+        ),
+        migrations.AddField(
+            model_name='notetombstone',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notetombstone',
+            index=models.Index(fields=['user', 'seq'], name='tombstone_user_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notetombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+        migrations.RunPython(
+            create_fts_triggers, migrations.RunPython.noop),
+        migrations.RunPython(create_sync, drop_sync),
+    ]
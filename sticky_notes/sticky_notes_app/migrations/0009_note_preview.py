@@ -0,0 +1,152 @@
+# Generated by Django 5.1.15 on 2026-10-17 11:20
+#
+# Stores a preview of each note's content (Note.preview, see note_preview)
+# so boards list notes without reading their content, and fills it in for
+# the existing notes with one UPDATE computing the same preview in SQL.
+#
+# Adding the column makes SQLite remake the notes table, which drops its
+# triggers, so the FTS triggers of 0006 and the sync triggers of 0008 are
+# created again afterwards (and again when reversing). Previews are not
+# changes: the sync update trigger does not watch the column.
+
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Concat, Length, Substr
+from django.db.models.lookups import GreaterThan
+
+NOTE_PREVIEW_LENGTH = 200
+PREVIEW_ELLIPSIS = '…'
+
+FTS_TABLE = 'sticky_notes_app_note_fts'
+
+FTS_TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_insert
+    AFTER INSERT ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_delete
+    AFTER DELETE ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_fts_update
+    AFTER UPDATE OF title, content ON sticky_notes_app_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+SEQUENCE_TABLE = 'sticky_notes_app_changesequence'
+TOMBSTONE_TABLE = 'sticky_notes_app_notetombstone'
+
+
+def _advance(user_id: str) -> str:
+    """
+    Returns the statement advancing a user's change sequence.
+    """
+
+    return f"""
+        INSERT INTO {SEQUENCE_TABLE}(user_id, last, pruned)
+        VALUES ({user_id}, 1, 0)
+        ON CONFLICT(user_id) DO UPDATE SET last = last + 1;
+    """
+
+
+def _stamp(row: str) -> str:
+    """
+    Returns the statement stamping a changed note with its owner's latest
+    change number.
+    """
+
+    return f"""
+        UPDATE sticky_notes_app_note SET change_seq = (
+            SELECT last FROM {SEQUENCE_TABLE}
+            WHERE user_id = {row}.user_id)
+        WHERE id = {row}.id;
+    """
+
+
+SYNC_TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_sync_insert
+    AFTER INSERT ON sticky_notes_app_note WHEN new.change_seq = 0 BEGIN
+        {_advance('new.user_id')}
+        {_stamp('new')}
+    END
+    """,
+    # Not fired by the trigger's own change_seq update
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_sync_update
+    AFTER UPDATE OF title, content, color, x_position, y_position,
+        updated_at, user_id
+    ON sticky_notes_app_note BEGIN
+        {_advance('new.user_id')}
+        {_stamp('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sticky_notes_app_note_sync_delete
+    AFTER DELETE ON sticky_notes_app_note BEGIN
+        {_advance('old.user_id')}
+        INSERT INTO {TOMBSTONE_TABLE}(note_id, user_id, seq, deleted_at)
+        VALUES (
+            old.id, old.user_id,
+            (SELECT last FROM {SEQUENCE_TABLE}
+             WHERE user_id = old.user_id),
+            strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """,
+]
+
+
+def create_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    if FTS_TABLE in connection.introspection.table_names():
+        for sql in FTS_TRIGGER_SQL:
+            schema_editor.execute(sql)
+    for sql in SYNC_TRIGGER_SQL:
+        schema_editor.execute(sql)
+
+
+def fill_previews(apps, schema_editor):
+    Note = apps.get_model('sticky_notes_app', 'Note')
+    Note.objects.using(schema_editor.connection.alias).update(preview=Case(
+        When(
+            GreaterThan(Length('content'), NOTE_PREVIEW_LENGTH),
+            then=Concat(
+                Substr('content', 1, NOTE_PREVIEW_LENGTH - 1),
+                Value(PREVIEW_ELLIPSIS),
+                output_field=models.TextField(),
+            ),
+        ),
+        default=F('content'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sticky_notes_app', '0008_note_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_triggers),
+        migrations.AddField(
+            model_name='note',
+            name='preview',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.RunPython(fill_previews, migrations.RunPython.noop),
+        migrations.RunPython(create_triggers, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,29 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+# Longest note preview stored with each note, in characters.
+NOTE_PREVIEW_LENGTH = 200
+# Ends a preview whose note content was cut.
+PREVIEW_ELLIPSIS = '\u2026'
+
+
+def note_preview(content: str) -> str:
+    """
+    Returns the preview of a note's content: the content itself when it
+    fits in NOTE_PREVIEW_LENGTH characters, otherwise its beginning ending
+    with PREVIEW_ELLIPSIS. Migration 0009 computes the same in SQL.
+
+    Args:
+        content (str): The note's content.
+
+    Returns:
+        str: The preview.
+    """
+
+    if len(content) <= NOTE_PREVIEW_LENGTH:
+        return content
+    return content[:NOTE_PREVIEW_LENGTH - 1] + PREVIEW_ELLIPSIS
+
 
 class Note(models.Model):
     """
@@ -17,26 +40,64 @@ class Note(models.Model):
         updated_at (DateTimeField): Timestamp of last update, auto-updated on
             save.
         user (ForeignKey): Reference to the User who owns the note, cascades
-            on delete.
+            on delete. Has no database constraint, since notes may live on
+            a shard database without the users table.
         color (CharField): Hex color code for the note, max length 7, defaults
             to Gold color ('#FFD700').
         x_position (IntegerField): X-coordinate for note position, defaults
             to 0.
         y_position (IntegerField): Y-coordinate for note position, defaults
             to 0.
+        change_seq (PositiveBigIntegerField): The owner's change sequence
+            number of the note's last change, set by database triggers
+            (migration 0008) on every insert and update; 0 until then.
+        preview (CharField): The beginning of the content, as returned by
+            note_preview, so boards can list notes without reading their
+            content. Kept up to date by save(); notes inserted with
+            bulk_create must be given theirs.
+
+    Meta:
+        indexes: A composite index on (user, x_position, y_position) so that
+            viewport window queries only visit the notes inside the requested
+            board rectangle instead of scanning the user's whole board, and
+            one on (user, updated_at) so a board's note count and latest
+            update are read from the index alone, and one on (user,
+            change_seq) so a sync only visits the notes changed since its
+            token.
 
     Methods:
         __str__: Returns the note's title as its string representation.
+        save: Saves the note with the preview of its content.
     """
 
     title = models.CharField(max_length=100)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False)
     color = models.CharField(max_length=7, default="#FFD700")
     x_position = models.IntegerField(default=0)
     y_position = models.IntegerField(default=0)
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False)
+    preview = models.CharField(
+        max_length=NOTE_PREVIEW_LENGTH, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'x_position', 'y_position'],
+                name='note_user_position_idx',
+            ),
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='note_user_updated_idx',
+            ),
+            models.Index(
+                fields=['user', 'change_seq'],
+                name='note_user_change_idx',
+            ),
+        ]
 
     def __str__(self):
         """
@@ -47,3 +108,169 @@ class Note(models.Model):
         """
 
         return self.title
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the note, first setting its preview from its content (and
+        saving it along with the content when update_fields is given). A
+        new note is inserted straight away: while sharding, its ID is
+        given by a pre_save receiver, which would otherwise make Django
+        try an UPDATE first.
+        """
+
+        self.preview = note_preview(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'preview'}
+        if self._state.adding and self.pk is None and not args:
+            kwargs.setdefault('force_insert', True)
+        super().save(*args, **kwargs)
+
+
+class UserShard(models.Model):
+    """
+    Records which shard database holds a user's notes. Stored on the
+    primary database alongside the users, and created the first time a
+    user's shard is looked up when NOTE_SHARDS is set.
+
+    Attributes:
+        user (OneToOneField): The user, also the primary key; deleted with
+            the user.
+        shard (CharField): The alias of the database holding the user's
+            notes.
+        moving (BooleanField): Whether the user's notes are being copied to
+            another shard, during which their writes are refused.
+
+    Methods:
+        __str__: Returns the user and the shard alias.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True)
+    shard = models.CharField(max_length=100)
+    moving = models.BooleanField(default=False)
+
+    def __str__(self):
+        """
+        Returns the user and the shard alias as the string representation.
+
+        Returns:
+            str: '<user> on <shard>'
+        """
+
+        return f'{self.user_id} on {self.shard}'
+
+
+class NoteIdBlock(models.Model):
+    """
+    A block of note IDs reserved by a process while notes are sharded.
+    Stored on the primary; the blocks never overlap, so notes created on
+    different shards never share an ID.
+
+    Attributes:
+        start (PositiveBigIntegerField): The first ID of the block; unique.
+        end (PositiveBigIntegerField): The last ID of the block.
+
+    Methods:
+        __str__: Returns the range of the block.
+    """
+
+    start = models.PositiveBigIntegerField(unique=True)
+    end = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        """
+        Returns the range of the block as the string representation.
+
+        Returns:
+            str: '<start>-<end>'
+        """
+
+        return f'{self.start}-{self.end}'
+
+
+class ChangeSequence(models.Model):
+    """
+    The change sequence of a user's notes: a counter that database triggers
+    (migration 0008) advance on every note insert, update and delete, and
+    whose new value is stamped on the changed note or its tombstone. Lives
+    on the database holding the user's notes.
+
+    Attributes:
+        user (OneToOneField): The user, also the primary key. Has no
+            database constraint, like Note.user.
+        last (PositiveBigIntegerField): The number of the user's latest
+            change.
+        pruned (PositiveBigIntegerField): The number of the latest change
+            whose tombstone was pruned; sync tokens older than it can no
+            longer be answered.
+
+    Methods:
+        __str__: Returns the user and the latest change number.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        db_constraint=False)
+    last = models.PositiveBigIntegerField(default=0)
+    pruned = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        """
+        Returns the user and the latest change number as the string
+        representation.
+
+        Returns:
+            str: '<user> at <last>'
+        """
+
+        return f'{self.user_id} at {self.last}'
+
+
+class NoteTombstone(models.Model):
+    """
+    Records a deleted note, so clients syncing their board learn about the
+    deletion. Created by a database trigger (migration 0008) whenever a
+    note row is deleted, and pruned after SYNC_TOMBSTONE_RETENTION_DAYS by
+    the prune_tombstones command.
+
+    Attributes:
+        note_id (PositiveBigIntegerField): The ID of the deleted note.
+        user (ForeignKey): The owner of the note. Has no database
+            constraint, like Note.user.
+        seq (PositiveBigIntegerField): The owner's change sequence number
+            of the deletion.
+        deleted_at (DateTimeField): When the note was deleted.
+
+    Meta:
+        indexes: One on (user, seq) for syncs, and one on deleted_at for
+            pruning.
+
+    Methods:
+        __str__: Returns the deleted note's ID and the change number.
+    """
+
+    note_id = models.PositiveBigIntegerField()
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False)
+    seq = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'seq'], name='tombstone_user_seq_idx'),
+            models.Index(
+                fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns the deleted note's ID and the change number as the string
+        representation.
+
+        Returns:
+            str: '<note_id> deleted at <seq>'
+        """
+
+        return f'{self.note_id} deleted at {self.seq}'
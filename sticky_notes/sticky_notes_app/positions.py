@@ -0,0 +1,636 @@
+import json
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from . import board_cache, metrics
+from .events import apublish_moves, publish_moves
+from .models import Note
+from .shards import note_database, shard_for_user, use_shard
+from .writer import arun_grouped, run_grouped
+
+# Range of the integer columns holding note IDs and coordinates.
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+
+# Columns written when a note is moved.
+POSITION_FIELDS = ['x_position', 'y_position', 'updated_at']
+
+
+def parse_position(data) -> tuple:
+    """
+    Parses and validates a single note position update.
+    Converts the 'note_id', 'x' and 'y' values of submitted form data to
+    integers so that raw strings never reach the model.
+
+    Args:
+        data (QueryDict): The POST data of the request.
+
+    Returns:
+        tuple: The (note_id, x, y) integers.
+
+    Raises:
+        ValueError: If a value is missing, is not an integer, or does not fit
+            the integer columns.
+    """
+
+    try:
+        values = tuple(int(data[key]) for key in ('note_id', 'x', 'y'))
+    except KeyError as exc:
+        raise ValueError(f'{exc} is required.') from exc
+    except ValueError as exc:
+        raise ValueError('note_id, x and y must be integers.') from exc
+    if not all(INT_MIN <= value <= INT_MAX for value in values):
+        raise ValueError('note_id, x and y are out of range.')
+    return values
+
+
+def write_position(user, note_id: int, x: int, y: int) -> bool:
+    """
+    Moves a single note with one conditional UPDATE statement.
+    The UPDATE is scoped by primary key and owner, so the ownership check and
+    the write happen in the same statement. Only x_position, y_position and
+    updated_at are written; the note row, including its content, is never
+    read.
+
+    Args:
+        user (User): The user who must own the note.
+        note_id (int): The primary key of the note to move.
+        x (int): The new x-coordinate.
+        y (int): The new y-coordinate.
+
+    Returns:
+        bool: True if the note was moved, False if no note with that ID
+            belongs to the user.
+    """
+
+    return bool(
+        Note.objects.filter(pk=note_id, user=user).update(
+            x_position=x, y_position=y, updated_at=timezone.now())
+    )
+
+
+async def awrite_position(user, note_id: int, x: int, y: int) -> bool:
+    """
+    Async version of write_position, using the async ORM.
+
+    Args:
+        user (User): The user who must own the note.
+        note_id (int): The primary key of the note to move.
+        x (int): The new x-coordinate.
+        y (int): The new y-coordinate.
+
+    Returns:
+        bool: True if the note was moved, False if no note with that ID
+            belongs to the user.
+    """
+
+    return bool(
+        await Note.objects.filter(pk=note_id, user=user).aupdate(
+            x_position=x, y_position=y, updated_at=timezone.now())
+    )
+
+
+def parse_position_batch(raw) -> dict:
+    """
+    Parses and coalesces a batch of note position updates.
+    Accepts a list of {'note_id', 'x', 'y'} entries, either already decoded
+    or as a JSON string, and validates that every value is an integer. When a
+    note appears more than once only its last position is kept, so a burst of
+    drags of the same note results in a single write.
+
+    Args:
+        raw (list | str): The batch entries, or their JSON encoding.
+
+    Returns:
+        dict: A mapping of note ID to its final (x, y) position, in the order
+            the notes first appeared in the batch.
+
+    Raises:
+        ValueError: If the batch is not a list of well-formed entries, is
+            empty, or is larger than POSITION_BATCH_MAX_SIZE.
+    """
+
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise ValueError('positions is not valid JSON.') from exc
+    if not isinstance(raw, list) or not raw:
+        raise ValueError('positions must be a non-empty list.')
+    if len(raw) > settings.POSITION_BATCH_MAX_SIZE:
+        raise ValueError('Too many positions in one batch.')
+    positions = {}
+    for entry in raw:
+        if not isinstance(entry, dict):
+            raise ValueError('Each position must be an object.')
+        try:
+            note_id, x, y = (
+                entry['note_id'], entry['x'], entry['y'])
+        except KeyError as exc:
+            raise ValueError(f'Position is missing {exc}.') from exc
+        # bool is an int subclass but never a valid coordinate or ID
+        if not all(
+            isinstance(value, int) and not isinstance(value, bool)
+            for value in (note_id, x, y)
+        ):
+            raise ValueError('note_id, x and y must be integers.')
+        if not all(INT_MIN <= value <= INT_MAX for value in (note_id, x, y)):
+            raise ValueError('note_id, x and y are out of range.')
+        positions[note_id] = (x, y)
+    return positions
+
+
+def apply_positions(user, positions: dict) -> int:
+    """
+    Writes a batch of note positions for a user in a single transaction.
+    Checks that every note belongs to the user with one query on primary
+    keys only, then applies all positions with one bulk UPDATE of the
+    x_position, y_position and updated_at columns. Note rows are never
+    loaded, so the number of queries does not grow with the batch size
+    (beyond the database's own statement size limits).
+
+    Args:
+        user (User): The user who must own every note in the batch.
+        positions (dict): A mapping of note ID to (x, y), as returned by
+            parse_position_batch.
+
+    Returns:
+        int: The number of notes updated.
+
+    Raises:
+        Note.DoesNotExist: If any of the notes does not exist or belongs to
+            another user; nothing is written in that case.
+    """
+
+    with transaction.atomic(using=note_database()):
+        check_ownership(user, positions)
+        updated = bulk_write_positions(positions)
+    return updated
+
+
+def check_ownership(user, note_ids) -> None:
+    """
+    Checks that every note ID belongs to the user with one query on primary
+    keys only.
+
+    Args:
+        user (User | int): The user who must own every note, or their
+            primary key.
+        note_ids (Iterable): The primary keys of the notes; must not contain
+            duplicates.
+
+    Raises:
+        Note.DoesNotExist: If any of the notes does not exist or belongs to
+            another user.
+    """
+
+    note_ids = list(note_ids)
+    owned = Note.objects.filter(user=user, pk__in=note_ids).count()
+    if owned != len(note_ids):
+        raise Note.DoesNotExist('Not all notes belong to the user.')
+
+
+def bulk_write_positions(positions: dict) -> int:
+    """
+    Applies note positions with one bulk UPDATE of the x_position,
+    y_position and updated_at columns, without loading the notes. Ownership
+    must already have been checked.
+
+    Args:
+        positions (dict): A mapping of note ID to (x, y).
+
+    Returns:
+        int: The number of positions written.
+    """
+
+    now = timezone.now()
+    notes = [
+        Note(pk=note_id, x_position=x, y_position=y, updated_at=now)
+        for note_id, (x, y) in positions.items()
+    ]
+    Note.objects.bulk_update(notes, POSITION_FIELDS)
+    return len(notes)
+
+
+def write_position_group(items: list) -> list:
+    """
+    Writes the position updates of several requests together, for the
+    write queue. Each request's ownership is checked on its own, so a
+    request naming a note it does not own fails alone, exactly as it would
+    have without the queue; the positions of all the others are merged (a
+    later request wins for the same note) and written with one bulk UPDATE.
+    Must run in a transaction.
+
+    Args:
+        items (list): (user ID, positions) pairs, one per request, in
+            arrival order.
+
+    Returns:
+        list: The number of positions written for each request, or the
+            Note.DoesNotExist raised by its ownership check.
+    """
+
+    results, merged = [], {}
+    for user_id, positions in items:
+        try:
+            check_ownership(user_id, positions)
+        except Note.DoesNotExist as exc:
+            results.append(exc)
+            continue
+        merged.update(positions)
+        results.append(len(positions))
+    if merged:
+        bulk_write_positions(merged)
+    return results
+
+
+class PositionBuffer:
+    """
+    A write-behind buffer for note positions stored in Django's cache.
+    Used when POSITION_WRITE_BEHIND is enabled so that drag traffic does not
+    write to the database on every request. Positions are kept per user as a
+    mapping of note ID to (x, y), so only the last position of each note is
+    ever written. A set of dirty user IDs tells the flusher which buffers to
+    drain, and flush() writes everything pending with one bulk UPDATE.
+    Updates to a buffer are serialized with a lock built on cache.add. The
+    configured cache must be shared by every worker process and by the
+    flush_positions process (e.g. a database, file, Redis or Memcached
+    cache); a system check rejects a per-process one (see checks).
+
+    Attributes:
+        cache_alias (str): The alias of the cache holding the buffer.
+        prefix (str): The prefix of every cache key used by the buffer.
+
+    Methods:
+        push: Buffers ownership-checked positions for a user.
+        pending: Returns the unflushed positions of a user.
+        apending: Async version of pending.
+        drain: Removes and returns every unflushed position.
+        restore: Puts drained positions back after a failed write.
+        flush: Writes every unflushed position to the database.
+    """
+
+    # Seconds before an abandoned lock expires, and the delay between
+    # attempts to acquire a busy lock.
+    lock_timeout = 5
+    lock_retry_delay = 0.001
+
+    def __init__(self, cache_alias: str = 'default',
+                 prefix: str = 'positions'):
+        """
+        Initializes the buffer on top of a configured cache.
+
+        Args:
+            cache_alias (str): The alias of the cache holding the buffer.
+            prefix (str): The prefix of every cache key used by the buffer.
+        """
+
+        self.cache_alias = cache_alias
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        """
+        Returns the cache backend holding the buffer.
+        """
+
+        return caches[self.cache_alias]
+
+    def _key(self, *parts) -> str:
+        """
+        Builds a cache key under the buffer's prefix.
+        """
+
+        return ':'.join((self.prefix,) + tuple(str(part) for part in parts))
+
+    @contextmanager
+    def _lock(self, key: str):
+        """
+        Holds an exclusive lock on a buffer key for the duration of the block.
+        Relies on cache.add only succeeding when the key does not exist yet.
+
+        Args:
+            key (str): The cache key to lock.
+        """
+
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.cache.add(lock_key, 1, self.lock_timeout):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Could not lock {key}.')
+            time.sleep(self.lock_retry_delay)
+        try:
+            yield
+        finally:
+            self.cache.delete(lock_key)
+
+    def push(self, user, positions: dict) -> int:
+        """
+        Buffers positions for a user after checking that they own every note.
+        The ownership check is a single read; nothing is written to the
+        database.
+
+        Args:
+            user (User): The user who must own every note.
+            positions (dict): A mapping of note ID to (x, y).
+
+        Returns:
+            int: The number of positions buffered.
+
+        Raises:
+            Note.DoesNotExist: If any of the notes does not exist or belongs
+                to another user; nothing is buffered in that case.
+        """
+
+        check_ownership(user, positions)
+        key = self._key('user', user.pk)
+        with self._lock(key):
+            buffered = self.cache.get(key, {})
+            buffered.update(positions)
+            self.cache.set(key, buffered, None)
+        dirty_key = self._key('dirty')
+        with self._lock(dirty_key):
+            dirty = self.cache.get(dirty_key, set())
+            dirty.add(user.pk)
+            self.cache.set(dirty_key, dirty, None)
+        return len(positions)
+
+    def pending(self, user_id: int) -> dict:
+        """
+        Returns the positions of a user that have not been flushed yet.
+
+        Args:
+            user_id (int): The primary key of the user.
+
+        Returns:
+            dict: A mapping of note ID to (x, y).
+        """
+
+        return self.cache.get(self._key('user', user_id), {})
+
+    async def apending(self, user_id: int) -> dict:
+        """
+        Async version of pending.
+
+        Args:
+            user_id (int): The primary key of the user.
+
+        Returns:
+            dict: A mapping of note ID to (x, y).
+        """
+
+        return await self.cache.aget(self._key('user', user_id), {})
+
+    def drain(self) -> dict:
+        """
+        Removes every unflushed position from the buffer.
+        The dirty set is cleared before the user buffers are taken, so a push
+        racing with the drain is either included or marks its user dirty
+        again for the next drain; no position is lost.
+
+        Returns:
+            dict: A mapping of user ID to that user's mapping of note ID to
+                (x, y).
+        """
+
+        dirty_key = self._key('dirty')
+        with self._lock(dirty_key):
+            dirty = self.cache.get(dirty_key, set())
+            self.cache.delete(dirty_key)
+        drained = {}
+        for user_id in dirty:
+            key = self._key('user', user_id)
+            with self._lock(key):
+                drained[user_id] = self.cache.get(key, {})
+                self.cache.delete(key)
+        return drained
+
+    def restore(self, drained: dict) -> None:
+        """
+        Puts drained positions back into the buffer, for the next flush to
+        write. Positions pushed for the same notes since the drain are newer
+        and are kept.
+
+        Args:
+            drained (dict): A mapping of user ID to that user's mapping of
+                note ID to (x, y), as returned by drain.
+        """
+
+        for user_id, positions in drained.items():
+            key = self._key('user', user_id)
+            with self._lock(key):
+                buffered = self.cache.get(key, {})
+                self.cache.set(key, {**positions, **buffered}, None)
+        dirty_key = self._key('dirty')
+        with self._lock(dirty_key):
+            dirty = self.cache.get(dirty_key, set())
+            dirty.update(drained)
+            self.cache.set(dirty_key, dirty, None)
+
+    def flush(self) -> int:
+        """
+        Writes every unflushed position to the database in one transaction
+        with one bulk UPDATE (one of each per shard when NOTE_SHARDS is
+        set), then invalidates the cached boards of the users whose notes
+        were written. Notes deleted since they were buffered simply match no
+        row. If a write fails, the positions not committed yet are put back
+        into the buffer before the error is raised, so none is lost.
+
+        Returns:
+            int: The number of positions written.
+        """
+
+        drained = self.drain()
+        flushed = set()
+        written = 0
+        try:
+            by_shard = {}
+            for user_id, user_positions in drained.items():
+                by_shard.setdefault(shard_for_user(user_id), {})[user_id] = (
+                    user_positions)
+            for shard, users in by_shard.items():
+                positions = {}
+                for user_positions in users.values():
+                    positions.update(user_positions)
+                if positions:
+                    with use_shard(shard), transaction.atomic(using=shard):
+                        written += bulk_write_positions(positions)
+                flushed.update(users)
+        except BaseException:
+            self.restore({
+                user_id: user_positions
+                for user_id, user_positions in drained.items()
+                if user_id not in flushed
+            })
+            raise
+        finally:
+            for user_id in flushed:
+                board_cache.invalidate(user_id)
+        return written
+
+
+def get_position_buffer() -> PositionBuffer:
+    """
+    Returns the write-behind buffer configured by POSITION_BUFFER_CACHE.
+
+    Returns:
+        PositionBuffer: The buffer used by update_position and the flusher.
+    """
+
+    return PositionBuffer(settings.POSITION_BUFFER_CACHE)
+
+
+def _apply_pending(rows: list, pending: dict) -> list:
+    """
+    Replaces the positions of serialized notes with pending ones, in place.
+    Only the position fields a row has are replaced, so rows without them
+    are left alone.
+    """
+
+    for row in rows:
+        if row.get('id') not in pending:
+            continue
+        for field, value in zip(
+                ('x_position', 'y_position'), pending[row['id']]):
+            if field in row:
+                row[field] = value
+    return rows
+
+
+def with_pending_positions(user, rows: list) -> list:
+    """
+    Applies a user's unflushed write-behind positions to serialized notes.
+    Does nothing unless POSITION_WRITE_BEHIND is enabled.
+
+    Args:
+        user (User): The owner of the notes.
+        rows (list): Note dictionaries with an 'id' and possibly position
+            fields.
+
+    Returns:
+        list: The same rows, updated in place with their most recent
+            positions.
+    """
+
+    if not settings.POSITION_WRITE_BEHIND:
+        return rows
+    return _apply_pending(rows, get_position_buffer().pending(user.pk))
+
+
+async def awith_pending_positions(user, rows: list) -> list:
+    """
+    Async version of with_pending_positions.
+
+    Args:
+        user (User): The owner of the notes.
+        rows (list): Note dictionaries with an 'id' and possibly position
+            fields.
+
+    Returns:
+        list: The same rows, updated in place with their most recent
+            positions.
+    """
+
+    if not settings.POSITION_WRITE_BEHIND:
+        return rows
+    return _apply_pending(
+        rows, await get_position_buffer().apending(user.pk))
+
+
+def _write_mode() -> str:
+    """
+    Returns how positions are currently written, as the mode label of the
+    saved positions counter: 'buffered', 'queued' or 'direct'.
+    """
+
+    if settings.POSITION_WRITE_BEHIND:
+        return 'buffered'
+    if settings.WRITE_QUEUE_ENABLED:
+        return 'queued'
+    return 'direct'
+
+
+def save_positions(user, positions: dict) -> int:
+    """
+    Saves ownership-checked positions for a user, either straight to the
+    database or, when POSITION_WRITE_BEHIND is enabled, into the write-behind
+    buffer to be written by the flusher. With WRITE_QUEUE_ENABLED, database
+    writes go through the write queue, grouped with other requests' position
+    updates. Either way the user's cached board is invalidated and a 'move'
+    event is pushed to their open boards, once the positions are committed.
+
+    Args:
+        user (User): The user who must own every note.
+        positions (dict): A mapping of note ID to (x, y).
+
+    Returns:
+        int: The number of positions saved.
+
+    Raises:
+        Note.DoesNotExist: If any of the notes does not exist or belongs to
+            another user; nothing is saved in that case.
+    """
+
+    if settings.POSITION_WRITE_BEHIND:
+        saved = get_position_buffer().push(user, positions)
+    elif settings.WRITE_QUEUE_ENABLED:
+        saved = run_grouped(write_position_group, (user.pk, positions))
+    elif len(positions) == 1:
+        [(note_id, (x, y))] = positions.items()
+        if not write_position(user, note_id, x, y):
+            raise Note.DoesNotExist('No Note matches the given query.')
+        saved = 1
+    else:
+        saved = apply_positions(user, positions)
+    metrics.inc('sticky_notes_positions_saved_total', saved,
+                mode=_write_mode())
+    # Positions are written without saving the notes, so no signal fires
+    board_cache.invalidate_on_commit(user.pk, using=note_database())
+    publish_moves(user.pk, positions)
+    return saved
+
+
+async def asave_positions(user, positions: dict) -> int:
+    """
+    Async version of save_positions.
+    A single note is moved natively with the async ORM. Batches and the
+    write-behind buffer need a transaction or the buffer's blocking lock,
+    which the async ORM does not offer, so they run save_positions in a
+    worker thread. With WRITE_QUEUE_ENABLED, the write queue's Future is
+    awaited instead.
+
+    Args:
+        user (User): The user who must own every note.
+        positions (dict): A mapping of note ID to (x, y).
+
+    Returns:
+        int: The number of positions saved.
+
+    Raises:
+        Note.DoesNotExist: If any of the notes does not exist or belongs to
+            another user; nothing is saved in that case.
+    """
+
+    if settings.POSITION_WRITE_BEHIND:
+        return await sync_to_async(save_positions)(user, positions)
+    if settings.WRITE_QUEUE_ENABLED:
+        saved = await arun_grouped(
+            write_position_group, (user.pk, positions))
+    elif len(positions) != 1:
+        return await sync_to_async(save_positions)(user, positions)
+    else:
+        [(note_id, (x, y))] = positions.items()
+        if not await awrite_position(user, note_id, x, y):
+            raise Note.DoesNotExist('No Note matches the given query.')
+        saved = 1
+    metrics.inc('sticky_notes_positions_saved_total', saved,
+                mode=_write_mode())
+    await board_cache.ainvalidate(user.pk)
+    await apublish_moves(user.pk, positions)
+    return saved
@@ -0,0 +1,208 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Measurements of the request being handled, if any.
+_current = ContextVar('request_stats', default=None)
+
+# Totals per view name in this process, guarded by _lock.
+_totals = {}
+_lock = threading.Lock()
+
+
+class RequestStats:
+    """
+    Measures one request: the queries it runs on any database, the time
+    they take, the time spent rendering templates and the time the whole
+    request takes. Queries are counted
+    wherever they run within the request's context, including the worker
+    threads of sync_to_async and the write queue.
+
+    Attributes:
+        queries (int): The number of queries run.
+        allowance (int): Queries run by work that grows with the data by
+            design (see unbudgeted), allowed on top of the view's budget.
+        db_time (float): Seconds spent running them.
+        render_time (float): Seconds spent rendering templates.
+        started (float): When the request started, from perf_counter.
+        duration (float): Seconds the request took, once finished.
+
+    Methods:
+        finish: Stops the clock.
+    """
+
+    def __init__(self):
+        """
+        Starts measuring.
+        """
+
+        self.queries = 0
+        self.allowance = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def finish(self) -> None:
+        """
+        Stops the clock.
+        """
+
+        self.duration = time.perf_counter() - self.started
+
+
+@contextmanager
+def measuring(stats: RequestStats):
+    """
+    Records the queries run inside the block in a request's stats.
+
+    Args:
+        stats (RequestStats): The stats of the request.
+    """
+
+    token = _current.set(stats)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def unbudgeted():
+    """
+    Lets the queries run inside the block go beyond the current request's
+    query budget: they are still counted, and added to its allowance. For
+    work repeated per unit of data by design, such as each export chunk or
+    import batch after the first or reserving a block of note IDs, so a
+    view's budget stays the number of queries of its fixed part.
+    """
+
+    stats = _current.get()
+    before = stats.queries if stats is not None else 0
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.allowance += stats.queries - before
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper that adds each query and its duration to the
+    current request's stats, if any.
+    """
+
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def record_render(seconds: float) -> None:
+    """
+    Adds the time taken to render a template to the current request's
+    stats, if any.
+
+    Args:
+        seconds (float): The rendering time.
+    """
+
+    stats = _current.get()
+    if stats is not None:
+        stats.render_time += seconds
+
+
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    """
+    Adds record_query to every new database connection; connected to
+    connection_created by the app config.
+
+    Args:
+        sender (type): The database wrapper class.
+        connection (BaseDatabaseWrapper): The new connection.
+        **kwargs: Remaining signal arguments.
+    """
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def query_budget(view_name: str):
+    """
+    Returns the most queries a view may run per request, from
+    VIEW_QUERY_BUDGETS, or None if it has no budget. A request may also
+    run its allowance of unbudgeted queries.
+
+    Args:
+        view_name (str): The resolved view name, e.g. 'note_list'.
+
+    Returns:
+        int: The budget, or None.
+    """
+
+    return settings.VIEW_QUERY_BUDGETS.get(view_name)
+
+
+def add(view_name: str, stats: RequestStats) -> None:
+    """
+    Adds a finished request to its view's totals.
+
+    Args:
+        view_name (str): The resolved view name.
+        stats (RequestStats): The request's stats.
+    """
+
+    with _lock:
+        totals = _totals.setdefault(view_name, {
+            'requests': 0, 'queries': 0, 'max_queries': 0, 'db_time': 0.0,
+            'time': 0.0, 'max_time': 0.0,
+        })
+        totals['requests'] += 1
+        totals['queries'] += stats.queries
+        totals['max_queries'] = max(totals['max_queries'], stats.queries)
+        totals['db_time'] += stats.db_time
+        totals['time'] += stats.duration
+        totals['max_time'] = max(totals['max_time'], stats.duration)
+
+
+def summary() -> dict:
+    """
+    Returns the per-view totals of this process as averages.
+
+    Returns:
+        dict: For each view name, the number of 'requests', the mean and
+            max 'queries' and 'max_queries', the mean 'db_ms' and 'ms' and
+            the 'max_ms' per request, and its 'budget'.
+    """
+
+    with _lock:
+        totals = {name: dict(values) for name, values in _totals.items()}
+    return {
+        name: {
+            'requests': values['requests'],
+            'queries': values['queries'] / values['requests'],
+            'max_queries': values['max_queries'],
+            'db_ms': values['db_time'] * 1000 / values['requests'],
+            'ms': values['time'] * 1000 / values['requests'],
+            'max_ms': values['max_time'] * 1000,
+            'budget': query_budget(name),
+        }
+        for name, values in sorted(totals.items())
+    }
+
+
+def reset() -> None:
+    """
+    Clears the per-view totals.
+    """
+
+    with _lock:
+        _totals.clear()
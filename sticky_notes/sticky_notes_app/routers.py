@@ -0,0 +1,261 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import ChangeSequence, Note, NoteTombstone
+from .shards import current_shard, shard_for_user
+
+# Models stored on the shard holding their owner's notes.
+SHARDED_MODELS = (Note, ChangeSequence, NoteTombstone)
+
+# Whether reads in the current request may be served by a replica.
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+class NoteShardRouter:
+    """
+    Routes note queries, and those of the owner's change sequence and
+    tombstones, to the shard holding their owner's notes.
+    A query about a given note or user goes to that user's shard; any other
+    note query goes to the shard entered with use_shard(), which the
+    note_shards middleware enters for the authenticated user of each
+    request, so views need no changes. Everything else, including users
+    and shard assignments, is left to the next router (the primary). Does
+    nothing while NOTE_SHARDS is empty.
+
+    Methods:
+        db_for_read: Picks the shard of a note query.
+        db_for_write: Picks the shard of a note write.
+        allow_relation: Allows notes to relate to users on the primary.
+        allow_migrate: Only creates the note tables on shards.
+    """
+
+    def _shard(self, model, hints):
+        """
+        Returns the shard of a note query, or None if it is not one.
+        """
+
+        if model not in SHARDED_MODELS or not settings.NOTE_SHARDS:
+            return None
+        instance = hints.get('instance')
+        if (isinstance(instance, SHARDED_MODELS)
+                and instance.user_id is not None):
+            return shard_for_user(instance.user_id)
+        if isinstance(instance, User) and instance.pk is not None:
+            return shard_for_user(instance.pk)
+        return current_shard()
+
+    def db_for_read(self, model, **hints):
+        """
+        Returns the shard a note is read from.
+        """
+
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        """
+        Returns the shard a note is written to.
+        """
+
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        Allows relations involving notes, whose owners are on the primary.
+        """
+
+        if (isinstance(obj1, SHARDED_MODELS)
+                or isinstance(obj2, SHARDED_MODELS)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+        Only allows the app's note migrations (and its raw SQL ones, such as
+        the search index) on NOTE_SHARD_DATABASES.
+        """
+
+        if db not in settings.NOTE_SHARD_DATABASES:
+            return None
+        return app_label == 'sticky_notes_app' and model_name in (
+            None, *(model._meta.model_name for model in SHARDED_MODELS))
+
+
+class PrimaryReplicaRouter:
+    """
+    Routes reads to a replica and everything else to the primary.
+    Reads go to one of DATABASE_REPLICAS, picked at random, only inside
+    replica_reads() (which the read_from_replica views enter), so any read
+    that may be followed by a write on the same data, such as ownership
+    checks or sessions, stays on the primary. With DATABASE_REPLICAS empty
+    every query uses the primary, as without the router.
+
+    Methods:
+        db_for_read: Picks a replica inside replica_reads().
+        db_for_write: Sends every write to the primary.
+        allow_relation: Allows relations across the primary and replicas.
+        allow_migrate: Only migrates the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        """
+        Returns a replica alias inside replica_reads() when replicas are
+        configured, or None to use the primary.
+        """
+
+        if _replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        """
+        Returns the primary, even for objects that were read from a replica.
+        """
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        Allows any relation, since replicas hold the same data.
+        """
+
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+        Only allows migrations on the primary; replicas get the schema along
+        with the data.
+        """
+
+        return db == DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def replica_reads():
+    """
+    Lets the reads run inside the block use a replica.
+    """
+
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _sticky_key(user_id: int) -> str:
+    """
+    Returns the cache key marking a user's recent write.
+    """
+
+    return f'replica:sticky:{user_id}'
+
+
+def mark_written(user_id: int) -> None:
+    """
+    Pins a user's reads to the primary for REPLICA_STICKY_SECONDS, so they
+    see their own writes before the replicas have caught up.
+
+    Args:
+        user_id (int): The ID of the user who wrote.
+    """
+
+    cache.set(_sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+async def amark_written(user_id: int) -> None:
+    """
+    Async version of mark_written.
+    """
+
+    await cache.aset(
+        _sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def _stream_within(content, context):
+    """
+    Iterates a streaming response's content inside a context manager, such
+    as replica_reads(), since its queries only run once the response is
+    being sent.
+    """
+
+    with context:
+        yield from content
+
+
+async def _astream_within(content, context):
+    """
+    Async version of _stream_within, for async streaming responses.
+    """
+
+    with context:
+        async for chunk in content:
+            yield chunk
+
+
+def stream_within(response, context):
+    """
+    Makes a streaming response, sync or async, produce its content inside
+    a context manager; other responses are returned unchanged.
+
+    Args:
+        response (HttpResponse): The response of a view.
+        context: The context manager to enter while streaming.
+
+    Returns:
+        HttpResponse: The same response.
+    """
+
+    if response.streaming:
+        stream = _astream_within if response.is_async else _stream_within
+        response.streaming_content = stream(
+            response.streaming_content, context)
+    return response
+
+
+def read_from_replica(view):
+    """
+    Serves a view's reads from a replica, unless the user wrote within the
+    last REPLICA_STICKY_SECONDS. Only GET and HEAD requests are routed;
+    the content of streaming responses is read from the replica too. Must
+    be applied under the login decorator, and above any decorator whose
+    reads (such as conditional GET validators) should see the same data.
+    Works with sync and async views.
+
+    Args:
+        view (callable): The view whose reads may use a replica.
+
+    Returns:
+        callable: The wrapped view.
+    """
+
+    def use_replica(request) -> bool:
+        return (settings.DATABASE_REPLICAS
+                and request.method in ('GET', 'HEAD'))
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if (not use_replica(request)
+                    or await cache.aget(_sticky_key(request.user.pk))):
+                return await view(request, *args, **kwargs)
+            with replica_reads():
+                response = await view(request, *args, **kwargs)
+            return stream_within(response, replica_reads())
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not use_replica(request) or cache.get(_sticky_key(request.user.pk)):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            response = view(request, *args, **kwargs)
+        return stream_within(response, replica_reads())
+    return wrapper
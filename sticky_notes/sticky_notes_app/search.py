@@ -0,0 +1,239 @@
+import re
+import time
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+
+from .models import Note
+
+# Virtual table holding the FTS5 index, created by migration 0006.
+FTS_TABLE = 'sticky_notes_app_note_fts'
+
+# Markers placed around matches by SQLite; replaced by <mark> tags once the
+# text has been HTML-escaped.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+# Number of tokens around a match kept in a content snippet.
+SNIPPET_TOKENS = 12
+
+# Characters allowed in a search term; everything else separates terms.
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query: str) -> list:
+    """
+    Splits a user's search query into plain word terms.
+    Operators and punctuation are dropped, so user input can never be
+    interpreted as FTS5 query syntax.
+
+    Args:
+        query (str): The raw search query.
+
+    Returns:
+        list: The words of the query.
+    """
+
+    return TERM_RE.findall(query)
+
+
+def _fts_query(terms: list) -> str:
+    """
+    Builds an FTS5 MATCH expression requiring every term, each as a quoted
+    prefix so partially typed words still match.
+
+    Args:
+        terms (list): Words as returned by search_terms.
+
+    Returns:
+        str: The MATCH expression.
+    """
+
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _mark(text: str) -> str:
+    """
+    HTML-escapes text highlighted by SQLite and turns its match markers into
+    <mark> tags.
+
+    Args:
+        text (str): Text containing MATCH_START/MATCH_END markers.
+
+    Returns:
+        str: Safe HTML.
+    """
+
+    return (
+        escape(text)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+def _connection(write: bool = False):
+    """
+    Returns the database connection that Note reads (or writes) are routed
+    to.
+    """
+
+    if write:
+        return connections[router.db_for_write(Note)]
+    return connections[router.db_for_read(Note)]
+
+
+def fts_available(connection=None) -> bool:
+    """
+    Tells whether the FTS5 index can be used on a connection.
+    It exists only on SQLite and can be switched off with NOTE_SEARCH_FTS.
+
+    Args:
+        connection: The database connection; defaults to the one Note reads
+            are routed to.
+
+    Returns:
+        bool: True if searches can use the FTS5 index.
+    """
+
+    connection = connection or _connection()
+    if not settings.NOTE_SEARCH_FTS or connection.vendor != 'sqlite':
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def _search_fts(connection, user, terms: list, limit: int) -> list:
+    """
+    Searches the FTS5 index, ranked by BM25 with title matches weighted
+    above content matches, and scoped to the user's notes by a join. Only
+    the columns needed for a result are read from the notes table.
+    """
+
+    sql = f"""
+        SELECT n.id, n.color, n.x_position, n.y_position, n.updated_at,
+               highlight({FTS_TABLE}, 0, %s, %s) AS title_match,
+               snippet({FTS_TABLE}, 1, %s, %s, '…', %s) AS snippet,
+               bm25({FTS_TABLE}, 10.0, 1.0) AS rank
+        FROM {FTS_TABLE}
+        JOIN sticky_notes_app_note n ON n.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND n.user_id = %s
+        ORDER BY rank
+        LIMIT %s
+    """
+    params = [
+        MATCH_START, MATCH_END, MATCH_START, MATCH_END, SNIPPET_TOKENS,
+        _fts_query(terms), user.pk, limit,
+    ]
+    notes = Note.objects.db_manager(connection.alias).raw(sql, params)
+    return [
+        {
+            'id': note.id,
+            'color': note.color,
+            'x_position': note.x_position,
+            'y_position': note.y_position,
+            'updated_at': note.updated_at,
+            'title': _mark(note.title_match),
+            'snippet': _mark(note.snippet),
+            'rank': note.rank,
+        }
+        for note in notes
+    ]
+
+
+def _highlight(text: str, pattern) -> str:
+    """
+    Escapes text and wraps matches of a pattern in <mark> tags.
+    """
+
+    marked = pattern.sub(lambda m: MATCH_START + m.group() + MATCH_END, text)
+    return _mark(marked)
+
+
+def _search_basic(user, terms: list, limit: int) -> list:
+    """
+    Searches with case-insensitive containment lookups, for backends without
+    the FTS5 index. Results are most recently updated first.
+    """
+
+    query = Q()
+    for term in terms:
+        query &= Q(title__icontains=term) | Q(content__icontains=term)
+    pattern = re.compile(
+        '|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    notes = Note.objects.filter(query, user=user).order_by(
+        '-updated_at').values(
+            'id', 'title', 'content', 'color', 'x_position', 'y_position',
+            'updated_at')[:limit]
+    results = []
+    for note in notes:
+        content = note.pop('content')
+        match = pattern.search(content)
+        start = max(0, match.start() - 60) if match else 0
+        snippet = content[start:start + 160]
+        note.update(
+            title=_highlight(note['title'], pattern),
+            snippet=_highlight(snippet, pattern),
+            rank=None,
+        )
+        results.append(note)
+    return results
+
+
+def search_notes(user, query: str, limit: int = None) -> list:
+    """
+    Searches a user's notes by title and content.
+    Uses the FTS5 index when available: results are ranked by relevance and
+    only the index and the matching notes are read. Other backends fall back
+    to containment lookups. Matches are highlighted with <mark> tags in
+    HTML-escaped 'title' and 'snippet' values.
+
+    Args:
+        user (User): The owner of the notes.
+        query (str): The raw search query.
+        limit (int): The maximum number of results; defaults to
+            NOTE_SEARCH_MAX_RESULTS.
+
+    Returns:
+        list: Result dictionaries with 'id', 'title', 'snippet', 'color',
+            'x_position', 'y_position', 'updated_at' and 'rank' (None
+            without FTS5), best match first.
+    """
+
+    limit = limit or settings.NOTE_SEARCH_MAX_RESULTS
+    terms = search_terms(query)
+    if not terms:
+        return []
+    connection = _connection()
+    if fts_available(connection):
+        return _search_fts(connection, user, terms, limit)
+    return _search_basic(user, terms, limit)
+
+
+def rebuild_index() -> dict:
+    """
+    Rebuilds the FTS5 index from the notes table.
+
+    Returns:
+        dict: The rebuild time in 'seconds', the number of indexed 'notes'
+            and the index 'size' in bytes.
+
+    Raises:
+        RuntimeError: If the FTS5 index is not available.
+    """
+
+    connection = _connection(write=True)
+    if not fts_available(connection):
+        raise RuntimeError('The FTS5 search index is not available.')
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elapsed = time.perf_counter() - started
+        cursor.execute('SELECT COUNT(*) FROM sticky_notes_app_note')
+        [notes] = cursor.fetchone()
+        # The index is stored in the FTS5 shadow tables
+        cursor.execute(
+            f"SELECT COALESCE(SUM(LENGTH(block)), 0) FROM {FTS_TABLE}_data")
+        [size] = cursor.fetchone()
+    return {'seconds': elapsed, 'notes': notes, 'size': size}
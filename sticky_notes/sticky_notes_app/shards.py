@@ -0,0 +1,438 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import (
+    DEFAULT_DB_ALIAS, IntegrityError, connections, router, transaction)
+from django.db.models import Count, Max
+
+from . import board_cache
+from .models import (
+    ChangeSequence, Note, NoteIdBlock, NoteTombstone, UserShard)
+from .request_stats import unbudgeted
+
+# Alias of the shard holding the notes of the current request's user.
+_current_shard = ContextVar('note_shard', default=None)
+
+
+@contextmanager
+def use_shard(alias: str):
+    """
+    Sends the note queries run inside the block, that are not about a
+    specific note or user, to a shard.
+
+    Args:
+        alias (str): The alias of the shard database.
+    """
+
+    token = _current_shard.set(alias)
+    try:
+        yield
+    finally:
+        _current_shard.reset(token)
+
+
+def current_shard():
+    """
+    Returns the shard entered with use_shard(), or None outside of one.
+    """
+
+    return _current_shard.get()
+
+
+def note_database() -> str:
+    """
+    Returns the alias note writes currently go to: the shard entered with
+    use_shard(), or the primary. Transactions around note writes must be
+    opened on it.
+
+    Returns:
+        str: A database alias.
+    """
+
+    return router.db_for_write(Note)
+
+
+def _assignment_key(user_id: int) -> str:
+    """
+    Returns the cache key of a user's shard assignment.
+    """
+
+    return f'shard:user:{user_id}'
+
+
+def _place(user_id: int) -> str:
+    """
+    Picks the shard of a user without an assignment yet. Users whose notes
+    predate sharding stay on the primary until rebalanced; the others are
+    spread over NOTE_SHARDS by user ID.
+    """
+
+    if Note.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id).exists():
+        return DEFAULT_DB_ALIAS
+    return settings.NOTE_SHARDS[user_id % len(settings.NOTE_SHARDS)]
+
+
+def get_assignment(user_id: int) -> tuple:
+    """
+    Returns a user's shard assignment, from the cache when possible,
+    assigning the user to a shard the first time. The cache must be shared
+    by every process, for the moves of rebalance_shards to reach the web
+    workers (see checks).
+
+    Args:
+        user_id (int): The primary key of the user.
+
+    Returns:
+        tuple: The (shard alias, moving) pair.
+    """
+
+    key = _assignment_key(user_id)
+    assignment = cache.get(key)
+    if assignment is None:
+        # Once per user and cache timeout, outside the query budget; the
+        # shard is only picked for a user without an assignment
+        with unbudgeted():
+            shard = UserShard.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+                user_id=user_id,
+                defaults={'shard': lambda: _place(user_id)})[0]
+        assignment = (shard.shard, shard.moving)
+        cache.set(key, assignment, settings.NOTE_SHARD_CACHE_TIMEOUT)
+    return tuple(assignment)
+
+
+async def aget_assignment(user_id: int) -> tuple:
+    """
+    Async version of get_assignment; only a cache miss leaves the event
+    loop.
+
+    Args:
+        user_id (int): The primary key of the user.
+
+    Returns:
+        tuple: The (shard alias, moving) pair.
+    """
+
+    assignment = await cache.aget(_assignment_key(user_id))
+    if assignment is None:
+        return await sync_to_async(get_assignment)(user_id)
+    return tuple(assignment)
+
+
+def shard_for_user(user_id: int) -> str:
+    """
+    Returns the alias of the database holding a user's notes: the primary
+    when NOTE_SHARDS is empty, or the user's shard otherwise.
+
+    Args:
+        user_id (int): The primary key of the user.
+
+    Returns:
+        str: A database alias.
+    """
+
+    if not settings.NOTE_SHARDS:
+        return DEFAULT_DB_ALIAS
+    return get_assignment(user_id)[0]
+
+
+def _set_assignment(user_id: int, shard: str, moving: bool) -> None:
+    """
+    Stores a user's shard assignment and refreshes its cache entry.
+    """
+
+    UserShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        user_id=user_id, defaults={'shard': shard, 'moving': moving})
+    cache.set(
+        _assignment_key(user_id), (shard, moving),
+        settings.NOTE_SHARD_CACHE_TIMEOUT)
+
+
+def _reserve_block(size: int) -> tuple:
+    """
+    Reserves the next block of note IDs on the primary, after every block
+    reserved so far and every note already on the primary. Its queries do
+    not count against the query budget of the request needing the IDs.
+
+    Returns:
+        tuple: The (first, last) IDs of the block.
+    """
+
+    with unbudgeted():
+        while True:
+            last_block = NoteIdBlock.objects.using(
+                DEFAULT_DB_ALIAS).aggregate(end=Max('end'))['end'] or 0
+            last_note = Note.objects.using(DEFAULT_DB_ALIAS).aggregate(
+                id=Max('id'))['id'] or 0
+            start = max(last_block, last_note) + 1
+            try:
+                with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                    NoteIdBlock.objects.using(DEFAULT_DB_ALIAS).create(
+                        start=start, end=start + size - 1)
+            except IntegrityError:
+                # Another process reserved the same block first
+                continue
+            return start, start + size - 1
+
+
+class NoteIdAllocator:
+    """
+    Hands out note IDs from blocks reserved on the primary, so notes get
+    IDs that are unique across shards without asking the primary for each
+    one. Thread-safe. A block reserved inside a transaction on the primary
+    only covers the IDs asked for and is not kept, since rolling the
+    transaction back releases it.
+
+    Attributes:
+        lock (Lock): Guards the current block.
+        next_id (int): The next free ID of the current block.
+        end (int): The last ID of the current block.
+
+    Methods:
+        allocate: Returns a number of fresh note IDs.
+    """
+
+    def __init__(self):
+        """
+        Starts without a block.
+        """
+
+        self.lock = threading.Lock()
+        self.next_id, self.end = 1, 0
+
+    def allocate(self, count: int) -> list:
+        """
+        Returns fresh note IDs, reserving blocks as needed.
+
+        Args:
+            count (int): The number of IDs.
+
+        Returns:
+            list: The IDs, in increasing order.
+        """
+
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            start, end = _reserve_block(count)
+            return list(range(start, end + 1))
+        ids = []
+        with self.lock:
+            while len(ids) < count:
+                if self.next_id > self.end:
+                    self.next_id, self.end = _reserve_block(max(
+                        settings.NOTE_ID_BLOCK_SIZE, count - len(ids)))
+                taken = min(count - len(ids), self.end - self.next_id + 1)
+                ids.extend(range(self.next_id, self.next_id + taken))
+                self.next_id += taken
+        return ids
+
+
+_allocator = NoteIdAllocator()
+
+
+def assign_note_ids(notes) -> None:
+    """
+    Gives new notes IDs from the allocator while NOTE_SHARDS is set, so
+    they do not take IDs from their database's own sequence. Notes that
+    already have an ID are left alone.
+
+    Args:
+        notes (iterable): Note instances about to be inserted.
+    """
+
+    if not settings.NOTE_SHARDS:
+        return
+    new = [note for note in notes if note.pk is None]
+    if not new:
+        return
+    for note, pk in zip(new, _allocator.allocate(len(new))):
+        note.pk = pk
+
+
+def _copy_sync_state(user_id: int, source: str, target: str,
+                     chunk_size: int) -> None:
+    """
+    Copies a user's change sequence and tombstones from one shard to
+    another, replacing those on the target, so the user's sync tokens stay
+    valid after a move.
+    """
+
+    for model in (ChangeSequence, NoteTombstone):
+        model.objects.using(target).filter(user_id=user_id).delete()
+        model.objects.using(target).bulk_create(
+            model.objects.using(source).filter(user_id=user_id)
+            .iterator(chunk_size), batch_size=chunk_size)
+
+
+def _copy_notes(user_id: int, source: str, target: str,
+                chunk_size: int) -> int:
+    """
+    Copies a user's notes from one shard to another, rows unchanged (IDs,
+    timestamps and change numbers included), along with their change
+    sequence and tombstones, in one transaction on the target. Notes left
+    on the target by an interrupted move are replaced.
+
+    Returns:
+        int: The number of notes copied.
+    """
+
+    target_connection = connections[target]
+    quote_name = target_connection.ops.quote_name
+    table = quote_name(Note._meta.db_table)
+    columns = [field.column for field in Note._meta.concrete_fields]
+    column_list = ', '.join(quote_name(column) for column in columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    copied, last_id = 0, 0
+    with transaction.atomic(using=target):
+        with target_connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE user_id = %s', [user_id])
+        _copy_sync_state(user_id, source, target, chunk_size)
+        while True:
+            with connections[source].cursor() as cursor:
+                cursor.execute(
+                    f'SELECT {column_list} FROM {table} '
+                    'WHERE user_id = %s AND id > %s ORDER BY id LIMIT %s',
+                    [user_id, last_id, chunk_size])
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            with target_connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {table} ({column_list}) '
+                    f'VALUES ({placeholders})', rows)
+            copied += len(rows)
+            last_id = rows[-1][columns.index('id')]
+    return copied
+
+
+def delete_user_notes(user_id: int, using: str) -> int:
+    """
+    Deletes a user's notes from one database with a single statement,
+    without loading them or sending delete signals, then their change
+    sequence and tombstones there.
+
+    Args:
+        user_id (int): The primary key of the user.
+        using (str): The alias of the database.
+
+    Returns:
+        int: The number of notes deleted.
+    """
+
+    connection = connections[using]
+    table = connection.ops.quote_name(Note._meta.db_table)
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE user_id = %s', [user_id])
+        deleted = cursor.rowcount
+        for model in (NoteTombstone, ChangeSequence):
+            sync_table = connection.ops.quote_name(model._meta.db_table)
+            cursor.execute(
+                f'DELETE FROM {sync_table} WHERE user_id = %s', [user_id])
+        return deleted
+
+
+def move_user(user_id: int, target: str, grace: float = None,
+              chunk_size: int = 1000) -> int:
+    """
+    Moves a user's notes to another shard while the site stays up.
+    The user is first marked as moving, which makes their write requests
+    fail with 503 while their reads carry on from the old shard; after
+    a grace period for writes already in flight, the notes are copied,
+    the assignment is switched and the old copies are deleted. Other users
+    are not affected. Note IDs do not change.
+
+    Args:
+        user_id (int): The primary key of the user.
+        target (str): The alias of the shard to move to; one of NOTE_SHARDS.
+        grace (float): Seconds to wait for in-flight writes; defaults to
+            NOTE_SHARD_MOVE_GRACE.
+        chunk_size (int): The number of notes copied per query.
+
+    Returns:
+        int: The number of notes moved.
+
+    Raises:
+        ValueError: If the target is not one of NOTE_SHARDS.
+    """
+
+    if target not in settings.NOTE_SHARDS:
+        raise ValueError(f'{target} is not one of NOTE_SHARDS.')
+    source, moving = get_assignment(user_id)
+    if source == target:
+        if moving:
+            # Left marked by an interrupted move
+            _set_assignment(user_id, source, moving=False)
+        return 0
+    _set_assignment(user_id, source, moving=True)
+    try:
+        time.sleep(settings.NOTE_SHARD_MOVE_GRACE if grace is None else grace)
+        if settings.POSITION_WRITE_BEHIND:
+            # Buffered positions must reach the old shard before the copy
+            from .positions import get_position_buffer
+            get_position_buffer().flush()
+        moved = _copy_notes(user_id, source, target, chunk_size)
+    except BaseException:
+        _set_assignment(user_id, source, moving=False)
+        raise
+    _set_assignment(user_id, target, moving=False)
+    delete_user_notes(user_id, source)
+    board_cache.invalidate(user_id)
+    return moved
+
+
+def shard_loads() -> dict:
+    """
+    Counts the notes of every user on every shard.
+
+    Returns:
+        dict: A mapping of shard alias to a mapping of user ID to their
+            number of notes.
+    """
+
+    return {
+        alias: dict(
+            Note.objects.using(alias).order_by().values_list('user_id')
+            .annotate(notes=Count('id')))
+        for alias in settings.NOTE_SHARDS
+    }
+
+
+def plan_rebalance(loads: dict) -> list:
+    """
+    Plans the user moves that even out the number of notes per shard.
+    Repeatedly moves, from the fullest shard to the emptiest, the user
+    whose move brings the two closest together, until no move narrows the
+    gap.
+
+    Args:
+        loads (dict): Notes per user per shard, as returned by shard_loads.
+
+    Returns:
+        list: (user ID, number of notes, source, target) moves, in order.
+    """
+
+    loads = {alias: dict(users) for alias, users in loads.items()}
+    totals = {alias: sum(users.values()) for alias, users in loads.items()}
+    moves = []
+    while len(totals) > 1:
+        fullest = max(totals, key=totals.get)
+        emptiest = min(totals, key=totals.get)
+        gap = totals[fullest] - totals[emptiest]
+        candidates = [
+            (user_id, notes) for user_id, notes in loads[fullest].items()
+            if 0 < notes < gap
+        ]
+        if not candidates:
+            break
+        user_id, notes = min(
+            candidates, key=lambda candidate: abs(gap - 2 * candidate[1]))
+        del loads[fullest][user_id]
+        loads[emptiest][user_id] = notes
+        totals[fullest] -= notes
+        totals[emptiest] += notes
+        moves.append((user_id, notes, fullest, emptiest))
+    return moves
@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+
+from . import board_cache
+from .auth_backends import invalidate_user
+from .events import note_data, publish_on_commit
+from .models import Note, UserShard
+from .shards import assign_note_ids, delete_user_notes
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_board(sender, instance: Note, **kwargs) -> None:
+    """
+    Invalidates the cached board of a note's owner whenever the note is
+    saved or deleted, once the change is committed.
+
+    Args:
+        sender (type): The Note model class.
+        instance (Note): The note that was saved or deleted.
+        **kwargs: Remaining signal arguments.
+    """
+
+    board_cache.invalidate_on_commit(
+        instance.user_id, using=kwargs.get('using'))
+
+
+@receiver(post_save, sender=Note)
+def publish_note_saved(sender, instance: Note, created: bool,
+                       **kwargs) -> None:
+    """
+    Pushes a 'create' or 'update' event to the owner's open boards once the
+    note is committed.
+
+    Args:
+        sender (type): The Note model class.
+        instance (Note): The note that was saved.
+        created (bool): Whether the note was just created.
+        **kwargs: Remaining signal arguments.
+    """
+
+    publish_on_commit(
+        instance.user_id, 'create' if created else 'update',
+        note_data(instance), using=kwargs.get('using'))
+
+
+@receiver(post_delete, sender=Note)
+def publish_note_deleted(sender, instance: Note, **kwargs) -> None:
+    """
+    Pushes a 'delete' event to the owner's open boards once the deletion is
+    committed.
+
+    Args:
+        sender (type): The Note model class.
+        instance (Note): The note that was deleted.
+        **kwargs: Remaining signal arguments.
+    """
+
+    publish_on_commit(
+        instance.user_id, 'delete', {'id': instance.pk},
+        using=kwargs.get('using'))
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_notes(sender, instance: User, **kwargs) -> None:
+    """
+    Deletes a user's notes from their shard when the user is deleted, since
+    the cascade only reaches notes on the primary.
+
+    Args:
+        sender (type): The User model class.
+        instance (User): The user being deleted.
+        **kwargs: Remaining signal arguments.
+    """
+
+    if not settings.NOTE_SHARDS:
+        return
+    shard = UserShard.objects.using(DEFAULT_DB_ALIAS).filter(
+        user=instance).values_list('shard', flat=True).first()
+    if shard and shard != DEFAULT_DB_ALIAS:
+        delete_user_notes(instance.pk, shard)
+
+
+@receiver(pre_save, sender=Note)
+def assign_note_id(sender, instance: Note, raw: bool, **kwargs) -> None:
+    """
+    Gives a new note an ID that is unique across shards while NOTE_SHARDS
+    is set.
+
+    Args:
+        sender (type): The Note model class.
+        instance (Note): The note about to be saved.
+        raw (bool): Whether the note is being loaded from a fixture.
+        **kwargs: Remaining signal arguments.
+    """
+
+    if not raw:
+        assign_note_ids([instance])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance: User, **kwargs) -> None:
+    """
+    Drops a user from the FAST_AUTH user cache whenever they are saved or
+    deleted, e.g. on a password change or a new last_login.
+
+    Args:
+        sender (type): The User model class.
+        instance (User): The user that was saved or deleted.
+        **kwargs: Remaining signal arguments.
+    """
+
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, request, user, **kwargs) -> None:
+    """
+    Drops a user from the FAST_AUTH user cache when they log out.
+
+    Args:
+        sender (type): The class of the logged out user.
+        request (HttpRequest): The logout request.
+        user (User): The user who logged out, or None if nobody was logged
+            in.
+        **kwargs: Remaining signal arguments.
+    """
+
+    if user is not None:
+        invalidate_user(user.pk)
@@ -0,0 +1,69 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    # Optional; only gzip siblings are written without it
+    brotli = None
+
+
+def _compressors() -> list:
+    """
+    Returns the (suffix, compress) pairs of the precompressed variants to
+    write: gzip, and Brotli when the brotli package is installed.
+    """
+
+    compressors = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        compressors.append(('.br', brotli.compress))
+    return compressors
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    The manifest storage of collectstatic, which copies every static file
+    under a name with a hash of its content (style.3b6f0a1c2d4e.css) and
+    maps the original names to them in staticfiles.json, writing a
+    precompressed sibling of each hashed text file next to it
+    (style.3b6f0a1c2d4e.css.gz, and .br with the brotli package), for
+    serve_static to send to clients that accept it. Files below
+    STATIC_COMPRESS_MIN_SIZE bytes, and variants that would not be
+    smaller, are skipped.
+
+    Methods:
+        post_process: Hashes the collected files, then compresses them.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        """
+        Hashes the collected files like ManifestStaticFilesStorage, then
+        writes the compressed variants of the hashed ones.
+        """
+
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        extensions = settings.STATIC_COMPRESS_EXTENSIONS
+        for name in sorted(set(self.hashed_files.values())):
+            if os.path.splitext(name)[1] in extensions:
+                self._compress(name)
+
+    def _compress(self, name: str) -> None:
+        """
+        Writes the compressed variants of one collected file.
+        """
+
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < settings.STATIC_COMPRESS_MIN_SIZE:
+            return
+        for suffix, compress in _compressors():
+            compressed = compress(data)
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as file:
+                    file.write(compressed)
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ChangeSequence, Note, NoteTombstone
+
+
+class StaleToken(Exception):
+    """
+    Raised for a sync token that can no longer be answered, because
+    tombstones it needs were pruned or it is newer than any change; the
+    client must reload the whole board.
+    """
+
+
+def sync_supported() -> bool:
+    """
+    Returns whether the database holding the current notes maintains
+    change sequences, which the triggers of migration 0008 only do on
+    SQLite.
+    """
+
+    return connections[router.db_for_read(Note)].vendor == 'sqlite'
+
+
+def parse_token(value: str) -> int:
+    """
+    Parses a sync token, the number of the last change a client has seen
+    ('0' for none).
+
+    Args:
+        value (str): The token, as sent by the client.
+
+    Returns:
+        int: The change number.
+
+    Raises:
+        ValueError: If the token is missing or not a change number.
+    """
+
+    if not value or not value.isdigit():
+        raise ValueError('since must be a change token.')
+    return int(value)
+
+
+def changes_since(user, since: int, fields: tuple, limit: int = None) -> dict:
+    """
+    Returns the changes to a user's board after a sync token, in the order
+    they were made: the notes created, updated or moved since, with their
+    current fields, and the IDs of the notes deleted since. Both queries
+    are served by (user, change number) indexes, so the cost depends on
+    the number of changes rather than on the size of the board. A note
+    changed several times is sent once. Positions still held by the
+    write-behind buffer are sent once flushed.
+
+    Args:
+        user (User): The owner of the notes.
+        since (int): The client's token, as returned by parse_token.
+        fields (tuple): The note fields to send.
+        limit (int): The most changes returned at once; defaults to
+            SYNC_MAX_CHANGES.
+
+    Returns:
+        dict: The changed 'notes' as dictionaries, the 'deleted' note IDs,
+            the 'token' to send next time and whether 'more' changes
+            remain, in which case the client should sync again at once.
+
+    Raises:
+        StaleToken: If tombstones after the token were pruned, or the
+            token is newer than the user's latest change.
+    """
+
+    limit = limit or settings.SYNC_MAX_CHANGES
+    last, pruned = ChangeSequence.objects.filter(user=user).values_list(
+        'last', 'pruned').first() or (0, 0)
+    if since > last:
+        raise StaleToken('The change token is unknown.')
+    if 0 < since < pruned:
+        raise StaleToken('The change token has expired.')
+    notes = Note.objects.filter(user=user, change_seq__gt=since).order_by(
+        'change_seq').values(*fields, 'change_seq')[:limit + 1]
+    tombstones = NoteTombstone.objects.filter(
+        user=user, seq__gt=since).order_by('seq').values_list(
+        'seq', 'note_id')[:limit + 1]
+    changes = sorted(
+        [(note.pop('change_seq'), note) for note in notes]
+        + [(seq, note_id) for seq, note_id in tombstones],
+        key=lambda change: change[0])
+    more = len(changes) > limit
+    changes = changes[:limit]
+    changed, deleted = [], []
+    for _, change in changes:
+        if isinstance(change, dict):
+            changed.append(change)
+        else:
+            deleted.append(change)
+    return {
+        'token': str(changes[-1][0] if changes else since),
+        'notes': changed,
+        'deleted': deleted,
+        'more': more,
+    }
+
+
+def prune_tombstones(days: float = None) -> int:
+    """
+    Deletes the tombstones of notes deleted more than a number of days
+    ago, on every database holding notes. Each user's change sequence
+    remembers the latest change pruned, so tokens from before it are
+    refused instead of missing deletions.
+
+    Args:
+        days (float): The age of the tombstones deleted; defaults to
+            SYNC_TOMBSTONE_RETENTION_DAYS.
+
+    Returns:
+        int: The number of tombstones deleted.
+    """
+
+    if days is None:
+        days = settings.SYNC_TOMBSTONE_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    for alias in settings.NOTE_SHARDS or [DEFAULT_DB_ALIAS]:
+        with transaction.atomic(using=alias):
+            old = NoteTombstone.objects.using(alias).filter(
+                deleted_at__lt=cutoff)
+            horizons = old.order_by().values_list('user_id').annotate(
+                seq=Max('seq'))
+            for user_id, seq in horizons:
+                ChangeSequence.objects.using(alias).filter(
+                    user_id=user_id, pruned__lt=seq).update(pruned=seq)
+            deleted += old.delete()[0]
+    return deleted
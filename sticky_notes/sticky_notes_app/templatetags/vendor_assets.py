@@ -0,0 +1,30 @@
+from django import template
+from django.utils.html import format_html
+
+from ..assets import vendor_asset_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_asset(name: str) -> str:
+    """
+    Renders the <script> or <link> element of a third-party asset of
+    VENDOR_ASSETS, from its vendored static file, or from its CDN (with its
+    integrity hash) until it has been vendored.
+
+    Args:
+        name (str): The asset's name, e.g. 'jquery.js' or 'bootstrap.css'.
+
+    Returns:
+        str: The HTML element.
+    """
+
+    url, integrity = vendor_asset_url(name)
+    attributes = format_html(
+        ' integrity="{}" crossorigin="anonymous"', integrity,
+    ) if integrity else ''
+    if name.endswith('.css'):
+        return format_html(
+            '<link rel="stylesheet" href="{}"{} />', url, attributes)
+    return format_html('<script src="{}"{}></script>', url, attributes)
@@ -1,7 +1,32 @@
-from django.test import TestCase, Client, SimpleTestCase
+from django.test import (
+    TestCase, TransactionTestCase, Client, SimpleTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import (
+    OperationalError, connection, connections, transaction)
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from io import StringIO
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock
 from django.urls import reverse, resolve
+from django.template import Template, Context, engines
+from django.template.loaders.cached import Loader as CachedLoader
 from django.contrib.auth.models import User
-from .models import Note
+from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+from .models import (
+    NOTE_PREVIEW_LENGTH, ChangeSequence, Note, NoteTombstone, UserShard)
 from .forms import NoteForm, UserRegistrationForm
 from .views import (
     note_list,
@@ -9,10 +34,34 @@ from .views import (
     note_update,
     note_delete,
     update_position,
+    note_window,
+    note_content,
+    note_sync,
+    note_export,
+    note_import,
+    note_search,
+    note_events,
     signup,
     login_view,
-    logout_view
+    logout_view,
+    request_stats as request_stats_view,
+    metrics as metrics_view,
 )
+from .api import api_note_list, api_note_detail
+from .export import EXPORT_FIELDS
+from . import async_views
+from . import board_cache, checks, metrics, request_stats
+from .urls import urlpatterns
+from .events import CacheBroker, InProcessBroker, get_broker
+from .benchmark import QUEUE_ALIAS, run_render_benchmark
+from .positions import (
+    bulk_write_positions, get_position_buffer, write_position_group)
+from .routers import NoteShardRouter, PrimaryReplicaRouter, replica_reads
+from .shards import move_user, shard_for_user, use_shard
+from .sync import changes_since
+from .writer import WriteQueue
+from .hashing import HashingBusy, HashingPool
+from . import writer
 
 
 class NoteModelTest(TestCase):
@@ -31,6 +80,7 @@ class NoteModelTest(TestCase):
         test_note_creation: Tests full note creation with all fields.
         test_note_str: Tests the __str__ method of the Note model.
         test_default_values: Tests application of default field values.
+        test_preview: Tests that saving a note stores its preview.
     """
 
     def setUp(self):
@@ -94,6 +144,23 @@ class NoteModelTest(TestCase):
         self.assertEqual(note.x_position, 0)
         self.assertEqual(note.y_position, 0)
 
+    def test_preview(self):
+        """
+        Tests that saving a note stores its content as its preview when it
+        fits, or its beginning ending with an ellipsis when it does not,
+        including saves limited with update_fields.
+        """
+
+        note = Note.objects.create(
+            title='Short', content='Fits', user=self.user)
+        self.assertEqual(note.preview, 'Fits')
+        note.content = 'x' * (NOTE_PREVIEW_LENGTH + 1)
+        note.save(update_fields=['content'])
+        note.refresh_from_db()
+        self.assertEqual(len(note.preview), NOTE_PREVIEW_LENGTH)
+        self.assertEqual(
+            note.preview, 'x' * (NOTE_PREVIEW_LENGTH - 1) + '\u2026')
+
 
 class NoteFormTest(TestCase):
     """
@@ -230,6 +297,11 @@ class NoteViewsTest(TestCase):
         test_note_update_view: Tests updating a note.
         test_note_delete_view: Tests deleting a note.
         test_update_position_view: Tests updating note position via AJAX.
+        test_update_position_single_statement: Tests the position write is
+            one UPDATE that never touches note content.
+        test_update_position_rejects_non_integers: Tests coordinate
+            validation.
+        test_update_position_other_users_note: Tests the ownership check.
         test_signup_view: Tests user signup.
         test_login_view: Tests login.
         test_logout_view: Tests logout.
@@ -238,11 +310,13 @@ class NoteViewsTest(TestCase):
     def setUp(self):
         """
         Sets up test data by creating a client, user, and note.
-        Initializes a test client for HTTP requests, a test user for
+        Clears the cache so no board cached by another test is served,
+        initializes a test client for HTTP requests, a test user for
         authentication, and a test note owned by the user, providing a
         consistent starting point for all tests.
         """
 
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(
             username='testuser',
@@ -358,6 +432,54 @@ class NoteViewsTest(TestCase):
         self.assertEqual(self.note.x_position, 100)
         self.assertEqual(self.note.y_position, 200)
 
+    def test_update_position_single_statement(self):
+        """
+        Tests that moving a note runs one UPDATE scoped by note and owner and
+        never reads or writes the note's content.
+        """
+
+        self.client.login(username='testuser', password='12345')
+        data = {'note_id': self.note.pk, 'x': 5, 'y': 6}
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('update_position'), data)
+        note_queries = [
+            query['sql'] for query in queries
+            if 'sticky_notes_app_note' in query['sql']
+        ]
+        self.assertEqual(len(note_queries), 1)
+        self.assertTrue(note_queries[0].startswith('UPDATE'))
+        self.assertNotIn('content', note_queries[0])
+        self.assertIn('"user_id"', note_queries[0])
+
+    def test_update_position_rejects_non_integers(self):
+        """
+        Tests that non-integer or missing coordinates are rejected with
+        status 400 and leave the note unchanged.
+        """
+
+        self.client.login(username='testuser', password='12345')
+        for data in (
+            {'note_id': self.note.pk, 'x': '1.5', 'y': 2},
+            {'note_id': self.note.pk, 'x': 'left', 'y': 2},
+            {'note_id': self.note.pk, 'x': 1},
+            {'note_id': self.note.pk, 'x': 2 ** 40, 'y': 2},
+        ):
+            response = self.client.post(reverse('update_position'), data)
+            self.assertEqual(response.status_code, 400)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.x_position, 0)
+
+    def test_update_position_other_users_note(self):
+        """
+        Tests that moving another user's note returns 404.
+        """
+
+        User.objects.create_user(username='other', password='12345')
+        self.client.login(username='other', password='12345')
+        data = {'note_id': self.note.pk, 'x': 1, 'y': 1}
+        response = self.client.post(reverse('update_position'), data)
+        self.assertEqual(response.status_code, 404)
+
     def test_signup_view(self):
         """Tests user signup.
         Submits a POST request with new user data and verifies a redirect and
@@ -402,100 +524,4107 @@ class NoteViewsTest(TestCase):
         self.assertRedirects(response, reverse('login'))
 
 
-class UrlTest(SimpleTestCase):
+class NoteWindowTest(TestCase):
     """
-    Tests the URL patterns of the sticky notes application.
-    Verifies that each URL name in the application's URL configuration resolves
-    to the correct view function, ensuring proper routing. Uses Django's
-    SimpleTestCase for lightweight testing without database setup.
+    Tests the viewport-windowed loading of a user's board.
+    Verifies that the note_window view only returns the requesting user's
+    notes inside the requested rectangle, caps the size of its response, and
+    rejects invalid viewports, and that note_list only embeds the initial
+    viewport.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the board.
 
     Methods:
-        test_note_list_url: Tests the 'note_list' URL resolution.
-        test_note_create_url: Tests the 'note_create' URL resolution.
-        test_note_update_url: Tests the 'note_update' URL resolution with a pk.
-        test_note_delete_url: Tests the 'note_delete' URL resolution with a pk.
-        test_update_position_url: Tests the 'update_position' URL resolution.
-        test_signup_url: Tests the 'signup' URL resolution.
-        test_login_url: Tests the 'login' URL resolution.
-        test_logout_url: Tests the 'logout' URL resolution.
+        setUp: Creates and logs in a test user.
+        window: Requests a window of the board and returns the response.
+        test_window_filters_by_rectangle: Tests rectangle filtering.
+        test_window_includes_overlapping_cards: Tests the card-size margin.
+        test_window_scoped_to_user: Tests that other users' notes are hidden.
+        test_window_truncated_at_limit: Tests the response cap.
+        test_window_omits_content_when_zoomed_out: Tests low-zoom payloads.
+        test_window_sends_previews: Tests that content is never read.
+        test_note_content: Tests fetching a note's full content.
+        test_window_invalid_viewport: Tests rejection of bad parameters.
+        test_note_list_embeds_initial_window: Tests the board shell.
+        test_note_list_renders_compact_json: Tests the fast rendering path.
     """
 
-    def test_note_list_url(self):
+    def setUp(self):
         """
-        Tests the resolution of the 'note_list' URL.
-        Generates the URL for 'note_list' and verifies that it resolves to the
-        note_list view function.
+        Sets up test data by creating and logging in a test user.
         """
 
-        url = reverse('note_list')
-        self.assertEqual(resolve(url).func, note_list)
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='windowuser',
+            password='12345'
+        )
+        self.client.login(username='windowuser', password='12345')
 
-    def test_note_create_url(self):
+    def window(self, **params):
         """
-        Tests the resolution of the 'note_create' URL.
-        Generates the URL for 'note_create' and checks that it resolves to the
-        note_create view function.
+        Requests a window of the board from the note_window view.
+
+        Args:
+            **params: Query parameters describing the viewport.
+
+        Returns:
+            HttpResponse: The response of the note_window view.
         """
 
-        url = reverse('note_create')
-        self.assertEqual(resolve(url).func, note_create)
+        return self.client.get(reverse('note_window'), params)
 
-    def test_note_update_url(self):
+    def test_window_filters_by_rectangle(self):
         """
-        Tests the resolution of the 'note_update' URL with a primary key.
-        Generates the URL for 'note_update' with a sample pk and verifies that
-        it resolves to the note_update view function.
+        Tests that only notes positioned inside the viewport are returned.
         """
 
-        url = reverse('note_update', args=[1])
-        self.assertEqual(resolve(url).func, note_update)
+        inside = Note.objects.create(
+            title='Inside', user=self.user, x_position=1000, y_position=1000)
+        Note.objects.create(
+            title='Right', user=self.user, x_position=5000, y_position=1000)
+        Note.objects.create(
+            title='Below', user=self.user, x_position=1000, y_position=5000)
+        response = self.window(x_min=800, x_max=1600, y_min=800, y_max=1400)
+        self.assertEqual(response.status_code, 200)
+        ids = [note['id'] for note in response.json()['notes']]
+        self.assertEqual(ids, [inside.pk])
+        self.assertFalse(response.json()['truncated'])
 
-    def test_note_delete_url(self):
+    def test_window_includes_overlapping_cards(self):
         """
-        Tests the resolution of the 'note_delete' URL with a primary key.
-        Generates the URL for 'note_delete' with a sample pk and checks that it
-        resolves to the note_delete view function.
+        Tests that a card starting left of the viewport but reaching into it
+        is returned.
         """
 
-        url = reverse('note_delete', args=[1])
-        self.assertEqual(resolve(url).func, note_delete)
+        Note.objects.create(
+            title='Overlap', user=self.user, x_position=900, y_position=1000)
+        response = self.window(x_min=1000, x_max=1600, y_min=800, y_max=1400)
+        self.assertEqual(len(response.json()['notes']), 1)
 
-    def test_update_position_url(self):
+    def test_window_scoped_to_user(self):
         """
-        Tests the resolution of the 'update_position' URL.
-        Generates the URL for 'update_position' and verifies that it resolves
-        to the update_position view function.
+        Tests that notes owned by another user are never returned.
         """
 
-        url = reverse('update_position')
-        self.assertEqual(resolve(url).func, update_position)
+        other = User.objects.create_user(username='other', password='12345')
+        Note.objects.create(title='Theirs', user=other)
+        response = self.window(x_min=0, x_max=1000, y_min=0, y_max=1000)
+        self.assertEqual(response.json()['notes'], [])
 
-    def test_signup_url(self):
+    @override_settings(NOTE_WINDOW_MAX_NOTES=2)
+    def test_window_truncated_at_limit(self):
         """
-        Tests the resolution of the 'signup' URL.
-        Generates the URL for 'signup' and checks that it resolves to the
-        signup view function.
+        Tests that a window never returns more than NOTE_WINDOW_MAX_NOTES
+        notes and flags the response as truncated.
         """
 
-        url = reverse('signup')
-        self.assertEqual(resolve(url).func, signup)
+        for i in range(3):
+            Note.objects.create(title=f'Note {i}', user=self.user)
+        response = self.window(x_min=0, x_max=1000, y_min=0, y_max=1000)
+        self.assertEqual(len(response.json()['notes']), 2)
+        self.assertTrue(response.json()['truncated'])
 
-    def test_login_url(self):
+    def test_window_omits_content_when_zoomed_out(self):
         """
-        Tests the resolution of the 'login' URL.
-        Generates the URL for 'login' and verifies that it resolves to the
-        login_view function.
+        Tests that note previews are left out below the detail zoom level.
         """
 
-        url = reverse('login')
-        self.assertEqual(resolve(url).func, login_view)
+        Note.objects.create(title='Far', content='Body', user=self.user)
+        response = self.window(
+            x_min=0, x_max=1000, y_min=0, y_max=1000, zoom=0.2)
+        self.assertNotIn('preview', response.json()['notes'][0])
 
-    def test_logout_url(self):
+    def test_window_sends_previews(self):
         """
-        Tests the resolution of the 'logout' URL.
-        Generates the URL for 'logout' and checks that it resolves to the
-        logout_view function.
+        Tests that windows carry each note's preview instead of its
+        content, and that the note content column is never read.
         """
 
-        url = reverse('logout')
-        self.assertEqual(resolve(url).func, logout_view)
+        Note.objects.create(
+            title='Long', content='y' * 5000, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.window(x_min=0, x_max=1000, y_min=0, y_max=1000)
+        note = response.json()['notes'][0]
+        self.assertNotIn('content', note)
+        self.assertEqual(len(note['preview']), NOTE_PREVIEW_LENGTH)
+        self.assertTrue(note['preview'].endswith('\u2026'))
+        self.assertFalse(any(
+            '"content"' in query['sql'] for query in queries))
+
+    def test_note_content(self):
+        """
+        Tests that note_content returns the full content of the user's own
+        note, supports conditional requests, and hides other users' notes.
+        """
+
+        note = Note.objects.create(
+            title='Long', content='z' * 5000, user=self.user)
+        url = reverse('note_content', args=[note.pk])
+        response = self.client.get(url)
+        self.assertEqual(
+            response.json(), {'id': note.pk, 'content': 'z' * 5000})
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        other = User.objects.create_user(username='other', password='12345')
+        theirs = Note.objects.create(title='Theirs', user=other)
+        response = self.client.get(
+            reverse('note_content', args=[theirs.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['status'], 'error')
+
+    def test_window_invalid_viewport(self):
+        """
+        Tests that missing, malformed or inverted viewports are rejected.
+        """
+
+        self.assertEqual(self.window(x_min=0).status_code, 400)
+        self.assertEqual(
+            self.window(x_min='a', x_max=1, y_min=0, y_max=1).status_code, 400)
+        self.assertEqual(
+            self.window(x_min=10, x_max=1, y_min=0, y_max=1).status_code, 400)
+        self.assertEqual(
+            self.window(x_min=0, x_max=1, y_min=0, y_max=1, zoom=50)
+            .status_code, 400)
+
+    def test_note_list_embeds_initial_window(self):
+        """
+        Tests that note_list embeds the notes of the initial viewport only.
+        """
+
+        Note.objects.create(title='Nearby', user=self.user)
+        Note.objects.create(
+            title='Faraway', user=self.user, x_position=90000)
+        response = self.client.get(reverse('note_list'))
+        self.assertContains(response, 'Nearby')
+        self.assertNotContains(response, 'Faraway')
+
+    def test_note_list_renders_compact_json(self):
+        """
+        Tests that note_list embeds its notes as compact JSON, with no URL
+        reversed per note, and that its templates come from the cached
+        loader.
+        """
+
+        note = Note.objects.create(title='Compact', user=self.user)
+        response = self.client.get(reverse('note_list'))
+        body = response.content.decode()
+        board_json = body.split('id="board-data"')[1].split('>', 1)[1]
+        board_json = board_json.split('</script>', 1)[0]
+        self.assertNotIn('", "', board_json)
+        self.assertNotIn('": ', board_json)
+        self.assertEqual(
+            json.loads(board_json)['notes'][0]['title'], 'Compact')
+        self.assertNotIn(reverse('note_update', args=[note.pk]), body)
+        loader = engines.all()[0].engine.template_loaders[0]
+        self.assertIsInstance(loader, CachedLoader)
+        self.assertIn('sticky_notes_app/note_list.html',
+                      [key.split('-')[0] for key in loader.get_template_cache])
+
+
+class PositionBatchTest(TestCase):
+    """
+    Tests batched position updates through the update_position view.
+    Verifies that a batch of {note_id, x, y} entries is applied in full with a
+    number of queries independent of its size, that repeated notes are
+    coalesced, and that batches touching foreign or malformed entries are
+    rejected without writing anything.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the notes.
+        notes (list): Notes owned by the test user.
+
+    Methods:
+        setUp: Creates a logged-in user with a few notes.
+        post_batch: Posts a batch of positions as a form field.
+        test_batch_updates_all_notes: Tests that every entry is applied.
+        test_batch_json_body: Tests batches sent as a JSON request body.
+        test_batch_coalesces_repeated_notes: Tests last-write-wins.
+        test_batch_query_count_constant: Tests queries do not grow with size.
+        test_batch_rejects_foreign_notes: Tests the ownership check.
+        test_batch_rejects_malformed_entries: Tests batch validation.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user owning several notes.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='batchuser',
+            password='12345'
+        )
+        self.client.login(username='batchuser', password='12345')
+        self.notes = [
+            Note.objects.create(title=f'Note {i}', user=self.user)
+            for i in range(50)
+        ]
+
+    def post_batch(self, positions):
+        """
+        Posts a batch of positions to update_position as a form field.
+
+        Args:
+            positions (list): The {note_id, x, y} entries to send.
+
+        Returns:
+            HttpResponse: The response of the update_position view.
+        """
+
+        return self.client.post(
+            reverse('update_position'), {'positions': json.dumps(positions)})
+
+    def test_batch_updates_all_notes(self):
+        """
+        Tests that every position of a batch is written.
+        """
+
+        positions = [
+            {'note_id': note.pk, 'x': i, 'y': i * 2}
+            for i, note in enumerate(self.notes[:3])
+        ]
+        response = self.post_batch(positions)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 3)
+        for i, note in enumerate(self.notes[:3]):
+            note.refresh_from_db()
+            self.assertEqual((note.x_position, note.y_position), (i, i * 2))
+
+    def test_batch_json_body(self):
+        """
+        Tests that a batch can be sent as a JSON request body.
+        """
+
+        response = self.client.post(
+            reverse('update_position'),
+            {'positions': [{'note_id': self.notes[0].pk, 'x': 7, 'y': 8}]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.notes[0].refresh_from_db()
+        self.assertEqual(self.notes[0].x_position, 7)
+
+    def test_batch_coalesces_repeated_notes(self):
+        """
+        Tests that only the last position of a repeated note is kept.
+        """
+
+        note = self.notes[0]
+        response = self.post_batch([
+            {'note_id': note.pk, 'x': 1, 'y': 1},
+            {'note_id': note.pk, 'x': 9, 'y': 9},
+        ])
+        self.assertEqual(response.json()['updated'], 1)
+        note.refresh_from_db()
+        self.assertEqual((note.x_position, note.y_position), (9, 9))
+
+    def test_batch_query_count_constant(self):
+        """
+        Tests that a large batch runs the same queries as a small one.
+        """
+
+        def count(notes):
+            positions = [
+                {'note_id': note.pk, 'x': 5, 'y': 5} for note in notes]
+            with CaptureQueriesContext(connection) as queries:
+                self.post_batch(positions)
+            return len(queries)
+
+        self.assertEqual(count(self.notes[:2]), count(self.notes))
+
+    def test_batch_rejects_foreign_notes(self):
+        """
+        Tests that a batch containing another user's note returns 404 and
+        writes nothing.
+        """
+
+        other = User.objects.create_user(username='other', password='12345')
+        foreign = Note.objects.create(title='Theirs', user=other)
+        response = self.post_batch([
+            {'note_id': self.notes[0].pk, 'x': 3, 'y': 3},
+            {'note_id': foreign.pk, 'x': 3, 'y': 3},
+        ])
+        self.assertEqual(response.status_code, 404)
+        self.notes[0].refresh_from_db()
+        self.assertEqual(self.notes[0].x_position, 0)
+
+    def test_batch_rejects_malformed_entries(self):
+        """
+        Tests that malformed batches are rejected with status 400.
+        """
+
+        note_id = self.notes[0].pk
+        for positions in (
+            [],
+            [{'note_id': note_id, 'x': 'left', 'y': 0}],
+            [{'note_id': note_id, 'x': 1}],
+            ['not an object'],
+        ):
+            self.assertEqual(self.post_batch(positions).status_code, 400)
+        response = self.client.post(
+            reverse('update_position'), {'positions': '{broken'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(POSITION_WRITE_BEHIND=True)
+class WriteBehindTest(TestCase):
+    """
+    Tests the write-behind mode of update_position.
+    Verifies that positions are buffered instead of written, that only the
+    last position of a note is kept, that board reads merge in unflushed
+    positions, and that the flush_positions command writes them.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the note.
+        note (Note): A note owned by the test user.
+
+    Methods:
+        setUp: Creates a logged-in user with a note and clears the buffer.
+        move: Posts a new position for the test note.
+        test_position_buffered_not_written: Tests that nothing is written.
+        test_flush_writes_last_position: Tests last-write-wins flushing.
+        test_window_merges_pending_positions: Tests read merging.
+        test_api_detail_merges_pending_positions: Tests merging into
+            selected fields.
+        test_foreign_note_not_buffered: Tests the ownership check.
+        test_failed_flush_keeps_positions: Tests positions survive a failed
+            write.
+        test_flusher_survives_errors: Tests the flusher keeps running.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user owning a note, with an empty buffer.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='bufferuser',
+            password='12345'
+        )
+        self.client.login(username='bufferuser', password='12345')
+        self.note = Note.objects.create(title='Buffered', user=self.user)
+
+    def move(self, x, y):
+        """
+        Posts a new position for the test note to update_position.
+
+        Args:
+            x (int): The new x-coordinate.
+            y (int): The new y-coordinate.
+
+        Returns:
+            HttpResponse: The response of the update_position view.
+        """
+
+        return self.client.post(
+            reverse('update_position'),
+            {'note_id': self.note.pk, 'x': x, 'y': y},
+        )
+
+    def test_position_buffered_not_written(self):
+        """
+        Tests that a buffered position does not write to the database.
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(40, 50)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            any(query['sql'].startswith('UPDATE') for query in queries))
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.x_position, 0)
+
+    def test_flush_writes_last_position(self):
+        """
+        Tests that flush_positions writes only the last buffered position.
+        """
+
+        self.move(10, 10)
+        self.move(70, 80)
+        out = StringIO()
+        call_command('flush_positions', '--once', stdout=out)
+        self.assertIn('Flushed 1 positions.', out.getvalue())
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.x_position, self.note.y_position),
+                         (70, 80))
+
+    def test_window_merges_pending_positions(self):
+        """
+        Tests that windows reflect unflushed positions, both for notes moved
+        out of and into the viewport.
+        """
+
+        self.move(9000, 9000)
+        response = self.client.get(
+            reverse('note_window'),
+            {'x_min': 0, 'x_max': 1000, 'y_min': 0, 'y_max': 1000},
+        )
+        self.assertEqual(response.json()['notes'], [])
+        response = self.client.get(
+            reverse('note_window'),
+            {'x_min': 8500, 'x_max': 9500, 'y_min': 8500, 'y_max': 9500},
+        )
+        [note] = response.json()['notes']
+        self.assertEqual((note['x_position'], note['y_position']),
+                         (9000, 9000))
+
+    def test_api_detail_merges_pending_positions(self):
+        """
+        Tests that the API returns an unflushed position when only position
+        fields are selected, without adding the fields not selected.
+        """
+
+        self.move(70, 80)
+        url = reverse('api_note_detail', args=[self.note.pk])
+        response = self.client.get(url, {'fields': 'x_position,y_position'})
+        self.assertEqual(response.json(), {'x_position': 70, 'y_position': 80})
+        response = self.client.get(url, {'fields': 'x_position'})
+        self.assertEqual(response.json(), {'x_position': 70})
+
+    def test_foreign_note_not_buffered(self):
+        """
+        Tests that another user's note cannot be moved in write-behind mode.
+        """
+
+        User.objects.create_user(username='other', password='12345')
+        self.client.login(username='other', password='12345')
+        self.assertEqual(self.move(1, 1).status_code, 404)
+
+    def test_failed_flush_keeps_positions(self):
+        """
+        Tests that positions whose write fails stay buffered, behind those
+        pushed since, and are written by the next flush.
+        """
+
+        self.move(10, 10)
+        buffer = get_position_buffer()
+        with mock.patch(
+                'sticky_notes_app.positions.bulk_write_positions',
+                side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+        self.assertEqual(
+            buffer.pending(self.user.pk), {self.note.pk: (10, 10)})
+        second = Note.objects.create(title='Second', user=self.user)
+        buffer.push(self.user, {second.pk: (5, 6)})
+        self.assertEqual(buffer.flush(), 2)
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.x_position, self.note.y_position),
+                         (10, 10))
+        self.assertEqual(buffer.pending(self.user.pk), {})
+
+    def test_flusher_survives_errors(self):
+        """
+        Tests that the flush_positions loop logs a failed flush and goes on
+        to write the positions in a later one.
+        """
+
+        self.move(70, 80)
+        failures = [OperationalError('database is locked')]
+
+        def write(positions):
+            if failures:
+                raise failures.pop()
+            return bulk_write_positions(positions)
+
+        out = StringIO()
+        with mock.patch(
+                'sticky_notes_app.positions.bulk_write_positions',
+                side_effect=write), \
+                mock.patch('time.sleep', side_effect=KeyboardInterrupt), \
+                self.assertLogs('sticky_notes_app.positions', 'ERROR'):
+            call_command('flush_positions', stdout=out)
+        self.assertIn('Flushed 1 positions.', out.getvalue())
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.x_position, self.note.y_position),
+                         (70, 80))
+
+
+class SharedCacheChecksTest(SimpleTestCase):
+    """
+    Tests the system checks of settings that only work with a cache shared
+    by every process.
+
+    Attributes:
+        shared_caches (dict): CACHES with a shared cache, 'shared'.
+
+    Methods:
+        assertNeedsSharedCache: Asserts a check rejects a per-process cache.
+        test_position_buffer_cache: Tests the write-behind buffer check.
+        test_note_shards_cache: Tests the sharding check.
+        test_fast_auth_cache: Tests the FAST_AUTH check.
+        test_auth_throttle_cache: Tests the throttling deployment check.
+    """
+
+    shared_caches = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(tempfile.gettempdir(), 'shared')},
+    }
+
+    def assertNeedsSharedCache(self, check, error_id: str, **enabled):
+        """
+        Asserts that a check passes while its feature is off, and fails with
+        error_id when it is on with the local memory cache.
+
+        Args:
+            check (callable): The system check.
+            error_id (str): The ID of its error.
+            **enabled: The settings turning the feature on.
+        """
+
+        self.assertEqual(check(None), [])
+        with override_settings(**enabled):
+            [error] = check(None)
+        self.assertEqual(error.id, error_id)
+
+    def test_position_buffer_cache(self):
+        """
+        Tests that write-behind positions need a shared buffer cache.
+        """
+
+        self.assertNeedsSharedCache(
+            checks.check_position_buffer_cache, 'sticky_notes_app.E001',
+            POSITION_WRITE_BEHIND=True)
+        with override_settings(
+                POSITION_WRITE_BEHIND=True, CACHES=self.shared_caches,
+                POSITION_BUFFER_CACHE='shared'):
+            self.assertEqual(checks.check_position_buffer_cache(None), [])
+
+    def test_note_shards_cache(self):
+        """
+        Tests that sharding needs a shared default cache for assignments.
+        """
+
+        self.assertNeedsSharedCache(
+            checks.check_note_shards_cache, 'sticky_notes_app.E002',
+            NOTE_SHARDS=['default', 'shard_1'])
+        with override_settings(
+                NOTE_SHARDS=['default', 'shard_1'],
+                CACHES={'default': self.shared_caches['shared']}):
+            self.assertEqual(checks.check_note_shards_cache(None), [])
+
+    def test_fast_auth_cache(self):
+        """
+        Tests that FAST_AUTH needs a shared default cache for users.
+        """
+
+        self.assertNeedsSharedCache(
+            checks.check_fast_auth_cache, 'sticky_notes_app.E003',
+            FAST_AUTH=True)
+        with override_settings(
+                FAST_AUTH=True,
+                CACHES={'default': self.shared_caches['shared']}):
+            self.assertEqual(checks.check_fast_auth_cache(None), [])
+
+    def test_auth_throttle_cache(self):
+        """
+        Tests that throttling warns about a per-process default cache, whose
+        token buckets would not be shared by the workers.
+        """
+
+        [warning] = checks.check_auth_throttle_cache(None)
+        self.assertEqual(warning.id, 'sticky_notes_app.W001')
+        with override_settings(AUTH_THROTTLE_ENABLED=False):
+            self.assertEqual(checks.check_auth_throttle_cache(None), [])
+        with override_settings(
+                CACHES={'default': self.shared_caches['shared']}):
+            self.assertEqual(checks.check_auth_throttle_cache(None), [])
+
+
+class ConditionalGetTest(TestCase):
+    """
+    Tests conditional GET support of the board views.
+    Verifies that note_list and note_window return 304 Not Modified for an
+    unchanged board after a single aggregate query, and a fresh response once
+    a note is created, edited, moved or deleted.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the note.
+        note (Note): A note owned by the test user.
+
+    Methods:
+        setUp: Creates a logged-in user with a note.
+        revalidate: Requests a URL twice, the second time conditionally.
+        test_unchanged_board_not_modified: Tests 304 for an unchanged board.
+        test_not_modified_runs_one_note_query: Tests the cost of a 304.
+        test_changed_board_revalidates: Tests changes invalidate the ETag.
+        test_window_not_modified: Tests 304 for note_window.
+        test_pending_messages_skip_validation: Tests messages are shown.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user owning a note.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='etaguser',
+            password='12345'
+        )
+        self.client.login(username='etaguser', password='12345')
+        self.note = Note.objects.create(title='Cached', user=self.user)
+
+    def revalidate(self, url, **params):
+        """
+        Requests a URL, then requests it again with its ETag.
+
+        Args:
+            url (str): The URL to request.
+            **params: Query parameters for both requests.
+
+        Returns:
+            HttpResponse: The response to the conditional request.
+        """
+
+        etag = self.client.get(url, params)['ETag']
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_board_not_modified(self):
+        """
+        Tests that an unchanged board is answered with 304.
+        """
+
+        response = self.client.get(reverse('note_list'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.revalidate(reverse('note_list'))
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_runs_one_note_query(self):
+        """
+        Tests that a 304 only runs the aggregate validator query on notes.
+        """
+
+        etag = self.client.get(reverse('note_list'))['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('note_list'), HTTP_IF_NONE_MATCH=etag)
+        note_queries = [
+            query for query in queries
+            if 'sticky_notes_app_note' in query['sql']
+        ]
+        self.assertEqual(len(note_queries), 1)
+
+    def test_changed_board_revalidates(self):
+        """
+        Tests that creating, moving or deleting a note changes the ETag.
+        """
+
+        url = reverse('note_list')
+        etag = self.client.get(url)['ETag']
+        other = Note.objects.create(title='New', user=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.client.post(
+            reverse('update_position'),
+            {'note_id': self.note.pk, 'x': 3, 'y': 4},
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        other.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_window_not_modified(self):
+        """
+        Tests that an unchanged window is answered with 304.
+        """
+
+        response = self.revalidate(
+            reverse('note_window'), x_min=0, x_max=100, y_min=0, y_max=100)
+        self.assertEqual(response.status_code, 304)
+
+    def test_pending_messages_skip_validation(self):
+        """
+        Tests that a page with pending messages is always rendered.
+        """
+
+        self.client.logout()
+        response = self.client.post(
+            reverse('login'), {'username': 'etaguser', 'password': '12345'})
+        response = self.client.get(reverse('note_list'))
+        self.assertFalse(response.has_header('ETag'))
+        self.assertContains(response, 'You are now logged in')
+
+
+@override_settings(BOARD_CACHE_ENABLED=True)
+class BoardCacheTest(TestCase):
+    """
+    Tests the per-user cache of board windows.
+    Verifies that a cached window is served without querying notes, that
+    saving, deleting or moving a note invalidates its owner's cached board
+    only, and that hits and misses are counted.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the note.
+        note (Note): A note owned by the test user.
+
+    Methods:
+        setUp: Creates a logged-in user with a note and clears the cache.
+        window: Requests the default test window.
+        test_cached_window_skips_note_queries: Tests cache hits.
+        test_save_invalidates: Tests invalidation on save.
+        test_invalidated_on_commit: Tests that invalidation waits for the
+            commit.
+        test_delete_invalidates: Tests invalidation on delete.
+        test_move_invalidates: Tests invalidation on position updates.
+        test_other_users_board_kept: Tests invalidation is per user.
+        test_stats_command: Tests the board_cache_stats command.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user owning a note, with an empty cache.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            password='12345'
+        )
+        self.client.login(username='cacheuser', password='12345')
+        self.note = Note.objects.create(title='Cached', user=self.user)
+
+    def window(self):
+        """
+        Requests a window covering the test note from note_window.
+
+        Returns:
+            dict: The decoded JSON window payload.
+        """
+
+        return self.client.get(
+            reverse('note_window'),
+            {'x_min': 0, 'x_max': 1000, 'y_min': 0, 'y_max': 1000},
+        ).json()
+
+    def test_cached_window_skips_note_queries(self):
+        """
+        Tests that a cached window is served without the window query.
+        """
+
+        self.window()
+        with CaptureQueriesContext(connection) as queries:
+            payload = self.window()
+        self.assertEqual(payload['notes'][0]['title'], 'Cached')
+        self.assertFalse(any(
+            '"preview"' in query['sql'] for query in queries))
+
+    def test_save_invalidates(self):
+        """
+        Tests that saving a note invalidates its owner's cached board.
+        """
+
+        self.window()
+        self.note.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note.save()
+        self.assertEqual(self.window()['notes'][0]['title'], 'Renamed')
+
+    def test_invalidated_on_commit(self):
+        """
+        Tests that a write invalidates the cached board only once its
+        transaction commits, so a board read before the commit cannot be
+        cached under the new generation.
+        """
+
+        self.window()
+        before = board_cache.generation(self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.note.title = 'Renamed'
+            self.note.save()
+            self.assertEqual(board_cache.generation(self.user.pk), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(board_cache.generation(self.user.pk), before)
+
+    def test_delete_invalidates(self):
+        """
+        Tests that deleting a note invalidates its owner's cached board.
+        """
+
+        self.window()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note.delete()
+        self.assertEqual(self.window()['notes'], [])
+
+    def test_move_invalidates(self):
+        """
+        Tests that the position-update path invalidates the cached board.
+        """
+
+        self.window()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('update_position'),
+                {'note_id': self.note.pk, 'x': 12, 'y': 34},
+            )
+        self.assertEqual(self.window()['notes'][0]['x_position'], 12)
+
+    def test_other_users_board_kept(self):
+        """
+        Tests that another user's note changes leave the board cached.
+        """
+
+        self.window()
+        other = User.objects.create_user(username='other', password='12345')
+        Note.objects.create(title='Theirs', user=other)
+        with CaptureQueriesContext(connection) as queries:
+            self.window()
+        self.assertFalse(any(
+            '"preview"' in query['sql'] for query in queries))
+
+    def test_stats_command(self):
+        """
+        Tests that board_cache_stats reports hits and misses.
+        """
+
+        self.window()
+        self.window()
+        out = StringIO()
+        call_command('board_cache_stats', '--reset', stdout=out)
+        self.assertIn('Hits: 1', out.getvalue())
+        self.assertIn('Misses: 1', out.getvalue())
+        self.assertIn('Hit ratio: 50.0%', out.getvalue())
+
+
+class NoteApiTest(TestCase):
+    """
+    Tests the versioned JSON API for notes.
+    Verifies listing with keyset pagination and field selection, and
+    creating, retrieving, updating and deleting notes, including ownership
+    checks, validation and authentication errors.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the notes.
+        notes (list): Notes owned by the test user.
+
+    Methods:
+        setUp: Creates a logged-in user with several notes.
+        test_list_paginates_with_cursor: Tests keyset pagination.
+        test_list_page_query_constant: Tests deep pages cost the same.
+        test_list_field_selection: Tests the 'fields' parameter.
+        test_list_invalid_parameters: Tests parameter validation.
+        test_create_note: Tests creating a note.
+        test_create_invalid_note: Tests NoteForm validation on create.
+        test_retrieve_update_delete: Tests the detail endpoint.
+        test_retrieve_not_modified: Tests conditional GET on a note.
+        test_list_not_modified_per_page: Tests per-page listing ETags.
+        test_create_skips_board_validators: Tests POST skips validators.
+        test_other_users_note_not_found: Tests ownership checks.
+        test_anonymous_unauthorized: Tests the 401 response.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user owning several notes.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='apiuser',
+            password='12345'
+        )
+        self.client.login(username='apiuser', password='12345')
+        self.notes = [
+            Note.objects.create(title=f'Note {i}', user=self.user)
+            for i in range(7)
+        ]
+
+    def test_list_paginates_with_cursor(self):
+        """
+        Tests that following 'next' cursors visits every note exactly once,
+        most recently updated first.
+        """
+
+        url = reverse('api_note_list')
+        seen = []
+        params = {'limit': 3}
+        while True:
+            page = self.client.get(url, params).json()
+            seen += [note['id'] for note in page['results']]
+            if not page['next']:
+                break
+            params['cursor'] = page['next']
+        self.assertEqual(seen, [note.pk for note in reversed(self.notes)])
+
+    def test_list_page_query_constant(self):
+        """
+        Tests that a deep page runs the same queries as the first one.
+        """
+
+        url = reverse('api_note_list')
+        first = self.client.get(url, {'limit': 2}).json()
+        with CaptureQueriesContext(connection) as first_queries:
+            self.client.get(url, {'limit': 2})
+        with CaptureQueriesContext(connection) as next_queries:
+            self.client.get(url, {'limit': 2, 'cursor': first['next']})
+        self.assertEqual(len(first_queries), len(next_queries))
+        self.assertNotIn('OFFSET', next_queries[-1]['sql'])
+
+    def test_list_field_selection(self):
+        """
+        Tests that only the requested fields are returned.
+        """
+
+        response = self.client.get(
+            reverse('api_note_list'), {'fields': 'id,title'})
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'title'})
+
+    def test_list_invalid_parameters(self):
+        """
+        Tests that unknown fields, bad limits and bad cursors return 400.
+        """
+
+        url = reverse('api_note_list')
+        for params in (
+            {'fields': 'title,user'},
+            {'limit': 0},
+            {'limit': 'many'},
+            {'cursor': 'not-a-cursor'},
+        ):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+
+    def test_create_note(self):
+        """
+        Tests that a note is created from a JSON body with model defaults.
+        """
+
+        response = self.client.post(
+            reverse('api_note_list'),
+            {'title': 'From API', 'content': 'Body'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        note = Note.objects.get(pk=response.json()['id'])
+        self.assertEqual(note.user, self.user)
+        self.assertEqual(note.color, '#FFD700')
+        self.assertEqual(
+            response['Location'], reverse('api_note_detail', args=[note.pk]))
+
+    def test_create_invalid_note(self):
+        """
+        Tests that notes failing NoteForm validation are rejected.
+        """
+
+        response = self.client.post(
+            reverse('api_note_list'),
+            {'title': 'x' * 101, 'content': 'Body'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.json()['errors'])
+
+    def test_retrieve_update_delete(self):
+        """
+        Tests retrieving, replacing, patching and deleting a note.
+        """
+
+        note = self.notes[0]
+        url = reverse('api_note_detail', args=[note.pk])
+        self.assertEqual(self.client.get(url).json()['title'], 'Note 0')
+        response = self.client.put(url, {
+            'title': 'Replaced', 'content': 'New', 'color': '#000000',
+            'x_position': 1, 'y_position': 2,
+        }, content_type='application/json')
+        self.assertEqual(response.json()['title'], 'Replaced')
+        response = self.client.patch(
+            url, {'color': '#FFFFFF'}, content_type='application/json')
+        self.assertEqual(response.json()['color'], '#FFFFFF')
+        self.assertEqual(response.json()['title'], 'Replaced')
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(Note.objects.filter(pk=note.pk).exists())
+
+    def test_retrieve_not_modified(self):
+        """
+        Tests that retrieving an unchanged note conditionally returns 304.
+        """
+
+        url = reverse('api_note_detail', args=[self.notes[0].pk])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_not_modified_per_page(self):
+        """
+        Tests that the listing's ETag depends on its query parameters, so
+        an unchanged page is answered with 304 but another page is not.
+        """
+
+        url = reverse('api_note_list')
+        first = self.client.get(url, {'limit': 2})
+        response = self.client.get(
+            url, {'limit': 2}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            url, {'limit': 2, 'cursor': first.json()['next']},
+            HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_create_skips_board_validators(self):
+        """
+        Tests that creating a note does not run the listing's conditional
+        GET validator query.
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('api_note_list'), {'title': 'New', 'content': 'B'},
+                content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('ETag', response)
+        self.assertFalse(any(
+            'COUNT(' in query['sql'] for query in queries))
+
+    def test_other_users_note_not_found(self):
+        """
+        Tests that another user's note is reported as not found.
+        """
+
+        other = User.objects.create_user(username='other', password='12345')
+        note = Note.objects.create(title='Theirs', user=other)
+        url = reverse('api_note_detail', args=[note.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertTrue(Note.objects.filter(pk=note.pk).exists())
+
+    def test_anonymous_unauthorized(self):
+        """
+        Tests that anonymous API requests get 401 instead of a redirect.
+        """
+
+        self.client.logout()
+        response = self.client.get(reverse('api_note_list'))
+        self.assertEqual(response.status_code, 401)
+
+
+class NoteExportTest(TestCase):
+    """
+    Tests the streaming export of a user's notes.
+    Verifies that the export view streams NDJSON and CSV containing only the
+    user's notes, that it reads notes in bounded chunks, and that the
+    export_notes command writes the same data and reports its throughput.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the notes.
+
+    Methods:
+        setUp: Creates a logged-in user with notes and another user's note.
+        test_export_ndjson: Tests the NDJSON export.
+        test_export_csv: Tests the CSV export.
+        test_export_reads_in_chunks: Tests chunked reading.
+        test_export_invalid_format: Tests rejection of unknown formats.
+        test_export_command: Tests the export_notes command.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in user with five notes and another user's note.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='exportuser',
+            password='12345'
+        )
+        self.client.login(username='exportuser', password='12345')
+        for i in range(5):
+            Note.objects.create(
+                title=f'Note {i}', content=f'Line one\nLine {i}',
+                user=self.user)
+        other = User.objects.create_user(username='other', password='12345')
+        Note.objects.create(title='Theirs', user=other)
+
+    def test_export_ndjson(self):
+        """
+        Tests that the NDJSON export streams one object per note.
+        """
+
+        response = self.client.get(reverse('note_export'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [row['title'] for row in rows], [f'Note {i}' for i in range(5)])
+
+    def test_export_csv(self):
+        """
+        Tests that the CSV export has a header and one record per note.
+        """
+
+        response = self.client.get(reverse('note_export'), {'format': 'csv'})
+        self.assertIn('attachment', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        records = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0]['content'], 'Line one\nLine 0')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_reads_in_chunks(self):
+        """
+        Tests that notes are read with one bounded query per chunk.
+        """
+
+        response = self.client.get(reverse('note_export'))
+        with CaptureQueriesContext(connection) as queries:
+            b''.join(response.streaming_content)
+        note_queries = [
+            query['sql'] for query in queries
+            if 'sticky_notes_app_note' in query['sql']
+        ]
+        # Three chunks of at most two notes, then an empty one
+        self.assertEqual(len(note_queries), 4)
+        self.assertTrue(all('LIMIT 2' in sql for sql in note_queries))
+
+    def test_export_invalid_format(self):
+        """
+        Tests that unsupported formats are rejected with status 400.
+        """
+
+        response = self.client.get(reverse('note_export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_command(self):
+        """
+        Tests that export_notes streams the notes and reports throughput.
+        """
+
+        out, err = StringIO(), StringIO()
+        call_command('export_notes', 'exportuser', stdout=out, stderr=err)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+        self.assertIn('Exported 5 notes', err.getvalue())
+        self.assertIn('rows/sec', err.getvalue())
+
+
+class NoteImportTest(TestCase):
+    """
+    Tests the bulk import of notes.
+    Verifies that NDJSON and CSV uploads are validated with NoteForm rules,
+    inserted in batches, and reported row by row, and that the import_notes
+    command imports a file exported by export_notes.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User receiving the notes.
+
+    Methods:
+        setUp: Creates and logs in a test user.
+        upload: Posts a file to the import view.
+        test_import_ndjson: Tests an NDJSON import.
+        test_import_csv: Tests a CSV import.
+        test_import_reports_row_errors: Tests per-row error reporting.
+        test_import_inserts_in_batches: Tests batched inserts.
+        test_import_unreadable_after_first_batch: Tests a file failing
+            part way through.
+        test_import_invalid_requests: Tests rejected uploads.
+        test_import_command_round_trip: Tests export then import.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='importuser',
+            password='12345'
+        )
+        self.client.login(username='importuser', password='12345')
+
+    def upload(self, name, content, **data):
+        """
+        Posts a file to the note_import view.
+
+        Args:
+            name (str): The uploaded file's name.
+            content (str): The file's content.
+            **data: Additional form fields.
+
+        Returns:
+            HttpResponse: The response of the note_import view.
+        """
+
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post(
+            reverse('note_import'), {'file': upload, **data})
+
+    def test_import_ndjson(self):
+        """
+        Tests that NDJSON rows become notes owned by the user, with model
+        defaults for omitted fields.
+        """
+
+        content = (
+            '{"title": "One", "content": "A", "x_position": 5}\n'
+            '\n'
+            '{"title": "Two", "content": "B", "color": "#000000"}\n'
+        )
+        response = self.upload('notes.ndjson', content)
+        self.assertEqual(response.json()['imported'], 2)
+        one = Note.objects.get(title='One')
+        self.assertEqual((one.user, one.x_position, one.color, one.preview),
+                         (self.user, 5, '#FFD700', 'A'))
+
+    def test_import_csv(self):
+        """
+        Tests that CSV rows, including multi-line fields, become notes.
+        """
+
+        content = 'title,content\nOne,"Line 1\nLine 2"\nTwo,B\n'
+        response = self.upload('notes.csv', content)
+        self.assertEqual(response.json()['imported'], 2)
+        self.assertEqual(
+            Note.objects.get(title='One').content, 'Line 1\nLine 2')
+
+    def test_import_reports_row_errors(self):
+        """
+        Tests that invalid rows are skipped and reported by row number.
+        """
+
+        content = (
+            '{"title": "Good", "content": "A"}\n'
+            '{"title": "' + 'x' * 101 + '", "content": "A"}\n'
+            'not json\n'
+        )
+        report = self.upload('notes.ndjson', content).json()
+        self.assertEqual((report['imported'], report['failed']), (1, 2))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3])
+        self.assertIn('title', report['errors'][0]['errors'])
+
+    @override_settings(IMPORT_BATCH_SIZE=2)
+    def test_import_inserts_in_batches(self):
+        """
+        Tests that notes are inserted with one INSERT per batch.
+        """
+
+        content = ''.join(
+            f'{{"title": "N{i}", "content": "C"}}\n' for i in range(5))
+        with CaptureQueriesContext(connection) as queries:
+            self.upload('notes.ndjson', content)
+        inserts = [
+            query for query in queries
+            if query['sql'].startswith('INSERT INTO "sticky_notes_app_note"')
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Note.objects.filter(user=self.user).count(), 5)
+
+    @override_settings(IMPORT_BATCH_SIZE=2)
+    def test_import_unreadable_after_first_batch(self):
+        """
+        Tests that a file becoming unreadable after a batch was inserted is
+        rejected, while the inserted notes still invalidate the cached board
+        and reset the user's open boards.
+        """
+
+        content = (
+            b'{"title": "One", "content": "A"}\n'
+            b'{"title": "Two", "content": "B"}\n'
+            b'{"title": "Three", "content": "C"}\n'
+            b'\xff\n'
+        )
+        before = board_cache.generation(self.user.pk)
+        with mock.patch.object(InProcessBroker, 'publish') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('note_import'), {
+                'file': SimpleUploadedFile('notes.ndjson', content)})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Note.objects.filter(user=self.user).count(), 2)
+        self.assertNotEqual(board_cache.generation(self.user.pk), before)
+        publish.assert_called_once_with(self.user.pk, 'reset', {})
+
+    def test_import_invalid_requests(self):
+        """
+        Tests that missing files and unsupported formats are rejected.
+        """
+
+        response = self.client.post(reverse('note_import'))
+        self.assertEqual(response.status_code, 400)
+        response = self.upload('notes.xml', '<notes/>')
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_command_round_trip(self):
+        """
+        Tests that import_notes imports a file written by export_notes.
+        """
+
+        Note.objects.create(title='Exported', content='X', user=self.user)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notes.csv')
+            call_command(
+                'export_notes', 'importuser', '--format', 'csv',
+                '--output', path, stdout=StringIO())
+            out = StringIO()
+            call_command(
+                'import_notes', 'importuser', path, stdout=out,
+                stderr=StringIO())
+        self.assertIn('Imported 1 notes, 0 rows failed', out.getvalue())
+        self.assertEqual(Note.objects.filter(title='Exported').count(), 2)
+
+
+class NoteSearchTest(TestCase):
+    """
+    Tests full-text search over notes.
+    Verifies that the FTS5-backed search ranks and highlights matches, is
+    scoped to the user, stays in sync with note changes through triggers,
+    treats user input as plain words, and that the fallback lookups and the
+    rebuild_search_index command work.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the notes.
+
+    Methods:
+        setUp: Creates a logged-in user with notes and another user's note.
+        search: Runs a search and returns its results.
+        test_search_ranks_title_matches_first: Tests ranking.
+        test_search_highlights_and_escapes: Tests highlighting.
+        test_search_scoped_to_user: Tests per-user scoping.
+        test_search_follows_updates_and_deletes: Tests index triggers.
+        test_search_ignores_query_syntax: Tests query sanitizing.
+        test_search_fallback: Tests search without FTS5.
+        test_rebuild_command: Tests the rebuild_search_index command.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in user with notes and another user's note.
+        """
+
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='searchuser',
+            password='12345'
+        )
+        self.client.login(username='searchuser', password='12345')
+        self.body = Note.objects.create(
+            title='Groceries', content='Buy apples and pears',
+            user=self.user)
+        self.title = Note.objects.create(
+            title='Apples', content='Varieties to try', user=self.user)
+        other = User.objects.create_user(username='other', password='12345')
+        Note.objects.create(title='Apples', content='Theirs', user=other)
+
+    def search(self, query):
+        """
+        Runs a search through the note_search view.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            list: The search results.
+        """
+
+        response = self.client.get(reverse('note_search'), {'q': query})
+        return response.json()['results']
+
+    def test_search_ranks_title_matches_first(self):
+        """
+        Tests that a title match outranks a content match.
+        """
+
+        results = self.search('apples')
+        self.assertEqual(
+            [result['id'] for result in results],
+            [self.title.pk, self.body.pk])
+
+    def test_search_highlights_and_escapes(self):
+        """
+        Tests that matches are marked and note text is HTML-escaped.
+        """
+
+        Note.objects.create(
+            title='<b>Plums</b>', content='x', user=self.user)
+        [result] = self.search('plum')
+        self.assertEqual(result['title'], '&lt;b&gt;<mark>Plums</mark>&lt;/b&gt;')
+
+    def test_search_scoped_to_user(self):
+        """
+        Tests that other users' notes are never returned.
+        """
+
+        self.assertEqual(self.search('theirs'), [])
+
+    def test_search_follows_updates_and_deletes(self):
+        """
+        Tests that edits and deletions are reflected in the index.
+        """
+
+        self.body.content = 'Buy bread'
+        self.body.save()
+        self.assertEqual(len(self.search('pears')), 0)
+        self.assertEqual(len(self.search('bread')), 1)
+        self.body.delete()
+        self.assertEqual(self.search('bread'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """
+        Tests that FTS5 operators in the query are treated as plain text.
+        """
+
+        self.assertEqual(len(self.search('apples AND "pears')), 1)
+        self.assertEqual(self.search('***'), [])
+
+    @override_settings(NOTE_SEARCH_FTS=False)
+    def test_search_fallback(self):
+        """
+        Tests that search works without the FTS5 index.
+        """
+
+        results = self.search('pears')
+        self.assertEqual([result['id'] for result in results], [self.body.pk])
+        self.assertIn('<mark>pears</mark>', results[0]['snippet'])
+
+    def test_rebuild_command(self):
+        """
+        Tests that rebuild_search_index reports the index statistics.
+        """
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 3 notes', out.getvalue())
+        self.assertEqual(len(self.search('apples')), 2)
+
+
+class AsyncViewsTest(TestCase):
+    """
+    Tests the async views served under ASGI.
+    Requests made with the async test client go through the async handler,
+    so the async_views middleware routes them to the native async views.
+    Verifies authentication, the board page and windows, conditional GET,
+    position updates, the streamed export and the JSON API.
+
+    Attributes:
+        user (User): A logged-in test User owning the notes.
+        note (Note): A note owned by the test user.
+        other_note (Note): A note owned by another user.
+
+    Methods:
+        setUp: Creates a user with a note and another user's note.
+        test_anonymous_redirected: Tests the async login check.
+        test_note_list: Tests the async board page.
+        test_note_window_not_modified: Tests async conditional GET.
+        test_note_window_invalid: Tests viewport validation.
+        test_update_position_single: Tests moving one note.
+        test_update_position_batch: Tests moving a batch of notes.
+        test_update_position_other_user: Tests ownership checks.
+        test_update_position_get: Tests that GET is rejected.
+        test_note_export_async_stream: Tests the async export iterator.
+        test_api_anonymous: Tests the async API login check.
+        test_api_note_list: Tests listing and creating notes.
+        test_api_note_detail: Tests retrieving, updating and deleting.
+    """
+
+    def setUp(self):
+        """
+        Sets up a test user with a note and another user's note.
+        """
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='asyncuser',
+            password='12345'
+        )
+        self.note = Note.objects.create(
+            title='Async Note', content='Content', user=self.user)
+        other = User.objects.create_user(username='other', password='12345')
+        self.other_note = Note.objects.create(title='Theirs', user=other)
+
+    async def test_anonymous_redirected(self):
+        """
+        Tests that anonymous requests are redirected to the login page.
+        """
+
+        response = await self.async_client.get(reverse('note_list'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    async def test_note_list(self):
+        """
+        Tests that the async board page embeds the user's notes.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('note_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Async Note')
+        self.assertContains(response, 'asyncuser')
+        self.assertNotContains(response, 'Theirs')
+
+    async def test_note_window_not_modified(self):
+        """
+        Tests that an unchanged window is answered with 304 and a moved
+        note changes the ETag.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        url = reverse('note_window')
+        params = {'x_min': 0, 'x_max': 1000, 'y_min': 0, 'y_max': 1000}
+        response = await self.async_client.get(url, params)
+        self.assertEqual(
+            [note['id'] for note in response.json()['notes']], [self.note.pk])
+        etag = response['ETag']
+        response = await self.async_client.get(
+            url, params, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        await self.async_client.post(
+            reverse('update_position'),
+            {'note_id': self.note.pk, 'x': 5, 'y': 5})
+        response = await self.async_client.get(
+            url, params, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['notes'][0]['x_position'], 5)
+
+    async def test_note_window_invalid(self):
+        """
+        Tests that an invalid viewport is rejected with status 400.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse('note_window'), {'x_min': 'a'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_update_position_single(self):
+        """
+        Tests that a single note is moved.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('update_position'),
+            {'note_id': self.note.pk, 'x': 100, 'y': 200})
+        self.assertEqual(response.json(), {'status': 'success'})
+        await self.note.arefresh_from_db()
+        self.assertEqual(
+            (self.note.x_position, self.note.y_position), (100, 200))
+
+    async def test_update_position_batch(self):
+        """
+        Tests that a batch of positions is written.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        second = await Note.objects.acreate(title='Second', user=self.user)
+        response = await self.async_client.post(
+            reverse('update_position'),
+            {'positions': json.dumps([
+                {'note_id': self.note.pk, 'x': 1, 'y': 2},
+                {'note_id': second.pk, 'x': 3, 'y': 4},
+            ])})
+        self.assertEqual(response.json(), {'status': 'success', 'updated': 2})
+        await second.arefresh_from_db()
+        self.assertEqual((second.x_position, second.y_position), (3, 4))
+
+    async def test_update_position_other_user(self):
+        """
+        Tests that another user's note cannot be moved.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('update_position'),
+            {'note_id': self.other_note.pk, 'x': 1, 'y': 1})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_update_position_get(self):
+        """
+        Tests that GET requests are rejected with status 400.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('update_position'))
+        self.assertEqual(response.status_code, 400)
+
+    async def test_note_export_async_stream(self):
+        """
+        Tests that the export is streamed from an async iterator, one chunk
+        at a time, and that an unsupported format is rejected.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        await Note.objects.acreate(title='Second', user=self.user)
+        with override_settings(EXPORT_CHUNK_SIZE=1):
+            response = await self.async_client.get(
+                reverse('note_export'), {'format': 'csv'})
+            self.assertTrue(response.is_async)
+            lines = b''.join([
+                chunk async for chunk in response.streaming_content
+            ]).decode().splitlines()
+        self.assertEqual(lines[0], ','.join(EXPORT_FIELDS))
+        self.assertEqual(len(lines), 3)
+        self.assertIn('Async Note', lines[1])
+        self.assertNotIn('Theirs', ''.join(lines))
+        response = await self.async_client.get(
+            reverse('note_export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_api_anonymous(self):
+        """
+        Tests that anonymous API requests get a 401 JSON error.
+        """
+
+        response = await self.async_client.get(reverse('api_note_list'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['status'], 'error')
+
+    async def test_api_note_list(self):
+        """
+        Tests that the async listing paginates, answers an unchanged page
+        with 304 and creates notes.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        url = reverse('api_note_list')
+        response = await self.async_client.post(
+            url, {'title': 'Created', 'content': 'Body'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        created = response.json()
+        self.assertEqual(
+            response['Location'],
+            reverse('api_note_detail', args=[created['id']]))
+        response = await self.async_client.get(
+            url, {'limit': 1, 'fields': 'id,title'})
+        page = response.json()
+        self.assertEqual(page['results'], [
+            {'id': created['id'], 'title': 'Created'}])
+        response = await self.async_client.get(
+            url, {'limit': 1, 'fields': 'id,title', 'cursor': page['next']})
+        self.assertEqual(response.json(), {
+            'results': [{'id': self.note.pk, 'title': 'Async Note'}],
+            'next': None})
+        etag = response['ETag']
+        response = await self.async_client.get(
+            url, {'limit': 1, 'fields': 'id,title', 'cursor': page['next']},
+            headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.get(url, {'limit': 0})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_api_note_detail(self):
+        """
+        Tests that a note is retrieved, patched and deleted, that If-Match
+        is honoured and that other users' notes are not found.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        url = reverse('api_note_detail', args=[self.note.pk])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json()['title'], 'Async Note')
+        etag = response['ETag']
+        response = await self.async_client.get(
+            url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.patch(
+            url, {'title': 'Patched'}, content_type='application/json',
+            headers={'if-match': etag})
+        self.assertEqual(response.json()['title'], 'Patched')
+        self.assertEqual(response.json()['content'], 'Content')
+        response = await self.async_client.delete(
+            url, headers={'if-match': etag})
+        self.assertEqual(response.status_code, 412)
+        response = await self.async_client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await Note.objects.filter(pk=self.note.pk).aexists())
+        response = await self.async_client.get(
+            reverse('api_note_detail', args=[self.other_note.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class BenchmarkServersTest(TransactionTestCase):
+    """
+    Tests the benchmark_servers command.
+    Uses a TransactionTestCase since the benchmark's requests run in other
+    threads, which must see the committed test data.
+
+    Methods:
+        test_benchmark_reports_both_servers: Tests the command output.
+    """
+
+    def test_benchmark_reports_both_servers(self):
+        """
+        Tests that the command loads the board under WSGI and ASGI without
+        errors and reports both.
+        """
+
+        user = User.objects.create_user(username='bench', password='12345')
+        Note.objects.create(title='Bench', user=user)
+        out = StringIO()
+        call_command(
+            'benchmark_servers', 'bench', '--requests', '20',
+            '--concurrency', '4', '--host', 'testserver', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('WSGI:'))
+        self.assertTrue(lines[1].startswith('ASGI:'))
+        for line in lines:
+            self.assertIn('0 errors', line)
+
+
+class BenchmarkRenderingTest(SimpleTestCase):
+    """
+    Tests the benchmark_rendering command.
+
+    Methods:
+        test_benchmark_rendering: Tests the command output.
+        test_benchmark_rendering_invalid: Tests rejected arguments.
+    """
+
+    def test_benchmark_rendering(self):
+        """
+        Tests that every rendering path is reported for each board size,
+        and that a window is capped at NOTE_WINDOW_MAX_NOTES notes.
+        """
+
+        out = StringIO()
+        with override_settings(NOTE_WINDOW_MAX_NOTES=10):
+            call_command('benchmark_rendering', '20', '40', '--repeat', '1',
+                         stdout=out)
+            results = run_render_benchmark(40, repeat=1)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('20 notes: template '))
+        self.assertTrue(lines[1].startswith('40 notes: template '))
+        for line in lines:
+            self.assertIn(', json ', line)
+            self.assertIn(', window ', line)
+            self.assertIn('faster than the template', line)
+        self.assertEqual(set(results), {'template', 'json', 'window'})
+        self.assertLess(results['window'][1], results['json'][1])
+
+    def test_benchmark_rendering_invalid(self):
+        """
+        Tests that empty boards and a zero --repeat are rejected.
+        """
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_rendering', '0', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('benchmark_rendering', '10', '--repeat', '0',
+                         stdout=StringIO())
+
+
+class BenchmarkViewsTest(TransactionTestCase):
+    """
+    Tests the seed_notes and benchmark_views commands.
+    Uses a TransactionTestCase since the benchmark's requests run in other
+    threads, which must see the committed test data; they run one at a
+    time, since the in-memory test database locks whole tables.
+
+    Methods:
+        test_seed_notes: Tests the seeded users and notes.
+        test_benchmark_views: Tests the benchmark results and comparison.
+    """
+
+    def test_seed_notes(self):
+        """
+        Tests that seed_notes creates the users and notes, reproducibly,
+        and only replaces existing ones with --clear.
+        """
+
+        call_command('seed_notes', '--users', '2', '--notes', '30',
+                     '--prefix', 'seeduser', stdout=StringIO())
+        self.assertEqual(
+            list(User.objects.values_list('username', flat=True)
+                 .order_by('username')), ['seeduser1', 'seeduser2'])
+        self.assertEqual(Note.objects.count(), 60)
+        self.assertTrue(User.objects.get(username='seeduser1')
+                        .check_password('benchpass'))
+        lengths = {len(note.content) for note in Note.objects.all()}
+        self.assertGreater(len(lengths), 10)
+        titles = list(Note.objects.order_by('pk').values_list(
+            'title', flat=True))
+        with self.assertRaises(CommandError):
+            call_command('seed_notes', '--users', '2', '--notes', '30',
+                         '--prefix', 'seeduser')
+        call_command('seed_notes', '--users', '2', '--notes', '30',
+                     '--prefix', 'seeduser', '--clear', stdout=StringIO())
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(list(Note.objects.order_by('pk').values_list(
+            'title', flat=True)), titles)
+
+    def test_benchmark_views(self):
+        """
+        Tests that benchmark_views runs every view without errors, counts
+        their queries, leaves the notes as they were and compares runs,
+        including one with FAST_AUTH.
+        """
+
+        call_command('seed_notes', '--users', '2', '--notes', '20',
+                     stdout=StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark_views', '--requests', '4', '--host', 'testserver',
+                '--output', path, stdout=StringIO())
+            with open(path) as file:
+                results = json.load(file)
+            out = StringIO()
+            call_command(
+                'benchmark_views', '--requests', '2', '--scenario',
+                'note_list', '--host', 'testserver', '--compare', path,
+                '--fast-auth', stdout=out)
+        self.assertEqual(
+            list(results['scenarios']),
+            ['login', 'note_list', 'note_create', 'note_update',
+             'update_position', 'note_delete'])
+        for summary in results['scenarios'].values():
+            self.assertEqual(summary['requests'], 4)
+            self.assertEqual(summary['errors'], 0)
+            self.assertGreater(summary['queries'], 0)
+        self.assertEqual(Note.objects.count(), 40)
+        self.assertIn('vs baseline: requests/sec', out.getvalue())
+        # Cached sessions and users save queries per request
+        self.assertIn(', queries -', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('benchmark_views', '--prefix', 'nobody')
+        with self.assertRaises(CommandError):
+            call_command('benchmark_views', '--fast-auth',
+                         '--url', 'http://localhost:8000')
+
+
+class NoteSyncTest(TestCase):
+    """
+    Tests syncing a board from a change token.
+    Verifies that every kind of write advances the owner's change
+    sequence, that note_sync returns only the changes after a token, in
+    pages, with a number of queries independent of the size of the board,
+    and that tokens older than the pruned tombstones are refused.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the board.
+
+    Methods:
+        setUp: Creates and logs in a test user.
+        sync: Requests the changes since a token.
+        board_token: Returns the token embedded in a board window.
+        test_sync_returns_changes: Tests creates, updates, moves, deletes.
+        test_sync_covers_bulk_writes: Tests bulk inserts and updates.
+        test_sync_scoped_to_user: Tests that other users' changes are hidden.
+        test_sync_pages: Tests SYNC_MAX_CHANGES paging.
+        test_sync_queries: Tests the queries of a sync.
+        test_sync_invalid_token: Tests rejection of bad tokens.
+        test_prune_tombstones: Tests tombstone retention.
+    """
+
+    def setUp(self):
+        """
+        Sets up test data by creating and logging in a test user.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='syncuser',
+            password='12345'
+        )
+        self.client.login(username='syncuser', password='12345')
+
+    def sync(self, since):
+        """
+        Requests the changes since a token from the note_sync view.
+
+        Args:
+            since (str): The change token.
+
+        Returns:
+            HttpResponse: The response of the note_sync view.
+        """
+
+        return self.client.get(reverse('note_sync'), {'since': since})
+
+    def board_token(self):
+        """
+        Returns the sync token of a board window, as the board gets it.
+
+        Returns:
+            str: The token.
+        """
+
+        response = self.client.get(reverse('note_window'), {
+            'x_min': 0, 'x_max': 1000, 'y_min': 0, 'y_max': 1000})
+        return response.json()['token']
+
+    def test_sync_returns_changes(self):
+        """
+        Tests that a sync returns the notes created, updated and moved and
+        the IDs of those deleted since the token, each once, and a token
+        with which the next sync is empty.
+        """
+
+        edited = Note.objects.create(title='Edited', user=self.user)
+        moved = Note.objects.create(title='Moved', user=self.user)
+        deleted = Note.objects.create(title='Deleted', user=self.user)
+        Note.objects.create(title='Unchanged', user=self.user)
+        token = self.board_token()
+        self.assertEqual(token, '4')
+        edited.title = 'Edited once'
+        edited.save()
+        edited.title = 'Edited twice'
+        edited.save()
+        self.client.post(
+            reverse('update_position'), {'note_id': moved.pk, 'x': 7, 'y': 8})
+        self.client.post(reverse('note_delete', args=[deleted.pk]))
+        created = Note.objects.create(title='Created', user=self.user)
+        response = self.sync(token)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [note['title'] for note in data['notes']],
+            ['Edited twice', 'Moved', 'Created'])
+        self.assertEqual(data['notes'][1]['x_position'], 7)
+        self.assertEqual(data['notes'][2]['id'], created.pk)
+        self.assertEqual(data['deleted'], [deleted.pk])
+        self.assertFalse(data['more'])
+        self.assertEqual(data['token'], '9')
+        self.assertEqual(
+            self.sync(data['token']).json(),
+            {'token': '9', 'notes': [], 'deleted': [], 'more': False})
+        self.assertEqual(len(self.sync('0').json()['notes']), 4)
+
+    def test_sync_covers_bulk_writes(self):
+        """
+        Tests that bulk inserts and bulk updates, which send no signals,
+        are synced too.
+        """
+
+        token = self.board_token()
+        Note.objects.bulk_create(
+            Note(title=f'Bulk {i}', user=self.user) for i in range(3))
+        data = self.sync(token).json()
+        self.assertEqual(len(data['notes']), 3)
+        Note.objects.filter(user=self.user).update(color='#000000')
+        data = self.sync(data['token']).json()
+        self.assertEqual(
+            [note['color'] for note in data['notes']], ['#000000'] * 3)
+
+    def test_sync_scoped_to_user(self):
+        """
+        Tests that changes to other users' notes are neither returned nor
+        counted in the user's token.
+        """
+
+        other = User.objects.create_user(username='other', password='x')
+        Note.objects.create(title='Theirs', user=other).delete()
+        self.assertEqual(self.board_token(), '0')
+        self.assertEqual(
+            self.sync('0').json(),
+            {'token': '0', 'notes': [], 'deleted': [], 'more': False})
+
+    @override_settings(SYNC_MAX_CHANGES=2)
+    def test_sync_pages(self):
+        """
+        Tests that a sync returns at most SYNC_MAX_CHANGES changes, flags
+        that more remain, and continues from its token.
+        """
+
+        notes = [
+            Note.objects.create(title=f'Paged {i}', user=self.user)
+            for i in range(4)
+        ]
+        deleted_pk = notes[0].pk
+        notes[0].delete()
+        first = self.sync('0').json()
+        self.assertTrue(first['more'])
+        self.assertEqual(
+            [note['title'] for note in first['notes']],
+            ['Paged 1', 'Paged 2'])
+        second = self.sync(first['token']).json()
+        self.assertEqual(second['notes'][0]['title'], 'Paged 3')
+        self.assertEqual(second['deleted'], [deleted_pk])
+        self.assertFalse(second['more'])
+
+    def test_sync_queries(self):
+        """
+        Tests that a sync runs the same three queries whatever the number
+        of notes and changes.
+        """
+
+        Note.objects.bulk_create(
+            Note(title=f'Many {i}', user=self.user) for i in range(50))
+        with self.assertNumQueries(3):
+            changes_since(self.user, 0, ('id', 'title'))
+        with self.assertNumQueries(3):
+            changes_since(self.user, 45, ('id', 'title'))
+
+    def test_sync_invalid_token(self):
+        """
+        Tests that a missing or malformed token is rejected with 400 and
+        a token newer than any change with 410.
+        """
+
+        response = self.client.get(reverse('note_sync'))
+        self.assertEqual(response.status_code, 400)
+        response = self.sync('-1')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertEqual(self.sync('5').status_code, 410)
+
+    def test_prune_tombstones(self):
+        """
+        Tests that prune_tombstones only deletes old tombstones, and that
+        tokens from before them are then refused while newer tokens and a
+        full sync still work.
+        """
+
+        old = Note.objects.create(title='Old', user=self.user)
+        Note.objects.create(title='Kept', user=self.user)
+        old.delete()
+        NoteTombstone.objects.update(
+            deleted_at=timezone.now() - timedelta(days=31))
+        recent = Note.objects.create(title='Recent', user=self.user)
+        recent_pk = recent.pk
+        recent.delete()
+        out = StringIO()
+        call_command('prune_tombstones', stdout=out)
+        self.assertEqual(out.getvalue(), 'Deleted 1 tombstones.\n')
+        self.assertEqual(
+            list(NoteTombstone.objects.values_list('note_id', flat=True)),
+            [recent_pk])
+        self.assertEqual(ChangeSequence.objects.get(user=self.user).pruned, 3)
+        self.assertEqual(self.sync('2').status_code, 410)
+        self.assertEqual(self.sync('3').json()['deleted'], [recent_pk])
+        self.assertEqual(
+            [note['title'] for note in self.sync('0').json()['notes']],
+            ['Kept'])
+        with self.assertRaises(CommandError):
+            call_command('prune_tombstones', '--days', '-1')
+
+
+@override_settings(
+    EVENT_POLL_INTERVAL=0.01,
+    EVENT_HEARTBEAT_INTERVAL=0.05,
+    EVENT_STREAM_DURATION=0.2,
+)
+class NoteEventsTest(TestCase):
+    """
+    Tests live board sync over Server-Sent Events.
+    Verifies that note changes publish events once committed, that both
+    brokers resume from an event ID and fall back to a 'reset' event when
+    events were missed, and that the sync and async streams deliver events.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the notes.
+        note (Note): A note owned by the test user.
+
+    Methods:
+        setUp: Creates a logged-in user with a note.
+        new_events: Returns the user's events published since setUp.
+        test_save_and_delete_publish_events: Tests the model signals.
+        test_events_wait_for_commit: Tests rolled back changes are not sent.
+        test_update_position_publishes_moves: Tests move events.
+        test_import_publishes_reset: Tests the event sent after an import.
+        test_in_process_broker_resume: Tests resuming and resets.
+        test_cache_broker_resume: Tests the cache broker.
+        test_cache_broker_missing_event: Tests a lost event.
+        test_stream_resumes_from_last_event_id: Tests the sync stream.
+        test_stream_invalid_last_event_id: Tests ID validation.
+        test_async_stream: Tests the async stream.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user with a note.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='eventuser',
+            password='12345'
+        )
+        self.client.login(username='eventuser', password='12345')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note = Note.objects.create(title='Live', user=self.user)
+        self.last_id = get_broker().last_id(self.user.pk)
+
+    def new_events(self) -> list:
+        """
+        Returns the (type, data) of the user's events published since setUp.
+        """
+
+        return [
+            (event['type'], event['data'])
+            for event in get_broker().read(self.user.pk, self.last_id)
+        ]
+
+    def test_save_and_delete_publish_events(self):
+        """
+        Tests that creating, updating and deleting notes publish events.
+        """
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = Note.objects.create(title='New', user=self.user)
+            self.note.title = 'Changed'
+            self.note.save()
+            note_id = self.note.pk
+            self.note.delete()
+        events = self.new_events()
+        self.assertEqual(
+            [event_type for event_type, data in events],
+            ['create', 'update', 'delete'])
+        self.assertEqual(events[0][1]['id'], created.pk)
+        self.assertEqual(events[1][1]['title'], 'Changed')
+        self.assertEqual(events[2][1], {'id': note_id})
+
+    def test_events_wait_for_commit(self):
+        """
+        Tests that no event is published for changes that are rolled back.
+        """
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Note.objects.create(title='Rolled back', user=self.user)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.new_events(), [])
+
+    def test_update_position_publishes_moves(self):
+        """
+        Tests that update_position publishes a move event per note.
+        """
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('update_position'),
+                {'note_id': self.note.pk, 'x': 40, 'y': 50})
+        self.assertEqual(self.new_events(), [
+            ('move', {'id': self.note.pk, 'x_position': 40, 'y_position': 50}),
+        ])
+
+    def test_import_publishes_reset(self):
+        """
+        Tests that an import tells open boards to reload.
+        """
+
+        upload = SimpleUploadedFile(
+            'notes.ndjson', b'{"title": "Imported", "content": "A"}\n')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('note_import'), {'file': upload, 'format': 'ndjson'})
+        self.assertEqual(
+            [event_type for event_type, data in self.new_events()],
+            ['reset'])
+
+    def test_in_process_broker_resume(self):
+        """
+        Tests that the in-process broker resumes after an event ID and
+        resets clients that are too far behind or ahead.
+        """
+
+        broker = InProcessBroker(history_size=2)
+        for number in range(3):
+            broker.publish(1, 'move', {'number': number})
+        self.assertEqual(
+            [event['data']['number'] for event in broker.read(1, 1)], [1, 2])
+        self.assertEqual(broker.read(1, 3), [])
+        self.assertEqual(
+            broker.read(1, 0), [{'id': 3, 'type': 'reset', 'data': {}}])
+        self.assertEqual(broker.read(1, 9)[0]['type'], 'reset')
+        self.assertEqual(broker.wait(1, 3, 0.01), [])
+
+    def test_cache_broker_resume(self):
+        """
+        Tests that the cache broker resumes after an event ID.
+        """
+
+        broker = CacheBroker()
+        for number in range(3):
+            broker.publish(self.user.pk, 'move', {'number': number})
+        self.assertEqual(broker.last_id(self.user.pk), 3)
+        self.assertEqual(
+            [event['data']['number'] for event in broker.read(self.user.pk, 1)],
+            [1, 2])
+        self.assertEqual(broker.read(self.user.pk, 3), [])
+        self.assertEqual(broker.read(self.user.pk, 9)[0]['type'], 'reset')
+
+    def test_cache_broker_missing_event(self):
+        """
+        Tests that the cache broker resets clients when an event was lost,
+        but waits for an event that is still being written.
+        """
+
+        broker = CacheBroker()
+        for number in range(3):
+            broker.publish(self.user.pk, 'move', {'number': number})
+        cache.delete(f'events:{self.user.pk}:3')
+        self.assertEqual(len(broker.read(self.user.pk, 0)), 2)
+        cache.delete(f'events:{self.user.pk}:2')
+        broker.publish(self.user.pk, 'move', {'number': 3})
+        self.assertEqual(broker.read(self.user.pk, 1)[0]['type'], 'reset')
+
+    def test_stream_resumes_from_last_event_id(self):
+        """
+        Tests that the stream sends the events after Last-Event-ID in the
+        text/event-stream format, then heartbeats.
+        """
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note.title = 'Streamed'
+            self.note.save()
+        response = self.client.get(
+            reverse('note_events'),
+            headers={'last-event-id': str(self.last_id)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('retry: 2000\n\n'))
+        self.assertIn(f'id: {self.last_id + 1}\nevent: update\n', body)
+        self.assertIn('"title": "Streamed"', body)
+        self.assertIn(': heartbeat', body)
+
+    def test_stream_invalid_last_event_id(self):
+        """
+        Tests that an invalid Last-Event-ID is rejected with status 400.
+        """
+
+        response = self.client.get(
+            reverse('note_events'), headers={'last-event-id': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_stream(self):
+        """
+        Tests that the async stream served under ASGI delivers events.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        await get_broker().apublish(self.user.pk, 'delete', {'id': 1})
+        response = await self.async_client.get(
+            reverse('note_events'), {'last_event_id': self.last_id})
+        body = ''.join([
+            chunk.decode() async for chunk in response.streaming_content])
+        self.assertIn('event: delete\ndata: {"id": 1}', body)
+
+
+class SqliteProfileTest(TestCase):
+    """
+    Tests the production SQLite connection profile.
+
+    Methods:
+        test_connection_pragmas: Tests the pragmas of new connections.
+        test_benchmark_command: Tests the benchmark_sqlite command.
+    """
+
+    def test_connection_pragmas(self):
+        """
+        Tests that connections run the profile's pragmas and busy timeout
+        and start transactions with BEGIN IMMEDIATE.
+        """
+
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for pragma in ('synchronous', 'cache_size', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {pragma}')
+                pragmas[pragma] = cursor.fetchone()[0]
+        self.assertEqual(
+            pragmas,
+            {'synchronous': 1, 'cache_size': -65536, 'busy_timeout': 20000})
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_benchmark_command(self):
+        """
+        Tests that benchmark_sqlite reports every profile.
+        """
+
+        out = StringIO()
+        # The write queue profile connects through a temporary alias
+        with mock.patch.object(
+                type(self), 'databases', {'default', QUEUE_ALIAS}):
+            call_command(
+                'benchmark_sqlite', '--notes', '50', '--users', '2',
+                '--readers', '2', '--writers', '2', '--duration', '0.2',
+                stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('stock:'))
+        self.assertTrue(lines[1].startswith('production:'))
+        self.assertIn('0 lock errors', lines[1])
+        self.assertTrue(lines[2].startswith('write queue:'))
+        self.assertIn('0 lock errors', lines[2])
+        self.assertTrue(lines[3].startswith('Read throughput:'))
+        self.assertTrue(lines[4].startswith('Write throughput with the queue:'))
+
+
+@override_settings(WRITE_QUEUE_ENABLED=True)
+class WriteQueueTest(TransactionTestCase):
+    """
+    Tests the single-writer queue and the views writing through it.
+    Uses a TransactionTestCase since queued writes run in the writer thread,
+    which must see the committed test data.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning the notes.
+        other (User): Another user owning a note.
+        note (Note): A note owned by the test user.
+
+    Methods:
+        setUp: Creates a logged-in user and notes.
+        tearDown: Stops the process-wide writer thread.
+        test_views_write_through_queue: Tests note writes via the queue.
+        test_update_position_through_queue: Tests position updates.
+        test_update_position_other_users_note: Tests the ownership check.
+        test_async_update_position_through_queue: Tests the ASGI view.
+        test_grouped_positions_fail_alone: Tests per-request ownership.
+        test_queue_batches_writes: Tests batching and error isolation.
+        test_timeout_cancels_queued_write: Tests writes not started in time.
+        test_timeout_waits_for_running_write: Tests writes started in time.
+        test_stop_drains_queue: Tests stopping the writer thread.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user with a note and another user's note.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='queueuser',
+            password='12345'
+        )
+        self.other = User.objects.create_user(
+            username='otheruser',
+            password='12345'
+        )
+        self.client.login(username='queueuser', password='12345')
+        self.note = Note.objects.create(title='Queued', user=self.user)
+
+    def tearDown(self):
+        """
+        Stops the process-wide writer threads so they do not outlive the
+        test database.
+        """
+
+        for write_queue in writer._write_queues.values():
+            write_queue.stop()
+        writer._write_queues.clear()
+
+    def test_views_write_through_queue(self):
+        """
+        Tests that creating, updating and deleting notes works through the
+        writer thread.
+        """
+
+        response = self.client.post(
+            reverse('note_create'), {
+                'title': 'New', 'content': 'Body', 'color': '#ffff88',
+                'x_position': 0, 'y_position': 0})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('default', writer._write_queues)
+        note = Note.objects.get(title='New')
+        self.assertEqual(note.user, self.user)
+        response = self.client.post(
+            reverse('note_update', args=[note.pk]), {
+                'title': 'Edited', 'content': 'Body', 'color': '#ffff88',
+                'x_position': 0, 'y_position': 0})
+        self.assertEqual(response.status_code, 302)
+        note.refresh_from_db()
+        self.assertEqual(note.title, 'Edited')
+        response = self.client.post(reverse('note_delete', args=[note.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Note.objects.filter(pk=note.pk).exists())
+
+    def test_update_position_through_queue(self):
+        """
+        Tests that single and batched position updates are written by the
+        writer thread.
+        """
+
+        second = Note.objects.create(title='Second', user=self.user)
+        response = self.client.post(
+            reverse('update_position'),
+            {'note_id': self.note.pk, 'x': 10, 'y': 20})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(
+            reverse('update_position'),
+            {'positions': [{'note_id': second.pk, 'x': 30, 'y': 40}]},
+            content_type='application/json')
+        self.assertEqual(response.json()['updated'], 1)
+        self.note.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((self.note.x_position, self.note.y_position), (10, 20))
+        self.assertEqual((second.x_position, second.y_position), (30, 40))
+
+    def test_update_position_other_users_note(self):
+        """
+        Tests that moving another user's note through the queue still
+        returns 404 and leaves the note in place.
+        """
+
+        foreign = Note.objects.create(title='Foreign', user=self.other)
+        response = self.client.post(
+            reverse('update_position'),
+            {'note_id': foreign.pk, 'x': 10, 'y': 20})
+        self.assertEqual(response.status_code, 404)
+        foreign.refresh_from_db()
+        self.assertEqual((foreign.x_position, foreign.y_position), (0, 0))
+
+    async def test_async_update_position_through_queue(self):
+        """
+        Tests that the async update_position view awaits the writer thread.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('update_position'),
+            {'note_id': self.note.pk, 'x': 50, 'y': 60})
+        self.assertEqual(response.status_code, 200)
+        await self.note.arefresh_from_db()
+        self.assertEqual((self.note.x_position, self.note.y_position), (50, 60))
+
+    def test_grouped_positions_fail_alone(self):
+        """
+        Tests that a request naming a foreign note fails without affecting
+        the requests grouped with it.
+        """
+
+        foreign = Note.objects.create(title='Foreign', user=self.other)
+        with transaction.atomic():
+            results = write_position_group([
+                (self.user.pk, {self.note.pk: (1, 2)}),
+                (self.user.pk, {foreign.pk: (3, 4)}),
+                (self.other.pk, {foreign.pk: (5, 6)}),
+            ])
+        self.assertEqual(results[0], 1)
+        self.assertIsInstance(results[1], Note.DoesNotExist)
+        self.assertEqual(results[2], 1)
+        self.note.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual((self.note.x_position, self.note.y_position), (1, 2))
+        self.assertEqual((foreign.x_position, foreign.y_position), (5, 6))
+
+    def test_queue_batches_writes(self):
+        """
+        Tests that operations queued together are committed in one batch
+        and that a failing operation only fails its own future.
+        """
+
+        write_queue = WriteQueue()
+        release = threading.Event()
+        calls = []
+
+        def handler(items):
+            calls.append(items)
+            return [item * 2 for item in items]
+
+        def fail():
+            Note.objects.filter(pk=self.note.pk).update(title='Lost')
+            raise ValueError('Boom')
+
+        # Holds the writer thread so the next operations queue up
+        blocker = write_queue.submit(release.wait, 5)
+        futures = [write_queue.submit_grouped(handler, i) for i in range(3)]
+        failed = write_queue.submit(fail)
+        renamed = write_queue.submit(
+            Note.objects.filter(pk=self.note.pk).update, title='A')
+        release.set()
+        self.assertTrue(blocker.result(5))
+        self.assertEqual([future.result(5) for future in futures], [0, 2, 4])
+        with self.assertRaisesMessage(ValueError, 'Boom'):
+            failed.result(5)
+        self.assertEqual(renamed.result(5), 1)
+        write_queue.stop()
+        self.assertEqual(calls, [[0, 1, 2]])
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, 'A')
+
+    @override_settings(WRITE_QUEUE_TIMEOUT=0.05)
+    def test_timeout_cancels_queued_write(self):
+        """
+        Tests that a write not started within WRITE_QUEUE_TIMEOUT fails like
+        a direct write to a locked database and is never written afterwards.
+        """
+
+        write_queue = writer.get_write_queue()
+        release = threading.Event()
+        blocker = write_queue.submit(release.wait, 5)
+        while not blocker.running():
+            # Until the writer thread has taken the blocker's batch
+            time.sleep(0.001)
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            writer.run_write(
+                Note.objects.filter(pk=self.note.pk).update, title='Late')
+        release.set()
+        self.assertTrue(blocker.result(5))
+        write_queue.stop()
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, 'Queued')
+
+    @override_settings(WRITE_QUEUE_TIMEOUT=0.05)
+    def test_timeout_waits_for_running_write(self):
+        """
+        Tests that a write the writer thread has started is waited for past
+        WRITE_QUEUE_TIMEOUT and returns its result.
+        """
+
+        def slow_rename():
+            time.sleep(0.2)
+            return Note.objects.filter(pk=self.note.pk).update(title='Slow')
+
+        self.assertEqual(writer.run_write(slow_rename), 1)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, 'Slow')
+
+    def test_stop_drains_queue(self):
+        """
+        Tests that stop() writes the queued operations before the writer
+        thread exits, and that a later operation restarts it.
+        """
+
+        write_queue = WriteQueue()
+        future = write_queue.submit(
+            Note.objects.filter(pk=self.note.pk).update, title='B')
+        write_queue.stop()
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), 1)
+        future = write_queue.submit(
+            Note.objects.filter(pk=self.note.pk).update, title='C')
+        self.assertEqual(future.result(5), 1)
+        write_queue.stop()
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, 'C')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    Tests routing reads to the read replica.
+    The replica alias mirrors the test database, so queries can be counted
+    per alias. Uses a TransactionTestCase since the replica connection only
+    sees committed data.
+
+    Attributes:
+        databases (set): The primary and the replica aliases.
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User owning a note.
+        note (Note): A note owned by the test user.
+
+    Methods:
+        setUp: Creates a logged-in user with a note.
+        replica_queries: Counts the replica queries of a GET request.
+        test_router: Tests the router's decisions.
+        test_read_views_use_replica: Tests the routed views.
+        test_writes_stay_on_primary: Tests writes and unrouted views.
+        test_write_pins_reads_to_primary: Tests read-your-writes.
+        test_no_replicas: Tests that reads stay on the primary by default.
+        test_async_views_use_replica: Tests the async board views.
+        test_sync_replica_command: Tests copying the primary to a replica.
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user with a note.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='replicauser',
+            password='12345'
+        )
+        self.client.login(username='replicauser', password='12345')
+        self.note = Note.objects.create(
+            title='Replica', content='Read me', user=self.user)
+
+    def replica_queries(self, url: str) -> int:
+        """
+        Requests a URL and counts the queries sent to the replica.
+
+        Args:
+            url (str): The URL to GET.
+
+        Returns:
+            int: The number of replica queries, including those run while
+                streaming the response.
+        """
+
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_router(self):
+        """
+        Tests that reads only go to the replica inside replica_reads() and
+        that writes and migrations stay on the primary.
+        """
+
+        router = PrimaryReplicaRouter()
+        self.assertIsNone(router.db_for_read(Note))
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Note), 'replica')
+        self.assertIsNone(router.db_for_read(Note))
+        with replica_reads():
+            self.assertEqual(router.db_for_write(Note), 'default')
+        self.assertTrue(router.allow_migrate('default', 'sticky_notes_app'))
+        self.assertFalse(router.allow_migrate('replica', 'sticky_notes_app'))
+
+    def test_read_views_use_replica(self):
+        """
+        Tests that the board, search, export and API list read from the
+        replica, including the streamed export.
+        """
+
+        window = '?x_min=0&x_max=2000&y_min=0&y_max=1200'
+        for url in (
+            reverse('note_list'),
+            reverse('note_window') + window,
+            reverse('note_search') + '?q=Replica',
+            reverse('note_export'),
+            reverse('api_note_list'),
+        ):
+            self.assertGreater(self.replica_queries(url), 0, url)
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(reverse('note_export'))
+            self.assertEqual(len(queries), 0)
+            content = b''.join(response.streaming_content)
+            self.assertGreater(len(queries), 0)
+        self.assertIn(b'Read me', content)
+
+    def test_writes_stay_on_primary(self):
+        """
+        Tests that writes, and reads outside the routed views, use the
+        primary.
+        """
+
+        with CaptureQueriesContext(connections['replica']) as queries:
+            self.client.post(
+                reverse('update_position'),
+                {'note_id': self.note.pk, 'x': 5, 'y': 6})
+            self.client.get(reverse('note_update', args=[self.note.pk]))
+        self.assertEqual(len(queries), 0)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.x_position, 5)
+
+    def test_write_pins_reads_to_primary(self):
+        """
+        Tests that a user's reads skip the replica after they write, and
+        return to it once the sticky window is over.
+        """
+
+        url = reverse('note_search') + '?q=Replica'
+        self.assertGreater(self.replica_queries(url), 0)
+        self.client.post(
+            reverse('update_position'),
+            {'note_id': self.note.pk, 'x': 5, 'y': 6})
+        self.assertEqual(self.replica_queries(url), 0)
+        cache.clear()
+        self.assertGreater(self.replica_queries(url), 0)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """
+        Tests that every read uses the primary when no replica is listed.
+        """
+
+        self.assertEqual(self.replica_queries(reverse('note_list')), 0)
+
+    async def test_async_views_use_replica(self):
+        """
+        Tests that the async board views read from the replica.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        # The async ORM queries from a worker thread, so the router's pick
+        # of a replica is recorded instead of the queries
+        with mock.patch(
+                'sticky_notes_app.routers.random.choice',
+                return_value='replica') as choice:
+            response = await self.async_client.get(reverse('note_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(choice.called)
+
+    def test_sync_replica_command(self):
+        """
+        Tests that sync_replica copies the primary into the replica's file
+        and rejects the primary as a replica.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            replica = connections['replica'].settings_dict
+            with mock.patch.dict(replica, {'NAME': path}):
+                call_command('sync_replica', stdout=StringIO())
+            copy = sqlite3.connect(path)
+            try:
+                [(title,)] = copy.execute(
+                    'SELECT title FROM sticky_notes_app_note').fetchall()
+            finally:
+                copy.close()
+        self.assertEqual(title, 'Replica')
+        with self.assertRaises(CommandError):
+            call_command('sync_replica', '--replica', 'default')
+
+
+@override_settings(NOTE_SHARDS=['default', 'shard_1'])
+class NoteShardTest(TestCase):
+    """
+    Tests sharding notes by user across the primary and a shard database.
+
+    Attributes:
+        databases (set): The primary and the shard aliases.
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User assigned to the shard.
+
+    Methods:
+        setUp: Creates a logged-in user assigned to the shard.
+        note_form: Returns valid note form data.
+        test_placement: Tests where users without an assignment go.
+        test_views_use_user_shard: Tests the views against the shard.
+        test_async_views_use_user_shard: Tests the async board views.
+        test_note_ids: Tests that note IDs are unique across shards.
+        test_move_user: Tests moving a user's notes between shards, with
+            their change sequence.
+        test_writes_refused_while_moving: Tests the write pause of a move.
+        test_rebalance_command: Tests the rebalance_shards command.
+        test_delete_user: Tests deleting a sharded user's notes.
+        test_router_allow_migrate: Tests which tables shards get.
+    """
+
+    databases = {'default', 'shard_1'}
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user whose notes live on the shard.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='sharduser',
+            password='12345'
+        )
+        UserShard.objects.create(user=self.user, shard='shard_1')
+        self.client.login(username='sharduser', password='12345')
+
+    def note_form(self, title: str) -> dict:
+        """
+        Returns valid note form data.
+
+        Args:
+            title (str): The title of the note.
+
+        Returns:
+            dict: The POST data of note_create and note_update.
+        """
+
+        return {'title': title, 'content': 'Sharded content',
+                'color': '#ffff88', 'x_position': 0, 'y_position': 0}
+
+    def test_placement(self):
+        """
+        Tests that new users are spread over the shards by ID and that users
+        with notes from before sharding stay on the primary.
+        """
+
+        new = User.objects.create_user(username='new', password='12345')
+        self.assertEqual(
+            shard_for_user(new.pk), ['default', 'shard_1'][new.pk % 2])
+        legacy = User.objects.create_user(username='legacy', password='12345')
+        with override_settings(NOTE_SHARDS=[]):
+            Note.objects.create(title='Old', user=legacy)
+        self.assertEqual(shard_for_user(legacy.pk), 'default')
+        self.assertEqual(
+            UserShard.objects.get(user=legacy).shard, 'default')
+
+    def test_views_use_user_shard(self):
+        """
+        Tests that creating, listing, moving, searching, exporting and
+        deleting notes all use the user's shard, and that creating the
+        first note stays within the query budget.
+        """
+
+        # The user's assignment and block of note IDs are left out of the
+        # query budget
+        with self.assertNoLogs('sticky_notes_app.requests', 'WARNING'):
+            response = self.client.post(
+                reverse('note_create'), self.note_form('Sharded'))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Note.objects.using('default').exists())
+        note = Note.objects.using('shard_1').get(title='Sharded')
+        response = self.client.get(reverse('note_list'))
+        self.assertContains(response, 'Sharded')
+        response = self.client.post(
+            reverse('update_position'), {'note_id': note.pk, 'x': 7, 'y': 8})
+        self.assertEqual(response.status_code, 200)
+        note.refresh_from_db()
+        self.assertEqual((note.x_position, note.y_position), (7, 8))
+        response = self.client.get(reverse('note_search'), {'q': 'shard'})
+        self.assertEqual(
+            [result['id'] for result in response.json()['results']],
+            [note.pk])
+        response = self.client.get(reverse('note_export'))
+        self.assertIn(b'Sharded', b''.join(response.streaming_content))
+        response = self.client.get(reverse('api_note_detail', args=[note.pk]))
+        self.assertEqual(response.json()['title'], 'Sharded')
+        response = self.client.post(reverse('note_delete', args=[note.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Note.objects.using('shard_1').exists())
+
+    async def test_async_views_use_user_shard(self):
+        """
+        Tests that the async board views read from the user's shard.
+        """
+
+        await Note.objects.using('shard_1').acreate(
+            title='Async shard', user=self.user)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('note_list'))
+        self.assertContains(response, 'Async shard')
+
+    def test_note_ids(self):
+        """
+        Tests that notes get IDs unique across shards, after the notes
+        created before sharding, and keep them when moved.
+        """
+
+        with override_settings(NOTE_SHARDS=[]):
+            legacy = Note.objects.create(title='Legacy', user=self.user)
+        note = Note(title='Sharded', user=self.user)
+        note.save()
+        self.assertEqual(note._state.db, 'shard_1')
+        self.assertGreater(note.pk, legacy.pk)
+        other = User.objects.create_user(username='other', password='12345')
+        UserShard.objects.create(user=other, shard='default')
+        with use_shard('default'):
+            primary = Note.objects.create(title='Primary', user=other)
+        self.assertGreater(primary.pk, note.pk)
+        move_user(self.user.pk, 'default', grace=0)
+        with use_shard('shard_1'):
+            later = Note.objects.create(title='Later', user=self.user)
+        self.assertGreater(later.pk, primary.pk)
+
+    def test_move_user(self):
+        """
+        Tests that moving a user copies their notes unchanged and removes
+        them from the old shard.
+        """
+
+        with use_shard('shard_1'):
+            notes = [
+                Note.objects.create(title=f'Moved {i}', user=self.user)
+                for i in range(3)
+            ]
+        self.assertEqual(move_user(self.user.pk, 'default', grace=0), 3)
+        self.assertEqual(shard_for_user(self.user.pk), 'default')
+        self.assertFalse(UserShard.objects.get(user=self.user).moving)
+        self.assertFalse(Note.objects.using('shard_1').exists())
+        for note in notes:
+            copy = Note.objects.using('default').get(pk=note.pk)
+            self.assertEqual(
+                (copy.title, copy.created_at, copy.updated_at),
+                (note.title, note.created_at, note.updated_at))
+        response = self.client.get(reverse('note_search'), {'q': 'Moved'})
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertEqual(
+            ChangeSequence.objects.using('default').get(user=self.user).last,
+            3)
+        self.assertFalse(ChangeSequence.objects.using('shard_1').exists())
+        response = self.client.get(reverse('note_sync'), {'since': '3'})
+        self.assertEqual(response.json()['notes'], [])
+        self.assertEqual(move_user(self.user.pk, 'default', grace=0), 0)
+        with self.assertRaises(ValueError):
+            move_user(self.user.pk, 'replica', grace=0)
+
+    def test_writes_refused_while_moving(self):
+        """
+        Tests that a moving user's writes get 503 while reads still work.
+        """
+
+        note = Note(title='Frozen', user=self.user)
+        note.save()
+        UserShard.objects.filter(user=self.user).update(moving=True)
+        cache.clear()
+        response = self.client.post(
+            reverse('update_position'), {'note_id': note.pk, 'x': 1, 'y': 1})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        response = self.client.get(reverse('note_list'))
+        self.assertContains(response, 'Frozen')
+
+    def test_rebalance_command(self):
+        """
+        Tests that rebalance_shards plans moves with --dry-run and evens out
+        the shards without it.
+        """
+
+        for username, count in (('big', 6), ('mid', 4), ('small', 2)):
+            user = User.objects.create_user(username=username, password='1')
+            UserShard.objects.create(user=user, shard='default')
+            Note.objects.bulk_create(
+                Note(title=f'{username} {i}', user=user)
+                for i in range(count))
+        out = StringIO()
+        call_command('rebalance_shards', '--dry-run', stdout=out)
+        self.assertIn('Would move big (6 notes) from default to shard_1.',
+                      out.getvalue())
+        self.assertEqual(Note.objects.using('default').count(), 12)
+        out = StringIO()
+        call_command('rebalance_shards', '--grace', '0', stdout=out)
+        self.assertIn('After: default 6 notes/2 users, shard_1 6 notes/1 '
+                      'users.', out.getvalue())
+        out = StringIO()
+        call_command(
+            'rebalance_shards', '--user', 'sharduser', '--to', 'default',
+            '--grace', '0', stdout=out)
+        self.assertEqual(shard_for_user(self.user.pk), 'default')
+        with self.assertRaises(CommandError):
+            call_command('rebalance_shards', '--user', 'sharduser')
+
+    def test_delete_user(self):
+        """
+        Tests that deleting a user deletes their notes on their shard.
+        """
+
+        Note(title='Gone', user=self.user).save()
+        self.user.delete()
+        self.assertFalse(Note.objects.using('shard_1').exists())
+
+    def test_router_allow_migrate(self):
+        """
+        Tests that shards only get the note tables.
+        """
+
+        router = NoteShardRouter()
+        self.assertTrue(
+            router.allow_migrate('shard_1', 'sticky_notes_app', 'note'))
+        self.assertTrue(router.allow_migrate(
+            'shard_1', 'sticky_notes_app', 'notetombstone'))
+        self.assertFalse(
+            router.allow_migrate('shard_1', 'sticky_notes_app', 'usershard'))
+        self.assertFalse(router.allow_migrate('shard_1', 'auth', 'user'))
+        self.assertIsNone(
+            router.allow_migrate('default', 'sticky_notes_app', 'note'))
+
+
+@override_settings(EVENT_STREAM_DURATION=0.05, EVENT_POLL_INTERVAL=0.01)
+class QueryBudgetTest(TestCase):
+    """
+    Tests the request measurements and the query budget of every URL.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User.
+
+    Methods:
+        setUp: Creates a logged-in user and clears the measurements.
+        assertWithinBudget: Asserts a response's queries fit its budget.
+        request_every_url: Requests every URL of the app.
+        test_every_url_has_budget: Tests that no URL lacks a budget.
+        test_budgets_regardless_of_note_count: Tests every URL's budget
+            with few and many notes.
+        test_over_budget_logged: Tests the over-budget warning.
+        test_repeated_work_allowed: Tests that export chunks and import
+            batches after the first are allowed on top of the budget.
+        test_async_views_measured: Tests measuring async views.
+        test_request_stats_view: Tests the development stats page.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user and clears the per-view totals.
+        """
+
+        cache.clear()
+        request_stats.reset()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='budgetuser',
+            password='12345'
+        )
+        self.client.login(username='budgetuser', password='12345')
+
+    def assertWithinBudget(self, response) -> int:
+        """
+        Asserts that a response's request ran no more queries than its
+        view's VIEW_QUERY_BUDGETS entry plus its allowance of unbudgeted
+        queries, consuming streaming content first.
+
+        Args:
+            response (HttpResponse): A test client response.
+
+        Returns:
+            int: The number of queries the request ran.
+        """
+
+        if response.streaming:
+            b''.join(response.streaming_content)
+        name = response.resolver_match.view_name
+        queries = response.request_stats.queries
+        self.assertLessEqual(
+            queries,
+            settings.VIEW_QUERY_BUDGETS[name]
+            + response.request_stats.allowance,
+            f'{name} ran {queries} queries.')
+        return queries
+
+    def request_every_url(self) -> dict:
+        """
+        Requests every URL of the app with each method it serves, checking
+        each against its budget.
+
+        Returns:
+            dict: The number of queries of each request, by description.
+        """
+
+        note = Note.objects.create(title='Budget', user=self.user)
+        form = {'title': 'Budget', 'content': 'Checked', 'color': '#ffffff',
+                'x_position': 1, 'y_position': 2}
+        batch = json.dumps([{'note_id': note.pk, 'x': 3, 'y': 4}])
+        detail = reverse('api_note_detail', args=[note.pk])
+        requests = [
+            ('note_list', 'get', reverse('note_list'), {}),
+            ('note_window', 'get', reverse('note_window'),
+             {'x_min': 0, 'x_max': 2000, 'y_min': 0, 'y_max': 1200}),
+            ('note_window uncached', 'get', reverse('note_window'),
+             {'x_min': 0, 'x_max': 900, 'y_min': 0, 'y_max': 900}),
+            ('note_create GET', 'get', reverse('note_create'), {}),
+            ('note_create', 'post', reverse('note_create'), form),
+            ('note_update GET', 'get',
+             reverse('note_update', args=[note.pk]), {}),
+            ('note_update', 'post',
+             reverse('note_update', args=[note.pk]), form),
+            ('update_position', 'post', reverse('update_position'),
+             {'note_id': note.pk, 'x': 1, 'y': 1}),
+            ('update_position batch', 'post', reverse('update_position'),
+             {'positions': batch}),
+            ('note_search', 'get', reverse('note_search'), {'q': 'budget'}),
+            ('note_sync', 'get', reverse('note_sync'), {'since': '0'}),
+            ('note_content', 'get',
+             reverse('note_content', args=[note.pk]), {}),
+            ('note_events', 'get', reverse('note_events'), {}),
+            ('note_export', 'get', reverse('note_export'), {}),
+            ('note_import', 'post', reverse('note_import'), {
+                'file': SimpleUploadedFile(
+                    'notes.ndjson',
+                    b'{"title": "Imported", "content": "Budget"}\n')}),
+            ('api_note_list', 'get', reverse('api_note_list'), {}),
+            ('api_note_detail', 'get', detail, {}),
+            ('metrics', 'get', reverse('metrics'), {}),
+            ('note_delete GET', 'get',
+             reverse('note_delete', args=[note.pk]), {}),
+            ('note_delete', 'post',
+             reverse('note_delete', args=[note.pk]), {}),
+            ('logout', 'post', reverse('logout'), {}),
+            ('login GET', 'get', reverse('login'), {}),
+            ('signup GET', 'get', reverse('signup'), {}),
+            ('signup', 'post', reverse('signup'), {
+                'username': f'signup{Note.objects.count()}',
+                'email': 'signup@example.com', 'password1': 'Budget-pass-1',
+                'password2': 'Budget-pass-1'}),
+            ('login', 'post', reverse('login'),
+             {'username': 'budgetuser', 'password': '12345'}),
+        ]
+        counts = {}
+        for label, method, path, data in requests:
+            response = getattr(self.client, method)(path, data)
+            self.assertLess(response.status_code, 400, label)
+            counts[label] = self.assertWithinBudget(response)
+        api_requests = [
+            ('api_note_list POST', 'post', reverse('api_note_list'),
+             {'title': 'Api', 'content': 'Created'}),
+            ('api_note_detail PATCH', 'patch', None, {'title': 'Patched'}),
+            ('api_note_detail DELETE', 'delete', None, None),
+        ]
+        for label, method, path, data in api_requests:
+            response = getattr(self.client, method)(
+                path or reverse('api_note_detail', args=[created]),
+                json.dumps(data), content_type='application/json')
+            self.assertLess(response.status_code, 400, label)
+            counts[label] = self.assertWithinBudget(response)
+            if method == 'post':
+                created = response.json()['id']
+        return counts
+
+    def test_every_url_has_budget(self):
+        """
+        Tests that every URL of the app has a query budget.
+        """
+
+        for pattern in urlpatterns:
+            self.assertIn(pattern.name, settings.VIEW_QUERY_BUDGETS)
+
+    def test_budgets_regardless_of_note_count(self):
+        """
+        Tests that every URL stays within its budget, with the same number
+        of queries, on a board of one note and on one of hundreds.
+        """
+
+        few = self.request_every_url()
+        Note.objects.bulk_create(
+            Note(title=f'Note {i}', content='Many', user=self.user)
+            for i in range(300))
+        cache.clear()
+        self.client = Client()
+        self.client.login(username='budgetuser', password='12345')
+        self.assertEqual(self.request_every_url(), few)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2, IMPORT_BATCH_SIZE=2)
+    def test_repeated_work_allowed(self):
+        """
+        Tests that exports and imports spanning several chunks or batches
+        run more queries than their view's budget without a warning, and
+        only their first chunk or batch counts against it.
+        """
+
+        content = ''.join(
+            f'{{"title": "N{i}", "content": "C"}}\n' for i in range(5))
+        with self.assertNoLogs('sticky_notes_app.requests', 'WARNING'):
+            response = self.client.post(reverse('note_import'), {
+                'file': SimpleUploadedFile('notes.ndjson', content.encode())})
+            imported = self.assertWithinBudget(response)
+            response = self.client.get(reverse('note_export'))
+            exported = self.assertWithinBudget(response)
+        budgets = settings.VIEW_QUERY_BUDGETS
+        self.assertGreater(imported, budgets['note_import'])
+        self.assertGreater(exported, budgets['note_export'])
+
+    def test_over_budget_logged(self):
+        """
+        Tests that a view running more queries than its budget is logged
+        as a warning, and every request at INFO level.
+        """
+
+        with override_settings(VIEW_QUERY_BUDGETS={'note_list': 1}):
+            with self.assertLogs(
+                    'sticky_notes_app.requests', 'INFO') as logs:
+                self.client.get(reverse('note_list'))
+        self.assertIn('GET note_list 200:', logs.output[0])
+        self.assertIn('over its budget of 1', logs.output[1])
+
+    async def test_async_views_measured(self):
+        """
+        Tests that the queries of async views, the API views among them,
+        are measured, including those run in worker threads, and fit their
+        budgets.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        note = await Note.objects.acreate(title='Measured', user=self.user)
+        for name, url in (
+                ('note_list', reverse('note_list')),
+                ('api_note_list', reverse('api_note_list')),
+                ('api_note_detail',
+                 reverse('api_note_detail', args=[note.pk]))):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertGreater(response.request_stats.queries, 0)
+            self.assertLessEqual(
+                response.request_stats.queries,
+                settings.VIEW_QUERY_BUDGETS[name])
+
+    def test_request_stats_view(self):
+        """
+        Tests that the development stats page lists the measured views,
+        and that it is only served when DEBUG is on.
+        """
+
+        self.client.get(reverse('note_list'))
+        self.client.get(reverse('note_list'))
+        with override_settings(DEBUG=True):
+            response = self.client.get(reverse('request_stats'))
+        stats = response.json()['views']['note_list']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(
+            stats['budget'], settings.VIEW_QUERY_BUDGETS['note_list'])
+        self.assertGreater(stats['ms'], 0)
+        response = self.client.get(reverse('request_stats'))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    FAST_AUTH=True,
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+)
+class FastAuthTest(TestCase):
+    """
+    Tests the cached sessions and users of FAST_AUTH.
+    SESSION_ENGINE is overridden along with FAST_AUTH, since settings.py
+    only derives it from the flag when the settings load.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User.
+        note (Note): A note of the user.
+
+    Methods:
+        setUp: Creates a logged-in user with a note.
+        move: Moves the note and returns the request's queries.
+        test_fewer_queries: Tests that authenticated requests skip the
+            session and user queries.
+        test_user_saved: Tests that saving a user drops the cached copy.
+        test_logout: Tests that logging out drops the cached user.
+        test_async: Tests the cached user under ASGI.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user with a note.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='fastuser',
+            password='12345'
+        )
+        self.client.login(username='fastuser', password='12345')
+        self.note = Note.objects.create(title='Fast', user=self.user)
+
+    def move(self) -> int:
+        """
+        Moves the note with update_position.
+
+        Returns:
+            int: The number of queries the request ran.
+        """
+
+        response = self.client.post(
+            reverse('update_position'),
+            {'note_id': self.note.pk, 'x': 10, 'y': 20})
+        self.assertEqual(response.status_code, 200)
+        return response.request_stats.queries
+
+    def test_fewer_queries(self):
+        """
+        Tests that once the session and user are cached, an authenticated
+        request runs two queries fewer than without FAST_AUTH.
+        """
+
+        self.move()
+        fast = self.move()
+        with override_settings(
+                FAST_AUTH=False,
+                SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            self.client = Client()
+            self.client.login(username='fastuser', password='12345')
+            self.move()
+            slow = self.move()
+        self.assertEqual(fast, slow - 2)
+
+    def test_user_saved(self):
+        """
+        Tests that a password change reaches the next request, whose
+        session then no longer authenticates.
+        """
+
+        self.client.get(reverse('note_list'))
+        self.user.set_password('changed')
+        self.user.save()
+        response = self.client.get(reverse('note_list'))
+        self.assertRedirects(
+            response, f"{reverse('login')}?next={reverse('note_list')}")
+
+    def test_logout(self):
+        """
+        Tests that logging out drops the user from the cache.
+        """
+
+        self.client.get(reverse('note_list'))
+        self.assertIsNotNone(cache.get(f'auth:user:{self.user.pk}'))
+        self.client.post(reverse('logout'))
+        self.assertIsNone(cache.get(f'auth:user:{self.user.pk}'))
+
+    async def test_async(self):
+        """
+        Tests that async views get the cached user too.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('note_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(await cache.aget(f'auth:user:{self.user.pk}'))
+        response = await self.async_client.get(reverse('note_list'))
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(
+    AUTH_THROTTLE_IP_BURST=2,
+    AUTH_THROTTLE_USERNAME_BURST=2,
+)
+class AuthLoadTest(TestCase):
+    """
+    Tests the hashing pool and the throttling of login and signup.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A test User.
+
+    Methods:
+        setUp: Creates a user.
+        login: Posts the login form.
+        test_login_throttled_per_ip: Tests the per-IP login limit.
+        test_login_throttled_per_username: Tests the per-username limit.
+        test_signup_throttled: Tests the per-IP signup limit.
+        test_hashing_on_pool: Tests that passwords are checked on the pool.
+        test_pool_busy: Tests the pool's bound and the 503 it causes.
+        test_password_upgraded: Tests rehashing outdated passwords.
+    """
+
+    def setUp(self):
+        """
+        Sets up a test user.
+        """
+
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='authuser',
+            password='12345'
+        )
+
+    def login(self, username: str = 'authuser', password: str = 'wrong',
+              address: str = '127.0.0.1'):
+        """
+        Posts the login form from an address.
+
+        Returns:
+            HttpResponse: The response.
+        """
+
+        return self.client.post(
+            reverse('login'), {'username': username, 'password': password},
+            REMOTE_ADDR=address)
+
+    def test_login_throttled_per_ip(self):
+        """
+        Tests that an address gets a 429 with Retry-After once it has used
+        its burst of attempts, whatever the usernames tried.
+        """
+
+        self.assertEqual(self.login('first').status_code, 200)
+        self.assertEqual(self.login('second').status_code, 200)
+        response = self.login('authuser', '12345')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(
+            self.login('authuser', '12345', '10.0.0.2').status_code, 302)
+
+    def test_login_throttled_per_username(self):
+        """
+        Tests that a username is throttled across addresses.
+        """
+
+        self.assertEqual(self.login(address='10.0.0.1').status_code, 200)
+        self.assertEqual(self.login(address='10.0.0.2').status_code, 200)
+        self.assertEqual(
+            self.login('AuthUser', address='10.0.0.3').status_code, 429)
+        self.assertEqual(
+            self.login('other', address='10.0.0.3').status_code, 200)
+
+    def test_signup_throttled(self):
+        """
+        Tests that signups are throttled per address, without creating
+        users.
+        """
+
+        for i in range(3):
+            response = self.client.post(reverse('signup'), {
+                'username': f'newcomer{i}', 'email': 'new@example.com',
+                'password1': 'Throttle-pass-1',
+                'password2': 'Throttle-pass-1'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(User.objects.filter(
+            username__startswith='newcomer').count(), 2)
+
+    def test_hashing_on_pool(self):
+        """
+        Tests that logins and signups hash on the pool's threads.
+        """
+
+        threads = []
+
+        def verify(password, encoded):
+            threads.append(threading.current_thread().name)
+            return original(password, encoded)
+
+        from django.contrib.auth.hashers import verify_password as original
+        with mock.patch('sticky_notes_app.auth_backends.verify_password',
+                        verify):
+            response = self.login(password='12345')
+        self.assertRedirects(response, reverse('note_list'))
+        self.assertTrue(threads[0].startswith('hashing'))
+        with override_settings(HASHING_POOL_ENABLED=False):
+            self.client.logout()
+            with mock.patch(
+                    'sticky_notes_app.auth_backends.verify_password', verify):
+                self.login(password='12345', address='10.0.0.2')
+        self.assertEqual(threads[1], threading.current_thread().name)
+
+    def test_pool_busy(self):
+        """
+        Tests that a full pool refuses work instead of queueing it, and
+        that login then answers 503.
+        """
+
+        pool = HashingPool(workers=1, backlog=0)
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        runner = threading.Thread(target=pool.run, args=(block,))
+        runner.start()
+        started.wait(5)
+        with self.assertRaises(HashingBusy):
+            pool.run(len, 'x')
+        release.set()
+        runner.join()
+        self.assertEqual(pool.run(len, 'x'), 1)
+        with mock.patch('sticky_notes_app.auth_backends.run_hashing',
+                        side_effect=HashingBusy):
+            response = self.login(password='12345')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_password_upgraded(self):
+        """
+        Tests that a password stored with an outdated hasher is rehashed
+        with the preferred one on login.
+        """
+
+        User.objects.filter(pk=self.user.pk).update(
+            password=make_password('12345', hasher='md5'))
+        self.assertEqual(self.login(password='12345').status_code, 302)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+
+
+class MetricsTest(TestCase):
+    """
+    Tests the Prometheus metrics and the Server-Timing header.
+
+    Attributes:
+        client (Client): A Django test client instance for simulating HTTP
+            requests.
+        user (User): A logged-in test User.
+        metrics_dir (TemporaryDirectory): The shared metrics directory.
+
+    Methods:
+        setUp: Creates a logged-in user and an empty metrics directory.
+        scrape: Returns the metrics exposition as lines.
+        test_request_metrics: Tests the request counters and histograms.
+        test_processes_added_up: Tests adding up other processes' metrics.
+        test_positions_and_board_cache: Tests the position and cache
+            metrics.
+        test_restricted: Tests that only allowed addresses get metrics.
+        test_server_timing: Tests the Server-Timing header.
+    """
+
+    def setUp(self):
+        """
+        Sets up a logged-in test user, an empty metrics directory and
+        cleared metrics.
+        """
+
+        cache.clear()
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.metrics_dir.cleanup)
+        settings_override = override_settings(
+            METRICS_DIR=self.metrics_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        metrics.registry.reset()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='metricsuser',
+            password='12345'
+        )
+        self.client.login(username='metricsuser', password='12345')
+
+    def scrape(self) -> list:
+        """
+        Requests /metrics and returns its lines.
+
+        Returns:
+            list: The lines of the exposition.
+        """
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        return response.content.decode().splitlines()
+
+    def test_request_metrics(self):
+        """
+        Tests that requests are counted by view, method and status, and
+        their durations recorded in cumulative histogram buckets.
+        """
+
+        self.client.get(reverse('note_list'))
+        self.client.get(reverse('note_list'))
+        self.client.get(reverse('note_update', args=[999]))
+        lines = self.scrape()
+        self.assertIn(
+            'sticky_notes_requests_total'
+            '{view="note_list",method="GET",status="200"} 2', lines)
+        self.assertIn(
+            'sticky_notes_requests_total'
+            '{view="note_update",method="GET",status="404"} 1', lines)
+        self.assertIn('# TYPE sticky_notes_request_duration_seconds histogram',
+                      lines)
+        self.assertIn(
+            'sticky_notes_request_duration_seconds_bucket'
+            '{view="note_list",le="+Inf"} 2', lines)
+        self.assertIn(
+            'sticky_notes_request_duration_seconds_count{view="note_list"} 2',
+            lines)
+        buckets = [
+            int(line.rsplit(' ', 1)[1]) for line in lines
+            if line.startswith('sticky_notes_db_duration_seconds_bucket'
+                               '{view="note_list"')]
+        self.assertEqual(len(buckets), len(metrics.LATENCY_BUCKETS) + 1)
+        self.assertEqual(buckets, sorted(buckets))
+
+    def test_processes_added_up(self):
+        """
+        Tests that the snapshots other running worker processes flushed to
+        METRICS_DIR are added to this process's values, and those of
+        exited processes deleted.
+        """
+
+        self.client.get(reverse('note_list'))
+        other = metrics.MetricsRegistry()
+        other.inc('sticky_notes_requests_total', 3, view='note_list',
+                  method='GET', status=200)
+        other.observe('sticky_notes_request_duration_seconds', 0.2,
+                      view='note_list')
+        # Written as the parent process, which is still running
+        with mock.patch('os.getpid', return_value=os.getppid()):
+            other.flush()
+        with open(os.path.join(self.metrics_dir.name, '999999999.json'),
+                  'w') as file:
+            file.write('{}')
+        lines = self.scrape()
+        self.assertIn(
+            'sticky_notes_requests_total'
+            '{view="note_list",method="GET",status="200"} 4', lines)
+        self.assertIn(
+            'sticky_notes_request_duration_seconds_count{view="note_list"} 2',
+            lines)
+        metrics.registry.flush()
+        self.assertEqual(
+            sorted(os.listdir(self.metrics_dir.name)),
+            sorted([f'{os.getpid()}.json', f'{os.getppid()}.json']))
+
+    @override_settings(BOARD_CACHE_ENABLED=True)
+    def test_positions_and_board_cache(self):
+        """
+        Tests that saved positions are counted, and the board cache
+        lookups and hit ratio exported.
+        """
+
+        note = Note.objects.create(title='Metrics', user=self.user)
+        self.client.post(reverse('update_position'),
+                         {'note_id': note.pk, 'x': 5, 'y': 6})
+        self.client.get(reverse('note_window'), {
+            'x_min': 0, 'x_max': 900, 'y_min': 0, 'y_max': 900})
+        self.client.get(reverse('note_window'), {
+            'x_min': 0, 'x_max': 900, 'y_min': 0, 'y_max': 900})
+        lines = self.scrape()
+        self.assertIn(
+            'sticky_notes_positions_saved_total{mode="direct"} 1', lines)
+        self.assertIn(
+            'sticky_notes_board_cache_lookups_total{result="hits"} 1', lines)
+        self.assertIn(
+            'sticky_notes_board_cache_lookups_total{result="misses"} 1',
+            lines)
+        self.assertIn('sticky_notes_board_cache_hit_ratio 0.5', lines)
+
+    def test_restricted(self):
+        """
+        Tests that metrics are only served to METRICS_ALLOWED_IPS and
+        while METRICS_ENABLED is on.
+        """
+
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 404)
+        with override_settings(METRICS_ENABLED=False):
+            response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_server_timing(self):
+        """
+        Tests that responses carry their db, render and total times in a
+        Server-Timing header, unless SERVER_TIMING_ENABLED is off.
+        """
+
+        response = self.client.get(reverse('note_list'))
+        timings = dict(
+            entry.split(';dur=')
+            for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(list(timings), ['db', 'render', 'total'])
+        self.assertGreater(float(timings['render']), 0)
+        self.assertGreaterEqual(
+            float(timings['total']),
+            float(timings['db']) + float(timings['render']))
+        self.assertGreater(response.request_stats.render_time, 0)
+        with override_settings(SERVER_TIMING_ENABLED=False):
+            response = self.client.get(reverse('note_list'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class StaticAssetsTest(SimpleTestCase):
+    """
+    Tests the hashed, precompressed static files and how they are served.
+
+    Attributes:
+        static_root (TemporaryDirectory): The STATIC_ROOT collected into.
+        manifest (dict): The collected names, by original name.
+
+    Methods:
+        setUp: Collects the static files into a temporary STATIC_ROOT.
+        get: Requests a collected file.
+        test_collected: Tests the hashed names and gzip siblings.
+        test_precompressed: Tests serving the gzip variant.
+        test_revalidated: Tests the headers and 304 of unhashed names.
+        test_missing: Tests unknown and escaping paths.
+        test_vendor_assets: Tests loading vendored and CDN assets.
+        test_no_third_party_requests: Tests that pages load every asset
+            from the site.
+    """
+
+    def setUp(self):
+        """
+        Collects the static files into a temporary STATIC_ROOT.
+        """
+
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+        settings_override = override_settings(
+            STATIC_ROOT=self.static_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', '--noinput', verbosity=0)
+        with open(os.path.join(
+                self.static_root.name, 'staticfiles.json')) as file:
+            self.manifest = json.load(file)['paths']
+
+    def get(self, name: str, **headers):
+        """
+        Requests a collected file by its name in STATIC_ROOT.
+
+        Returns:
+            HttpResponse: The response.
+        """
+
+        return self.client.get(f'{settings.STATIC_URL}{name}', **headers)
+
+    def test_collected(self):
+        """
+        Tests that collected files get hashed names and that text files get
+        a gzip sibling with the same content, but not images.
+        """
+
+        hashed = self.manifest[
+            'sticky_notes_app/vendor/jquery-ui/jquery-ui-1.13.2.min.css']
+        self.assertRegex(
+            hashed, r'^sticky_notes_app/vendor/jquery-ui/'
+                    r'jquery-ui-1\.13\.2\.min\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.static_root.name, hashed)
+        with open(path, 'rb') as file, open(f'{path}.gz', 'rb') as packed:
+            self.assertEqual(gzip.decompress(packed.read()), file.read())
+        image = self.manifest[
+            'sticky_notes_app/vendor/jquery-ui/images/'
+            'ui-icons_444444_256x240.png']
+        self.assertFalse(os.path.exists(
+            os.path.join(self.static_root.name, f'{image}.gz')))
+
+    def test_precompressed(self):
+        """
+        Tests that hashed files are sent gzipped to clients accepting it,
+        and cached as immutable.
+        """
+
+        hashed = self.manifest['sticky_notes_app/vendor/jquery/'
+                               'jquery-3.7.1.min.js']
+        with open(os.path.join(self.static_root.name, hashed), 'rb') as file:
+            original = file.read()
+        response = self.get(hashed, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertEqual(
+            response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = b''.join(response.streaming_content)
+        self.assertLess(len(body), len(original))
+        self.assertEqual(gzip.decompress(body), original)
+        response = self.get(hashed, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b''.join(response.streaming_content), original)
+
+    def test_revalidated(self):
+        """
+        Tests that files under their original names must be revalidated,
+        and get a 304 while unchanged.
+        """
+
+        response = self.get('sticky_notes_app/style.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=0')
+        response = self.get(
+            'sticky_notes_app/style.css',
+            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('ETag', response)
+
+    def test_missing(self):
+        """
+        Tests that unknown files and paths outside STATIC_ROOT give a 404.
+        """
+
+        self.assertEqual(self.get('missing.css').status_code, 404)
+        self.assertEqual(self.get('../manage.py').status_code, 404)
+
+    def test_vendor_assets(self):
+        """
+        Tests that vendored assets load from the site, and that an asset
+        not vendored yet loads from its CDN with its integrity hash.
+        """
+
+        template = Template(
+            "{% load vendor_assets %}{% vendor_asset 'jquery.js' %}"
+            "{% vendor_asset 'jquery-ui.css' %}")
+        html = template.render(Context())
+        jquery = self.manifest[
+            'sticky_notes_app/vendor/jquery/jquery-3.7.1.min.js']
+        self.assertIn(
+            f'<script src="{settings.STATIC_URL}{jquery}"></script>', html)
+        self.assertIn('<link rel="stylesheet" href="/static/', html)
+        self.assertNotIn('https://', html)
+        assets = dict(settings.VENDOR_ASSETS)
+        assets['jquery.js'] = ('sticky_notes_app/vendor/missing.js',
+                               'https://cdn.example.com/jquery.js',
+                               'sha384-abc')
+        with override_settings(VENDOR_ASSETS=assets):
+            html = template.render(Context())
+        self.assertIn(
+            '<script src="https://cdn.example.com/jquery.js" '
+            'integrity="sha384-abc" crossorigin="anonymous"></script>', html)
+
+    def test_no_third_party_requests(self):
+        """
+        Tests that every asset of VENDOR_ASSETS is vendored, with a gzip
+        sibling once collected, so pages load nothing from a CDN.
+        """
+
+        for path, url, integrity in settings.VENDOR_ASSETS.values():
+            hashed = self.manifest[path]
+            self.assertTrue(os.path.exists(
+                os.path.join(self.static_root.name, f'{hashed}.gz')))
+        response = self.client.get(reverse('login'))
+        self.assertContains(response, 'vendor/bootstrap/bootstrap-5.3.2')
+        self.assertNotContains(response, 'https://')
+
+
+class UrlTest(SimpleTestCase):
+    """
+    Tests the URL patterns of the sticky notes application.
+    Verifies that each URL name in the application's URL configuration resolves
+    to the correct view function, ensuring proper routing. Uses Django's
+    SimpleTestCase for lightweight testing without database setup.
+
+    Methods:
+        test_note_list_url: Tests the 'note_list' URL resolution.
+        test_note_create_url: Tests the 'note_create' URL resolution.
+        test_note_update_url: Tests the 'note_update' URL resolution with a pk.
+        test_note_delete_url: Tests the 'note_delete' URL resolution with a pk.
+        test_update_position_url: Tests the 'update_position' URL resolution.
+        test_note_window_url: Tests the 'note_window' URL resolution.
+        test_note_sync_url: Tests the 'note_sync' URL resolution.
+        test_note_content_url: Tests the 'note_content' URL resolution.
+        test_note_export_url: Tests the 'note_export' URL resolution.
+        test_note_import_url: Tests the 'note_import' URL resolution.
+        test_note_search_url: Tests the 'note_search' URL resolution.
+        test_note_events_url: Tests the 'note_events' URL resolution.
+        test_api_note_list_url: Tests the 'api_note_list' URL resolution.
+        test_api_note_detail_url: Tests the 'api_note_detail' URL resolution.
+        test_signup_url: Tests the 'signup' URL resolution.
+        test_login_url: Tests the 'login' URL resolution.
+        test_logout_url: Tests the 'logout' URL resolution.
+        test_request_stats_url: Tests the 'request_stats' URL resolution.
+        test_metrics_url: Tests the 'metrics' URL resolution.
+        test_async_urls: Tests the URL resolution under ASGI.
+    """
+
+    def test_note_list_url(self):
+        """
+        Tests the resolution of the 'note_list' URL.
+        Generates the URL for 'note_list' and verifies that it resolves to the
+        note_list view function.
+        """
+
+        url = reverse('note_list')
+        self.assertEqual(resolve(url).func, note_list)
+
+    def test_note_create_url(self):
+        """
+        Tests the resolution of the 'note_create' URL.
+        Generates the URL for 'note_create' and checks that it resolves to the
+        note_create view function.
+        """
+
+        url = reverse('note_create')
+        self.assertEqual(resolve(url).func, note_create)
+
+    def test_note_update_url(self):
+        """
+        Tests the resolution of the 'note_update' URL with a primary key.
+        Generates the URL for 'note_update' with a sample pk and verifies that
+        it resolves to the note_update view function.
+        """
+
+        url = reverse('note_update', args=[1])
+        self.assertEqual(resolve(url).func, note_update)
+
+    def test_note_delete_url(self):
+        """
+        Tests the resolution of the 'note_delete' URL with a primary key.
+        Generates the URL for 'note_delete' with a sample pk and checks that it
+        resolves to the note_delete view function.
+        """
+
+        url = reverse('note_delete', args=[1])
+        self.assertEqual(resolve(url).func, note_delete)
+
+    def test_update_position_url(self):
+        """
+        Tests the resolution of the 'update_position' URL.
+        Generates the URL for 'update_position' and verifies that it resolves
+        to the update_position view function.
+        """
+
+        url = reverse('update_position')
+        self.assertEqual(resolve(url).func, update_position)
+
+    def test_note_window_url(self):
+        """
+        Tests the resolution of the 'note_window' URL.
+        Generates the URL for 'note_window' and verifies that it resolves to
+        the note_window view function.
+        """
+
+        url = reverse('note_window')
+        self.assertEqual(resolve(url).func, note_window)
+
+    def test_note_sync_url(self):
+        """
+        Tests the resolution of the 'note_sync' URL.
+        Generates the URL for 'note_sync' and verifies that it resolves to
+        the note_sync view function.
+        """
+
+        url = reverse('note_sync')
+        self.assertEqual(resolve(url).func, note_sync)
+
+    def test_note_content_url(self):
+        """
+        Tests the resolution of the 'note_content' URL.
+        Generates the URL for 'note_content' with a note ID and verifies that
+        it resolves to the note_content view function.
+        """
+
+        url = reverse('note_content', args=[1])
+        self.assertEqual(resolve(url).func, note_content)
+
+    def test_note_export_url(self):
+        """
+        Tests the resolution of the 'note_export' URL.
+        Generates the URL for 'note_export' and verifies that it resolves to
+        the note_export view function.
+        """
+
+        url = reverse('note_export')
+        self.assertEqual(resolve(url).func, note_export)
+
+    def test_note_import_url(self):
+        """
+        Tests the resolution of the 'note_import' URL.
+        Generates the URL for 'note_import' and verifies that it resolves to
+        the note_import view function.
+        """
+
+        url = reverse('note_import')
+        self.assertEqual(resolve(url).func, note_import)
+
+    def test_note_search_url(self):
+        """
+        Tests the resolution of the 'note_search' URL.
+        Generates the URL for 'note_search' and verifies that it resolves to
+        the note_search view function.
+        """
+
+        url = reverse('note_search')
+        self.assertEqual(resolve(url).func, note_search)
+
+    def test_note_events_url(self):
+        """
+        Tests the resolution of the 'note_events' URL.
+        Generates the URL for 'note_events' and verifies that it resolves to
+        the note_events view function.
+        """
+
+        url = reverse('note_events')
+        self.assertEqual(resolve(url).func, note_events)
+
+    def test_api_note_list_url(self):
+        """
+        Tests the resolution of the 'api_note_list' URL.
+        Generates the URL for 'api_note_list' and verifies that it resolves to
+        the api_note_list view function.
+        """
+
+        url = reverse('api_note_list')
+        self.assertEqual(resolve(url).func, api_note_list)
+
+    def test_api_note_detail_url(self):
+        """
+        Tests the resolution of the 'api_note_detail' URL with a primary key.
+        Generates the URL for 'api_note_detail' with a sample pk and verifies
+        that it resolves to the api_note_detail view function.
+        """
+
+        url = reverse('api_note_detail', args=[1])
+        self.assertEqual(resolve(url).func, api_note_detail)
+
+    def test_signup_url(self):
+        """
+        Tests the resolution of the 'signup' URL.
+        Generates the URL for 'signup' and checks that it resolves to the
+        signup view function.
+        """
+
+        url = reverse('signup')
+        self.assertEqual(resolve(url).func, signup)
+
+    def test_login_url(self):
+        """
+        Tests the resolution of the 'login' URL.
+        Generates the URL for 'login' and verifies that it resolves to the
+        login_view function.
+        """
+
+        url = reverse('login')
+        self.assertEqual(resolve(url).func, login_view)
+
+    def test_logout_url(self):
+        """
+        Tests the resolution of the 'logout' URL.
+        Generates the URL for 'logout' and checks that it resolves to the
+        logout_view function.
+        """
+
+        url = reverse('logout')
+        self.assertEqual(resolve(url).func, logout_view)
+
+    def test_request_stats_url(self):
+        """
+        Tests the resolution of the 'request_stats' URL.
+        Generates the URL for 'request_stats' and checks that it resolves to
+        the request_stats view function.
+        """
+
+        url = reverse('request_stats')
+        self.assertEqual(resolve(url).func, request_stats_view)
+
+    def test_metrics_url(self):
+        """
+        Tests the resolution of the 'metrics' URL.
+        Generates the URL for 'metrics' and checks that it resolves to the
+        metrics view function, at /metrics.
+        """
+
+        url = reverse('metrics')
+        self.assertEqual(url, '/metrics')
+        self.assertEqual(resolve(url).func, metrics_view)
+
+    def test_async_urls(self):
+        """
+        Tests the resolution of URLs with the ASGI URL configuration.
+        Verifies that the board, export and API views resolve to their async
+        versions and that every other URL resolves to the same view as under
+        WSGI.
+        """
+
+        urlconf = 'sticky_notes.async_urls'
+        self.assertEqual(
+            resolve(reverse('note_list'), urlconf).func,
+            async_views.note_list)
+        self.assertEqual(
+            resolve(reverse('note_window'), urlconf).func,
+            async_views.note_window)
+        self.assertEqual(
+            resolve(reverse('update_position'), urlconf).func,
+            async_views.update_position)
+        self.assertEqual(
+            resolve(reverse('note_events'), urlconf).func,
+            async_views.note_events)
+        self.assertEqual(
+            resolve(reverse('note_export'), urlconf).func,
+            async_views.note_export)
+        self.assertEqual(
+            resolve(reverse('api_note_list'), urlconf).func,
+            async_views.api_note_list)
+        self.assertEqual(
+            resolve(reverse('api_note_detail', args=[1]), urlconf).func,
+            async_views.api_note_detail)
+        self.assertEqual(
+            resolve(reverse('note_create'), urlconf).func, note_create)
@@ -0,0 +1,76 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _bucket_key(scope: str, value: str) -> str:
+    """
+    Returns the cache key of a token bucket, with the value hashed so any
+    username makes a valid key.
+    """
+
+    digest = hashlib.sha256(value.encode()).hexdigest()
+    return f'throttle:{scope}:{digest}'
+
+
+def take_token(scope: str, value: str, burst: int, rate: float) -> float:
+    """
+    Takes a token from a cache-backed token bucket. Each bucket holds at
+    most `burst` tokens and gains `rate` tokens per second. The read and
+    write are not atomic, so concurrent requests may occasionally both get
+    the last token, which is fine for throttling. The bucket is only
+    shared between processes when the default cache is (see
+    checks.check_auth_throttle_cache); with a per-process cache each
+    process allows the full burst and rate.
+
+    Args:
+        scope (str): What the bucket limits, e.g. 'login:ip'.
+        value (str): Whose bucket it is, e.g. an IP address.
+        burst (int): The capacity of the bucket.
+        rate (float): Tokens added per second.
+
+    Returns:
+        float: 0 if a token was taken, or else the seconds until one will
+            be available.
+    """
+
+    key = _bucket_key(scope, value)
+    now = time.time()
+    tokens, updated = cache.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    # Full again once every token is back
+    cache.set(key, (tokens - 1, now), int((burst - tokens + 1) / rate) + 1)
+    return 0
+
+
+def throttle_auth(request, scope: str, username: str = None) -> float:
+    """
+    Takes a token from the client IP's bucket of an authentication view
+    and, when a username is given, from that username's bucket, while
+    AUTH_THROTTLE_ENABLED is on. The username's token is only taken once
+    the IP's was.
+
+    Args:
+        request (HttpRequest): The request being throttled.
+        scope (str): The view, 'login' or 'signup'.
+        username (str): The username tried, if any.
+
+    Returns:
+        float: 0 if the request may go ahead, or else the seconds to wait.
+    """
+
+    if not settings.AUTH_THROTTLE_ENABLED:
+        return 0
+    wait = take_token(
+        f'{scope}:ip', request.META.get('REMOTE_ADDR', ''),
+        settings.AUTH_THROTTLE_IP_BURST, settings.AUTH_THROTTLE_IP_RATE)
+    if wait or not username:
+        return wait
+    return take_token(
+        f'{scope}:user', username.lower(),
+        settings.AUTH_THROTTLE_USERNAME_BURST,
+        settings.AUTH_THROTTLE_USERNAME_RATE)
@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from . import api
 
 urlpatterns = [
 
@@ -8,7 +9,21 @@ urlpatterns = [
     path('update/<int:pk>/', views.note_update, name='note_update'),
     path('delete/<int:pk>/', views.note_delete, name='note_delete'),
     path('update-position/', views.update_position, name='update_position'),
+    path('window/', views.note_window, name='note_window'),
+    path('content/<int:pk>/', views.note_content, name='note_content'),
+    path('sync/', views.note_sync, name='note_sync'),
+    path('search/', views.note_search, name='note_search'),
+    path('events/', views.note_events, name='note_events'),
+    path('export/', views.note_export, name='note_export'),
+    path('import/', views.note_import, name='note_import'),
     path('signup/', views.signup, name='signup'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
+    path('dev/request-stats/', views.request_stats, name='request_stats'),
+    path('metrics', views.metrics, name='metrics'),
+
+    # Versioned JSON API
+    path('api/v1/notes/', api.api_note_list, name='api_note_list'),
+    path('api/v1/notes/<int:pk>/', api.api_note_detail,
+         name='api_note_detail'),
 ]
@@ -6,29 +6,378 @@ from .forms import UserRegistrationForm
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import login, logout
 from django.contrib import messages
-from django.http import JsonResponse
-from django.http import HttpResponse, HttpRequest
+from django.http import JsonResponse, Http404
+from django.http import HttpResponse, HttpRequest, StreamingHttpResponse
+from django.conf import settings
+from django.views.decorators.cache import cache_control
+from django.core.serializers.json import DjangoJSONEncoder
+from . import board_cache
+from .export import export_notes, EXPORT_FORMATS
+from .importer import iter_records, import_notes
+from .search import search_notes
+from .sync import StaleToken, changes_since, parse_token, sync_supported
+from .request_stats import summary as stats_summary
+from . import metrics as metrics_store
+from .events import iter_event_stream, parse_last_event_id
+from .routers import read_from_replica
+from .writer import run_write
+from .hashing import HashingBusy, run_hashing
+from .throttle import throttle_auth
+from .conditional import (
+    board_condition, board_page_condition, board_state, note_condition)
+from .positions import (
+    parse_position, parse_position_batch, save_positions, get_position_buffer)
+import csv
+import json
+import math
+
+# Fields sent to the client for each note card in a board window. Cards
+# show the stored preview; the content is fetched from note_content when a
+# card is expanded, so boards never read or send the notes' bodies.
+WINDOW_FIELDS = (
+    'id', 'title', 'preview', 'color', 'x_position', 'y_position',
+    'updated_at',
+)
+
+# Characters escaped in board JSON so it can be embedded in a <script> tag
+# unchanged, as the json_script template filter does.
+JSON_SCRIPT_ESCAPES = {
+    ord('>'): '\\u003E',
+    ord('<'): '\\u003C',
+    ord('&'): '\\u0026',
+}
+
+# Accepted range for the zoom level reported by the client.
+MIN_ZOOM = 0.1
+MAX_ZOOM = 4.0
+
+
+def _parse_window(params) -> dict:
+    """
+    Parses and validates a board viewport rectangle from query parameters.
+    Expects integer 'x_min', 'x_max', 'y_min' and 'y_max' board coordinates
+    and an optional float 'zoom' (defaults to 1).
+
+    Args:
+        params (QueryDict): The request's GET parameters.
+
+    Returns:
+        dict: The validated rectangle with 'x_min', 'x_max', 'y_min', 'y_max'
+            and 'zoom' keys.
+
+    Raises:
+        ValueError: If a coordinate is missing or not an integer, the
+            rectangle is inverted, or the zoom is out of range.
+    """
+
+    window = {
+        key: int(params[key])
+        for key in ('x_min', 'x_max', 'y_min', 'y_max')
+        if key in params
+    }
+    if len(window) != 4:
+        raise ValueError('x_min, x_max, y_min and y_max are required.')
+    if window['x_min'] > window['x_max'] or window['y_min'] > window['y_max']:
+        raise ValueError('The viewport rectangle is inverted.')
+    window['zoom'] = float(params.get('zoom', 1))
+    if not MIN_ZOOM <= window['zoom'] <= MAX_ZOOM:
+        raise ValueError('zoom is out of range.')
+    return window
+
+
+def _notes_in_window(user, window: dict, token: int) -> dict:
+    """
+    Returns the user's notes that overlap a board viewport rectangle.
+    The rectangle is widened to the left and top by the card size so cards
+    that start outside the viewport but reach into it are included. The query
+    is served by the (user, x_position, y_position) index and is capped at
+    NOTE_WINDOW_MAX_NOTES rows, so its cost depends on the viewport and not
+    on the size of the board. Content is omitted when zoomed out too far for
+    it to be readable. With POSITION_WRITE_BEHIND enabled, positions not yet
+    flushed to the database are merged in.
+
+    Args:
+        user (User): The owner of the notes.
+        window (dict): A validated rectangle as returned by _parse_window.
+        token (int): The board's sync token, read before the window.
+
+    Returns:
+        dict: A JSON-serializable payload with the 'window' requested, the
+            list of 'notes' as dictionaries, a 'truncated' flag set when
+            more notes matched than the cap allows, and the sync 'token'
+            of the board the window was read from.
+    """
+
+    notes, window_query, bounds = _window_query(user, window)
+    window_notes = list(window_query)
+    if settings.POSITION_WRITE_BEHIND:
+        window_notes = _merge_pending_positions(
+            user, notes, window_notes, bounds)
+    return _window_payload(window, window_notes, token)
+
+
+def _window_query(user, window: dict) -> tuple:
+    """
+    Builds the query of the notes overlapping a board viewport rectangle,
+    shared by the sync and async views.
+
+    Args:
+        user (User): The owner of the notes.
+        window (dict): A validated rectangle as returned by _parse_window.
+
+    Returns:
+        tuple: The user's notes as dictionaries of window fields, the capped
+            query of the window's notes, and the position bounds.
+    """
+
+    fields = WINDOW_FIELDS
+    if window['zoom'] < settings.NOTE_WINDOW_DETAIL_ZOOM:
+        fields = tuple(field for field in fields if field != 'preview')
+    bounds = _window_bounds(window)
+    notes = Note.objects.filter(user=user).values(*fields)
+    window_query = notes.filter(
+        x_position__gte=bounds[0],
+        x_position__lte=bounds[1],
+        y_position__gte=bounds[2],
+        y_position__lte=bounds[3],
+    ).order_by('x_position', 'y_position')[
+        :settings.NOTE_WINDOW_MAX_NOTES + 1]
+    return notes, window_query, bounds
+
+
+def _window_payload(window: dict, window_notes: list, token: int) -> dict:
+    """
+    Builds the payload of a board window from the notes found in it.
+
+    Args:
+        window (dict): The validated rectangle.
+        window_notes (list): The window's notes, at most one more than
+            NOTE_WINDOW_MAX_NOTES.
+        token (int): The owner's latest change before the window was read.
+
+    Returns:
+        dict: The 'window', its 'notes', the 'truncated' flag and the sync
+            'token'.
+    """
+
+    limit = settings.NOTE_WINDOW_MAX_NOTES
+    return {
+        'window': window,
+        'notes': window_notes[:limit],
+        'truncated': len(window_notes) > limit,
+        'token': str(token),
+    }
+
+
+def _window_bounds(window: dict) -> tuple:
+    """
+    Returns the range of note positions that overlap a viewport rectangle,
+    widened to the left and top by the card size.
+
+    Args:
+        window (dict): A validated rectangle as returned by _parse_window.
+
+    Returns:
+        tuple: The (x_min, x_max, y_min, y_max) bounds of note positions.
+    """
+
+    return (
+        window['x_min'] - settings.NOTE_CARD_WIDTH,
+        window['x_max'],
+        window['y_min'] - settings.NOTE_CARD_HEIGHT,
+        window['y_max'],
+    )
+
+
+def _merge_pending_positions(user, notes, window_notes: list,
+                             bounds: tuple) -> list:
+    """
+    Applies the user's unflushed write-behind positions to a window.
+    Notes of the window whose pending position is outside the bounds are
+    dropped, and notes whose pending position moved them into the bounds are
+    loaded with one extra query, only when there are any.
+
+    Args:
+        user (User): The owner of the notes.
+        notes (QuerySet): The user's notes as dictionaries of window fields.
+        window_notes (list): The notes found in the window by the database.
+        bounds (tuple): The position bounds as returned by _window_bounds.
+
+    Returns:
+        list: The window's notes with their most recent positions.
+    """
+
+    pending = get_position_buffer().pending(user.pk)
+    if not pending:
+        return window_notes
+
+    def inside(x, y):
+        return bounds[0] <= x <= bounds[1] and bounds[2] <= y <= bounds[3]
+
+    seen = {note['id'] for note in window_notes}
+    moved_in = [
+        note_id for note_id, (x, y) in pending.items()
+        if note_id not in seen and inside(x, y)
+    ]
+    if moved_in:
+        window_notes += list(notes.filter(pk__in=moved_in))
+    merged = []
+    for note in window_notes:
+        if note['id'] in pending:
+            note['x_position'], note['y_position'] = pending[note['id']]
+        if inside(note['x_position'], note['y_position']):
+            merged.append(note)
+    return merged
+
+
+def _board_json(user, window: dict, token: int) -> str:
+    """
+    Returns the JSON payload of a board window from the board cache.
+    On a miss the window is queried and encoded once; on a hit neither the
+    database nor the encoder is touched. The JSON is escaped so it can be
+    served as-is by note_window and embedded in a <script> tag by note_list.
+
+    Args:
+        user (User): The owner of the notes.
+        window (dict): A validated rectangle as returned by _parse_window.
+        token (int): The board's sync token, as read by board_state; a
+            cached payload keeps the token it was built with.
+
+    Returns:
+        str: The window payload built by _notes_in_window, encoded as JSON.
+    """
+
+    def build():
+        return _encode_window(_notes_in_window(user, window, token))
+
+    return board_cache.get_or_build(user.pk, _window_name(window), build)
+
+
+def _window_name(window: dict) -> str:
+    """
+    Returns the board cache name of a window's fragment.
+    """
+
+    return 'window:{x_min}:{x_max}:{y_min}:{y_max}:{zoom}'.format(**window)
+
+
+def _encode_window(payload: dict) -> str:
+    """
+    Encodes a window payload as compact JSON (no whitespace between
+    tokens) that is safe to embed in a <script> tag.
+    """
+
+    return json.dumps(
+        payload, cls=DjangoJSONEncoder, separators=(',', ':')).translate(
+        JSON_SCRIPT_ESCAPES)
+
+
+def _initial_window() -> dict:
+    """
+    Returns the viewport rectangle embedded in the board page.
+    """
+
+    return {
+        'x_min': 0,
+        'x_max': settings.NOTE_WINDOW_INITIAL_WIDTH,
+        'y_min': 0,
+        'y_max': settings.NOTE_WINDOW_INITIAL_HEIGHT,
+        'zoom': 1.0,
+    }
 
 
 @login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@board_page_condition
 def note_list(request: HttpRequest) -> HttpResponse:
     """
-    Displays a list of notes from an authenticated user.
-    Retrieves notes from the database filtered by the current user and renders
-    them in a template. Requires user authentication via the login_required
-    decorator to ensure only the user's own notes are shown.
+    Displays the board shell for an authenticated user's notes.
+    Renders the board with only the notes inside the initial viewport
+    embedded as JSON, served from the per-user board cache; the client
+    builds the cards from it and fetches further windows from the
+    note_window view as the user pans. Requires user authentication via the
+    login_required decorator to ensure only the user's own notes are shown.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user.
+
+    Returns:
+        HttpResponse: A rendered HTML response displaying the board shell and
+            the notes of the initial viewport, or 304 Not Modified.
+    """
+
+    window = _initial_window()
+    return render(request, 'sticky_notes_app/note_list.html', {
+        'window': window,
+        'board_json': _board_json(
+            request.user, window, board_state(request)['token']),
+    })
+
+
+@login_required
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@board_condition
+def note_window(request: HttpRequest) -> HttpResponse:
+    """
+    Returns the authenticated user's notes inside a board viewport as JSON.
+    Expects GET parameters 'x_min', 'x_max', 'y_min' and 'y_max' (board
+    pixels) and an optional 'zoom'. Used by the board to load notes as the
+    user pans, so the size of each response is bounded by the viewport rather
+    than by the number of notes the user owns. Windows are served from the
+    per-user board cache. Supports conditional GET with the same board
+    validators as note_list.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the viewport parameters.
+
+    Returns:
+        HttpResponse: The JSON window payload built by _notes_in_window,
+            or a JsonResponse with {'status': 'error'} with status 400 for
+            a missing or invalid viewport, or 304 Not Modified.
+    """
+
+    try:
+        window = _parse_window(request.GET)
+    except ValueError as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=400)
+    board_json = _board_json(
+        request.user, window, board_state(request)['token'])
+    return HttpResponse(board_json, content_type='application/json')
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@note_condition
+def note_content(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    Returns the full content of one of the authenticated user's notes as
+    JSON. Board cards only carry the note's preview, so the board fetches
+    the content when a card is expanded; only the requested note's body is
+    read. Supports conditional requests with the note's ETag and
+    Last-Modified, so an unchanged note is not sent again.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata,
             including the authenticated user.
+        pk (int): The primary key (ID) of the note.
 
     Returns:
-        HttpResponse: A rendered HTML response displaying the user's notes in
-            the template that displays the list of notes.
+        JsonResponse: The note's 'id' and 'content', or {'status': 'error'}
+            with status 404 if the note is missing or not owned.
     """
 
-    notes = Note.objects.filter(user=request.user)
-    return render(request, 'sticky_notes_app/note_list.html', {'notes': notes})
+    note = Note.objects.filter(pk=pk, user=request.user).values(
+        'id', 'content').first()
+    if note is None:
+        return JsonResponse(
+            {'status': 'error', 'message': 'No Note matches the given query.'},
+            status=404)
+    return JsonResponse(note)
 
 
 @login_required
@@ -54,7 +403,7 @@ def note_create(request: HttpRequest) -> HttpResponse:
         if form.is_valid():
             note = form.save(commit=False)
             note.user = request.user
-            note.save()
+            run_write(note.save)
             return redirect('note_list')
     else:
         form = NoteForm()
@@ -88,7 +437,7 @@ def note_update(request: HttpRequest, pk: int) -> HttpResponse:
     if request.method == 'POST':
         form = NoteForm(request.POST, instance=note)
         if form.is_valid():
-            form.save()
+            run_write(form.save)
             return redirect('note_list')
     else:
         form = NoteForm(instance=note)
@@ -118,7 +467,7 @@ def note_delete(request: HttpRequest, pk: int) -> HttpResponse:
 
     note = get_object_or_404(Note, pk=pk, user=request.user)
     if request.method == 'POST':
-        note.delete()
+        run_write(note.delete)
         return redirect('note_list')
     return render(
         request, 'sticky_notes_app/note_confirm_delete.html', {'note': note})
@@ -127,33 +476,282 @@ def note_delete(request: HttpRequest, pk: int) -> HttpResponse:
 @login_required
 def update_position(request: HttpRequest) -> JsonResponse:
     """
-    Updates the position of a sticky note for the authenticated user via POST
-    request. Expects a POST request with note ID and new x, y coordinates.
-    Retrieves the note by ID, ensures it belongs to the current user, updates
-    its position, and saves the changes. Returns a JSON response indicating
-    success or error. Designed for AJAX usage and requires user authentication.
+    Updates the position of one or more sticky notes for the authenticated
+    user via POST request. Expects either a note ID with new x, y coordinates,
+    or a batch of positions in a 'positions' field (JSON-encoded list of
+    {'note_id', 'x', 'y'} objects) or in a JSON request body
+    ({'positions': [...]}). Single updates validate the coordinates as
+    integers and move the note with one UPDATE scoped to the current user,
+    without loading the note; batches are ownership-checked and written
+    together with a fixed number of queries. With POSITION_WRITE_BEHIND
+    enabled, positions are ownership-checked and buffered instead, and the
+    flush_positions command writes them later; with WRITE_QUEUE_ENABLED,
+    writes are grouped with other requests' by the single-writer queue.
+    Returns a JSON response indicating success or error. Designed for AJAX
+    usage and requires user authentication.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata,
-            including the authenticated user and POST data with 'note_id', 'x',
-            and 'y' keys.
+            including the authenticated user and POST data with either
+            'note_id', 'x', and 'y' keys or a 'positions' batch.
 
     Returns:
         JsonResponse: A JSON response with {'status': 'success'} on successful
-            POST update, or {'status': 'error'} with status 400 for non-POST
-            requests.
+            POST update ('updated' holds the count for batches), or
+            {'status': 'error'} with status 400 for non-POST requests,
+            non-integer values and malformed batches. Raises Http404 if a
+            note is missing or not owned by the user.
     """
 
-    if request.method == 'POST':
-        note_id = request.POST.get('note_id')
-        x = request.POST.get('x')
-        y = request.POST.get('y')
-        note = get_object_or_404(Note, pk=note_id, user=request.user)
-        note.x_position = x
-        note.y_position = y
-        note.save()
-        return JsonResponse({'status': 'success'})
-    return JsonResponse({'status': 'error'}, status=400)
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error'}, status=400)
+    batch = _position_batch(request)
+    try:
+        if batch is not None:
+            positions = parse_position_batch(batch)
+        else:
+            note_id, x, y = parse_position(request.POST)
+            positions = {note_id: (x, y)}
+    except ValueError as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=400)
+    try:
+        updated = save_positions(request.user, positions)
+    except Note.DoesNotExist:
+        raise Http404('No Note matches the given query.')
+    if batch is not None:
+        return JsonResponse({'status': 'success', 'updated': updated})
+    return JsonResponse({'status': 'success'})
+
+
+def _position_batch(request: HttpRequest):
+    """
+    Extracts the raw batch of positions from an update_position request.
+
+    Args:
+        request (HttpRequest): A POST request to update_position.
+
+    Returns:
+        list | str | None: The batch from a JSON body (either the body itself
+            or its 'positions' key), the JSON string of a 'positions' form
+            field, or None for a single-note update. A JSON body that cannot
+            be decoded is returned as an empty string so that parsing reports
+            it as invalid.
+    """
+
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return ''
+        if isinstance(payload, dict):
+            return payload.get('positions', [])
+        return payload
+    return request.POST.get('positions')
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+def note_sync(request: HttpRequest) -> JsonResponse:
+    """
+    Returns the changes to the authenticated user's board since a change
+    token as JSON. Expects a GET parameter 'since', the token of the board
+    payload or sync response the client last applied ('0' for the whole
+    board). Used by the board to catch up after missing live events, so
+    the cost of a reconnect depends on the number of changes rather than
+    on the size of the board. Reads from the primary, so tokens never go
+    back in time.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the change token.
+
+    Returns:
+        JsonResponse: The changed 'notes', the 'deleted' note IDs, the next
+            'token' and whether 'more' changes remain, as built by
+            changes_since, or {'status': 'error'} with status 400 for an
+            invalid token, 410 for a token that can no longer be answered
+            (the client must reload the board) or 501 on a database without
+            change sequences.
+    """
+
+    if not sync_supported():
+        return JsonResponse(
+            {'status': 'error', 'message': 'Sync is not available.'},
+            status=501)
+    try:
+        since = parse_token(request.GET.get('since', ''))
+        changes = changes_since(request.user, since, WINDOW_FIELDS)
+    except ValueError as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=400)
+    except StaleToken as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=410)
+    return JsonResponse(
+        changes, json_dumps_params={'separators': (',', ':')})
+
+
+@login_required
+@read_from_replica
+def note_search(request: HttpRequest) -> JsonResponse:
+    """
+    Searches the authenticated user's notes by title and content.
+    Expects the query in the 'q' GET parameter. Results are ranked by the
+    FTS5 index on SQLite (falling back to plain lookups elsewhere) and
+    carry HTML-escaped title and content snippets with matches wrapped in
+    <mark> tags, plus the note's position so the board can pan to it.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the 'q' parameter.
+
+    Returns:
+        JsonResponse: {'results': [...]} with the best matches first.
+    """
+
+    results = search_notes(request.user, request.GET.get('q', ''))
+    return JsonResponse({'results': results})
+
+
+@login_required
+def note_events(request: HttpRequest) -> HttpResponse:
+    """
+    Streams live changes to the authenticated user's board as Server-Sent
+    Events.
+    Pushes a 'create', 'update', 'move' or 'delete' event whenever one of
+    the user's notes changes, from any tab or device, so open boards apply
+    small deltas instead of reloading. A reconnecting EventSource sends the
+    Last-Event-ID header and resumes after that event; if the events since
+    then are no longer available a single 'reset' event tells the client to
+    reload its windows. The stream ends after EVENT_STREAM_DURATION seconds
+    and the browser reconnects.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the Last-Event-ID header.
+
+    Returns:
+        HttpResponse: A text/event-stream StreamingHttpResponse, or a
+            JsonResponse with {'status': 'error'} with status 400 for an
+            invalid event ID.
+    """
+
+    try:
+        last_id = parse_last_event_id(request)
+    except ValueError:
+        return JsonResponse(
+            {'status': 'error', 'message': 'Invalid last event ID.'},
+            status=400)
+    response = StreamingHttpResponse(
+        iter_event_stream(request.user.pk, last_id),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stops proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@read_from_replica
+def note_export(request: HttpRequest) -> HttpResponse:
+    """
+    Streams a backup of the authenticated user's notes as a download.
+    The 'format' GET parameter selects NDJSON (default) or CSV. Notes are
+    read in keyset chunks and encoded as they are sent, so memory use stays
+    constant whatever the size of the board. Like the board and search
+    views, it reads from a replica when DATABASE_REPLICAS is set.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the optional 'format'.
+
+    Returns:
+        HttpResponse: A StreamingHttpResponse with the exported notes, or
+            {'status': 'error'} with status 400 for an unsupported format.
+    """
+
+    export_format = request.GET.get('format', 'ndjson')
+    try:
+        lines = export_notes(request.user, export_format)
+    except ValueError as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=400)
+    response = StreamingHttpResponse(
+        lines, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="notes.{export_format}"')
+    return response
+
+
+@login_required
+def note_import(request: HttpRequest) -> JsonResponse:
+    """
+    Imports notes for the authenticated user from an uploaded file.
+    Expects a POST request with the file in 'file' and an optional 'format'
+    ('ndjson' or 'csv', otherwise taken from the file extension). The upload
+    is parsed incrementally, each row is validated with the same rules as
+    NoteForm and valid rows are inserted in batches with bulk_create, so
+    memory stays bounded for imports of any size.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata,
+            including the authenticated user and the uploaded file.
+
+    Returns:
+        JsonResponse: {'status': 'success'} with the import report (counts
+            and per-row errors) from import_notes, or {'status': 'error'}
+            with status 400 for non-POST requests, a missing file, an
+            unsupported format or an unreadable file (batches inserted
+            before the unreadable part are kept).
+    """
+
+    upload = request.FILES.get('file')
+    if request.method != 'POST' or upload is None:
+        return JsonResponse(
+            {'status': 'error', 'message': 'A file upload is required.'},
+            status=400)
+    import_format = request.POST.get(
+        'format', upload.name.rpartition('.')[2].lower())
+    try:
+        records = iter_records(upload, import_format)
+    except ValueError as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': str(exc)}, status=400)
+    try:
+        report = import_notes(request.user, records)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        return JsonResponse(
+            {'status': 'error', 'message': f'Unreadable file: {exc}'},
+            status=400)
+    return JsonResponse({'status': 'success', **report})
+
+
+def _auth_unavailable(request: HttpRequest, template: str, form, wait: float,
+                      status: int) -> HttpResponse:
+    """
+    Renders a login or signup form again without processing it, for a
+    client that is being throttled (429) or while the password hashing pool
+    is full (503), with a Retry-After header.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        template (str): The form's template.
+        form (Form): An unbound form to render, since rendering a bound one
+            would validate it and so hash its password.
+        wait (float): Seconds the client should wait before retrying.
+        status (int): The response status, 429 or 503.
+
+    Returns:
+        HttpResponse: The rendered form.
+    """
+
+    messages.error(request, 'Too many attempts; please try again shortly.'
+                   if status == 429 else
+                   'The server is busy; please try again shortly.')
+    response = render(request, template, {'form': form}, status=status)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
 
 
 def signup(request: HttpRequest) -> HttpResponse:
@@ -163,7 +761,8 @@ def signup(request: HttpRequest) -> HttpResponse:
     POST requests, validates the form, creates a new user, logs them in, adds a
     success message, and redirects to the note list. If the form is invalid,
     displays it again with errors. Requires no authentication, intended for new
-    users.
+    users. Signups are throttled per client IP (429 with Retry-After), and the
+    password is hashed on the hashing pool, whose saturation gives a 503.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata,
@@ -176,16 +775,31 @@ def signup(request: HttpRequest) -> HttpResponse:
             'note_list' URL on successful POST registration.
     """
 
+    template = 'registration/signup.html'
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
+        # Shown instead of the submitted form, whose validation hashes
+        retry_form = UserRegistrationForm(initial={
+            'username': request.POST.get('username', ''),
+            'email': request.POST.get('email', '')})
+        wait = throttle_auth(request, 'signup')
+        if wait:
+            return _auth_unavailable(request, template, retry_form, wait, 429)
         if form.is_valid():
-            user = form.save()
-            login(request, user)
+            try:
+                # Only hashes the password; the user is saved below
+                user = run_hashing(form.save, commit=False)
+            except HashingBusy:
+                return _auth_unavailable(
+                    request, template, retry_form, 5, 503)
+            user.save()
+            form.save_m2m()
+            login(request, user, settings.AUTHENTICATION_BACKENDS[0])
             messages.success(request, f'Account created for {user.username}!')
             return redirect('note_list')
     else:
         form = UserRegistrationForm()
-    return render(request, 'registration/signup.html', {'form': form})
+    return render(request, template, {'form': form})
 
 
 def login_view(request: HttpRequest) -> HttpResponse:
@@ -195,7 +809,9 @@ def login_view(request: HttpRequest) -> HttpResponse:
     requests, validates credentials, logs the user in, adds a success message,
     and redirects to the note list on success. If invalid, adds an error
     message and displays again the form. Requires no authentication, intended
-    for user login.
+    for user login. Attempts are throttled per client IP and per username (429
+    with Retry-After), and the password is checked on the hashing pool, whose
+    saturation gives a 503.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata,
@@ -208,9 +824,20 @@ def login_view(request: HttpRequest) -> HttpResponse:
             'note_list' URL on successful POST login.
     """
 
+    template = 'registration/login.html'
     if request.method == 'POST':
         form = AuthenticationForm(request, data=request.POST)
-        if form.is_valid():
+        username = request.POST.get('username', '')
+        # Shown instead of the submitted form, whose validation hashes
+        retry_form = AuthenticationForm(initial={'username': username})
+        wait = throttle_auth(request, 'login', username)
+        if wait:
+            return _auth_unavailable(request, template, retry_form, wait, 429)
+        try:
+            valid = form.is_valid()
+        except HashingBusy:
+            return _auth_unavailable(request, template, retry_form, 5, 503)
+        if valid:
             user = form.get_user()
             login(request, user)
             messages.info(request, f'You are now logged in as {user.username}')
@@ -219,7 +846,7 @@ def login_view(request: HttpRequest) -> HttpResponse:
             messages.error(request, 'Invalid username or password.')
     else:
         form = AuthenticationForm()
-    return render(request, 'registration/login.html', {'form': form})
+    return render(request, template, {'form': form})
 
 
 def logout_view(request: HttpRequest) -> HttpResponse:
@@ -242,3 +869,51 @@ def logout_view(request: HttpRequest) -> HttpResponse:
     logout(request)
     messages.info(request, 'You have successfully logged out.')
     return redirect('login')
+
+
+def request_stats(request: HttpRequest) -> JsonResponse:
+    """
+    Shows the per-view request measurements of this process, for
+    development. For each view name, lists the number of requests, the mean
+    and max queries, the mean database and total times in milliseconds,
+    the max time and the view's query budget. Only served when DEBUG is on.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: {'views': {view name: measurements}}.
+
+    Raises:
+        Http404: When DEBUG is off.
+    """
+
+    if not settings.DEBUG:
+        raise Http404('Request stats are only shown in development.')
+    return JsonResponse({'views': stats_summary()})
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Serves the app's metrics in the Prometheus text format: request counts
+    by view, method and status, request and database time histograms by
+    view, query counts, saved positions and board cache lookups with their
+    hit ratio, added up over every worker process. Only served to
+    METRICS_ALLOWED_IPS, and while METRICS_ENABLED is on.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The metrics exposition.
+
+    Raises:
+        Http404: When metrics are disabled or the client is not allowed.
+    """
+
+    if (not settings.METRICS_ENABLED
+            or request.META.get('REMOTE_ADDR')
+            not in settings.METRICS_ALLOWED_IPS):
+        raise Http404('Metrics are not served to this address.')
+    return HttpResponse(
+        metrics_store.render(), content_type=metrics_store.CONTENT_TYPE)
@@ -0,0 +1,378 @@
+import asyncio
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS, OperationalError, connections, transaction)
+
+from .shards import note_database
+
+# Queued in place of an operation to stop the writer thread.
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Serializes database writes through a single writer thread.
+    SQLite lets one connection write at a time, so request threads that
+    write concurrently mostly wait on each other's locks. With the queue,
+    request threads submit their writes and wait on a Future while one
+    thread runs them. Whatever has queued up while the previous batch was
+    being written (at most max_batch operations) is committed in a single
+    transaction, each operation in its own savepoint so one failure does
+    not affect the others. Consecutive grouped operations with the same
+    handler, such as position updates, are handed to the handler together
+    so it can write them with one statement. Operations run in a copy of
+    the submitting thread's context, so context variables such as the
+    current shard carry over to the writer thread.
+
+    Attributes:
+        using (str): The alias of the database written to.
+        max_batch (int): The most operations committed in one transaction.
+
+    Methods:
+        submit: Queues a callable to run in the writer thread.
+        submit_grouped: Queues an item for a group handler.
+        stop: Stops the writer thread once the queue is drained.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS, max_batch: int = None):
+        """
+        Initializes an empty queue; the writer thread starts with the first
+        operation.
+
+        Args:
+            using (str): The alias of the database written to.
+            max_batch (int): The most operations committed in one
+                transaction; defaults to WRITE_QUEUE_MAX_BATCH.
+        """
+
+        self.using = using
+        self.max_batch = max_batch or settings.WRITE_QUEUE_MAX_BATCH
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """
+        Queues a callable to run in the writer thread.
+
+        Args:
+            func (callable): The write operation.
+            *args: Positional arguments for func.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            Future: Resolves to func's return value, or raises its exception,
+                once the transaction it ran in has committed. Cancelling it
+                before the writer thread takes it skips the operation.
+        """
+
+        return self._put(None, (func, args, kwargs))
+
+    def submit_grouped(self, handler, item) -> Future:
+        """
+        Queues an item for a group handler. Consecutive items queued for the
+        same handler are passed to one call of handler(items), which must
+        return one result per item; a result that is an exception is raised
+        by that item's Future instead.
+
+        Args:
+            handler (callable): Writes a list of items.
+            item: The item to write.
+
+        Returns:
+            Future: Resolves to the item's result once committed.
+        """
+
+        return self._put(handler, item)
+
+    def is_writer_thread(self) -> bool:
+        """
+        Tells whether the current thread is the writer thread.
+        """
+
+        return threading.current_thread() is self._thread
+
+    def stop(self) -> None:
+        """
+        Stops the writer thread once the operations already queued are
+        written.
+        """
+
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join()
+
+    def _put(self, handler, item) -> Future:
+        """
+        Queues an operation, starting the writer thread if needed.
+        """
+
+        future = Future()
+        context = contextvars.copy_context()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f'note-writer-{self.using}',
+                    daemon=True)
+                self._thread.start()
+            self._queue.put((handler, item, future, context))
+        return future
+
+    def _run(self) -> None:
+        """
+        Writes queued operations in batches until stopped.
+        """
+
+        connection = connections[self.using]
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not _STOP and len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping = batch[-1] is _STOP
+                if stopping:
+                    batch.pop()
+                # Operations whose caller gave up waiting are skipped
+                batch = [
+                    operation for operation in batch
+                    if operation[2].set_running_or_notify_cancel()
+                ]
+                if batch:
+                    connection.close_if_unusable_or_obsolete()
+                    self._write(batch)
+                if stopping:
+                    return
+        finally:
+            connection.close()
+
+    def _write(self, batch: list) -> None:
+        """
+        Writes a batch of operations in one transaction and resolves their
+        futures once it has committed.
+        """
+
+        outcomes = []
+        try:
+            with transaction.atomic(using=self.using):
+                start = 0
+                while start < len(batch):
+                    handler = batch[start][0]
+                    end = start + 1
+                    if handler is not None:
+                        while end < len(batch) and batch[end][0] is handler:
+                            end += 1
+                    outcomes += self._write_group(batch[start:end])
+                    start = end
+        except Exception as exc:
+            # The commit failed, so nothing in the batch was written
+            outcomes = [(future, exc) for _, _, future, _ in batch]
+        for future, outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def _write_group(self, group: list) -> list:
+        """
+        Runs a single operation, or a group of items through their handler,
+        in a savepoint.
+
+        Returns:
+            list: (future, result or exception) pairs.
+        """
+
+        futures = [future for _, _, future, _ in group]
+        handler, context = group[0][0], group[0][3]
+        try:
+            with transaction.atomic(using=self.using):
+                if handler is None:
+                    func, args, kwargs = group[0][1]
+                    results = [context.run(func, *args, **kwargs)]
+                else:
+                    results = context.run(
+                        handler, [item for _, item, _, _ in group])
+        except Exception as exc:
+            return [(future, exc) for future in futures]
+        return list(zip(futures, results))
+
+
+# The process-wide write queues, by database alias.
+_write_queues = {}
+_write_queues_lock = threading.Lock()
+
+
+def get_write_queue(using: str = DEFAULT_DB_ALIAS) -> WriteQueue:
+    """
+    Returns the process-wide write queue of a database, so each database
+    (such as each note shard) has a single writer.
+
+    Args:
+        using (str): The alias of the database.
+
+    Returns:
+        WriteQueue: The queue used by the views when WRITE_QUEUE_ENABLED is
+            on.
+    """
+
+    with _write_queues_lock:
+        if using not in _write_queues:
+            _write_queues[using] = WriteQueue(using)
+        return _write_queues[using]
+
+
+def _queue_for_caller():
+    """
+    Returns the write queue of the database notes are written to if the
+    caller's write should go through it, or None to write directly: when
+    the queue is disabled, when called from the writer thread itself, or
+    when the caller is inside a transaction (whose locks the writer thread
+    would wait on forever).
+    """
+
+    if not settings.WRITE_QUEUE_ENABLED:
+        return None
+    write_queue = get_write_queue(note_database())
+    if (write_queue.is_writer_thread()
+            or connections[write_queue.using].in_atomic_block):
+        return None
+    return write_queue
+
+
+def _queue_timeout() -> OperationalError:
+    """
+    Returns the error raised for a queued write that was not started within
+    WRITE_QUEUE_TIMEOUT seconds: the one a direct write raises when SQLite
+    gives up waiting for the database lock.
+    """
+
+    return OperationalError('database is locked')
+
+
+def _result(future: Future):
+    """
+    Waits for a queued write's result. If the writer thread has not taken
+    the write within WRITE_QUEUE_TIMEOUT seconds, it is cancelled and
+    _queue_timeout() is raised, so it is never written after the caller
+    gave up; a write already running is waited for until it finishes.
+    """
+
+    try:
+        return future.result(settings.WRITE_QUEUE_TIMEOUT)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise _queue_timeout() from None
+        return future.result()
+
+
+def run_write(func, *args, **kwargs):
+    """
+    Runs a write operation through the write queue when WRITE_QUEUE_ENABLED
+    is on, or directly otherwise, with the same result or exception either
+    way, including when the database stays locked (see _result).
+
+    Args:
+        func (callable): The write operation.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        The return value of func.
+    """
+
+    write_queue = _queue_for_caller()
+    if write_queue is None:
+        return func(*args, **kwargs)
+    return _result(write_queue.submit(func, *args, **kwargs))
+
+
+def run_grouped(handler, item):
+    """
+    Writes an item with a group handler through the write queue when
+    WRITE_QUEUE_ENABLED is on, or directly as a group of one otherwise.
+
+    Args:
+        handler (callable): Writes a list of items, returning one result or
+            exception per item.
+        item: The item to write.
+
+    Returns:
+        The item's result.
+    """
+
+    write_queue = _queue_for_caller()
+    if write_queue is None:
+        with transaction.atomic(using=note_database()):
+            [result] = handler([item])
+        if isinstance(result, BaseException):
+            raise result
+        return result
+    return _result(write_queue.submit_grouped(handler, item))
+
+
+async def _aresult(future: Future):
+    """
+    Async version of _result: the event loop awaits the writer thread's
+    Future without blocking a thread, with the same timeout handling.
+    """
+
+    try:
+        # Shielded, so the timeout does not cancel a write already running
+        return await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(future)),
+            settings.WRITE_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        if future.cancel():
+            raise _queue_timeout() from None
+        return await asyncio.wrap_future(future)
+
+
+async def arun_write(func, *args, **kwargs):
+    """
+    Async version of run_write. With WRITE_QUEUE_ENABLED, the write queue's
+    Future is awaited; otherwise func runs in a worker thread, since the
+    model methods it calls use the sync ORM.
+
+    Args:
+        func (callable): The write operation.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        The return value of func.
+    """
+
+    if not settings.WRITE_QUEUE_ENABLED:
+        return await sync_to_async(func)(*args, **kwargs)
+    return await _aresult(
+        get_write_queue(note_database()).submit(func, *args, **kwargs))
+
+
+async def arun_grouped(handler, item):
+    """
+    Async version of run_grouped for when WRITE_QUEUE_ENABLED is on; the
+    event loop awaits the writer thread's Future without blocking a thread,
+    with the same timeout handling as _result.
+
+    Args:
+        handler (callable): Writes a list of items.
+        item: The item to write.
+
+    Returns:
+        The item's result.
+    """
+
+    return await _aresult(
+        get_write_queue(note_database()).submit_grouped(handler, item))